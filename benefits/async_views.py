@@ -0,0 +1,139 @@
+"""
+An async counterpart of DRF's APIView, for the AllowAny proxy endpoints whose time is
+spent waiting on another service (Google Places, Rewiring America, mfb-ai-service).
+
+DRF only dispatches synchronously, so each of those requests held a worker for the whole
+upstream call. AsyncAPIView handlers are coroutines that await the upstream through
+http_client(), so under the ASGI entry point (benefits/asgi.py) one process keeps many
+of them in flight. It keeps the parts of APIView these endpoints use: throttle_classes,
+a parsed JSON `request.data`, exceptions turned into responses by the EXCEPTION_HANDLER
+setting, and DRF Response objects, rendered as JSON. There is no authentication or
+permission check, so it is only for AllowAny endpoints.
+"""
+
+import asyncio
+import json
+import ssl
+import weakref
+from contextvars import ContextVar
+from functools import cache
+from typing import Optional
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import MethodNotAllowed, ParseError, Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# event loop -> the AsyncClient requests on it share
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+# The AsyncClient of a request dispatched under WSGI, closed when the request is done
+_request_client: ContextVar[Optional[httpx.AsyncClient]] = ContextVar("request_client", default=None)
+
+
+@cache
+def _ssl_context() -> ssl.SSLContext:
+    # Loading the CA bundle takes most of the time it takes to open a client, so the
+    # clients share one context.
+    return httpx.create_ssl_context()
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(verify=_ssl_context())
+
+
+def http_client() -> httpx.AsyncClient:
+    """A pooled AsyncClient for the running event loop.
+
+    An AsyncClient's connections belong to the loop that opened them. The ASGI server
+    runs one loop per process, so every request shares one pool. Under WSGI each request
+    runs on a loop of its own, so AsyncAPIView.dispatch opens a client for the request
+    and closes it before the loop goes away.
+    """
+    client = _request_client.get()
+    if client is not None:
+        return client
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = _new_client()
+    return client
+
+
+class AsyncAPIView(View):
+    throttle_classes = []
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Like APIView: no session authentication, so no CSRF check.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponseBase:
+        if isinstance(request, ASGIRequest):
+            response = await self.handle(request, *args, **kwargs)
+        else:
+            async with _new_client() as client:
+                token = _request_client.set(client)
+                try:
+                    response = await self.handle(request, *args, **kwargs)
+                finally:
+                    _request_client.reset(token)
+        return self.finalize_response(response)
+
+    async def handle(self, request: HttpRequest, *args, **kwargs) -> HttpResponseBase:
+        try:
+            method = request.method.lower()
+            handler = getattr(self, method, None) if method in self.http_method_names else None
+            if handler is None:
+                raise MethodNotAllowed(request.method)
+            await self.check_throttles(request)
+            request.data = self.parse_data(request)
+            return await handler(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    def handle_exception(self, exc: Exception) -> Response:
+        """The EXCEPTION_HANDLER's response for `exc`, like APIView.handle_exception.
+
+        Anything the handler doesn't turn into a response is raised again, so Django
+        returns a 500 and reports it.
+        """
+        context = {"view": self, "args": self.args, "kwargs": self.kwargs, "request": self.request}
+        response = api_settings.EXCEPTION_HANDLER(exc, context)
+        if response is None:
+            raise exc
+        response.exception = True
+        return response
+
+    async def check_throttles(self, request: HttpRequest):
+        """Raise Throttled if any throttle refuses the request, like APIView.check_throttles."""
+        waits = []
+        for throttle in [throttle() for throttle in self.throttle_classes]:
+            # Throttle history lives in the cache, which is synchronous.
+            if not await sync_to_async(throttle.allow_request)(request, self):
+                waits.append(throttle.wait())
+        if waits:
+            raise Throttled(max([wait for wait in waits if wait is not None], default=None))
+
+    def parse_data(self, request: HttpRequest):
+        """The request body: parsed JSON, or the form fields for anything else."""
+        if request.content_type == "application/json":
+            try:
+                return json.loads(request.body) if request.body else {}
+            except ValueError as e:
+                raise ParseError(f"JSON parse error - {e}")
+        return request.POST
+
+    def finalize_response(self, response: HttpResponseBase) -> HttpResponseBase:
+        if isinstance(response, Response):
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+            response.renderer_context = {"view": self, "request": self.request, "response": response}
+            response.render()
+        return response
@@ -0,0 +1,36 @@
+"""
+WhiteNoise's middleware, made async-capable.
+
+Django runs a sync-only middleware under ASGI by handing the request, and the rest of
+the stack below it, to the one thread it keeps for thread-sensitive code. WhiteNoise
+6.2 is sync-only and sits near the top of MIDDLEWARE, so every request would queue for
+that thread and the async views (benefits/async_views.py) would be served one at a time.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Without autorefresh (DEBUG) a static file is found with a dict lookup, so
+        # only finding one with autorefresh, and serving one, need a thread.
+        if self.autorefresh or request.path_info in self.files:
+            response = await sync_to_async(self.process_request)(request)
+            if response is not None:
+                return response
+        return await self.get_response(request)
@@ -96,9 +96,14 @@ REST_FRAMEWORK = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+# Let the frontend read the validators it needs for conditional and ?since= requests.
+CORS_EXPOSE_HEADERS = ["ETag", "X-Translations-Version"]
 
 # Contact Management
 CONTACT_SERVICE = os.getenv("CONTACT_SERVICE", "hubspot")
+# The custom HubSpot contact properties email_new_benefits fills in, as named in the HubSpot portal.
+HUBSPOT_NEW_BENEFITS_COUNT_PROPERTY = os.getenv("HUBSPOT_NEW_BENEFITS_COUNT_PROPERTY")
+HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY = os.getenv("HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY")
 BREVO_API_KEY = os.getenv("BREVO_API_KEY")
 FRONTEND_DOMAIN = config("FRONTEND_DOMAIN", default="http://localhost:3000")
 EMAIL_FROM = os.getenv("EMAIL_FROM")
@@ -147,7 +152,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "benefits.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -321,7 +326,9 @@ if config("SENTRY_DSN", None) is not None:
         environment="dev" if DEBUG else "production",
     )
 
-django_heroku.settings(locals())
+# The static files settings are above. django_heroku's would put the sync-only
+# WhiteNoiseMiddleware back at the top of MIDDLEWARE (see benefits/middleware.py).
+django_heroku.settings(locals(), staticfiles=False)
 
 # Cache Configuration
 # Uses Redis in production (REDIS_URL is set automatically by the Heroku Redis add-on).
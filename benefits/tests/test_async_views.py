@@ -0,0 +1,109 @@
+"""Tests for AsyncAPIView. The concurrency it buys the proxy endpoints is measured by the
+load tests in test_async_views_load.py.
+"""
+
+from unittest.mock import patch
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from benefits.async_views import AsyncAPIView, http_client
+from benefits.tests.cache_override import LOCAL_CACHE
+
+PLACES_URL = "/api/places/autocomplete/"
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class TestAsyncAPIView(TestCase):
+    def setUp(self):
+        patcher = patch("screener.views.PlacesRateThrottle.allow_request", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        async def google(request):
+            return httpx.Response(200, json={"predictions": [], "status": "ZERO_RESULTS"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(google))
+        patcher = patch("integrations.clients.google_places.http_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unsupported_method_returns_405(self):
+        response = self.client.post(PLACES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_throttled_request_returns_429_with_retry_after(self):
+        with patch("screener.views.PlacesRateThrottle.allow_request", return_value=False), patch(
+            "screener.views.PlacesRateThrottle.wait", return_value=30
+        ):
+            response = self.client.get(PLACES_URL, {"input": "123 Main"})
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertIn("detail", response.data)
+
+    def test_malformed_json_body_returns_400(self):
+        url = "/api/screens/00000000-0000-0000-0000-000000000000/assistant/conversations/"
+        with patch("screener.assistant.AssistantStartRateThrottle.allow_request", return_value=True):
+            response = self.client.post(url, "{not json", content_type="application/json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ClientView(AsyncAPIView):
+    """Returns the client http_client() gave it, in the response's `client`."""
+
+    async def get(self, request):
+        response = Response({})
+        response.client = http_client()
+        return response
+
+
+class RaisingView(AsyncAPIView):
+    async def get(self, request):
+        raise request.exc
+
+
+class TestAsyncAPIViewDispatch(TestCase):
+    def test_wsgi_requests_get_a_client_of_their_own_closed_after(self):
+        view = ClientView.as_view()
+
+        first = async_to_sync(view)(RequestFactory().get("/"))
+        second = async_to_sync(view)(RequestFactory().get("/"))
+
+        self.assertIsNot(first.client, second.client)
+        self.assertTrue(first.client.is_closed)
+        self.assertTrue(second.client.is_closed)
+
+    async def test_asgi_requests_share_the_loop_client(self):
+        view = ClientView.as_view()
+
+        first = await view(AsyncRequestFactory().get("/"))
+        second = await view(AsyncRequestFactory().get("/"))
+
+        self.assertIs(first.client, second.client)
+        self.assertFalse(first.client.is_closed)
+        await first.client.aclose()
+
+    def test_exceptions_go_through_the_exception_handler(self):
+        request = RequestFactory().get("/")
+        request.exc = ValidationError({"input": ["This field is required."]})
+
+        with patch("benefits.views.capture_message") as capture_message:
+            response = async_to_sync(RaisingView.as_view())(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"input": ["This field is required."]})
+        capture_message.assert_called_once_with("Bad Request", level="warning")
+
+    def test_unhandled_exceptions_are_raised(self):
+        request = RequestFactory().get("/")
+        request.exc = RuntimeError("boom")
+
+        with self.assertRaisesMessage(RuntimeError, "boom"):
+            async_to_sync(RaisingView.as_view())(request)
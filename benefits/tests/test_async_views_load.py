@@ -0,0 +1,59 @@
+"""Load tests for the concurrency AsyncAPIView buys the proxy endpoints. They time real
+waits, so they are marked `load` and left out of the default run:
+
+    pytest -m load benefits/tests/test_async_views_load.py
+
+The async test client runs every request on one event loop, as a uvicorn worker does,
+while the sync test client serves them one at a time, as a sync gunicorn worker does.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from benefits.tests.cache_override import LOCAL_CACHE
+
+PLACES_URL = "/api/places/autocomplete/"
+GOOGLE_DELAY = 0.2
+CONCURRENT_REQUESTS = 10
+
+
+@pytest.mark.load
+@override_settings(CACHES=LOCAL_CACHE)
+class TestAsyncAPIViewLoad(TestCase):
+    def setUp(self):
+        patcher = patch("screener.views.PlacesRateThrottle.allow_request", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        async def slow_google(request):
+            await asyncio.sleep(GOOGLE_DELAY)
+            return httpx.Response(200, json={"predictions": [], "status": "ZERO_RESULTS"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(slow_google))
+        patcher = patch("integrations.clients.google_places.http_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_one_process_serves_requests_concurrently(self):
+        started = time.monotonic()
+        responses = await asyncio.gather(
+            *(self.async_client.get(PLACES_URL, {"input": f"{i} Main"}) for i in range(CONCURRENT_REQUESTS))
+        )
+        elapsed = time.monotonic() - started
+
+        self.assertEqual({response.status_code for response in responses}, {status.HTTP_200_OK})
+        # Served one after another, as a sync worker does, this takes the sum of the waits.
+        self.assertLess(elapsed, CONCURRENT_REQUESTS * GOOGLE_DELAY / 2)
+
+    def test_a_sync_worker_serves_them_one_at_a_time(self):
+        started = time.monotonic()
+        for i in range(CONCURRENT_REQUESTS):
+            self.client.get(PLACES_URL, {"input": f"{i} Oak"})
+
+        self.assertGreaterEqual(time.monotonic() - started, CONCURRENT_REQUESTS * GOOGLE_DELAY)
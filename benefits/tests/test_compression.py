@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase
+
+from benefits.compression import encoded_etag, etag_matches, negotiate_encoding
+
+
+class NegotiateEncodingTests(SimpleTestCase):
+    def test_prefers_brotli(self):
+        self.assertEqual(negotiate_encoding("gzip, deflate, br"), "br")
+
+    def test_falls_back_to_gzip(self):
+        self.assertEqual(negotiate_encoding("gzip, deflate"), "gzip")
+
+    def test_identity_without_header(self):
+        self.assertEqual(negotiate_encoding(None), "identity")
+        self.assertEqual(negotiate_encoding(""), "identity")
+
+    def test_q_zero_refuses_an_encoding(self):
+        self.assertEqual(negotiate_encoding("br;q=0, gzip"), "gzip")
+
+    def test_higher_q_wins(self):
+        self.assertEqual(negotiate_encoding("br;q=0.5, gzip;q=0.9"), "gzip")
+
+    def test_wildcard_accepts_anything(self):
+        self.assertEqual(negotiate_encoding("*"), "br")
+
+
+class EtagTests(SimpleTestCase):
+    def test_compressed_bodies_get_the_encoding_added(self):
+        self.assertEqual(encoded_etag('"v1"', "br"), '"v1-br"')
+        self.assertEqual(encoded_etag('"v1"', "gzip"), '"v1-gzip"')
+        self.assertEqual(encoded_etag('"v1"', "identity"), '"v1"')
+
+    def test_matches_any_encoding_of_the_body(self):
+        for if_none_match in ('"v1"', '"v1-br"', '"old", "v1-gzip"', 'W/"v1-br"', "*"):
+            with self.subTest(if_none_match=if_none_match):
+                self.assertTrue(etag_matches('"v1"', if_none_match))
+
+    def test_does_not_match_other_bodies(self):
+        for if_none_match in (None, '"v2"', '"v2-br"', '"v1-deflate"'):
+            with self.subTest(if_none_match=if_none_match):
+                self.assertFalse(etag_matches('"v1"', if_none_match))
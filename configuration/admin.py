@@ -2,6 +2,7 @@ from django.contrib import admin
 from django_json_widget.widgets import JSONEditorWidget
 from django.db.models import JSONField
 from authentication.admin import SecureAdmin
+from .bundle import invalidate_config_bundle_on_commit, refresh_config_bundle_on_commit
 from .models import Configuration, PolicyEngineConfig
 import json
 
@@ -31,6 +32,23 @@ class ConfigurationAdmin(SecureAdmin):
             obj.data = json.loads(obj.data)
         return form
 
+    # Prebuild the white label's configuration bundle after an edit, so the first
+    # visitor after a change is served from cache rather than rebuilding it.
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_config_bundle_on_commit(obj.white_label.code)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_config_bundle_on_commit(obj.white_label.code)
+
+    def delete_queryset(self, request, queryset):
+        # Bulk delete skips Configuration.delete(), which is what normally invalidates.
+        codes = set(queryset.values_list("white_label__code", flat=True))
+        super().delete_queryset(request, queryset)
+        for code in codes:
+            invalidate_config_bundle_on_commit(code)
+
 
 admin.site.register(Configuration, ConfigurationAdmin)
 
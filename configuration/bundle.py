@@ -0,0 +1,147 @@
+"""
+Prebuilt per-white-label configuration bundle.
+
+The frontend used to assemble a white label's configuration from one request per
+Configuration row, each serialized from the DB on every page load. The bundle is every
+active row plus the frontend feature flags, encoded to JSON once and stored as bytes
+with a content-hash ETag, so serving it is a cache read and a returning visitor with a
+matching ETag gets a 304 and no body at all.
+
+Two tiers. Redis holds the encoded bundle and, under a separate tiny key, its ETag.
+Each process also keeps the bundles it has served; a request checks only the ETag key
+and reuses the in-process copy when it still matches, so the full body crosses the
+network only after a change. Gzip and brotli copies are compressed once, when the
+bundle is built, and stored with it; the view sends whichever the client accepts.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import partial
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from benefits.compression import ENCODINGS, IDENTITY, compress
+from configuration.models import Configuration
+from configuration.serializers import frontend_feature_flags
+from screener.models import WhiteLabel
+
+_CONFIG_BUNDLE_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+# Bump when the bundle's shape changes, so entries written by the previous release are
+# ignored instead of served.
+_CONFIG_BUNDLE_CACHE_VERSION = "v2"
+
+
+@dataclass(frozen=True)
+class ConfigBundle:
+    etag: str
+    # encoding -> body, for IDENTITY and every one of ENCODINGS
+    bodies: dict[str, bytes]
+
+    @property
+    def body(self) -> bytes:
+        return self.bodies[IDENTITY]
+
+
+# white label code -> the bundle this process last served for it
+_local_bundles: dict[str, ConfigBundle] = {}
+
+
+def _bundle_cache_key(white_label_code: str) -> str:
+    return f"config_bundle:{_CONFIG_BUNDLE_CACHE_VERSION}:{white_label_code}"
+
+
+def _etag_cache_key(white_label_code: str) -> str:
+    return f"config_bundle_etag:{_CONFIG_BUNDLE_CACHE_VERSION}:{white_label_code}"
+
+
+def _decode(data):
+    return json.loads(data) if isinstance(data, str) else data
+
+
+def build_config_bundle(white_label_code: str) -> Optional[ConfigBundle]:
+    """Encode the bundle from the DB. Returns None for an unknown white label."""
+    # code is not unique at the DB level; pick the same white label get_form_options does.
+    white_label = WhiteLabel.objects.filter(code=white_label_code).order_by("id").first()
+    if white_label is None:
+        return None
+
+    # Same rows ConfigurationView serves, keyed by name.
+    configurations = (
+        Configuration.objects.filter(active=True, white_label__code=white_label_code)
+        .order_by("white_label_id", "name")
+        .values_list("name", "data")
+    )
+    payload = {
+        # OrderedJSONField hands rows back as JSON text; embed them as JSON rather than as
+        # strings to be parsed a second time on the client.
+        "configurations": {name: _decode(data) for name, data in configurations},
+        "feature_flags": frontend_feature_flags(white_label),
+    }
+
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    bodies = {IDENTITY: body, **{encoding: compress(body, encoding) for encoding in ENCODINGS}}
+
+    return ConfigBundle(etag=etag, bodies=bodies)
+
+
+def refresh_config_bundle(white_label_code: str) -> Optional[ConfigBundle]:
+    """Rebuild the bundle and publish it to both tiers."""
+    bundle = build_config_bundle(white_label_code)
+    if bundle is None:
+        invalidate_config_bundle(white_label_code)
+        return None
+
+    # Body before ETag: a reader that sees the new ETag must be able to find the new body.
+    cache.set(
+        _bundle_cache_key(white_label_code),
+        {"etag": bundle.etag, "bodies": bundle.bodies},
+        timeout=_CONFIG_BUNDLE_CACHE_TIMEOUT,
+    )
+    cache.set(_etag_cache_key(white_label_code), bundle.etag, timeout=_CONFIG_BUNDLE_CACHE_TIMEOUT)
+    _local_bundles[white_label_code] = bundle
+
+    return bundle
+
+
+def get_config_bundle(white_label_code: str) -> Optional[ConfigBundle]:
+    """Return the current bundle, building it on a miss. None for an unknown white label."""
+    etag = cache.get(_etag_cache_key(white_label_code))
+
+    if etag is not None:
+        local = _local_bundles.get(white_label_code)
+        if local is not None and local.etag == etag:
+            return local
+
+        cached = cache.get(_bundle_cache_key(white_label_code))
+        if cached is not None and cached["etag"] == etag:
+            bundle = ConfigBundle(etag=cached["etag"], bodies=cached["bodies"])
+            _local_bundles[white_label_code] = bundle
+            return bundle
+
+    return refresh_config_bundle(white_label_code)
+
+
+def invalidate_config_bundle(white_label_code: str) -> None:
+    # Other processes notice through the missing ETag key; their in-process copies are
+    # never served without it.
+    cache.delete_many([_etag_cache_key(white_label_code), _bundle_cache_key(white_label_code)])
+    _local_bundles.pop(white_label_code, None)
+
+
+def invalidate_config_bundle_on_commit(white_label_code: str) -> None:
+    """Invalidate once the current transaction commits.
+
+    Invalidating inside the transaction would let a concurrent request rebuild from the
+    pre-commit rows and cache them again.
+    """
+    transaction.on_commit(partial(invalidate_config_bundle, white_label_code))
+
+
+def refresh_config_bundle_on_commit(white_label_code: str) -> None:
+    """Prebuild once the current transaction commits, so the next visitor gets a cache hit."""
+    transaction.on_commit(partial(refresh_config_bundle, white_label_code))
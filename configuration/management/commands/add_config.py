@@ -1,6 +1,7 @@
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from configuration.bundle import refresh_config_bundle_on_commit
 from configuration.models import (
     Configuration,
 )
@@ -33,6 +34,7 @@ class Command(BaseCommand):
             )
             return
 
+        updated_codes = []
         for white_label_code in white_labels_to_update:
             if white_label_code not in white_label_config:
                 self.stdout.write(self.style.WARNING(f'White label for "{white_label_code}" does not exist'))
@@ -97,6 +99,8 @@ class Command(BaseCommand):
                 defaults={"data": WhiteLabelData.override_text, "active": True},
             )
 
+            updated_codes.append(white_label.code)
+
             if WhiteLabelData.is_default:
                 continue
 
@@ -239,3 +243,8 @@ class Command(BaseCommand):
                 white_label=white_label,
                 defaults={"data": WhiteLabelData.communications, "active": True},
             )
+
+        # Queued after the invalidations from each save above, so these run last once the
+        # command commits and leave every updated white label's bundle prebuilt.
+        for white_label_code in updated_codes:
+            refresh_config_bundle_on_commit(white_label_code)
@@ -1,3 +1,7 @@
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 from django.db.utils import DatabaseError, ProgrammingError
 from django.core.management.base import BaseCommand, CommandError
 from django.db import connection
@@ -62,6 +66,78 @@ VIEWS = {
 }
 
 
+# Groups whose views are built on another group's views. A view starts once every view in the groups it
+# depends on has been refreshed. Views in the same batch don't read each other, so they run in parallel.
+GROUP_DEPENDENCIES = {
+    "v2_batch_1": ["v2_dependencies"],
+    "v1_batch_1": ["v1_dependencies"],
+    "v1_batch_2": ["v1_dependencies"],
+    "v1_batch_3": ["v1_dependencies"],
+    "v1_batch_4": ["v1_dependencies"],
+    "v1_batch_5": ["v1_dependencies"],
+}
+
+# Groups whose views are built on each other, in the order listed.
+ORDERED_GROUPS = {"v2_dependencies", "v1_dependencies"}
+
+# Populated materialized views with a unique index on plain columns, which REFRESH ... CONCURRENTLY needs.
+UNIQUE_INDEXED_VIEWS_SQL = """
+    SELECT DISTINCT c.relname
+    FROM pg_class c
+    JOIN pg_index i ON i.indrelid = c.oid
+    WHERE c.relkind = 'm'
+      AND c.relispopulated
+      AND pg_table_is_visible(c.oid)
+      AND i.indisunique
+      AND i.indisvalid
+      AND i.indpred IS NULL
+      AND i.indexprs IS NULL
+"""
+
+
+def view_dependencies(groups: dict[str, list[str]]) -> dict[str, set[str]]:
+    """The views each view waits for. Dependencies on groups that weren't selected are left out."""
+    dependencies = {}
+    for group, views in groups.items():
+        upstream = {view for dependency in GROUP_DEPENDENCIES.get(group, []) for view in groups.get(dependency, [])}
+        for i, view in enumerate(views):
+            dependencies[view] = set(upstream)
+            if group in ORDERED_GROUPS and i > 0:
+                dependencies[view].add(views[i - 1])
+    return dependencies
+
+
+def chain_lengths(dependencies: dict[str, set[str]]) -> dict[str, int]:
+    """The longest chain of views waiting on each view, counting the view itself."""
+    dependents = {view: [] for view in dependencies}
+    for view, upstream in dependencies.items():
+        for dependency in upstream:
+            dependents[dependency].append(view)
+
+    lengths = {}
+
+    def length(view):
+        if view not in lengths:
+            lengths[view] = 1 + max((length(dependent) for dependent in dependents[view]), default=0)
+        return lengths[view]
+
+    for view in dependencies:
+        length(view)
+    return lengths
+
+
+def refresh_view(view: str, concurrently: bool) -> float:
+    """Refresh a view on this thread's own connection and return the seconds it took."""
+    ident = connection.ops.quote_name(view)  # safe for unqualified names
+    start = time.monotonic()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{ident};")
+    finally:
+        connection.close()
+    return time.monotonic() - start
+
+
 class Command(BaseCommand):
     help = "Refresh all materialized views"
 
@@ -71,9 +147,21 @@ class Command(BaseCommand):
             nargs="+",
             help="Specify which group of views to refresh (e.g., v1_batch_1). If omitted, refreshes all groups.",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Views to refresh at once, each on its own database connection (default: 4)",
+        )
+        parser.add_argument(
+            "--timings",
+            type=str,
+            help="Write each view's refresh time to this JSON file",
+        )
 
     def handle(self, *args, **options):
         selected_groups = options.get("views")
+        concurrency = max(1, options.get("concurrency") or 1)
         db_errors = []
         skipped = []
         failures = []
@@ -95,26 +183,63 @@ class Command(BaseCommand):
         else:
             groups_to_refresh = VIEWS  # Refresh all groups if none specified
 
-        # Process each group
         for group_name, views in groups_to_refresh.items():
             self.stdout.write(self.style.NOTICE(f"Refreshing group: {group_name} ({len(views)} views)"))
+        group_of = {view: group for group, views in groups_to_refresh.items() for view in views}
+
+        with connection.cursor() as cursor:
+            cursor.execute(UNIQUE_INDEXED_VIEWS_SQL)
+            concurrent_views = {name for (name,) in cursor.fetchall()}
+
+        waiting = view_dependencies(groups_to_refresh)
+        # Start views at the head of the longest chains first, so the refresh takes as long as the longest chain.
+        priority = chain_lengths(waiting)
+        finished = set()
+        timings = {}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            running = {}
 
-            with connection.cursor() as cursor:
-                for view in views:
+            def start_ready_views():
+                ready = [view for view, dependencies in waiting.items() if dependencies <= finished]
+                for view in sorted(ready, key=lambda v: -priority[v]):
+                    del waiting[view]
+                    running[pool.submit(refresh_view, view, view in concurrent_views)] = view
 
+            start_ready_views()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    view = running.pop(future)
+                    finished.add(view)
+                    mode = "concurrently" if view in concurrent_views else "locked"
                     try:
-                        msg = f"Refreshing {view}... {self.style.SUCCESS('Done')}"
-                        ident = connection.ops.quote_name(view)  # safe for unqualified names
-                        cursor.execute(f"REFRESH MATERIALIZED VIEW {ident};")
-                        self.stdout.write(msg)
-                    except DatabaseError as e:
-                        db_errors.append((view, str(e)))
+                        seconds = future.result()
+                        timings[view] = {"group": group_of[view], "seconds": round(seconds, 3), "mode": mode}
+                        self.stdout.write(f"Refreshing {view}... {self.style.SUCCESS('Done')} ({seconds:.1f}s, {mode})")
                     except ProgrammingError as e:
                         skipped.append((view, str(e)))
                         msg = f"Refreshing {view}... {self.style.WARNING('Skipped')}"
                         self.stdout.write(msg)
+                    except DatabaseError as e:
+                        db_errors.append((view, str(e)))
                     except Exception as e:
                         failures.append((view, str(e)))
+                start_ready_views()
+
+        if waiting:
+            raise CommandError(f"Circular view dependencies: {', '.join(waiting)}")
+
+        if timings:
+            slowest = max(timings, key=lambda view: timings[view]["seconds"])
+            self.stdout.write(
+                f"Refreshed {len(timings)} views in {time.monotonic() - started:.1f}s "
+                f"(slowest: {slowest}, {timings[slowest]['seconds']:.1f}s)"
+            )
+        if options.get("timings"):
+            with open(options["timings"], "w") as f:
+                json.dump(timings, f, indent=2)
 
         if db_errors:
             db_errors_list = ", ".join(v for v, _ in db_errors)
@@ -0,0 +1,142 @@
+"""
+Unit tests for the refresh_views management command.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from configuration.management.commands import refresh_views
+from configuration.management.commands.refresh_views import view_dependencies
+
+TEST_VIEWS = {
+    "base": ["test_refresh_base"],
+    "batch": ["test_refresh_child", "test_refresh_missing"],
+}
+
+
+class ViewDependenciesTest(TestCase):
+    def test_batch_views_wait_for_their_dependency_group(self):
+        dependencies = view_dependencies(refresh_views.VIEWS)
+
+        self.assertEqual(dependencies["reference_data_salud"], {"reference_data"})
+        self.assertEqual(dependencies["data_programs"], {"data_referrer_codes", "data"})
+
+    def test_dependency_groups_refresh_in_order(self):
+        dependencies = view_dependencies(refresh_views.VIEWS)
+
+        self.assertEqual(dependencies["data_referrer_codes"], set())
+        self.assertEqual(dependencies["data"], {"data_referrer_codes"})
+
+    def test_unselected_groups_are_not_waited_for(self):
+        dependencies = view_dependencies({"v2_batch_1": refresh_views.VIEWS["v2_batch_1"]})
+
+        self.assertEqual(set().union(*dependencies.values()), set())
+
+
+class RefreshViewsSchedulingTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+
+    def test_refreshes_independent_views_in_parallel(self):
+        # Both batch views have to be running at once to get past the barrier.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def refresh(view, concurrently):
+            barrier.wait()
+            return 0.0
+
+        views = {"batch": ["view_a", "view_b"]}
+        with patch.dict(refresh_views.VIEWS, views, clear=True), patch.object(refresh_views, "refresh_view", refresh):
+            call_command("refresh_views", concurrency=2, stdout=self.out)
+
+        self.assertIn("Refreshed 2 views", self.out.getvalue())
+
+    def test_concurrency_cap(self):
+        running = []
+        most_running = []
+        lock = threading.Lock()
+
+        def refresh(view, concurrently):
+            with lock:
+                running.append(view)
+                most_running.append(len(running))
+            threading.Event().wait(0.01)
+            with lock:
+                running.remove(view)
+            return 0.0
+
+        views = {"batch": [f"view_{i}" for i in range(6)]}
+        with patch.dict(refresh_views.VIEWS, views, clear=True), patch.object(refresh_views, "refresh_view", refresh):
+            call_command("refresh_views", concurrency=2, stdout=self.out)
+
+        self.assertEqual(len(most_running), 6)
+        self.assertLessEqual(max(most_running), 2)
+
+
+@patch.dict(refresh_views.VIEWS, TEST_VIEWS, clear=True)
+@patch.dict(refresh_views.GROUP_DEPENDENCIES, {"batch": ["base"]}, clear=True)
+class RefreshViewsCommandTest(TransactionTestCase):
+    """Refreshes real materialized views, which worker threads only see once committed."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE MATERIALIZED VIEW test_refresh_base AS SELECT generate_series(1, 3) AS id")
+            cursor.execute("CREATE UNIQUE INDEX test_refresh_base_id ON test_refresh_base (id)")
+            cursor.execute("CREATE MATERIALIZED VIEW test_refresh_child AS SELECT id FROM test_refresh_base")
+        self.addCleanup(self._drop_views)
+
+        self.out = StringIO()
+        self.calls = []
+        lock = threading.Lock()
+        real_refresh = refresh_views.refresh_view
+
+        def refresh(view, concurrently):
+            with lock:
+                self.calls.append(("start", view, concurrently))
+            try:
+                return real_refresh(view, concurrently)
+            finally:
+                with lock:
+                    self.calls.append(("end", view, concurrently))
+
+        patcher = patch.object(refresh_views, "refresh_view", refresh)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _drop_views(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP MATERIALIZED VIEW IF EXISTS test_refresh_child")
+            cursor.execute("DROP MATERIALIZED VIEW IF EXISTS test_refresh_base")
+
+    def test_refreshes_dependencies_first(self):
+        call_command("refresh_views", stdout=self.out)
+
+        events = [(event, view) for event, view, _ in self.calls]
+        self.assertLess(events.index(("end", "test_refresh_base")), events.index(("start", "test_refresh_child")))
+        self.assertLess(events.index(("end", "test_refresh_base")), events.index(("start", "test_refresh_missing")))
+
+    def test_refreshes_concurrently_only_with_a_unique_index(self):
+        call_command("refresh_views", stdout=self.out)
+
+        modes = {view: concurrently for event, view, concurrently in self.calls if event == "start"}
+        self.assertEqual(modes, {"test_refresh_base": True, "test_refresh_child": False, "test_refresh_missing": False})
+
+    def test_missing_views_are_skipped_and_timings_recorded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            timings_path = os.path.join(directory, "timings.json")
+            call_command("refresh_views", timings=timings_path, stdout=self.out)
+            with open(timings_path) as f:
+                timings = json.load(f)
+
+        self.assertEqual(set(timings), {"test_refresh_base", "test_refresh_child"})
+        self.assertEqual(timings["test_refresh_child"]["group"], "batch")
+        self.assertEqual(timings["test_refresh_base"]["mode"], "concurrently")
+        self.assertIn("Skipped materialized views: test_refresh_missing", self.out.getvalue())
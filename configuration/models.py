@@ -16,6 +16,21 @@ class Configuration(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_bundle()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_bundle()
+        return result
+
+    def _invalidate_bundle(self):
+        # Deferred: configuration.bundle imports this module.
+        from configuration.bundle import invalidate_config_bundle_on_commit
+
+        invalidate_config_bundle_on_commit(self.white_label.code)
+
 
 class PolicyEngineConfig(models.Model):
     """
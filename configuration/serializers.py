@@ -18,8 +18,13 @@ class ConfigurationSerializer(serializers.ModelSerializer):
         if not obj.white_label:
             return {}
 
-        return {
-            key: obj.white_label._get_flag_value(key)
-            for key, config in WhiteLabel.FEATURE_FLAGS.items()
-            if config.scope in ("frontend", "both")
-        }
+        return frontend_feature_flags(obj.white_label)
+
+
+def frontend_feature_flags(white_label: WhiteLabel) -> dict[str, bool]:
+    """Feature flags the frontend reads: those scoped "frontend" or "both"."""
+    return {
+        key: white_label._get_flag_value(key)
+        for key, config in WhiteLabel.FEATURE_FLAGS.items()
+        if config.scope in ("frontend", "both")
+    }
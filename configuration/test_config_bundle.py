@@ -0,0 +1,134 @@
+"""
+Tests for the prebuilt configuration bundle and its endpoint.
+"""
+
+import gzip
+import json
+from unittest.mock import patch
+
+import brotli
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+
+from authentication.models import User
+from configuration import bundle
+from configuration.models import Configuration
+from screener.models import WhiteLabel
+
+
+class TestConfigBundleEndpoint(APITestCase):
+    def setUp(self):
+        self.wl = WhiteLabel.objects.create(name="Test State", code="test", state_code="TS")
+        Configuration.objects.create(white_label=self.wl, name="footer_data", data={"email": "a@b.org"}, active=True)
+        Configuration.objects.create(white_label=self.wl, name="state", data={"name": "Test"}, active=True)
+        Configuration.objects.create(white_label=self.wl, name="retired", data={"x": 1}, active=False)
+
+        self.url = "/api/test/config-bundle/"
+        self.user = User.objects.create_user(email_or_cell="testuser@example.com", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_returns_active_configurations_by_name(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content)
+        self.assertEqual(
+            payload["configurations"],
+            {"footer_data": {"email": "a@b.org"}, "state": {"name": "Test"}},
+        )
+        self.assertIn("feature_flags", payload)
+
+    def test_unknown_white_label_returns_404(self):
+        response = self.client.get("/api/doesnotexist/config-bundle/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_requires_authentication(self):
+        response = APIClient().get(self.url)
+        self.assertIn(response.status_code, [401, 403])
+
+    def test_matching_if_none_match_returns_304_without_body(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_each_encoding_has_its_own_etag(self):
+        identity = self.client.get(self.url)["ETag"]
+        br = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br")["ETag"]
+
+        self.assertEqual(br, f'{identity[:-1]}-br"')
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=br)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], f'{identity[:-1]}-gzip"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_stale_if_none_match_returns_full_bundle(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content)
+
+    def test_warm_bundle_is_served_without_queries(self):
+        self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            bundle.get_config_bundle("test")
+
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_saving_a_configuration_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        config = Configuration.objects.get(white_label=self.wl, name="state")
+        config.data = {"name": "Renamed"}
+        with self.captureOnCommitCallbacks(execute=True):
+            config.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(json.loads(response.content)["configurations"]["state"], {"name": "Renamed"})
+
+    def test_saving_the_white_label_invalidates_the_bundle(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wl.save()
+
+        self.assertIsNone(cache.get(bundle._etag_cache_key("test")))
+
+    def test_in_process_copy_is_not_served_once_the_shared_etag_is_gone(self):
+        """Another process invalidating shows up here only as a missing ETag key."""
+        bundle.get_config_bundle("test")
+        cache.delete(bundle._etag_cache_key("test"))
+        Configuration.objects.filter(white_label=self.wl, name="state").update(data={"name": "New"})
+
+        rebuilt = bundle.get_config_bundle("test")
+
+        self.assertEqual(json.loads(rebuilt.body)["configurations"]["state"], {"name": "New"})
+
+    def test_serves_the_precompressed_encoding_the_client_accepts(self):
+        for accept, encoding, decompress in (("br, gzip", "br", brotli.decompress), ("gzip", "gzip", gzip.decompress)):
+            with self.subTest(encoding=encoding):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=accept)
+
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertIn("Accept-Encoding", response["Vary"])
+                self.assertEqual(decompress(response.content), bundle.get_config_bundle("test").body)
+
+    def test_compression_happens_when_the_bundle_is_built(self):
+        self.client.get(self.url)
+
+        with patch.object(bundle, "compress") as compress:
+            self.client.get(self.url, HTTP_ACCEPT_ENCODING="br")
+
+        compress.assert_not_called()
@@ -1,5 +1,14 @@
 from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from benefits.compression import (
+    encoded_etag,
+    encoded_json_response,
+    etag_matches,
+    negotiate_encoding,
+    not_modified_response,
+)
+from configuration.bundle import get_config_bundle
 from configuration.models import Configuration
 from configuration.serializers import ConfigurationSerializer
 from rest_framework import permissions
@@ -56,6 +65,30 @@ def get_form_options(request, white_label_code: str):
     )
 
 
+@api_view(["GET"])
+def get_config_bundle_view(request, white_label_code: str):
+    """Every active configuration and the frontend feature flags for a white label, in one response.
+
+    Served from the prebuilt bundle in configuration.bundle, compressed ahead of time
+    in whichever encoding the client accepts. Each encoding has its own ETag, and clients
+    that send back the one they already have get a 304 with no body.
+    """
+    bundle = get_config_bundle(white_label_code)
+    if bundle is None:
+        return Response({"error": "White label not found"}, status=404)
+
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    if etag_matches(bundle.etag, request.headers.get("If-None-Match")):
+        response = not_modified_response()
+    else:
+        response = encoded_json_response(bundle.bodies[encoding], encoding)
+
+    response["ETag"] = encoded_etag(bundle.etag, encoding)
+    # Caches may keep the bundle but must revalidate it; a matching ETag makes that a 304.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
 class ConfigurationView(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows configurations to be viewed.
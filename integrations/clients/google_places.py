@@ -2,10 +2,12 @@ import hashlib
 import logging
 from typing import TypedDict
 
-import requests
+import httpx
 from django.conf import settings
 from django.core.cache import cache
 
+from benefits.async_views import http_client
+
 logger = logging.getLogger(__name__)
 
 AUTOCOMPLETE_CACHE_TTL = 60 * 60 * 24 * 7  # 7 days
@@ -19,13 +21,13 @@ class AddressPrediction(TypedDict):
 class GooglePlacesClient:
     BASE_URL = "https://maps.googleapis.com"
 
-    def autocomplete_address(self, input_text: str) -> list[AddressPrediction]:
+    async def autocomplete_address(self, input_text: str) -> list[AddressPrediction]:
         cache_key = "places_autocomplete_" + hashlib.md5(input_text.lower().encode()).hexdigest()
-        cached = cache.get(cache_key)
+        cached = await cache.aget(cache_key)
         if cached is not None:
             return cached
 
-        response = requests.get(
+        response = await http_client().get(
             f"{self.BASE_URL}/maps/api/place/autocomplete/json",
             params={
                 "input": input_text,
@@ -40,7 +42,7 @@ class GooglePlacesClient:
         api_status = data.get("status")
         if api_status not in ("OK", "ZERO_RESULTS"):
             logger.warning("Google Places API returned status %s for input %r", api_status, input_text)
-            raise requests.RequestException(f"Google Places API error status: {api_status}")
+            raise httpx.HTTPError(f"Google Places API error status: {api_status}")
         results: list[AddressPrediction] = [
             {
                 "description": p["description"].removesuffix(", USA"),
@@ -48,5 +50,5 @@ class GooglePlacesClient:
             }
             for p in data.get("predictions", [])
         ]
-        cache.set(cache_key, results, AUTOCOMPLETE_CACHE_TTL)
+        await cache.aset(cache_key, results, AUTOCOMPLETE_CACHE_TTL)
         return results
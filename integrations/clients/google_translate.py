@@ -4,7 +4,42 @@ from decouple import config
 import json
 from google.oauth2 import service_account
 from google.cloud import translate_v2 as translate
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import html
+import threading
+import time
+
+# Google's v2 API takes at most 128 segments per request and recommends staying
+# under 5k characters.
+MAX_BATCH_SEGMENTS = 128
+MAX_BATCH_CHARS = 5_000
+
+# Requests in flight at once, and started per second, across every language. Shared
+# by all Translate instances in the process so parallel callers can't add up to more.
+MAX_CONCURRENT_REQUESTS = 8
+MAX_REQUESTS_PER_SECOND = 10
+
+# Source hashes per translation memory query.
+_MEMORY_LOOKUP_CHUNK = 1_000
+
+
+class _RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        time.sleep(start - now)
+
+
+_rate_limiter = _RateLimiter(MAX_REQUESTS_PER_SECOND)
 
 
 class Translate:
@@ -40,10 +75,19 @@ class Translate:
         """
         return "\n".join(paragraphs)
 
-    def __init__(self):
-        info = json.loads(config("GOOGLE_APPLICATION_CREDENTIALS"))
-        creds = service_account.Credentials.from_service_account_info(info)
-        self.client = translate.Client(credentials=creds)
+    def __init__(self, client=None, use_memory: bool = True):
+        """
+        client: anything with google translate_v2.Client's translate(); built from
+        GOOGLE_APPLICATION_CREDENTIALS when omitted.
+        use_memory: read and write the TranslationMemory table. Off for callers that
+        may run before its migration (data migrations).
+        """
+        if client is None:
+            info = json.loads(config("GOOGLE_APPLICATION_CREDENTIALS"))
+            creds = service_account.Credentials.from_service_account_info(info)
+            client = translate.Client(credentials=creds)
+        self.client = client
+        self.use_memory = use_memory
 
     LANGUAGE_CODE_MAPPING = {
         "pt-br": "pt",  # Map pt-br to pt for Google Translate
@@ -72,38 +116,135 @@ class Translate:
         """
         Translates all of the texts to the target langs, preserving paragraph structure for each text.
         Include __all__ in langs to translate to all languages.
+
+        Paragraphs are the unit of work: identical paragraphs across texts are translated once,
+        paragraphs already in the translation memory aren't sent at all, and the rest go out in
+        batches that run concurrently across languages.
         """
         if "__all__" in langs:
             langs = Translate.languages
 
-        translations = {text: {} for text in texts}
         for lang in langs:
             if lang not in Translate.languages:
                 raise Exception(f"{lang} is not configured in settings, or is the default language")
 
-            # Use mapped code for Google Translate
-            google_lang = self._map_language_code(lang)
-            google_source = self._map_language_code(Translate.main_language)
-
-            # For each text, split into paragraphs, translate, and rejoin
-            for text in texts:
-                paragraphs = self.split_paragraphs(text)
-
-                try:
-                    results = self.client.translate(
-                        paragraphs,
-                        target_language=google_lang,
-                        source_language=google_source,
-                    )
-                except Exception as e:
-                    capture_exception(e, level="error")
-                    raise
-                if isinstance(results, dict):
-                    translated_paragraphs = [self.format_text(results)]
-                else:
-                    translated_paragraphs = [self.format_text(res) for res in results]
-                translations[text][lang] = self.join_paragraphs(translated_paragraphs)
-        return translations
+        paragraphs_by_text = {text: self.split_paragraphs(text) for text in texts}
+        # Whitespace-only paragraphs come back unchanged (see format_text), so they never
+        # need a request.
+        unique_paragraphs = list(
+            dict.fromkeys(
+                paragraph
+                for paragraphs in paragraphs_by_text.values()
+                for paragraph in paragraphs
+                if paragraph.strip() != ""
+            )
+        )
+
+        translated = self._translate_paragraphs(langs, unique_paragraphs)
+
+        return {
+            text: {
+                lang: self.join_paragraphs([translated[lang].get(paragraph, paragraph) for paragraph in paragraphs])
+                for lang in langs
+            }
+            for text, paragraphs in paragraphs_by_text.items()
+        }
+
+    def _translate_paragraphs(self, langs: list[str], paragraphs: list[str]) -> dict[str, dict[str, str]]:
+        """{lang: {paragraph: translation}}, from memory where possible and the API otherwise."""
+        translated = self._recall(langs, paragraphs)
+
+        jobs = []
+        for lang in langs:
+            missing = [paragraph for paragraph in paragraphs if paragraph not in translated[lang]]
+            jobs.extend((lang, batch) for batch in self._batches(missing))
+
+        if not jobs:
+            return translated
+
+        fresh = {lang: {} for lang in langs}
+        pool = ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(jobs)))
+        try:
+            futures = {pool.submit(self._translate_batch, lang, batch): lang for lang, batch in jobs}
+            for future in as_completed(futures):
+                fresh[futures[future]].update(future.result())
+        finally:
+            # On failure, don't send the batches still queued, but keep what was already
+            # paid for so a rerun picks up from there.
+            pool.shutdown(cancel_futures=True)
+            self._remember(fresh)
+
+        for lang in langs:
+            translated[lang].update(fresh[lang])
+
+        return translated
+
+    @staticmethod
+    def _batches(paragraphs: list[str]):
+        batch, chars = [], 0
+        for paragraph in paragraphs:
+            if batch and (len(batch) == MAX_BATCH_SEGMENTS or chars + len(paragraph) > MAX_BATCH_CHARS):
+                yield batch
+                batch, chars = [], 0
+            batch.append(paragraph)
+            chars += len(paragraph)
+
+        if batch:
+            yield batch
+
+    def _translate_batch(self, lang: str, paragraphs: list[str]) -> dict[str, str]:
+        _rate_limiter.wait()
+        try:
+            results = self.client.translate(
+                paragraphs,
+                target_language=self._map_language_code(lang),
+                source_language=self._map_language_code(Translate.main_language),
+            )
+        except Exception as e:
+            capture_exception(e, level="error")
+            raise
+
+        return {paragraph: self.format_text(result) for paragraph, result in zip(paragraphs, results)}
+
+    def _recall(self, langs: list[str], paragraphs: list[str]) -> dict[str, dict[str, str]]:
+        recalled = {lang: {} for lang in langs}
+        if not self.use_memory or not paragraphs:
+            return recalled
+
+        # Deferred: this module is imported while the app registry is still loading.
+        from translations.models import TranslationMemory
+
+        by_hash = {TranslationMemory.hash_source(paragraph): paragraph for paragraph in paragraphs}
+        hashes = list(by_hash)
+        for i in range(0, len(hashes), _MEMORY_LOOKUP_CHUNK):
+            rows = TranslationMemory.objects.filter(
+                language__in=langs, source_hash__in=hashes[i : i + _MEMORY_LOOKUP_CHUNK]
+            ).values_list("source_hash", "language", "translated_text")
+            for source_hash, lang, translated_text in rows:
+                recalled[lang][by_hash[source_hash]] = translated_text
+
+        return recalled
+
+    def _remember(self, translated: dict[str, dict[str, str]]):
+        if not self.use_memory:
+            return
+
+        from translations.models import TranslationMemory
+
+        TranslationMemory.objects.bulk_create(
+            [
+                TranslationMemory(
+                    source_hash=TranslationMemory.hash_source(paragraph),
+                    language=lang,
+                    source_text=paragraph,
+                    translated_text=translated_text,
+                )
+                for lang, paragraphs in translated.items()
+                for paragraph, translated_text in paragraphs.items()
+            ],
+            ignore_conflicts=True,
+            batch_size=1_000,
+        )
 
     def format_text(self, result):
         # If the input is whitespace-only, return it unchanged
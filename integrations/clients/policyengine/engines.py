@@ -1,6 +1,11 @@
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Optional
 from django.core.cache import cache
 from decouple import config
+from .versions import is_valid_version_number
+import hashlib
+import json
+import os
 import requests
 
 
@@ -47,6 +52,60 @@ class Sim:
 
 _PE_TOKEN_CACHE_KEY = "pe_bearer_token"
 
+# Called before every calculate request. Web requests aren't throttled; batch runners
+# install a limiter shared by their worker processes (see batch_snapshots).
+_request_throttle: Optional[Callable[[], None]] = None
+
+
+def set_request_throttle(throttle: Optional[Callable[[], None]]) -> None:
+    global _request_throttle
+    _request_throttle = throttle
+
+
+class ResponseCache:
+    """Calculate responses on disk, one file per request body, for batch runs that send
+    the same households again (see validate --pe-cache).
+
+    Only requests pinned to an exact version are cached: "current" can mean a different
+    model tomorrow, and the request alone wouldn't tell the two apart."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, data) -> Optional[Path]:
+        if not is_valid_version_number(str(data.get("version", ""))):
+            return None
+        digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def get(self, data) -> Optional[dict]:
+        path = self._path(data)
+        if path is None or not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def set(self, data, response_json: dict) -> None:
+        path = self._path(data)
+        if path is None:
+            return
+        # Written whole and renamed, so a parallel reader never sees half a file.
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(response_json, f)
+        os.replace(tmp_path, path)
+
+
+# Web requests always go to PolicyEngine; batch runners may install a ResponseCache.
+_response_cache: Optional[ResponseCache] = None
+
+
+def set_response_cache(response_cache: Optional[ResponseCache]) -> None:
+    global _response_cache
+    _response_cache = response_cache
+
+
 _pe_client_id: str = config("POLICY_ENGINE_CLIENT_ID", "")
 _pe_client_secret: str = config("POLICY_ENGINE_CLIENT_SECRET", "")
 _pe_token_url = "https://policyengine.uk.auth0.com/oauth/token"
@@ -96,13 +155,21 @@ class PrivateApiSim(Sim):
     pe_url = "https://household.api.policyengine.org/us/calculate"
 
     def __init__(self, data) -> None:
+        self.request_payload = data
+        cached = _response_cache.get(data) if _response_cache is not None else None
+        if cached is not None:
+            self.response_json = cached
+            self.data = cached["result"]
+            return
+
         token = _fetch_pe_bearer_token()
 
         headers = {
             "Authorization": f"Bearer {token}",
         }
 
-        self.request_payload = data
+        if _request_throttle is not None:
+            _request_throttle()
         try:
             res = requests.post(self.pe_url, json=data, headers=headers, timeout=(5, 30))
             if res.status_code == 401:
@@ -117,6 +184,8 @@ class PrivateApiSim(Sim):
         if "result" not in self.response_json:
             raise PolicyEngineAPIError("Missing 'result' key in Policy Engine response")
         self.data = self.response_json["result"]
+        if _response_cache is not None:
+            _response_cache.set(data, self.response_json)
 
     def value(self, unit, sub_unit, variable, period):
         return self.data[unit][sub_unit][variable][period]
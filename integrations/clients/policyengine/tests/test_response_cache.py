@@ -0,0 +1,51 @@
+"""Tests for PrivateApiSim's optional on-disk response cache (validate --pe-cache)."""
+
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from integrations.clients.policyengine import engines
+from integrations.clients.policyengine.engines import PrivateApiSim, ResponseCache
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        engines.set_response_cache(ResponseCache(directory.name))
+        self.addCleanup(engines.set_response_cache, None)
+
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"result": {"people": {}}}
+        token = patch.object(engines, "_fetch_pe_bearer_token", return_value="token")
+        post = patch.object(engines.requests, "post", return_value=response)
+        token.start()
+        self.post = post.start()
+        self.addCleanup(token.stop)
+        self.addCleanup(post.stop)
+
+    def test_pinned_request_is_sent_once(self):
+        payload = {"household": {"people": {"1": {}}}, "version": "1.715.2"}
+
+        first = PrivateApiSim(payload)
+        second = PrivateApiSim({"version": "1.715.2", "household": {"people": {"1": {}}}})
+
+        self.assertEqual(self.post.call_count, 1)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.response_json, {"result": {"people": {}}})
+
+    def test_other_household_or_version_is_sent(self):
+        PrivateApiSim({"household": {"people": {"1": {}}}, "version": "1.715.2"})
+        PrivateApiSim({"household": {"people": {"2": {}}}, "version": "1.715.2"})
+        PrivateApiSim({"household": {"people": {"1": {}}}, "version": "1.716.0"})
+
+        self.assertEqual(self.post.call_count, 3)
+
+    def test_floating_version_is_not_cached(self):
+        payload = {"household": {"people": {"1": {}}}, "version": "current"}
+
+        PrivateApiSim(payload)
+        PrivateApiSim(payload)
+
+        self.assertEqual(self.post.call_count, 2)
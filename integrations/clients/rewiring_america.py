@@ -1,11 +1,12 @@
-import requests
 from django.conf import settings
 
+from benefits.async_views import http_client
+
 
 class RewiringAmericaClient:
     BASE_URL = "https://api.rewiringamerica.org"
 
-    def fetch_rem_impact(
+    async def fetch_rem_impact(
         self,
         upgrade: str,
         address: str,
@@ -21,7 +22,7 @@ class RewiringAmericaClient:
         if water_heater_fuel:
             params["water_heater_fuel"] = water_heater_fuel
 
-        response = requests.get(
+        response = await http_client().get(
             f"{self.BASE_URL}/api/v1/rem/address",
             params=params,
             headers={"Authorization": f"Bearer {settings.REWIRING_AMERICA_API_KEY}"},
@@ -0,0 +1,131 @@
+"""
+Tests for the Google Translate client's batching, dedup and translation memory,
+run against a local fake of translate_v2.Client so no API is touched.
+"""
+
+import threading
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from integrations.clients import google_translate
+from integrations.clients.google_translate import Translate
+from translations.models import TranslationMemory
+
+
+class FakeTranslateClient:
+    """Echoes each segment back tagged with the target language, and records every call."""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def translate(self, values, target_language, source_language):
+        with self._lock:
+            self.calls.append((target_language, list(values)))
+        if self.fail_on == target_language:
+            raise RuntimeError("quota exceeded")
+        return [{"input": value, "translatedText": f"{value.strip()} [{target_language}]"} for value in values]
+
+    def segments_sent(self):
+        return [segment for _, values in self.calls for segment in values]
+
+
+@patch.object(google_translate, "_rate_limiter", google_translate._RateLimiter(1_000))
+class TranslateBulkTests(TestCase):
+    def setUp(self):
+        self.client = FakeTranslateClient()
+        self.translate = Translate(client=self.client)
+
+    def test_preserves_paragraphs_and_whitespace(self):
+        result = self.translate.bulk_translate(["es"], ["Hello\n\n  Goodbye "])
+
+        self.assertEqual(result["Hello\n\n  Goodbye "]["es"], "Hello [es]\n\n  Goodbye [es] ")
+
+    def test_maps_language_codes(self):
+        self.translate.bulk_translate(["pt-br"], ["Hello"])
+
+        self.assertEqual(self.client.calls, [("pt", ["Hello"])])
+
+    def test_identical_paragraphs_are_sent_once(self):
+        texts = ["Apply online.\nCall us.", "Call us.", "Apply online."]
+
+        result = self.translate.bulk_translate(["es"], texts)
+
+        self.assertEqual(sorted(self.client.segments_sent()), ["Apply online.", "Call us."])
+        self.assertEqual(result["Call us."]["es"], "Call us. [es]")
+
+    def test_whitespace_only_text_makes_no_request(self):
+        result = self.translate.bulk_translate(["es"], ["", "  "])
+
+        self.assertEqual(self.client.calls, [])
+        self.assertEqual(result, {"": {"es": ""}, "  ": {"es": "  "}})
+
+    def test_remembered_translations_skip_the_api(self):
+        self.translate.bulk_translate(["es", "fr"], ["Hello", "Goodbye"])
+        self.client.calls.clear()
+
+        result = Translate(client=self.client).bulk_translate(["es", "fr", "vi"], ["Hello", "New"])
+
+        self.assertEqual(sorted(self.client.calls), [("es", ["New"]), ("fr", ["New"]), ("vi", ["Hello", "New"])])
+        self.assertEqual(result["Hello"]["fr"], "Hello [fr]")
+        self.assertEqual(TranslationMemory.objects.filter(language="vi").count(), 2)
+
+    def test_memory_can_be_disabled(self):
+        translate = Translate(client=self.client, use_memory=False)
+        translate.bulk_translate(["es"], ["Hello"])
+        translate.bulk_translate(["es"], ["Hello"])
+
+        self.assertEqual(len(self.client.calls), 2)
+        self.assertFalse(TranslationMemory.objects.exists())
+
+    def test_batches_respect_segment_and_character_limits(self):
+        texts = [f"Sentence number {i}." for i in range(300)] + ["x" * 4_990, "y" * 20]
+
+        self.translate.bulk_translate(["es"], texts)
+
+        for _, values in self.client.calls:
+            self.assertLessEqual(len(values), google_translate.MAX_BATCH_SEGMENTS)
+            self.assertTrue(len(values) == 1 or sum(map(len, values)) <= google_translate.MAX_BATCH_CHARS)
+        self.assertEqual(len(self.client.segments_sent()), 302)
+
+    def test_languages_are_requested_concurrently(self):
+        started = threading.Barrier(3, timeout=5)
+
+        class BlockingClient(FakeTranslateClient):
+            def translate(self, values, target_language, source_language):
+                # Only returns once all three languages are in flight at the same time.
+                started.wait()
+                return super().translate(values, target_language, source_language)
+
+        result = Translate(client=BlockingClient()).bulk_translate(["es", "fr", "vi"], ["Hello"])
+
+        self.assertEqual(result["Hello"], {"es": "Hello [es]", "fr": "Hello [fr]", "vi": "Hello [vi]"})
+
+    def test_failure_keeps_the_batches_that_succeeded(self):
+        translate = Translate(client=FakeTranslateClient(fail_on="fr"))
+
+        with patch.object(google_translate, "capture_exception"), self.assertRaises(RuntimeError):
+            translate.bulk_translate(["es", "fr"], ["Hello"])
+
+        self.assertTrue(TranslationMemory.objects.filter(language="es").exists())
+        self.assertFalse(TranslationMemory.objects.filter(language="fr").exists())
+
+    def test_unknown_language_raises_before_any_request(self):
+        with self.assertRaises(Exception):
+            self.translate.bulk_translate(["es", "xx"], ["Hello"])
+
+        self.assertEqual(self.client.calls, [])
+
+
+class RateLimiterTests(TestCase):
+    def test_spaces_request_starts(self):
+        limiter = google_translate._RateLimiter(rate=50)
+        sleeps = []
+
+        with patch.object(google_translate.time, "sleep", side_effect=sleeps.append):
+            for _ in range(3):
+                limiter.wait()
+
+        self.assertAlmostEqual(sleeps[2] - sleeps[1], 0.02, delta=0.01)
@@ -115,10 +115,23 @@ class HubSpotIntegration(CmsIntegration):
         )
         return api_response
 
+    @staticmethod
+    def format_email_new_benefit(contact_id: str, num_benefits: int, value: int) -> dict:
+        return {
+            "id": contact_id,
+            "properties": {
+                settings.HUBSPOT_NEW_BENEFITS_COUNT_PROPERTY: num_benefits,
+                settings.HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY: value,
+            },
+        }
+
     @classmethod
     def bulk_update(cls, data):
+        # A client per call: callers send batches from several threads at once, and the
+        # instance client in __init__ needs a user and screen.
+        api_client = HubSpot(access_token=cls.access_token)
         batch_input_simple_public_object_batch_input = BatchInputSimplePublicObjectBatchInput(data)
-        cls.api_client.crm.contacts.batch_api.update(
+        api_client.crm.contacts.batch_api.update(
             batch_input_simple_public_object_batch_input=batch_input_simple_public_object_batch_input
         )
 
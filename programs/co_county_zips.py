@@ -2,14 +2,8 @@ from screener.models import Screen
 
 
 def counties_from_zip(lookup_zip):
-    matches = []
-
-    for county, zips in zipcodes.items():
-        for zip in zips:
-            if zip == lookup_zip:
-                matches.append(county)
-
-    return matches
+    # copy so callers can't mutate the shared index
+    return list(_counties_by_zip.get(lookup_zip, ()))
 
 
 def counties_from_screen(screen: Screen):
@@ -1364,3 +1358,24 @@ zipcodes = {
         "80805",
     ],
 }
+
+
+def _build_counties_by_zip(county_zips: dict[str, list[str]]) -> dict[str, tuple[str, ...]]:
+    """
+    Invert a county -> ZIPs mapping into ZIP -> counties.
+
+    A ZIP that straddles county lines maps to every county it appears under, in the same order the
+    counties are listed, which is the order the old linear scan returned them in.
+    """
+    counties_by_zip: dict[str, list[str]] = {}
+
+    for county, zips in county_zips.items():
+        for zip in zips:
+            matches = counties_by_zip.setdefault(zip, [])
+            if county not in matches:
+                matches.append(county)
+
+    return {zip: tuple(counties) for zip, counties in counties_by_zip.items()}
+
+
+_counties_by_zip = _build_counties_by_zip(zipcodes)
@@ -96,11 +96,13 @@ def pe_input(
         version = pe_versions.determine_pe_version(pe_version)
         comparable_version = _resolve_comparable_version(programs, version)
 
-    # order_by("id") is load-bearing, not tidiness: the payload lists every unit's members
+    # Sorting by id is load-bearing, not tidiness: the payload lists every unit's members
     # in iteration order, and the cassette matcher compares request bodies exactly. Without
     # it Postgres picks the order, so the same household can serialize differently between
     # runs and a recorded cassette stops matching — the request then goes to the live API.
-    members = screen.household_members.all().order_by("id")
+    # Sorted in Python rather than with order_by("id") so the household_members prefetch
+    # is used — the quick estimate (screener/estimate.py) has no rows to query.
+    members = sorted(screen.household_members.all(), key=lambda member: member.id)
     relationship_map = screen.relationship_map()
 
     main_tax_members = []
@@ -213,7 +213,7 @@ def sync_data(apps, _):
                 for lang_code, _ in settings.LANGUAGES:
                     if lang_code == base_lang:
                         continue
-                    auto_translated = Translate().translate(lang_code, type_name)
+                    auto_translated = Translate(use_memory=False).translate(lang_code, type_name)
                     translated_obj = Translation.objects.edit_translation_by_id(
                         name_translation.id, lang_code, auto_translated
                     )
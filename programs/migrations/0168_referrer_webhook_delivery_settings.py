@@ -0,0 +1,24 @@
+# Generated by Django 4.2.28 on 2026-10-19 00:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0167_add_nc_homeless_and_health_care_categories'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='referrer',
+            name='webhook_batch_size',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='referrer',
+            name='webhook_concurrency',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
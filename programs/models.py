@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import Q
 from django.db.models.functions import Lower
@@ -210,6 +211,7 @@ class ProgramCategoryManager(models.Manager):
 
 class ProgramCategoryDataController(ModelDataController["ProgramCategory"]):
     _model_name = "ProgramCategory"
+    export_select_related = ["white_label", "icon"]
 
     DataType = TypedDict(
         "DataType",
@@ -339,6 +341,7 @@ class DocumentManager(models.Manager):
 
 class DocumentDataController(ModelDataController["Document"]):
     _model_name = "Document"
+    export_select_related = ["white_label"]
 
     DataType = TypedDict(
         "DataType",
@@ -500,6 +503,8 @@ class ProgramManager(models.Manager):
 class ProgramDataController(ModelDataController["Program"]):
     _model_name = "Program"
     dependencies = ["Document", "ProgramCategory"]
+    export_select_related = ["year", "category", "white_label"]
+    export_prefetch_related = ["legal_status_required", "documents", "required_programs", "excludes_programs"]
 
     YearDataType = TypedDict("FplDataType", {"year": str, "period": str})
     LegalStatusesDataType = list[TypedDict("LegalStatusDataType", {"status": str})]
@@ -884,6 +889,7 @@ from translations.model_data import ModelDataController
 
 class UrgentNeedTypeDataController(ModelDataController["UrgentNeedType"]):
     _model_name = "UrgentNeedType"
+    export_select_related = ["white_label", "icon"]
 
     DataType = TypedDict(
         "DataType",
@@ -1040,6 +1046,8 @@ class UrgentNeedManager(models.Manager):
 class UrgentNeedDataController(ModelDataController["UrgentNeed"]):
     _model_name = "UrgentNeed"
     dependencies = ["UrgentNeedType"]
+    export_select_related = ["category_type", "year", "white_label"]
+    export_prefetch_related = ["type_short", "functions", "counties", "required_expense_types"]
 
     YearDataType = TypedDict("FplDataType", {"year": str, "period": str})
     CategoriesType = list[TypedDict("CategoryType", {"name": str})]
@@ -1351,6 +1359,8 @@ class NavigatorManager(models.Manager):
 class NavigatorDataController(ModelDataController["Navigator"]):
     _model_name = "Navigator"
     dependencies = ["Program"]
+    export_select_related = ["white_label"]
+    export_prefetch_related = ["counties", "languages", "programs", "eligibility_programs"]
 
     CountiesType = list[TypedDict("CountyType", {"name": str})]
     LanugagesType = list[TypedDict("LanguageType", {"code": str})]
@@ -1613,6 +1623,8 @@ class WarningMessageManager(models.Manager):
 class WarningMessageDataController(ModelDataController["WarningMessage"]):
     _model_name = "WarningMessage"
     dependencies = ["Program"]
+    export_select_related = ["white_label"]
+    export_prefetch_related = ["legal_statuses", "counties", "programs"]
 
     CountiesType = list[TypedDict("CountyType", {"name": str})]
     LegalStatusesDataType = list[TypedDict("LegalStatusDataType", {"status": str})]
@@ -1760,6 +1772,10 @@ class Referrer(models.Model):
     is_partner = models.BooleanField(default=False)
     webhook_url = models.CharField(max_length=320, blank=True, null=True)
     webhook_functions = models.ManyToManyField(WebHookFunction, related_name="web_hook", blank=True)
+    # Screens posted together in one webhook request. Above 1, the body is {"batch": [...]}.
+    webhook_batch_size = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    # Webhook requests in flight to the referrer at a time.
+    webhook_concurrency = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
     primary_navigators = models.ManyToManyField(Navigator, related_name="primary_navigators", blank=True)
     remove_programs = models.ManyToManyField(Program, related_name="removed_programs", blank=True)
 
@@ -1819,6 +1835,8 @@ class TranslationOverrideManager(models.Manager):
 class TranslationOverrideDataController(ModelDataController["TranslationOverride"]):
     _model_name = "TranslationOverride"
     dependencies = ["Program"]
+    export_select_related = ["program", "white_label"]
+    export_prefetch_related = ["counties"]
 
     CountiesType = list[TypedDict("CountyType", {"name": str})]
     DataType = TypedDict(
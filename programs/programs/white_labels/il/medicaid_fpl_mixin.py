@@ -23,7 +23,7 @@ class IlMedicaidFplIncomeCheckMixin:
             fpl_percent: FPL percentage to check (e.g., 1.38 for 138% FPL)
         """
         # Calculate pregnancy-adjusted household size
-        pregnant_count = self.screen.household_members.filter(pregnant=True).count()
+        pregnant_count = sum(1 for member in self.screen.household_members.all() if member.pregnant)
         adjusted_household_size = self.screen.household_size + pregnant_count
 
         # Calculate income limit using adjusted household size
@@ -2,6 +2,7 @@ from unittest.mock import patch
 
 from django.test import SimpleTestCase, TestCase
 
+from programs.co_county_zips import counties_from_zip, zipcodes
 from programs.models import _FPL_DEFAULTS, FederalPoveryLimit, Program, _get_fpl_data
 from screener.models import WhiteLabel
 
@@ -91,3 +92,27 @@ class FederalPovertyLimitTests(SimpleTestCase):
                     list(range(1, FederalPoveryLimit.MAX_DEFINED_SIZE + 1)),
                 )
                 self.assertIn("additional", table)
+
+
+class CountiesFromZipTests(SimpleTestCase):
+    """counties_from_zip reads a ZIP -> counties index built once at import instead of
+    scanning every county's ZIP list per lookup. The index has to give back exactly what
+    the scan did, including the county order for ZIPs that straddle county lines."""
+
+    @staticmethod
+    def _scan(lookup_zip):
+        return [county for county, zips in zipcodes.items() for zip in zips if zip == lookup_zip]
+
+    def test_matches_the_linear_scan_for_every_zip(self):
+        all_zips = {zip for zips in zipcodes.values() for zip in zips}
+
+        for zip in all_zips:
+            self.assertEqual(counties_from_zip(zip), self._scan(zip), zip)
+
+    def test_unknown_zip_has_no_counties(self):
+        self.assertEqual(counties_from_zip("00000"), [])
+
+    def test_result_does_not_alias_the_index(self):
+        counties_from_zip("80205").append("Nowhere County")
+
+        self.assertNotIn("Nowhere County", counties_from_zip("80205"))
@@ -16,6 +16,6 @@ class CollegeAndFafsaSupport(UrgentNeedFunction):
         is_cambridge = self.screen.county == self.eligible_county
 
         # Condition 2:  Student
-        is_student = self.screen.household_members.filter(student=True).exists()
+        is_student = any(member.student for member in self.screen.household_members.all())
 
         return is_cambridge or is_student
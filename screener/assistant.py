@@ -14,20 +14,26 @@ or tells them to apply for benefits they already have (MFB-1427).
 See the ai-service repo's docs/ for the full API contract.
 """
 
+import hashlib
+import json
 import logging
 import os
 import re
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-import requests
+import httpx
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch, Q
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBase, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import permissions, status, views
-from rest_framework.request import Request
+from rest_framework import status
 from rest_framework.response import Response
 from sentry_sdk import capture_message
 
+from benefits.async_views import AsyncAPIView, http_client
 from programs.models import Program
 from parler.models import TranslationDoesNotExist
 
@@ -44,6 +50,9 @@ AI_SERVICE_URL = os.getenv("AI_SERVICE_URL", "http://localhost:8080")
 AI_SERVICE_TOKEN = os.getenv("AI_SERVICE_TOKEN", "")
 AI_SERVICE_TIMEOUT = 60
 
+# What ai-service streams a reply as, token by token, when asked to.
+EVENT_STREAM = "text/event-stream"
+
 # Upper bound on the client-supplied visible-programs list. Comfortably above the
 # largest white label's active program count; exists to bound untrusted input.
 MAX_VISIBLE_PROGRAMS = 256
@@ -72,6 +81,16 @@ _LOOKS_LIKE_INSURANCE = re.compile(r"medicaid|chip|medicare|mass_health|apple_he
 #       OneToOne `member.insurance`, which hasattr() would otherwise query per member)
 CONTEXT_PREFETCH = ("current_benefits__program", "household_members__insurance")
 
+# Assembled contexts are cached under a key covering everything _build_context reads
+# from the screen (see _context_cache_key), so reopening the assistant skips the
+# rebuild, and a new snapshot or a change to current benefits lands on a fresh key.
+# Program names and apply links come from admin-edited config, which the key can't
+# see, so an edit reaches open assistants within the timeout.
+CONTEXT_CACHE_TIMEOUT = 60 * 60
+# Bump when the context's shape changes, so entries written by the previous release
+# are ignored instead of served.
+_CONTEXT_CACHE_VERSION = "v1"
+
 
 def _ai_headers() -> dict:
     headers = {"Content-Type": "application/json"}
@@ -137,7 +156,9 @@ def _latest_snapshot(screen: Screen):
     try:
         return (
             EligibilitySnapshot.objects.filter(screen=screen, is_batch=False, had_error=False)
-            .prefetch_related("program_snapshots")
+            .prefetch_related(
+                Prefetch("program_snapshots", queryset=ProgramEligibilitySnapshot.objects.select_related("program"))
+            )
             .latest("submission_date")
         )
     except EligibilitySnapshot.DoesNotExist:
@@ -145,7 +166,18 @@ def _latest_snapshot(screen: Screen):
 
 
 def _apply_urls_by_name(screen: Screen, name_abbreviations: list[str], language_code: str) -> dict[str, str]:
-    """Map name_abbreviated -> apply link for the given programs (one query).
+    """Map name_abbreviated -> apply link for the given programs."""
+    if not name_abbreviations:
+        return {}
+    urls = _white_label_apply_urls(screen.white_label_id, language_code)
+    return {name: urls[name] for name in name_abbreviations if name in urls}
+
+
+def _white_label_apply_urls(white_label_id: int, language_code: str) -> dict[str, str]:
+    """Map name_abbreviated -> apply link for every program in the white label.
+
+    Built once per white label and language (one query plus the translations
+    prefetch) and cached, so assembling a context doesn't resolve translations.
 
     apply_button_link is a translated field, resolved through `_translated` so
     blank/placeholder links come back empty — the assistant must never receive an empty
@@ -158,19 +190,18 @@ def _apply_urls_by_name(screen: Screen, name_abbreviations: list[str], language_
     the current seed config already exceed the name cap (tx_wic at 198 chars, il_ibccp at
     174), so truncating here would have shipped two dead links.
     """
-    if not name_abbreviations:
-        return {}
+    cache_key = f"assistant_apply_urls:{_CONTEXT_CACHE_VERSION}:{white_label_id}:{language_code}"
+    urls = cache.get(cache_key)
+    if urls is not None:
+        return urls
 
     programs = (
-        Program.objects.filter(
-            white_label=screen.white_label,
-            name_abbreviated__in=name_abbreviations,
-        )
+        Program.objects.filter(white_label_id=white_label_id)
         .select_related("apply_button_link")
         .prefetch_related("apply_button_link__translations")
     )
 
-    urls: dict[str, str] = {}
+    urls = {}
     for program in programs:
         link = _translated(program.apply_button_link, language_code, max_len=None)
         if not link:
@@ -183,6 +214,8 @@ def _apply_urls_by_name(screen: Screen, name_abbreviations: list[str], language_
             )
             continue
         urls[program.name_abbreviated] = link
+
+    cache.set(cache_key, urls, timeout=CONTEXT_CACHE_TIMEOUT)
     return urls
 
 
@@ -460,6 +493,42 @@ def _build_context(screen: Screen, visible_programs: Optional[list[dict]] = None
     }
 
 
+def _context_cache_key(screen: Screen, visible_programs: Optional[list[dict]]) -> str:
+    """The cache key for the screen's context: its latest snapshot id, the language,
+    the client's visible programs, and the enrollment the gates read.
+
+    Current benefits and insurance come from CONTEXT_PREFETCH, so the only query here
+    is the snapshot id.
+    """
+    latest_snapshot_id = (
+        EligibilitySnapshot.objects.filter(screen=screen, is_batch=False, had_error=False)
+        .order_by("-submission_date")
+        .values_list("id", flat=True)
+        .first()
+    )
+    state = {
+        "snapshot": latest_snapshot_id,
+        "language": screen.get_language_code(),
+        # None (use the server filters) and [] (the page shows nothing) differ.
+        "visible_programs": visible_programs,
+        "current_benefits": sorted(benefit.program.name_abbreviated for benefit in screen.current_benefits.all()),
+        "insurance": sorted(screen.held_insurance_keys()),
+        "household_size": screen.household_size,
+    }
+    digest = hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()[:32]
+    return f"assistant_context:{_CONTEXT_CACHE_VERSION}:{screen.id}:{digest}"
+
+
+def _cached_context(screen: Screen, visible_programs: Optional[list[dict]] = None) -> dict:
+    """`_build_context`, cached per screen state (see CONTEXT_CACHE_TIMEOUT)."""
+    cache_key = _context_cache_key(screen, visible_programs)
+    context = cache.get(cache_key)
+    if context is None:
+        context = _build_context(screen, visible_programs)
+        cache.set(cache_key, context, timeout=CONTEXT_CACHE_TIMEOUT)
+    return context
+
+
 def _visible_programs(body: dict) -> Optional[list[dict]]:
     """Parse and sanitize the client's `visible_programs` list.
 
@@ -536,30 +605,83 @@ def _clean_value(value: object) -> Optional[int]:
     return int(value)
 
 
-def _proxy(method: str, path: str, json_body: dict) -> Response:
-    """Forward a request to mfb-ai-service and pass its response through."""
+async def _proxy(
+    request: HttpRequest, method: str, path: str, json_body: dict, stream: bool = False
+) -> HttpResponseBase:
+    """Forward a request to mfb-ai-service and pass its response through.
+
+    The call goes through the shared async client (benefits/async_views.py), so a
+    reply that takes the LLM a minute to write doesn't hold a worker for that minute.
+
+    With `stream`, ai-service is asked for server-sent events and, if it answers with
+    them, each chunk is relayed to the browser as it arrives instead of after the whole
+    reply has been generated. AI_SERVICE_TIMEOUT then bounds the wait between chunks
+    rather than the whole reply. Any other answer is handled like a normal call, so a
+    service that doesn't stream still works.
+    """
+    headers = _ai_headers()
+    if stream:
+        headers["Accept"] = EVENT_STREAM
+    client = http_client()
     try:
-        resp = requests.request(
-            method,
-            f"{AI_SERVICE_URL}{path}",
-            json=json_body,
-            headers=_ai_headers(),
-            timeout=AI_SERVICE_TIMEOUT,
-        )
-    except requests.RequestException as e:
-        return Response(
-            {"error": {"code": "ai_upstream_error", "message": str(e)}},
-            status=status.HTTP_502_BAD_GATEWAY,
+        resp = await client.send(
+            client.build_request(
+                method, f"{AI_SERVICE_URL}{path}", json=json_body, headers=headers, timeout=AI_SERVICE_TIMEOUT
+            ),
+            stream=True,
         )
+    except httpx.HTTPError as e:
+        return _upstream_error(str(e))
+    if stream and resp.headers.get("Content-Type", "").startswith(EVENT_STREAM):
+        if not isinstance(request, ASGIRequest):
+            # Under WSGI Django would read the relay on an event loop of its own, which
+            # the upstream connection doesn't belong to — and buffers it regardless.
+            chunks = [chunk async for chunk in _relay(resp)]
+            return HttpResponse(b"".join(chunks), status=resp.status_code, content_type=EVENT_STREAM)
+        response = StreamingHttpResponse(_relay(resp), status=resp.status_code, content_type=EVENT_STREAM)
+        # Keep caches and proxies (nginx buffers by default) from holding chunks back.
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+    try:
+        await resp.aread()
+    except httpx.HTTPError as e:
+        return _upstream_error(str(e))
+    finally:
+        await resp.aclose()
     try:
         body = resp.json()
     except ValueError:
-        body = {"error": {"code": "ai_upstream_error", "message": "Non-JSON response from AI service."}}
-        return Response(body, status=status.HTTP_502_BAD_GATEWAY)
+        return _upstream_error("Non-JSON response from AI service.")
     return Response(body, status=resp.status_code)
 
 
-def _body(request: Request) -> dict:
+def _upstream_error(message: str) -> Response:
+    return Response(
+        {"error": {"code": "ai_upstream_error", "message": message}},
+        status=status.HTTP_502_BAD_GATEWAY,
+    )
+
+
+async def _relay(resp: httpx.Response) -> AsyncIterator[bytes]:
+    """The upstream event stream's chunks as they arrive.
+
+    The status line has gone out by the time the stream breaks, so a failure is
+    reported to the browser as a final `error` event in the same shape as the
+    non-streaming error body.
+    """
+    try:
+        async for chunk in resp.aiter_bytes():
+            yield chunk
+    except httpx.HTTPError as e:
+        logger.warning("ai-service stream broke off: %s", e)
+        error = json.dumps({"error": {"code": "ai_upstream_error", "message": str(e)}})
+        yield f"event: error\ndata: {error}\n\n".encode()
+    finally:
+        await resp.aclose()
+
+
+def _body(request: HttpRequest) -> dict:
     """The request body as a dict.
 
     `request.data` is a list for a JSON array body and a QueryDict for a form post, so
@@ -568,44 +690,56 @@ def _body(request: Request) -> dict:
     return request.data if isinstance(request.data, dict) else {}
 
 
-class AssistantStartView(views.APIView):
+def _start_context(screen_uuid, visible_programs: Optional[list[dict]]) -> Optional[tuple[Screen, dict]]:
+    """The screen and its assistant context, or None if the white label has Benbot off."""
+    # CONTEXT_PREFETCH keeps _build_context's per-program enrollment checks, and the
+    # context cache key, on the zero-query path. _current_programs still issues its
+    # own query — it needs the translated names, which these prefetches don't carry.
+    screen = get_object_or_404(
+        Screen.objects.select_related("white_label").prefetch_related(*CONTEXT_PREFETCH),
+        uuid=screen_uuid,
+    )
+    if not screen.white_label.has_feature("benbot"):
+        return None
+    return screen, _cached_context(screen, visible_programs)
+
+
+class AssistantStartView(AsyncAPIView):
     """POST: open (or resume) a Benbot conversation for a screen."""
 
-    permission_classes = [permissions.AllowAny]
     # AllowAny + a proxy to a paid LLM: same shape as the REM/Places proxies, which
     # are throttled for the same reason. A start call also persists context in
     # ai-service, so it isn't only a cost concern.
     throttle_classes = [AssistantStartRateThrottle]
 
-    def post(self, request, screen_uuid):
-        # CONTEXT_PREFETCH keeps _build_context's per-program enrollment checks on the
-        # zero-query path. _current_programs still issues its own query — it needs the
-        # translated names, which these prefetches don't carry.
-        screen = get_object_or_404(
-            Screen.objects.select_related("white_label").prefetch_related(*CONTEXT_PREFETCH),
-            uuid=screen_uuid,
-        )
-        if not screen.white_label.has_feature("benbot"):
+    async def post(self, request, screen_uuid):
+        body = _body(request)
+        # Building the context is ORM work, so it runs on a thread; only the wait on
+        # ai-service happens on the event loop.
+        started = await sync_to_async(_start_context)(screen_uuid, _visible_programs(body))
+        if started is None:
             return Response({"error": {"code": "assistant_disabled"}}, status=status.HTTP_403_FORBIDDEN)
 
-        body = _body(request)
+        screen, context = started
         payload = {
             "screen_uuid": str(screen.uuid),
             "white_label": screen.white_label.code,
             "locale": body.get("locale", "en-US"),
-            "context": _build_context(screen, _visible_programs(body)),
+            "context": context,
         }
-        return _proxy("POST", "/v1/conversations", payload)
+        return await _proxy(request, "POST", "/v1/conversations", payload)
 
 
-class AssistantMessageView(views.APIView):
+class AssistantMessageView(AsyncAPIView):
     """POST: send a user message to an existing Benbot conversation."""
 
-    permission_classes = [permissions.AllowAny]
     throttle_classes = [AssistantMessageRateThrottle]
 
-    def post(self, request, screen_uuid, conversation_id):
-        screen = get_object_or_404(Screen, uuid=screen_uuid)
+    async def post(self, request, screen_uuid, conversation_id):
+        try:
+            screen = await Screen.objects.select_related("white_label").aget(uuid=screen_uuid)
+        except Screen.DoesNotExist:
+            raise Http404
         if not screen.white_label.has_feature("benbot"):
             return Response({"error": {"code": "assistant_disabled"}}, status=status.HTTP_403_FORBIDDEN)
 
@@ -614,4 +748,11 @@ class AssistantMessageView(views.APIView):
             "text": body.get("text", ""),
             "client_message_id": body.get("client_message_id"),
         }
-        return _proxy("POST", f"/v1/conversations/{conversation_id}/messages", payload)
+        # `"stream": true` asks for the reply as server-sent events (see _proxy).
+        return await _proxy(
+            request,
+            "POST",
+            f"/v1/conversations/{conversation_id}/messages",
+            payload,
+            stream=body.get("stream") is True,
+        )
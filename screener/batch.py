@@ -0,0 +1,130 @@
+"""
+Running eligibility over many stored screens, shared by the batch_snapshots,
+what_if_impact and validate commands.
+
+Screen ids are read newest first in keyset-paginated chunks and fanned out to a
+fork-based process pool; each worker opens its own database connection. PolicyEngine
+requests are rate limited across all workers by a SharedRateLimiter.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from django.db import connections
+from integrations.clients.policyengine import engines as pe_engines
+from screener.models import Screen
+
+# Ids read per keyset page.
+ID_CHUNK_SIZE = 500
+# Screens queued per worker, so the pool never waits on the parent.
+IN_FLIGHT_PER_WORKER = 4
+
+T = TypeVar("T")
+
+
+class SharedRateLimiter:
+    """Spaces calls at least 1/rate seconds apart across forked worker processes."""
+
+    def __init__(self, rate: float, context=multiprocessing):
+        self.interval = 1 / rate
+        self._next_start = context.Value("d", 0.0)
+
+    def wait(self):
+        with self._next_start.get_lock():
+            now = time.monotonic()
+            start = max(now, self._next_start.value)
+            self._next_start.value = start + self.interval
+        time.sleep(start - now)
+
+
+def load_screen(screen_id: int) -> Screen:
+    """A screen with the relations the calculators read, as the eligibility view loads it."""
+    return (
+        Screen.objects.select_related("white_label")
+        .prefetch_related(
+            "household_members",
+            "household_members__income_streams",
+            "household_members__insurance",
+            "household_members__energy_calculator",
+            "expenses",
+            "energy_calculator",
+            "current_benefits__program",
+        )
+        .get(id=screen_id)
+    )
+
+
+def screen_ids(screens) -> Iterator[int]:
+    """Ids of `screens`, newest first, one keyset page at a time."""
+    screens = screens.order_by("-id").values_list("id", flat=True)
+    before_id = None
+    while True:
+        page = screens if before_id is None else screens.filter(id__lt=before_id)
+        ids = list(page[:ID_CHUNK_SIZE])
+        yield from ids
+        if len(ids) < ID_CHUNK_SIZE:
+            return
+        before_id = ids[-1]
+
+
+def _init_worker(limiter: SharedRateLimiter):
+    pe_engines.set_request_throttle(limiter.wait)
+
+
+def run_screens(
+    work: Callable[[int], T],
+    ids: Iterable[int],
+    workers: int,
+    pe_rate: float,
+    submitted: Optional[Callable[[int], None]] = None,
+) -> Iterator[tuple[int, T]]:
+    """Yield (screen id, work(screen id)) as screens finish, in completion order.
+
+    `work` runs in the worker processes, so it must be picklable (a module-level
+    function, or a functools.partial of one). `submitted` is called in this process
+    with each id as it is handed out.
+    """
+    limiter = SharedRateLimiter(pe_rate, multiprocessing.get_context("fork"))
+
+    if workers <= 1:
+        pe_engines.set_request_throttle(limiter.wait)
+        try:
+            for screen_id in ids:
+                if submitted is not None:
+                    submitted(screen_id)
+                yield screen_id, work(screen_id)
+        finally:
+            pe_engines.set_request_throttle(None)
+        return
+
+    ids = iter(ids)
+    # Read the first page of ids, then close the connection so the forked workers
+    # don't inherit it; each opens its own and the parent reconnects for later pages.
+    first = next(ids, None)
+    if first is None:
+        return
+    connections.close_all()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_worker,
+        initargs=(limiter,),
+    ) as pool:
+        in_flight = {}
+        for screen_id in chain([first], ids):
+            if submitted is not None:
+                submitted(screen_id)
+            in_flight[pool.submit(work, screen_id)] = screen_id
+            if len(in_flight) >= workers * IN_FLIGHT_PER_WORKER:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
@@ -0,0 +1,163 @@
+"""
+Views and materialized views built on the screener tables outside of migrations, like the reporting views
+configuration/management/commands/refresh_views.py refreshes.
+
+Postgres won't drop a table or column a view reads, so a migration that does has to take those views out of the
+way and put them back afterwards:
+
+    views = DependentViews(["screener_programeligibilitysnapshot"], renames={...})
+    operations = [views.save(), ...the change..., views.restore()]
+
+save() keeps the definition, indexes, owner, grants and comment of every view that reads the tables, directly or
+through other views, and drops them. restore() creates them again in dependency order, reading each table in
+`renames` under its new name. A materialized view that had data is filled again when it is created, so restore()
+takes as long as refreshing those views. Both operations reverse, so the migration can be unapplied.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.db import migrations
+
+# Every view reading one of the tables, directly or through other views, with the length of the longest chain of
+# views between it and the tables. Creating them in that order creates each view after the views it reads.
+DEPENDENTS_SQL = """
+WITH RECURSIVE dependents(oid, depth) AS (
+    SELECT rewrite.ev_class, 1
+    FROM pg_depend
+    JOIN pg_rewrite rewrite ON rewrite.oid = pg_depend.objid
+    WHERE pg_depend.classid = 'pg_rewrite'::regclass
+      AND pg_depend.refclassid = 'pg_class'::regclass
+      AND pg_depend.refobjid = ANY(ARRAY(SELECT to_regclass(name) FROM unnest(%s::text[]) AS name))
+      AND rewrite.ev_class <> pg_depend.refobjid
+    UNION
+    SELECT rewrite.ev_class, dependents.depth + 1
+    FROM dependents
+    JOIN pg_depend ON pg_depend.refobjid = dependents.oid
+        AND pg_depend.classid = 'pg_rewrite'::regclass
+        AND pg_depend.refclassid = 'pg_class'::regclass
+    JOIN pg_rewrite rewrite ON rewrite.oid = pg_depend.objid
+    WHERE rewrite.ev_class <> dependents.oid
+),
+depths AS (
+    SELECT oid, max(depth) AS depth FROM dependents GROUP BY oid
+)
+SELECT
+    view.oid,
+    format('%%I.%%I', namespace.nspname, view.relname),
+    view.relkind,
+    view.relispopulated,
+    array_to_string(view.reloptions, ', '),
+    pg_get_viewdef(view.oid),
+    pg_get_userbyid(view.relowner) <> current_user,
+    quote_ident(pg_get_userbyid(view.relowner)),
+    obj_description(view.oid, 'pg_class')
+FROM depths
+JOIN pg_class view ON view.oid = depths.oid
+JOIN pg_namespace namespace ON namespace.oid = view.relnamespace
+ORDER BY depths.depth, view.relname
+"""
+
+INDEXES_SQL = "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s ORDER BY indexrelid"
+
+GRANTS_SQL = """
+SELECT
+    CASE WHEN acl.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(acl.grantee)) END,
+    acl.privilege_type,
+    acl.is_grantable
+FROM pg_class, aclexplode(pg_class.relacl) AS acl
+WHERE pg_class.oid = %s AND acl.grantee <> pg_class.relowner
+ORDER BY 1, 2
+"""
+
+
+@dataclass
+class SavedView:
+    name: str
+    materialized: bool
+    populated: bool
+    options: str
+    definition: str
+    owner: str
+    set_owner: bool
+    comment: str
+    indexes: list[str]
+    grants: list[tuple[str, str, bool]]
+
+    @property
+    def kind(self) -> str:
+        return "MATERIALIZED VIEW" if self.materialized else "VIEW"
+
+    def create_sql(self, renames: dict[str, str]) -> list[str]:
+        definition = self.definition.strip().rstrip(";")
+        for old, new in renames.items():
+            definition = re.sub(rf"\b{re.escape(old)}\b", new, definition)
+        options = f" WITH ({self.options})" if self.options else ""
+        create = f"CREATE {self.kind} {self.name}{options} AS {definition}"
+        if self.materialized:
+            create += " WITH DATA" if self.populated else " WITH NO DATA"
+
+        statements = [create, *self.indexes]
+        if self.set_owner:
+            statements.append(f"ALTER {self.kind} {self.name} OWNER TO {self.owner}")
+        for grantee, privilege, grantable in self.grants:
+            statements.append(
+                f"GRANT {privilege} ON {self.name} TO {grantee}{' WITH GRANT OPTION' if grantable else ''}"
+            )
+        return statements
+
+
+def saved_views(cursor, tables: list[str]) -> list[SavedView]:
+    """The views reading the tables, in the order to create them."""
+    cursor.execute(DEPENDENTS_SQL, [tables])
+    views = []
+    for oid, name, relkind, populated, options, definition, set_owner, owner, comment in cursor.fetchall():
+        cursor.execute(INDEXES_SQL, [oid])
+        indexes = [indexdef for (indexdef,) in cursor.fetchall()]
+        cursor.execute(GRANTS_SQL, [oid])
+        grants = cursor.fetchall()
+        views.append(
+            SavedView(name, relkind == "m", populated, options, definition, owner, set_owner, comment, indexes, grants)
+        )
+    return views
+
+
+class DependentViews:
+    def __init__(self, tables: list[str], renames: dict[str, str] = None):
+        self.tables = tables
+        self.renames = renames or {}
+        self.saved: list[SavedView] = []
+
+    def save(self) -> migrations.RunPython:
+        return migrations.RunPython(self._save, self._restore_unrenamed)
+
+    def restore(self) -> migrations.RunPython:
+        return migrations.RunPython(self._restore, self._save_renamed)
+
+    def _save(self, apps, schema_editor):
+        self._save_views(schema_editor, self.tables)
+
+    def _save_renamed(self, apps, schema_editor):
+        self._save_views(schema_editor, [self.renames.get(table, table) for table in self.tables])
+
+    def _restore(self, apps, schema_editor):
+        self._restore_views(schema_editor, self.renames)
+
+    def _restore_unrenamed(self, apps, schema_editor):
+        self._restore_views(schema_editor, {new: old for old, new in self.renames.items()})
+
+    def _save_views(self, schema_editor, tables: list[str]):
+        with schema_editor.connection.cursor() as cursor:
+            self.saved = saved_views(cursor, tables)
+            # Views reading other views come last, so drop from the end.
+            for view in reversed(self.saved):
+                cursor.execute(f"DROP {view.kind} {view.name}")
+
+    def _restore_views(self, schema_editor, renames: dict[str, str]):
+        with schema_editor.connection.cursor() as cursor:
+            for view in self.saved:
+                for statement in view.create_sql(renames):
+                    cursor.execute(statement)
+                if view.comment is not None:
+                    cursor.execute(f"COMMENT ON {view.kind} {view.name} IS %s", [view.comment])
+        self.saved = []
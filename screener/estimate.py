@@ -0,0 +1,114 @@
+"""
+In-memory screens for the quick eligibility estimate (EligibilityEstimateView).
+
+unsaved_screen() builds the Screen, household members, income streams, expenses and
+current benefits that ScreenSerializer.create() would save, without saving any of them.
+Every reverse relation the calculators read is filled in as if it had been prefetched,
+so `screen.household_members.all()`, `member.income_streams.all()`, `member.insurance`
+and the rest are served from memory, as they are for the prefetched screen
+EligibilityTranslationView loads.
+
+The relations are cached as `.none()` querysets. A helper that builds a new query on one
+(`.filter()`, `.order_by()`) gets an empty result rather than querying for rows that do
+not exist, so the helpers the calculators call iterate `.all()` instead.
+"""
+
+from typing import Iterable, Optional
+
+from django.db import models
+
+from programs.models import Program
+from .models import (
+    CurrentBenefit,
+    EnergyCalculatorMember,
+    EnergyCalculatorScreen,
+    Expense,
+    HouseholdMember,
+    IncomeStream,
+    Insurance,
+    Screen,
+)
+from .serializers import _derived_current_benefit_names
+
+# Reverse relation managers refuse to run for an instance without a pk, even when the
+# relation is prefetched. No row has id 0, and the screen is never saved.
+UNSAVED_SCREEN_ID = 0
+
+
+def _prefetch(instance: models.Model, accessor: str, objects: Iterable[models.Model]):
+    """Cache `objects` as the result of `instance.<accessor>.all()`, as prefetch_related does."""
+    model = getattr(type(instance), accessor).rel.related_model
+    queryset = model._default_manager.none()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance.__dict__.setdefault("_prefetched_objects_cache", {})[accessor] = queryset
+
+
+def _set_one_to_one(instance: models.Model, accessor: str, obj: Optional[models.Model]):
+    """Cache the reverse one-to-one `instance.<accessor>`. None reads as a missing row."""
+    getattr(type(instance), accessor).related.set_cached_value(instance, obj)
+
+
+def unsaved_screen(validated_data: dict) -> Screen:
+    """An unsaved Screen for validated ScreenSerializer data, with its relations in memory."""
+    data = dict(validated_data)
+    household_members = data.pop("household_members")
+    expenses = data.pop("expenses")
+    energy_calculator_screen = data.pop("energy_calculator", None)
+    current_benefits = data.pop("current_benefits", [])
+
+    screen = Screen(**data, id=UNSAVED_SCREEN_ID, completed=False)
+
+    members = []
+    screen_incomes = []
+    # The PolicyEngine payload keys people by member id, so each member needs its own.
+    for member_id, member in enumerate(household_members, start=1):
+        member = dict(member)
+        incomes = member.pop("income_streams")
+        insurance = member.pop("insurance", None)
+        energy_calculator_member = member.pop("energy_calculator", None)
+
+        household_member = HouseholdMember(**member, id=member_id, screen=screen)
+        member_incomes = [
+            IncomeStream(**income, screen=screen, household_member=household_member) for income in incomes
+        ]
+        _prefetch(household_member, "income_streams", member_incomes)
+        _prefetch(household_member, "expenses", [])
+        _set_one_to_one(
+            household_member,
+            "insurance",
+            None if insurance is None else Insurance(**insurance, household_member=household_member),
+        )
+        _set_one_to_one(
+            household_member,
+            "energy_calculator",
+            (
+                None
+                if energy_calculator_member is None
+                else EnergyCalculatorMember(**energy_calculator_member, household_member=household_member)
+            ),
+        )
+        members.append(household_member)
+        screen_incomes.extend(member_incomes)
+
+    _prefetch(screen, "household_members", members)
+    _prefetch(screen, "income_streams", screen_incomes)
+    _prefetch(screen, "expenses", [Expense(**expense, screen=screen) for expense in expenses])
+    _prefetch(screen, "validations", [])
+    _set_one_to_one(
+        screen,
+        "energy_calculator",
+        (
+            None
+            if energy_calculator_screen is None
+            else EnergyCalculatorScreen(**energy_calculator_screen, screen=screen)
+        ),
+    )
+
+    # Resolved like _write_current_benefits(): the requested names and the names implied
+    # by the screen (which reads the members above), in the screen's white label.
+    names = set(current_benefits) | _derived_current_benefit_names(screen)
+    programs = Program.objects.filter(white_label=screen.white_label, name_abbreviated__in=names)
+    _prefetch(screen, "current_benefits", [CurrentBenefit(screen=screen, program=program) for program in programs])
+
+    return screen
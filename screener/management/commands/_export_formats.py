@@ -0,0 +1,232 @@
+"""
+COPY extraction and Parquet output for export_screener_data.
+
+Both the ORM and the COPY engine stream: the ORM reads with a server-side cursor, and COPY spools to a
+temporary file that pyarrow reads back a block at a time. Parquet files are written a row group at a time,
+so memory stays flat however large the export.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from django.db import connection
+from django.db.models import Field, QuerySet
+
+PARQUET_COMPRESSION = "zstd"
+# Rows per Parquet row group. Bigger groups compress better; this bounds the rows held in memory.
+ROW_GROUP_SIZE = 50_000
+# Directory name Hive readers use for a NULL partition value.
+HIVE_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# Bytes of COPY output pyarrow parses at a time.
+COPY_BLOCK_SIZE = 8 * 1024 * 1024
+
+_ARROW_TYPES = {
+    "AutoField": pa.int64(),
+    "BigAutoField": pa.int64(),
+    "IntegerField": pa.int64(),
+    "BigIntegerField": pa.int64(),
+    "PositiveIntegerField": pa.int64(),
+    "PositiveSmallIntegerField": pa.int64(),
+    "SmallIntegerField": pa.int64(),
+    "BooleanField": pa.bool_(),
+    "DateField": pa.date32(),
+    "DateTimeField": pa.timestamp("us", tz="UTC"),
+    "FloatField": pa.float64(),
+}
+
+
+def _column_type(field: Field | None) -> str | None:
+    """Internal type of the value exported for a field. Relations export the related key."""
+    if field is None:
+        return None
+    while field.is_relation:
+        field = field.target_field
+    return field.get_internal_type()
+
+
+def arrow_schema(columns: dict[str, Field | None]) -> pa.Schema:
+    """Parquet schema for the exported columns. Columns without a model field are strings."""
+    schema = []
+    for name, field in columns.items():
+        column_type = _column_type(field)
+        if column_type == "DecimalField":
+            arrow_type = pa.decimal128(field.max_digits, field.decimal_places)
+        else:
+            # Text, UUIDs and JSON are stored as strings.
+            arrow_type = _ARROW_TYPES.get(column_type, pa.string())
+        schema.append(pa.field(name, arrow_type))
+    return pa.schema(schema)
+
+
+def _copy_statement(queryset: QuerySet, columns: dict[str, Field | None]) -> str:
+    """COPY the values() queryset out as CSV, in the same text format the ORM engine writes."""
+    query = queryset.query
+    # The order values() selects in: extras, then fields, then annotations.
+    selected = [*query.extra_select, *query.values_select, *query.annotation_select]
+    sql, params = query.sql_with_params()
+    with connection.cursor() as cursor:
+        select = cursor.mogrify(sql, params).decode()
+
+    quote = connection.ops.quote_name
+    expressions = []
+    for name, field in columns.items():
+        column = quote(name)
+        column_type = _column_type(field)
+        if column_type == "BooleanField":
+            expressions.append(f"CASE WHEN {column} THEN 'True' WHEN NOT {column} THEN 'False' END AS {column}")
+        elif column_type == "DateTimeField":
+            expressions.append(
+                f"""to_char({column} AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS.US"+00:00"') AS {column}"""
+            )
+        else:
+            expressions.append(column)
+
+    aliases = ", ".join(quote(name) for name in selected)
+    return (
+        f"COPY (SELECT {', '.join(expressions)} FROM ({select}) AS export ({aliases})) "
+        "TO STDOUT WITH (FORMAT csv, HEADER true)"
+    )
+
+
+def copy_csv(queryset: QuerySet, columns: dict[str, Field | None], file) -> int:
+    """Write the queryset to a binary file as CSV with COPY. Returns the number of rows."""
+    with connection.cursor() as cursor:
+        cursor.copy_expert(_copy_statement(queryset, columns), file)
+        return cursor.rowcount
+
+
+def _copy_batches(queryset: QuerySet, columns: dict[str, Field | None], schema: pa.Schema):
+    with tempfile.TemporaryFile() as spool:
+        copy_csv(queryset, columns, spool)
+        spool.seek(0)
+        reader = pa_csv.open_csv(
+            spool,
+            read_options=pa_csv.ReadOptions(block_size=COPY_BLOCK_SIZE),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=schema,
+                true_values=["True"],
+                false_values=["False"],
+                # COPY writes NULL unquoted and empty strings quoted.
+                null_values=[""],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        yield from reader
+
+
+def _orm_batches(queryset: QuerySet, columns: dict[str, Field | None], schema: pa.Schema, chunk_size: int):
+    to_text = {}
+    for name, field in columns.items():
+        column_type = _column_type(field)
+        if column_type == "JSONField":
+            to_text[name] = json.dumps
+        elif column_type == "UUIDField":
+            to_text[name] = str
+
+    rows = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        for name, convert in to_text.items():
+            if row[name] is not None:
+                row[name] = convert(row[name])
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield pa.RecordBatch.from_pylist(rows, schema=schema)
+            rows = []
+    if rows:
+        yield pa.RecordBatch.from_pylist(rows, schema=schema)
+
+
+def record_batches(queryset: QuerySet, columns: dict[str, Field | None], engine: str, chunk_size: int):
+    """Stream a values() queryset as Arrow record batches, read through the ORM or with COPY."""
+    schema = arrow_schema(columns)
+    if engine == "copy":
+        return _copy_batches(queryset, columns, schema)
+    return _orm_batches(queryset, columns, schema, chunk_size)
+
+
+def _row_groups(batches, schema: pa.Schema):
+    """Regroup record batches into tables of ROW_GROUP_SIZE rows."""
+    pending = []
+    pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= ROW_GROUP_SIZE:
+            yield pa.Table.from_batches(pending, schema=schema)
+            pending = []
+            pending_rows = 0
+    if pending:
+        yield pa.Table.from_batches(pending, schema=schema)
+
+
+def _write_partitioned(path: str, schema: pa.Schema, tables, partition_by: list[str], basename: str, append: bool):
+    # pyarrow's dataset writer pulls batches from its own threads, which would read the queryset on
+    # another database connection, so split each row group into one open file per partition here.
+    if os.path.exists(path) and not append:
+        shutil.rmtree(path)
+    file_schema = pa.schema([field for field in schema if field.name not in partition_by])
+    writers = {}
+    try:
+        for table in tables:
+            for key in table.group_by(partition_by).aggregate([]).to_pylist():
+                mask = None
+                for column, value in key.items():
+                    match = pc.is_null(table[column]) if value is None else pc.equal(table[column], value)
+                    mask = match if mask is None else pc.and_(mask, match)
+                partition = tuple(key[column] for column in partition_by)
+                if partition not in writers:
+                    directory = os.path.join(
+                        path,
+                        *(
+                            f"{column}={HIVE_NULL_PARTITION if value is None else value}"
+                            for column, value in zip(partition_by, partition)
+                        ),
+                    )
+                    os.makedirs(directory, exist_ok=True)
+                    writers[partition] = pq.ParquetWriter(
+                        os.path.join(directory, f"{basename}.parquet"), file_schema, compression=PARQUET_COMPRESSION
+                    )
+                writers[partition].write_table(table.filter(mask).select(file_schema.names))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def write_parquet(
+    path: str,
+    schema: pa.Schema,
+    batches,
+    partition_by: list[str] | None = None,
+    basename: str = "part-0",
+    append: bool = False,
+) -> int:
+    """
+    Write record batches to a Parquet file at `path`, or with `partition_by` to a hive-partitioned
+    directory (path/white_label_code=co/submission_month=2024-06/part-0.parquet). Returns the number of rows.
+
+    A partitioned directory is replaced unless `append` is set, in which case files named `basename`
+    are added alongside the ones earlier runs wrote.
+    """
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for table in _row_groups(batches, schema):
+            rows += table.num_rows
+            yield table
+
+    if partition_by:
+        _write_partitioned(path, schema, counted(), partition_by, basename, append)
+        return rows
+
+    with pq.ParquetWriter(path, schema, compression=PARQUET_COMPRESSION) as writer:
+        for table in counted():
+            writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+    return rows
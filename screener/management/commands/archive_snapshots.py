@@ -0,0 +1,182 @@
+"""
+Keep the partitioned eligibility snapshot tables in shape. Run it on a schedule:
+
+- Adds the monthly screener_eligibilitysnapshot partitions for the next --months-ahead months, so new
+  snapshots never land in the default partition (see screener/partitions.py).
+- Moves batch snapshots older than --older-than days to a gzipped JSON lines file and deletes them, with their
+  program results. A screen's latest snapshot, and snapshots with an NPS score, are kept.
+- With --delete-orphans, deletes program results and NPS scores whose snapshot is gone. Their foreign keys to
+  the partitioned table have no database constraint, so a delete that goes around Django leaves them behind.
+
+Each line of the archive is a snapshot with its program results in the shape of ProgramEligibilityExport. Each
+chunk is written and synced to the file before it is deleted, and reruns append to the same file:
+
+    python manage.py archive_snapshots --output /backups/batch-snapshots.jsonl.gz
+"""
+
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+from typing import Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from screener.models import EligibilitySnapshot, NPSScore, ProgramEligibilitySnapshot
+from screener.partitions import (
+    SNAPSHOT_PARTITION_COLUMN,
+    SNAPSHOT_TABLE,
+    add_months,
+    ensure_month_partitions,
+    is_partitioned,
+)
+
+SNAPSHOT_FIELDS = ("id", "screen_id", "submission_date", "is_batch", "had_error")
+PROGRAM_FIELDS = (
+    "eligibility_snapshot_id",
+    "name",
+    "name_abbreviated",
+    "new",
+    "eligible",
+    "estimated_value",
+    "estimated_delivery_time",
+    "estimated_application_time",
+    "failed_tests",
+    "passed_tests",
+)
+
+
+class Command(BaseCommand):
+    help = """
+    Add upcoming eligibility snapshot partitions, and move old batch snapshots to an archive file.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Gzipped JSON lines file to append archived snapshots to (required unless --dry-run)",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=180,
+            help="Archive batch snapshots submitted more than this many days ago (default: 180)",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Months after the current one to have snapshot partitions for (default: 3)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1_000,
+            help="Snapshots archived per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--delete-orphans",
+            action="store_true",
+            help="Also delete program results and NPS scores whose snapshot no longer exists",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show how many snapshots would be archived without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        output: Optional[str] = options["output"]
+        dry_run = options["dry_run"]
+        if output is None and not dry_run:
+            raise CommandError("--output is required unless --dry-run is used")
+
+        if not dry_run:
+            self._add_partitions(options["months_ahead"])
+
+        snapshots = self._archivable(timezone.now() - timedelta(days=options["older_than"]))
+        if dry_run:
+            self.stdout.write(f"Would archive {snapshots.count()} batch snapshots")
+            if options["delete_orphans"]:
+                for orphans in self._orphans():
+                    self.stdout.write(
+                        f"Would delete {orphans.count()} orphaned {orphans.model._meta.verbose_name_plural}"
+                    )
+            return
+
+        archived = self._archive(snapshots, output, options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} batch snapshots to {output}"))
+
+        if options["delete_orphans"]:
+            for orphans in self._orphans():
+                deleted = self._delete(orphans, options["chunk_size"])
+                self.stdout.write(f"Deleted {deleted} orphaned {orphans.model._meta.verbose_name_plural}")
+
+    def _add_partitions(self, months_ahead: int):
+        if not is_partitioned(SNAPSHOT_TABLE):
+            self.stdout.write(f"{SNAPSHOT_TABLE} is not partitioned, not adding partitions")
+            return
+        this_month = timezone.now().date().replace(day=1)
+        created = ensure_month_partitions(
+            SNAPSHOT_TABLE, SNAPSHOT_PARTITION_COLUMN, this_month, add_months(this_month, months_ahead)
+        )
+        for name in created:
+            self.stdout.write(f"Added partition {name}")
+
+    def _archivable(self, cutoff):
+        """Batch snapshots from before the cutoff that a later snapshot of the same screen has replaced."""
+        newer = EligibilitySnapshot.objects.filter(screen_id=OuterRef("screen_id"), id__gt=OuterRef("id"))
+        return EligibilitySnapshot.objects.filter(
+            Exists(newer), is_batch=True, submission_date__lt=cutoff, nps_score__isnull=True
+        )
+
+    def _archive(self, snapshots, output: str, chunk_size: int) -> int:
+        archived = 0
+        after_id = 0
+        with open(output, "ab") as raw, gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+            while chunk := list(snapshots.filter(id__gt=after_id).order_by("id").values(*SNAPSHOT_FIELDS)[:chunk_size]):
+                after_id = chunk[-1]["id"]
+                ids = [snapshot["id"] for snapshot in chunk]
+
+                programs = defaultdict(list)
+                rows = (
+                    ProgramEligibilitySnapshot.objects.expanded()
+                    .filter(eligibility_snapshot_id__in=ids)
+                    .order_by("id")
+                    .values(*PROGRAM_FIELDS)
+                )
+                for row in rows:
+                    programs[row.pop("eligibility_snapshot_id")].append(row)
+
+                for snapshot in chunk:
+                    line = {**snapshot, "programs": programs[snapshot["id"]]}
+                    archive.write(json.dumps(line, cls=DjangoJSONEncoder).encode() + b"\n")
+                # Make sure the chunk is on disk before its rows are deleted.
+                archive.flush()
+                os.fsync(raw.fileno())
+
+                with transaction.atomic():
+                    EligibilitySnapshot.objects.filter(id__in=ids).delete()
+                archived += len(chunk)
+        return archived
+
+    def _orphans(self):
+        """Program results and NPS scores whose snapshot no longer exists."""
+        snapshot = EligibilitySnapshot.objects.filter(id=OuterRef("eligibility_snapshot_id"))
+        return [
+            ProgramEligibilitySnapshot.objects.filter(~Exists(snapshot)),
+            NPSScore.objects.filter(~Exists(snapshot)),
+        ]
+
+    def _delete(self, orphans, chunk_size: int) -> int:
+        deleted = 0
+        while ids := list(orphans.values_list("id", flat=True)[:chunk_size]):
+            orphans.model.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+        return deleted
@@ -1,8 +1,95 @@
-from django.core.management.base import BaseCommand
+"""
+Creates batch eligibility snapshots for completed screens.
+
+Screens are read newest first and fanned out to a process pool (see screener/batch.py).
+PolicyEngine requests are rate limited across all workers (--pe-rate) rather than
+sleeping between screens.
+
+With --checkpoint, progress is written to a file as screens finish and a rerun with
+the same file and filters carries on from where the previous one stopped. The file
+is removed once every matching screen has been processed.
+
+Usage:
+    python manage.py batch_snapshots --white-label co --limit -1 --workers 8 \\
+        --checkpoint /tmp/co-snapshots.json
+"""
+
+import json
+import os
+import time
+from collections import Counter, deque
+from itertools import islice
+from typing import Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from screener.batch import load_screen, run_screens, screen_ids
 from screener.models import Screen
 from screener.views import eligibility_results
-from tqdm import trange
-import time
+from tqdm import tqdm
+
+# Completed screens between checkpoint writes.
+CHECKPOINT_EVERY = 50
+
+
+def snapshot_screen(screen_id: int) -> Optional[tuple[str, str]]:
+    """Snapshot one screen. Returns (error type, message) if it failed."""
+    try:
+        eligibility_results(load_screen(screen_id), batch=True)
+    except Exception as e:
+        return type(e).__name__, str(e)
+    return None
+
+
+class Checkpoint:
+    """The id every screen above which (in run order) has been snapshotted.
+
+    Screens finish out of order in the pool, so the saved position only moves past a
+    screen once every screen submitted before it has finished too.
+    """
+
+    def __init__(self, path: Optional[str], filters: dict):
+        self.path = path
+        self.filters = filters
+        self.before_id: Optional[int] = None
+        self._submitted = deque()
+        self._finished = set()
+        self._unsaved = 0
+
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved["filters"] != filters:
+                raise CommandError(
+                    f"Checkpoint {path} was written for {saved['filters']}, not {filters}. "
+                    "Use the same options or remove the file."
+                )
+            self.before_id = saved["before_id"]
+
+    def submitted(self, screen_id: int):
+        self._submitted.append(screen_id)
+
+    def finished(self, screen_id: int):
+        self._finished.add(screen_id)
+        while self._submitted and self._submitted[0] in self._finished:
+            self.before_id = self._submitted.popleft()
+            self._finished.remove(self.before_id)
+
+        self._unsaved += 1
+        if self._unsaved >= CHECKPOINT_EVERY:
+            self.save()
+
+    def save(self):
+        self._unsaved = 0
+        if self.path is None or self.before_id is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"filters": self.filters, "before_id": self.before_id}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class Command(BaseCommand):
@@ -17,6 +104,23 @@ class Command(BaseCommand):
         parser.add_argument("--all", default=False, type=bool)
         parser.add_argument("--new", default=False, type=bool)
         parser.add_argument("--white-label", default="co", type=str)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes. 1 runs every screen in this process (default: CPU count)",
+        )
+        parser.add_argument(
+            "--pe-rate",
+            type=float,
+            default=5.0,
+            help="Maximum PolicyEngine requests per second across all workers (default: 5)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            help="File to record progress in; rerunning with the same file resumes the run",
+        )
 
     def handle(self, *args, **options):
         # Get the screens
@@ -31,17 +135,44 @@ class Command(BaseCommand):
         if options["white_label"]:
             screens = screens.filter(white_label__code=options["white_label"])
 
-        # List[:None] is everything in the list
+        filters = {key: options[key] for key in ("all", "new", "white_label")}
+        checkpoint = Checkpoint(options["checkpoint"], filters)
+        if checkpoint.before_id is not None:
+            screens = screens.filter(id__lt=checkpoint.before_id)
+            self.stdout.write(f"Resuming from {checkpoint.path}, before screen {checkpoint.before_id}")
+
+        total = screens.count()
         limit = None if options["limit"] == -1 else options["limit"]
-        screens = screens.order_by("-submission_date")[:limit]
+        if limit is not None:
+            total = min(total, limit)
+        ids = islice(screen_ids(screens), limit)
 
-        # Calculate eligibility for each screen
         errors = []
-        for i in trange(len(screens), desc="Screens"):
-            try:
-                eligibility_results(screens[i], batch=True)
-                time.sleep(1)
-            except Exception as e:
-                errors.append(str(screens[i].id) + ": " + str(e))
+        error_counts = Counter()
+        processed = 0
+        start = time.monotonic()
+        try:
+            with tqdm(total=total, desc="Screens") as progress:
+                for screen_id, error in run_screens(
+                    snapshot_screen, ids, options["workers"], options["pe_rate"], checkpoint.submitted
+                ):
+                    processed += 1
+                    progress.update()
+                    checkpoint.finished(screen_id)
+                    if error is not None:
+                        error_type, message = error
+                        error_counts[error_type] += 1
+                        errors.append(f"{screen_id}: {error_type}: {message}")
+        finally:
+            checkpoint.save()
+
+        if processed == total and (limit is None or processed < limit):
+            checkpoint.remove()
+
+        seconds = time.monotonic() - start
+        rate = processed / seconds if seconds else 0.0
+        self.stdout.write(f"Processed {processed} screens in {seconds:.1f}s ({rate:.2f} screens/sec)")
         if len(errors):
+            counts = "\n".join(f"  {error_type}: {count}" for error_type, count in error_counts.most_common())
+            self.stdout.write(self.style.ERROR(f"{len(errors)} screens had errors:\n{counts}"))
             self.stdout.write(self.style.ERROR("The following screens had errors:\n" + "\n".join(errors)))
@@ -0,0 +1,143 @@
+"""
+Post queued referrer webhooks (see screener/webhooks.py). Runs as a long-lived worker:
+
+    python manage.py deliver_webhooks
+
+Requests are posted from a thread pool, while claiming deliveries, building request bodies and saving outcomes
+stay on the main thread. Several workers can run at once, though each only limits the requests a referrer has
+in flight from that worker. --once delivers what is due and exits, which is handy locally and from cron.
+--stats prints per-referrer delivery metrics instead.
+"""
+
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sentry_sdk import capture_exception
+
+from screener.webhooks import Attempt, Hook, claim_batches, delivery_stats, post, record_attempt
+
+STATS_COLUMNS = (
+    "queued",
+    "delivered",
+    "failed",
+    "waiting",
+    "retried",
+    "avg_attempts",
+    "avg_duration_ms",
+    "oldest_waiting_seconds",
+)
+
+
+class Command(BaseCommand):
+    help = """
+    Post queued referrer webhooks, retrying failed ones with backoff.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver everything that is due, then exit",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Webhook requests in flight at a time across all referrers (default: 8)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between checks for due deliveries (default: 2)",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print delivery metrics per referrer and exit",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=1,
+            help="With --stats, cover deliveries queued in the last this many days (default: 1)",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self._print_stats(timezone.now() - timedelta(days=options["days"]))
+            return
+
+        delivered, failed = self._deliver(options["threads"], options["poll_interval"], options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Posted {delivered + failed} webhook requests, {failed} failed"))
+
+    def _deliver(self, threads: int, poll_interval: float, once: bool) -> tuple[int, int]:
+        delivered = 0
+        failed = 0
+        hooks: dict[int, Hook] = {}
+        # Open requests, and how many there are per referrer id.
+        open_requests = {}
+        in_flight = Counter()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while True:
+                for batch in claim_batches(in_flight):
+                    referrer = batch[0].referrer
+                    if referrer.id not in hooks:
+                        hooks[referrer.id] = Hook(referrer)
+                    try:
+                        body = hooks[referrer.id].payload(batch)
+                    except Exception as e:
+                        # Record it like a failed request, so the batch is retried later rather than straight away.
+                        capture_exception(e)
+                        record_attempt(batch, Attempt(None, f"Could not build the request body: {e!r}", 0))
+                        failed += 1
+                        self._warn_failed(batch, e)
+                        continue
+                    if body is None:
+                        continue
+                    future = pool.submit(post, referrer.webhook_url, body)
+                    open_requests[future] = batch
+                    in_flight[referrer.id] += 1
+
+                if not open_requests:
+                    if once:
+                        return delivered, failed
+                    # Pick up referrer setting changes between idle polls.
+                    hooks.clear()
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(open_requests, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = open_requests.pop(future)
+                    in_flight[batch[0].referrer_id] -= 1
+                    attempt = future.result()
+                    record_attempt(batch, attempt)
+                    if attempt.error is None:
+                        delivered += 1
+                    else:
+                        failed += 1
+                        self._warn_failed(batch, attempt.error)
+
+    def _warn_failed(self, batch, error):
+        self.stdout.write(
+            self.style.WARNING(f"Webhook request to {batch[0].referrer} with {len(batch)} screens failed: {error}")
+        )
+
+    def _print_stats(self, since):
+        stats = delivery_stats(since)
+        if not stats:
+            self.stdout.write(f"No webhook deliveries queued since {since:%Y-%m-%d %H:%M}")
+            return
+        self.stdout.write("\t".join(("referrer",) + STATS_COLUMNS))
+        for row in stats:
+            values = [row["referrer"]]
+            for column in STATS_COLUMNS:
+                value = row[column]
+                values.append("" if value is None else f"{value:.1f}" if isinstance(value, float) else str(value))
+            self.stdout.write("\t".join(values))
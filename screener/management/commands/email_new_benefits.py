@@ -1,7 +1,58 @@
-from django.core.management.base import BaseCommand
-from django.core.exceptions import ObjectDoesNotExist
-from integrations.services.cms_integration import CoHubSpotIntegration
-from screener.models import Screen, EligibilitySnapshot
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, DecimalField, Q, Sum
+from django.db.models.functions import Coalesce
+from hubspot.crm.contacts.exceptions import ApiException as HubSpotApiException
+from integrations.services.cms_integration import NoCmsSelected, get_cms_integration
+from screener.models import EligibilitySnapshot, WhiteLabel
+
+# HubSpot's limit on contacts per batch update.
+BATCH_SIZE = 100
+# Batch updates in flight at once. HubSpot allows ~10 requests/second per app.
+MAX_CONCURRENT_BATCHES = 4
+# Rows read per round trip while streaming the totals.
+CHUNK_SIZE = 2_000
+
+
+def new_benefit_totals(white_label: WhiteLabel):
+    """(HubSpot contact id, new benefits, their value) for every contact in the white label,
+    from the latest batch snapshot of any of their screens. One query."""
+    new_and_eligible = Q(program_snapshots__new=True, program_snapshots__eligible=True)
+
+    # DISTINCT ON keeps the first row per user, so order newest first within each user.
+    latest_snapshots = (
+        EligibilitySnapshot.objects.filter(
+            is_batch=True,
+            screen__white_label=white_label,
+            screen__user__external_id__isnull=False,
+        )
+        .order_by("screen__user_id", "-submission_date")
+        .distinct("screen__user_id")
+        .values("id")
+    )
+
+    return (
+        EligibilitySnapshot.objects.filter(id__in=latest_snapshots)
+        .annotate(
+            new_benefits=Count("program_snapshots", filter=new_and_eligible),
+            new_value=Coalesce(
+                Sum("program_snapshots__estimated_value", filter=new_and_eligible),
+                0,
+                output_field=DecimalField(),
+            ),
+        )
+        .order_by("id")
+        .values_list("screen__user__external_id", "new_benefits", "new_value")
+    )
+
+
+def _batches(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
 
 
 class Command(BaseCommand):
@@ -10,45 +61,56 @@ class Command(BaseCommand):
     """
 
     def add_arguments(self, parser):
-        parser.add_argument("--limit", default=1, type=int)
+        parser.add_argument("--limit", default=1, type=int, help="Contacts to update, -1 for all (default: 1)")
         parser.add_argument("--white-label", default="co", type=str)
 
     def handle(self, *args, **options):
-        screens = Screen.objects.all().exclude(user__isnull=True, white_label__code=options["white_label"])
-        latest_snapshots = []
-        limit = options["limit"]
-        for screen in screens:
-            try:
-                previous_snapshot = EligibilitySnapshot.objects.filter(is_batch=True, screen=screen).latest(
-                    "submission_date"
-                )
-            except ObjectDoesNotExist:
-                self.stdout.write(self.style.WARNING(f"No snapshots for screen with id of {screen.id}"))
-                continue
-            latest_snapshots.append(previous_snapshot)
-
-        existing_users = []
-        for snapshot in latest_snapshots:
-            if limit == 0:
-                break
-            if snapshot.screen.user.external_id is None:
-                continue
-
-            num_eligible = 0
-            value = 0
-            for program in snapshot.program_snapshots.all():
-                if program.new and program.eligible:
-                    num_eligible += 1
-                    value += program.estimated_value
-
-            existing_users.append(
-                CoHubSpotIntegration.format_email_new_benefit(snapshot.screen.user.external_id, num_eligible, value)
+        if not (settings.HUBSPOT_NEW_BENEFITS_COUNT_PROPERTY and settings.HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY):
+            raise CommandError(
+                "Set HUBSPOT_NEW_BENEFITS_COUNT_PROPERTY and HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY to the HubSpot "
+                "contact properties to update"
             )
+        white_label = WhiteLabel.objects.get(code=options["white_label"])
+        try:
+            Integration = get_cms_integration(white_label)
+        except NoCmsSelected as e:
+            raise CommandError(str(e))
+
+        limit = None if options["limit"] == -1 else options["limit"]
+        rows = islice(new_benefit_totals(white_label).iterator(chunk_size=CHUNK_SIZE), limit)
+        contacts = (
+            Integration.format_email_new_benefit(external_id, new_benefits, int(new_value))
+            for external_id, new_benefits, new_value in rows
+        )
+
+        updated = 0
+        failed = 0
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BATCHES) as pool:
+            in_flight = {}
+
+            def collect():
+                nonlocal updated, failed
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        future.result()
+                        updated += len(batch)
+                    except HubSpotApiException as e:
+                        failed += len(batch)
+                        self.stdout.write(self.style.ERROR(f"HubSpot rejected a batch of {len(batch)}: {e}"))
 
-            limit -= 1
+            for batch in _batches(contacts, BATCH_SIZE):
+                in_flight[pool.submit(Integration.bulk_update, batch)] = batch
+                if len(in_flight) >= MAX_CONCURRENT_BATCHES:
+                    collect()
+            while in_flight:
+                collect()
 
-        if not len(existing_users):
+        if not updated and not failed:
             self.stdout.write(self.style.WARNING("No users in HubSpot. Make sure that you add users to HubSpot first"))
             return
 
-        CoHubSpotIntegration.bulk_update(existing_users)
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} HubSpot contacts"))
+        if failed:
+            self.stdout.write(self.style.ERROR(f"Failed to update {failed} HubSpot contacts"))
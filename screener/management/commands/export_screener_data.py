@@ -1,5 +1,5 @@
 """
-Export screener data to CSV files.
+Export screener data to CSV or Parquet files.
 
 Exports completed screener data from the following tables:
 - Screen
@@ -33,15 +33,28 @@ Usage:
 
     # Create compressed zip archive
     python manage.py export_screener_data --output-dir /path/to/exports --compress
+
+    # Extract with PostgreSQL COPY instead of the ORM (much faster for full exports)
+    python manage.py export_screener_data --output-dir /path/to/exports --engine copy
+
+    # Typed, zstd-compressed Parquet, partitioned into white_label_code=co/submission_month=2024-06/ directories
+    python manage.py export_screener_data --output-dir /path/to/exports --engine copy --format parquet \
+        --partition-by white_label month
+
+    # Daily warehouse load: only screens new or changed since the last --incremental run to this directory,
+    # appended as part-<run id> files and listed in manifest.json
+    python manage.py export_screener_data --output-dir /path/to/warehouse --format parquet --incremental
 """
 
 import csv
+import json
 import os
 import zipfile
 from datetime import datetime, timedelta
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Max
+from django.db.models import CharField, Exists, F, Func, Max, OuterRef, Q, Value
 from django.utils import timezone
+from screener.management.commands._export_formats import arrow_schema, copy_csv, record_batches, write_parquet
 from screener.models import (
     Screen,
     HouseholdMember,
@@ -50,6 +63,7 @@ from screener.models import (
     Insurance,
     CurrentBenefit,
     EligibilitySnapshot,
+    ProgramEligibilityExport,
     ProgramEligibilitySnapshot,
     WhiteLabel,
 )
@@ -57,13 +71,17 @@ from screener.models import (
 
 class Command(BaseCommand):
     help = """
-    Export screener data to CSV files for completed screeners within a date range.
+    Export screener data to CSV or Parquet files for completed screeners within a date range.
     Test data is always excluded.
     """
 
     # Fields to exclude from export (test flags, internal fields, etc.)
     EXCLUDED_FIELDS = {"is_test", "is_test_data", "frontend_id", "user", "uid", "content"}
     CHUNK_SIZE = 5000
+    # --partition-by option -> partition column name
+    PARTITIONS = {"white_label": "white_label_code", "month": "submission_month"}
+    # Written to the output directory by --incremental runs
+    MANIFEST_FILENAME = "manifest.json"
 
     def _get_model_fields(self, model):
         """Get exportable field names from a model, excluding reverse relations and specified fields."""
@@ -123,6 +141,32 @@ class Command(BaseCommand):
             action="store_true",
             help="Include incomplete surveys in the export (though agree_to_tos must still be true)",
         )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "parquet"],
+            default="csv",
+            help="File format for the exported tables (default: csv). The data dictionary is always CSV.",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=["orm", "copy"],
+            default="orm",
+            help="Read rows through the ORM or with PostgreSQL COPY, which is several times faster (default: orm)",
+        )
+        parser.add_argument(
+            "--partition-by",
+            choices=list(self.PARTITIONS),
+            nargs="+",
+            help="Write each Parquet table as a directory partitioned by screen white label and/or submission month",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Export only screens that are new or changed since the last incremental run to this output directory,"
+                f" as new part files, and record the run in {self.MANIFEST_FILENAME}"
+            ),
+        )
 
     def handle(self, *args, **options):
         # Parse dates
@@ -146,6 +190,14 @@ class Command(BaseCommand):
         dry_run = options.get("dry_run", False)
         compress = options.get("compress", False)
         include_incomplete = options.get("include_incomplete", False)
+        self.file_format = options.get("format", "csv")
+        self.engine = options.get("engine", "orm")
+        self.partition_by = [self.PARTITIONS[p] for p in options.get("partition_by") or []]
+        incremental = options.get("incremental", False)
+        self.run_id = None
+
+        if self.partition_by and self.file_format != "parquet":
+            raise CommandError("--partition-by requires --format parquet.")
 
         # Validate output directory (skip for dry run)
         if not dry_run and not os.path.exists(output_dir):
@@ -175,6 +227,15 @@ class Command(BaseCommand):
             screens = screens.filter(white_label__code__in=white_label)
 
         screens = screens.order_by("submission_date")
+        matching_screens = screens
+
+        if incremental:
+            manifest = self._load_manifest(output_dir)
+            # Taken before reading anything, so changes made during the export are picked up next run.
+            high_water_mark = self._high_water_mark()
+            if manifest["high_water_mark"]:
+                screens = screens.filter(self._changed_since(manifest["high_water_mark"]))
+                self.stdout.write(f"Exporting screens changed since {manifest['high_water_mark']}")
 
         screen_count = screens.count()
         if screen_count == 0:
@@ -187,85 +248,95 @@ class Command(BaseCommand):
             self._dry_run(screens)
             return
 
-        self._export(screens, output_dir)
+        if incremental:
+            self.run_id = timezone.now().strftime("%Y%m%dT%H%M%S%fZ")
+
+        self.row_counts = {}
+        self._export(screens, output_dir, matching_screens)
+
+        if incremental:
+            self._save_manifest(output_dir, manifest, high_water_mark)
 
         if compress:
             self._compress_output(output_dir)
 
         self.stdout.write(self.style.SUCCESS(f"Export completed to {output_dir}"))
 
-    def _export(self, screens, output_dir):
-        """Export data as separate CSV files, one per table."""
+    def _export(self, screens, output_dir, matching_screens):
+        """
+        Export data as separate files, one per table.
+
+        matching_screens is every screen the filters select. It differs from screens on incremental runs,
+        where the white label lookup still covers screens exported by earlier runs.
+        """
         # Use subqueries instead of loading all IDs into memory
         screen_ids_subquery = screens.values("id")
 
-        # Get field lists dynamically
-        screen_fields = self._get_model_fields(Screen)
-        household_member_fields = self._get_model_fields(HouseholdMember)
-        income_stream_fields = self._get_model_fields(IncomeStream)
-        expense_fields = self._get_model_fields(Expense)
-        insurance_fields = self._get_model_fields(Insurance)
-
         # Export screens
-        self._write_csv(
-            os.path.join(output_dir, "screens.csv"),
-            screen_fields,
-            screens.values(*screen_fields),
-        )
-        self.stdout.write(f"  Exported {screens.count()} screens")
+        count = self._write_table(output_dir, "screens", screens, Screen, self._get_model_fields(Screen), "")
+        self.stdout.write(f"  Exported {count} screens")
 
         # Export household members
         household_members = HouseholdMember.objects.filter(screen_id__in=screen_ids_subquery)
         member_ids_subquery = household_members.values("id")
-        self._write_csv(
-            os.path.join(output_dir, "household_members.csv"),
-            household_member_fields,
-            household_members.values(*household_member_fields),
+        count = self._write_table(
+            output_dir,
+            "household_members",
+            household_members,
+            HouseholdMember,
+            self._get_model_fields(HouseholdMember),
+            "screen__",
         )
-        self.stdout.write(f"  Exported {household_members.count()} household members")
+        self.stdout.write(f"  Exported {count} household members")
 
         # Export income streams
         income_streams = IncomeStream.objects.filter(screen_id__in=screen_ids_subquery)
-        self._write_csv(
-            os.path.join(output_dir, "income_streams.csv"),
-            income_stream_fields,
-            income_streams.values(*income_stream_fields),
+        count = self._write_table(
+            output_dir,
+            "income_streams",
+            income_streams,
+            IncomeStream,
+            self._get_model_fields(IncomeStream),
+            "screen__",
         )
-        self.stdout.write(f"  Exported {income_streams.count()} income streams")
+        self.stdout.write(f"  Exported {count} income streams")
 
         # Export expenses
         expenses = Expense.objects.filter(screen_id__in=screen_ids_subquery)
-        self._write_csv(
-            os.path.join(output_dir, "expenses.csv"),
-            expense_fields,
-            expenses.values(*expense_fields),
+        count = self._write_table(
+            output_dir, "expenses", expenses, Expense, self._get_model_fields(Expense), "screen__"
         )
-        self.stdout.write(f"  Exported {expenses.count()} expenses")
+        self.stdout.write(f"  Exported {count} expenses")
 
         # Export insurance (linked via household_member_id)
         insurance_records = Insurance.objects.filter(household_member_id__in=member_ids_subquery)
-        self._write_csv(
-            os.path.join(output_dir, "insurance.csv"),
-            insurance_fields,
-            insurance_records.values(*insurance_fields),
+        count = self._write_table(
+            output_dir,
+            "insurance",
+            insurance_records,
+            Insurance,
+            self._get_model_fields(Insurance),
+            "household_member__screen__",
         )
-        self.stdout.write(f"  Exported {insurance_records.count()} insurance records")
+        self.stdout.write(f"  Exported {count} insurance records")
 
         # Export current benefits (programs the user already has)
-        current_benefit_fields = self._get_model_fields(CurrentBenefit)
         current_benefits = CurrentBenefit.objects.filter(screen_id__in=screen_ids_subquery)
-        self._write_csv(
-            os.path.join(output_dir, "current_benefits.csv"),
-            current_benefit_fields,
-            current_benefits.values(*current_benefit_fields),
+        count = self._write_table(
+            output_dir,
+            "current_benefits",
+            current_benefits,
+            CurrentBenefit,
+            self._get_model_fields(CurrentBenefit),
+            "screen__",
         )
-        self.stdout.write(f"  Exported {current_benefits.count()} current benefit records")
+        self.stdout.write(f"  Exported {count} current benefit records")
 
         # Export program eligibility (merged table with screen_id, only most recent snapshot per screen)
         self._export_program_eligibility(screen_ids_subquery, output_dir)
 
         # Export white label lookup table
-        self._export_white_labels(screens, output_dir)
+        self._export_white_labels(matching_screens, output_dir)
 
         # Export data dictionary
         self._export_data_dictionary(output_dir)
@@ -280,38 +351,29 @@ class Command(BaseCommand):
         )
         latest_snapshot_ids_subquery = latest_snapshots.values("latest_id")
 
-        # Build a mapping of snapshot_id -> screen_id (this is bounded by number of screens, not records)
-        snapshot_to_screen = dict(
-            EligibilitySnapshot.objects.filter(id__in=latest_snapshot_ids_subquery).values_list("id", "screen_id")
-        )
-
         # Get program eligibility fields, excluding the snapshot FK
-        program_fields = self._get_model_fields(ProgramEligibilitySnapshot)
+        program_fields = self._get_model_fields(ProgramEligibilityExport)
         program_fields = [f for f in program_fields if f != "eligibility_snapshot_id"]
 
-        # Add screen_id as the first column
-        headers = ["screen_id"] + program_fields
-
-        # Get the program snapshots for the latest snapshots only
-        program_snapshots = ProgramEligibilitySnapshot.objects.filter(
-            eligibility_snapshot_id__in=latest_snapshot_ids_subquery
-        ).order_by("eligibility_snapshot_id", "id")
-
-        # Write the merged CSV with iterator for memory efficiency
-        output_path = os.path.join(output_dir, "program_eligibility.csv")
-        count = 0
-        with open(output_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-
-            for row in program_snapshots.values("eligibility_snapshot_id", *program_fields).iterator(
-                chunk_size=self.CHUNK_SIZE
-            ):
-                screen_id = snapshot_to_screen.get(row.pop("eligibility_snapshot_id"))
-                row["screen_id"] = screen_id
-                writer.writerow(row)
-                count += 1
+        # Get the program snapshots for the latest snapshots only, with screen_id joined from the snapshot
+        # and the program text and messages joined in to give the columns of ProgramEligibilityExport
+        program_snapshots = (
+            ProgramEligibilitySnapshot.objects.expanded()
+            .filter(eligibility_snapshot_id__in=latest_snapshot_ids_subquery)
+            .annotate(screen_id=F("eligibility_snapshot__screen_id"))
+            .order_by("eligibility_snapshot_id", "id")
+        )
 
+        # Add screen_id as the first column
+        count = self._write_table(
+            output_dir,
+            "program_eligibility",
+            program_snapshots,
+            ProgramEligibilityExport,
+            ["screen_id"] + program_fields,
+            "eligibility_snapshot__screen__",
+            extra_fields={"screen_id": EligibilitySnapshot._meta.get_field("screen")},
+        )
         self.stdout.write(f"  Exported {count} program eligibility records")
 
     def _export_white_labels(self, screens, output_dir):
@@ -320,12 +382,8 @@ class Command(BaseCommand):
         white_labels = WhiteLabel.objects.filter(id__in=white_label_ids)
 
         headers = ["id", "code", "name", "state_code"]
-        self._write_csv(
-            os.path.join(output_dir, "white_labels.csv"),
-            headers,
-            white_labels.values(*headers),
-        )
-        self.stdout.write(f"  Exported {white_labels.count()} white labels")
+        count = self._write_table(output_dir, "white_labels", white_labels, WhiteLabel, headers, None)
+        self.stdout.write(f"  Exported {count} white labels")
 
     def _export_data_dictionary(self, output_dir):
         """Export a data dictionary describing all exported fields."""
@@ -497,7 +555,7 @@ class Command(BaseCommand):
             ("expense", Expense),
             ("insurance", Insurance),
             ("current_benefit", CurrentBenefit),
-            ("program_eligibility", ProgramEligibilitySnapshot),
+            ("program_eligibility", ProgramEligibilityExport),
             ("white_label", WhiteLabel),
         ]
 
@@ -589,20 +647,139 @@ class Command(BaseCommand):
         self.stdout.write(f"  White labels: {white_label_count}")
 
     def _compress_output(self, output_dir):
-        """Create a zip archive of all CSV files in the output directory."""
+        """Create a zip archive of all exported CSV and Parquet files in the output directory."""
         zip_path = f"{output_dir}.zip"
         with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            for filename in os.listdir(output_dir):
-                if filename.endswith(".csv"):
-                    file_path = os.path.join(output_dir, filename)
-                    zf.write(file_path, filename)
+            # Walk so partitioned Parquet tables keep their directory layout.
+            for dirpath, _, filenames in os.walk(output_dir):
+                for filename in filenames:
+                    if filename.endswith((".csv", ".parquet")):
+                        file_path = os.path.join(dirpath, filename)
+                        zf.write(file_path, os.path.relpath(file_path, output_dir))
 
         self.stdout.write(f"  Created compressed archive: {zip_path}")
 
+    def _write_table(self, output_dir, name, queryset, model, headers, screen_path, extra_fields=None):
+        """
+        Write a table in the selected format with the selected engine and return the number of rows.
+
+        screen_path is the lookup from the model to its screen ("" for Screen itself), used for
+        --partition-by. Tables that don't belong to a screen pass None and are never partitioned.
+        """
+        extra_fields = extra_fields or {}
+        columns = {header: extra_fields.get(header) or model._meta.get_field(header) for header in headers}
+
+        partition_by = self.partition_by if screen_path is not None else []
+        if partition_by:
+            partitions = {
+                "white_label_code": F(f"{screen_path}white_label__code"),
+                "submission_month": Func(
+                    F(f"{screen_path}submission_date"),
+                    Value("YYYY-MM"),
+                    function="to_char",
+                    output_field=CharField(),
+                ),
+            }
+            queryset = queryset.annotate(**{column: partitions[column] for column in partition_by})
+            columns.update({column: None for column in partition_by})
+        queryset = queryset.values(*columns)
+
+        # Incremental runs add a part file per run to a directory per table.
+        append = self.run_id is not None and screen_path is not None
+        if append:
+            basename = f"part-{self.run_id}"
+            table_dir = os.path.join(output_dir, name)
+            os.makedirs(table_dir, exist_ok=True)
+            path = table_dir if partition_by else os.path.join(table_dir, f"{basename}.{self.file_format}")
+        else:
+            basename = "part-0"
+            path = os.path.join(output_dir, name if partition_by else f"{name}.{self.file_format}")
+
+        if self.file_format == "parquet":
+            batches = record_batches(queryset, columns, self.engine, self.CHUNK_SIZE)
+            count = write_parquet(path, arrow_schema(columns), batches, partition_by, basename, append)
+        elif self.engine == "copy":
+            with open(path, "wb") as f:
+                count = copy_csv(queryset, columns, f)
+        else:
+            count = self._write_csv(path, headers, queryset)
+
+        self.row_counts[name] = count
+        return count
+
+    def _load_manifest(self, output_dir):
+        """Load the incremental export manifest, checking earlier runs used the same file layout."""
+        path = os.path.join(output_dir, self.MANIFEST_FILENAME)
+        layout = {"format": self.file_format, "partition_by": self.partition_by}
+        if not os.path.exists(path):
+            return {**layout, "high_water_mark": None, "runs": []}
+
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if {key: manifest[key] for key in layout} != layout:
+            raise CommandError(
+                f"{path} was written with --format {manifest['format']} and partitions {manifest['partition_by']}. "
+                "Use the same options or a new --output-dir."
+            )
+        return manifest
+
+    def _high_water_mark(self):
+        """The newest screen id, submission date and eligibility snapshot id."""
+        mark = Screen.objects.aggregate(screen_id=Max("id"), submission_date=Max("submission_date"))
+        mark["snapshot_id"] = EligibilitySnapshot.objects.aggregate(latest_id=Max("id"))["latest_id"]
+        if mark["submission_date"] is not None:
+            mark["submission_date"] = mark["submission_date"].isoformat()
+        return mark
+
+    def _changed_since(self, mark):
+        """
+        Filter for screens created, resubmitted or given new eligibility results since the high-water mark.
+        Editing a screen recalculates its results, so a new snapshot also covers changed members and income.
+        """
+        changed = Exists(
+            EligibilitySnapshot.objects.filter(screen_id=OuterRef("id"), id__gt=mark["snapshot_id"] or 0)
+        ) | Q(id__gt=mark["screen_id"] or 0)
+        if mark["submission_date"] is not None:
+            changed |= Q(submission_date__gt=datetime.fromisoformat(mark["submission_date"]))
+        return changed
+
+    def _save_manifest(self, output_dir, manifest, high_water_mark):
+        """
+        Record the run's files and row counts and advance the high-water mark. The manifest is replaced
+        atomically and only after every table is written, so a failed run is exported again next time.
+        """
+        basename = f"part-{self.run_id}"
+        files = sorted(
+            os.path.relpath(os.path.join(dirpath, filename), output_dir)
+            for dirpath, _, filenames in os.walk(output_dir)
+            for filename in filenames
+            if filename.startswith(basename)
+        )
+        manifest["runs"].append(
+            {
+                "run_id": self.run_id,
+                "exported_at": timezone.now().isoformat(),
+                "since": manifest["high_water_mark"],
+                "high_water_mark": high_water_mark,
+                "rows": self.row_counts,
+                "files": files,
+            }
+        )
+        manifest["high_water_mark"] = high_water_mark
+
+        path = os.path.join(output_dir, self.MANIFEST_FILENAME)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+        self.stdout.write(f"  Recorded run {self.run_id} ({len(files)} files) in {path}")
+
     def _write_csv(self, filepath, headers, queryset):
-        """Write a queryset to a CSV file using iterator for memory efficiency."""
+        """Write a queryset to a CSV file using iterator for memory efficiency. Returns the number of rows."""
+        count = 0
         with open(filepath, "w", newline="", encoding="utf-8") as f:
             writer = csv.DictWriter(f, fieldnames=headers)
             writer.writeheader()
             for row in queryset.iterator(chunk_size=self.CHUNK_SIZE):
                 writer.writerow(row)
+                count += 1
+        return count
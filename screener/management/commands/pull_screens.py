@@ -1,9 +1,27 @@
+"""
+Copy screens and everything hanging off them from the 'migration_source' database.
+
+Source screens are read in chunks of CHUNK_SIZE. Each chunk is copied with one bulk insert per table:
+new rows get their ids back from the insert, and foreign keys are remapped to them in memory. Every
+chunk is checked against the source with _screen_key_checks and committed on its own.
+
+With --checkpoint, the last committed source screen is written to a file after each chunk, and a rerun
+with the same file carries on after it:
+
+    python manage.py pull_screens --checkpoint /tmp/pull-screens.json
+"""
+
+import json
+import os
+from typing import Optional
+
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from django.db.models import Prefetch
+from django.db.models import Max, Prefetch
 from tqdm import tqdm
 from authentication.models import User
 from screener.models import (
+    EligibilityMessage,
     EligibilitySnapshot,
     EnergyCalculatorMember,
     EnergyCalculatorScreen,
@@ -14,6 +32,7 @@ from screener.models import (
     Message,
     ProgramEligibilitySnapshot,
     Screen,
+    SnapshotProgram,
     WhiteLabel,
 )
 from django.db import transaction
@@ -29,108 +48,218 @@ class Command(BaseCommand):
     class CheckFailed(Exception):
         pass
 
-    @transaction.atomic
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            help="File to record progress in after each chunk, and to resume from if it exists",
+        )
+
     def handle(self, *args, **options):
         if not settings.HAS_MIGRATION_SOURCE_DB:
             self.stdout.write(f"No '{self.MIGRATION_SOURCE_DB}' db set up", self.style.ERROR)
             return
 
-        source_screens: list[Screen] = (
-            Screen.objects.using(self.MIGRATION_SOURCE_DB)
-            .filter(validations__isnull=True)
-            .prefetch_related(
-                Prefetch("user", queryset=User.objects.order_by("pk")),
-                Prefetch("white_label", queryset=WhiteLabel.objects.order_by("pk")),
-                Prefetch("household_members", queryset=HouseholdMember.objects.order_by("pk")),
-                Prefetch("household_members__income_streams", queryset=IncomeStream.objects.order_by("pk")),
-                Prefetch("household_members__insurance", queryset=Insurance.objects.order_by("pk")),
-                Prefetch(
-                    "household_members__energy_calculator", queryset=EnergyCalculatorMember.objects.order_by("pk")
-                ),
-                Prefetch("eligibility_snapshots", queryset=EligibilitySnapshot.objects.order_by("pk")),
-                Prefetch(
-                    "eligibility_snapshots__program_snapshots",
-                    queryset=ProgramEligibilitySnapshot.objects.order_by("pk"),
-                ),
-                Prefetch("expenses", queryset=Expense.objects.order_by("pk")),
-                Prefetch("messages", queryset=Message.objects.order_by("pk")),
-                Prefetch("energy_calculator", queryset=EnergyCalculatorScreen.objects.order_by("pk")),
-            )
-        )
+        checkpoint_path: Optional[str] = options.get("checkpoint")
+        after_id = self._load_checkpoint(checkpoint_path)
+        # The checkpoint is written just after a chunk commits, so a crash in between can leave the next chunk
+        # already copied. Screens keep their uuid, so skip any the target already has in that chunk.
+        resuming = after_id is not None
+        if resuming:
+            self.stdout.write(f"Resuming after source screen {after_id} from {checkpoint_path}")
+
+        source_screens = Screen.objects.using(self.MIGRATION_SOURCE_DB).filter(validations__isnull=True).order_by("pk")
+        # Only what is there now, so screens created while copying (or copies, if source and target are the
+        # same database) aren't picked up.
+        last_source_id = source_screens.aggregate(last_id=Max("pk"))["last_id"] or 0
+        source_screens = source_screens.filter(pk__lte=last_source_id)
+        white_label_ids = dict(WhiteLabel.objects.values_list("code", "pk"))
         main_checks = self._key_checks()
 
-        for screen in tqdm(
-            source_screens.iterator(chunk_size=self.CHUNK_SIZE),
+        copied = 0
+        skipped = 0
+        with tqdm(
             desc="Screens".ljust(self.PROGRESS_TITLE_WIDTH),
-            total=source_screens.count(),
-        ):
-            baseline_screen_check = self._screen_key_checks(screen)
-            user = screen.user
-            if user is not None:
-                user.pk = None
-                user.save(using="default")
-
-            try:
-                white_label = WhiteLabel.objects.get(code=screen.white_label.code)
-            except WhiteLabel.DoesNotExist:
+            total=source_screens.filter(pk__gt=after_id or 0).count(),
+        ) as progress:
+            while screens := list(self._prefetched(source_screens.filter(pk__gt=after_id or 0)[: self.CHUNK_SIZE])):
+                last_id = screens[-1].pk
+                progress.update(len(screens))
+
+                if resuming:
+                    resuming = False
+                    existing = set(
+                        Screen.objects.filter(uuid__in=[s.uuid for s in screens]).values_list("uuid", flat=True)
+                    )
+                    skipped = len(existing)
+                    screens = [s for s in screens if s.uuid not in existing]
+
+                with transaction.atomic(using="default"):
+                    self._copy_chunk(screens, white_label_ids)
+
+                after_id = last_id
+                self._save_checkpoint(checkpoint_path, after_id)
+                copied += len(screens)
+
+        self._check_checks(main_checks, self._key_checks())
+
+        if skipped:
+            self.stdout.write(f"Skipped {skipped} screens already in the target database")
+        self.stdout.write(self.style.SUCCESS(f"Copied {copied} screens"))
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def _prefetched(self, screens):
+        """Prefetch everything copied and checked, each relation ordered by pk."""
+        return screens.prefetch_related(
+            Prefetch("user", queryset=User.objects.order_by("pk")),
+            Prefetch("white_label", queryset=WhiteLabel.objects.order_by("pk")),
+            Prefetch("household_members", queryset=HouseholdMember.objects.order_by("pk")),
+            Prefetch("household_members__income_streams", queryset=IncomeStream.objects.order_by("pk")),
+            Prefetch("household_members__insurance", queryset=Insurance.objects.order_by("pk")),
+            Prefetch("household_members__energy_calculator", queryset=EnergyCalculatorMember.objects.order_by("pk")),
+            Prefetch("eligibility_snapshots", queryset=EligibilitySnapshot.objects.order_by("pk")),
+            Prefetch(
+                "eligibility_snapshots__program_snapshots",
+                queryset=ProgramEligibilitySnapshot.objects.select_related("program").order_by("pk"),
+            ),
+            Prefetch("expenses", queryset=Expense.objects.order_by("pk")),
+            Prefetch("messages", queryset=Message.objects.order_by("pk")),
+            Prefetch("energy_calculator", queryset=EnergyCalculatorScreen.objects.order_by("pk")),
+        )
+
+    def _copy_chunk(self, screens: list[Screen], white_label_ids: dict[str, int]):
+        """
+        Insert copies of the prefetched source screens and their related rows into the default database,
+        one bulk_create per table, then check each copy against its source.
+        """
+        baseline_checks = [self._screen_key_checks(screen) for screen in screens]
+
+        for screen in screens:
+            if screen.white_label.code not in white_label_ids:
                 raise Exception(f"White label with code '{screen.white_label.code}' does not exist. Please add it.")
 
+        # Users are matched on email_or_cell, so someone with screens in several chunks is only copied once.
+        users = {screen.user.email_or_cell: screen.user for screen in screens if screen.user is not None}
+        user_ids = dict(User.objects.filter(email_or_cell__in=users).values_list("email_or_cell", "pk"))
+        new_users = [user for email_or_cell, user in users.items() if email_or_cell not in user_ids]
+        for user in new_users:
+            user.pk = None
+        User.objects.bulk_create(new_users)
+        user_ids.update({user.email_or_cell: user.pk for user in new_users})
+
+        for screen in screens:
             screen.pk = None
-            if user is not None:
-                screen.user_id = user.id
-            screen.white_label_id = white_label.pk
-            screen.save(using="default")
+            if screen.user is not None:
+                screen.user_id = user_ids[screen.user.email_or_cell]
+            screen.white_label_id = white_label_ids[screen.white_label.code]
+        Screen.objects.bulk_create(screens)
 
+        members = {}
+        for screen in screens:
+            for member in screen.household_members.all():
+                members[member.pk] = member
+                member.pk = None
+                member.screen_id = screen.pk
+        HouseholdMember.objects.bulk_create(members.values())
+
+        incomes, insurances, energy_members = [], [], []
+        for member in members.values():
+            for income in member.income_streams.all():
+                income.pk = None
+                income.household_member_id = member.pk
+                income.screen_id = member.screen_id
+                incomes.append(income)
+
+            if hasattr(member, "insurance"):
+                member.insurance.pk = None
+                member.insurance.household_member_id = member.pk
+                insurances.append(member.insurance)
+
+            if hasattr(member, "energy_calculator"):
+                member.energy_calculator.pk = None
+                member.energy_calculator.household_member_id = member.pk
+                energy_members.append(member.energy_calculator)
+
+        expenses, messages, snapshots, energy_screens = [], [], [], []
+        for screen in screens:
             for expense in screen.expenses.all():
                 expense.pk = None
                 expense.screen_id = screen.pk
-                expense.save(using="default")
+                if expense.household_member_id is not None:
+                    member = members.get(expense.household_member_id)
+                    expense.household_member_id = member.pk if member is not None else None
+                expenses.append(expense)
 
             for message in screen.messages.all():
                 message.pk = None
                 message.screen_id = screen.pk
-                message.save(using="default")
+                messages.append(message)
 
             for snapshot in screen.eligibility_snapshots.all():
                 snapshot.pk = None
                 snapshot.screen_id = screen.pk
-                snapshot.save(using="default")
-
-                for program_snapshot in snapshot.program_snapshots.all():
-                    program_snapshot.pk = None
-                    program_snapshot.eligibility_snapshot_id = snapshot.pk
-                    program_snapshot.save(using="default")
-
-            for member in screen.household_members.all():
-                member.pk = None
-                member.screen_id = screen.pk
-                member.save(using="default")
-
-                for income in member.income_streams.all():
-                    income.pk = None
-                    income.household_member_id = member.pk
-                    income.screen_id = screen.pk
-                    income.save(using="default")
-
-                if hasattr(member, "insurance"):
-                    member.insurance.pk = None
-                    member.insurance.household_member_id = member.pk
-                    member.insurance.save(using="default")
-
-                if hasattr(member, "energy_calculator"):
-                    member.energy_calculator.pk = None
-                    member.energy_calculator.household_member_id = member.pk
-                    member.energy_calculator.save(using="default")
+                snapshots.append(snapshot)
 
             if hasattr(screen, "energy_calculator"):
                 screen.energy_calculator.pk = None
                 screen.energy_calculator.screen_id = screen.pk
-                screen.energy_calculator.save(using="default")
+                energy_screens.append(screen.energy_calculator)
 
-            screen.refresh_from_db()
-            self._check_screen(baseline_screen_check, self._screen_key_checks(screen))
+        IncomeStream.objects.bulk_create(incomes)
+        Insurance.objects.bulk_create(insurances)
+        EnergyCalculatorMember.objects.bulk_create(energy_members)
+        Expense.objects.bulk_create(expenses)
+        Message.objects.bulk_create(messages)
+        EligibilitySnapshot.objects.bulk_create(snapshots)
+        EnergyCalculatorScreen.objects.bulk_create(energy_screens)
 
-        self._check_checks(main_checks, self._key_checks())
+        # Program text and messages are stored once per database, so they are copied by value and looked up
+        # (or added) in this one.
+        program_snapshots = [
+            (snapshot, program_snapshot)
+            for snapshot in snapshots
+            for program_snapshot in snapshot.program_snapshots.all()
+        ]
+        message_ids = {
+            message_id
+            for _, program_snapshot in program_snapshots
+            for message_id in program_snapshot.failed_test_ids + program_snapshot.passed_test_ids
+        }
+        messages = EligibilityMessage.objects.using(self.MIGRATION_SOURCE_DB).in_bulk(message_ids)
+        ProgramEligibilitySnapshot.objects.create_results(
+            [
+                {
+                    "eligibility_snapshot_id": snapshot.pk,
+                    "new": program_snapshot.new,
+                    "eligible": program_snapshot.eligible,
+                    "estimated_value": program_snapshot.estimated_value,
+                    **{field: getattr(program_snapshot.program, field) for field in SnapshotProgram.TEXT_FIELDS},
+                    "failed_tests": [messages[id].message for id in program_snapshot.failed_test_ids],
+                    "passed_tests": [messages[id].message for id in program_snapshot.passed_test_ids],
+                }
+                for snapshot, program_snapshot in program_snapshots
+            ],
+            batch_size=self.CHUNK_SIZE,
+        )
+
+        copies = self._prefetched(Screen.objects.filter(pk__in=[screen.pk for screen in screens]).order_by("pk"))
+        for baseline, copy in zip(baseline_checks, copies, strict=True):
+            self._check_screen(baseline, self._screen_key_checks(copy))
+
+    def _load_checkpoint(self, path: Optional[str]) -> Optional[int]:
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)["after_id"]
+
+    def _save_checkpoint(self, path: Optional[str], after_id: int):
+        if path is None:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"after_id": after_id}, f)
+        os.replace(tmp_path, path)
 
     # create a bunch of checks to try to alert us if something is wrong
     def _screen_key_checks(self, screen: Screen):
@@ -151,7 +280,8 @@ class Command(BaseCommand):
         # check energy_calculator
         checks.append(hasattr(screen, "energy_calculator"))
 
-        household_members = screen.household_members.all().order_by("pk")
+        # sorted rather than order_by("pk") so prefetched relations don't query again
+        household_members = sorted(screen.household_members.all(), key=lambda h: h.pk)
         # check the income_streams
         checks.append([len(h.income_streams.all()) for h in household_members])
         # check the screen
@@ -161,7 +291,7 @@ class Command(BaseCommand):
         # check energy_calculator
         checks.append([hasattr(h, "energy_calculator") for h in household_members])
 
-        snapshots = screen.eligibility_snapshots.all().order_by("pk").prefetch_related("program_snapshots")
+        snapshots = sorted(screen.eligibility_snapshots.all(), key=lambda s: s.pk)
         # check the screen
         checks.append([s.screen.uuid for s in snapshots])
         # check the program_snapshots
@@ -171,17 +301,7 @@ class Command(BaseCommand):
 
     def _key_checks(self):
         checks = []
-        screens: list[Screen] = (
-            Screen.objects.all()
-            .order_by("pk")
-            .prefetch_related(
-                "household_members",
-                "household_members__income_streams",
-                "expenses",
-                "eligibility_snapshots",
-                "eligibility_snapshots__program_snapshots",
-            )
-        )
+        screens: list[Screen] = self._prefetched(Screen.objects.all().order_by("pk"))
 
         for screen in tqdm(
             screens.iterator(chunk_size=self.CHUNK_SIZE),
@@ -8,7 +8,7 @@ from screener.views import all_results
 
 
 class Command(BaseCommand):
-    help = "Retrigger webhook for a list of screen uuids"
+    help = "Retrigger webhook for a list of screen uuids. The deliver_webhooks worker posts them."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -60,11 +60,13 @@ class Command(BaseCommand):
                 )
                 continue
 
-            err = webhook.send(screen, results, force=True)
+            delivery = webhook.send(screen, results, force=True)
 
-            if err is not None:
+            if delivery is None:
                 self.stdout.write(
-                    self.style.ERROR(f"Failed to trigger webhook for '{screen.uuid}'. Failed with error: '{repr(err)}'")
+                    self.style.WARNING(
+                        f"No webhook url for '{screen.uuid}'. The referrer '{screen.referrer_code}' has no webhook_url"
+                    )
                 )
             else:
-                self.stdout.write(self.style.SUCCESS(f"Webhook triggered for '{screen.uuid}'"))
+                self.stdout.write(self.style.SUCCESS(f"Webhook queued for '{screen.uuid}'"))
@@ -0,0 +1,164 @@
+"""
+Unit tests for the archive_snapshots management command and the snapshot partition helpers.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from screener.models import EligibilitySnapshot, NPSScore, ProgramEligibilitySnapshot, Screen, WhiteLabel
+from screener.partitions import add_months, ensure_month_partitions, is_partitioned
+
+
+class ArchiveSnapshotsCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+        self.white_label = WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+        self.screen = Screen.objects.create(white_label=self.white_label, household_size=1, completed=True)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, "snapshots.jsonl.gz")
+
+    def _snapshot(self, days_ago, is_batch=True, screen=None):
+        snapshot = EligibilitySnapshot.objects.create(screen=screen or self.screen, is_batch=is_batch)
+        # submission_date is auto_now, so set it with an update.
+        EligibilitySnapshot.objects.filter(id=snapshot.id).update(
+            submission_date=timezone.now() - timedelta(days=days_ago)
+        )
+        ProgramEligibilitySnapshot.objects.create(
+            eligibility_snapshot=snapshot,
+            name="SNAP",
+            name_abbreviated="snap",
+            estimated_value=Decimal("100"),
+            eligible=True,
+            passed_tests=["income"],
+        )
+        return snapshot
+
+    def _call(self, **kwargs):
+        call_command("archive_snapshots", stdout=self.out, **kwargs)
+
+    def _archived(self):
+        with gzip.open(self.output, "rt") as f:
+            return [json.loads(line) for line in f]
+
+    def test_archives_old_batch_snapshots_with_their_programs(self):
+        old = self._snapshot(400)
+        self._snapshot(1)
+
+        self._call(output=self.output)
+
+        [line] = self._archived()
+        self.assertEqual(line["id"], old.id)
+        self.assertEqual(line["screen_id"], self.screen.id)
+        self.assertEqual(
+            [(p["name_abbreviated"], p["estimated_value"], p["passed_tests"]) for p in line["programs"]],
+            [("snap", "100.00", ["income"])],
+        )
+        self.assertFalse(EligibilitySnapshot.objects.filter(id=old.id).exists())
+        self.assertFalse(ProgramEligibilitySnapshot.objects.filter(eligibility_snapshot_id=old.id).exists())
+        self.assertIn("Archived 1 batch snapshots", self.out.getvalue())
+
+    def test_keeps_recent_user_latest_and_rated_snapshots(self):
+        user_snapshot = self._snapshot(500, is_batch=False)
+        rated = self._snapshot(400)
+        NPSScore.objects.create(eligibility_snapshot=rated, score=9)
+        recent = self._snapshot(10)
+        other_screen = Screen.objects.create(white_label=self.white_label, household_size=1, completed=True)
+        latest = self._snapshot(400, screen=other_screen)
+
+        self._call(output=self.output)
+
+        self.assertEqual(self._archived(), [])
+        self.assertEqual(
+            set(EligibilitySnapshot.objects.values_list("id", flat=True)),
+            {user_snapshot.id, rated.id, recent.id, latest.id},
+        )
+
+    def test_reruns_append_to_the_archive(self):
+        first = self._snapshot(400)
+        second = self._snapshot(300)
+        self._snapshot(1)
+        self._call(output=self.output, older_than=350)
+
+        self._call(output=self.output, older_than=200, chunk_size=1)
+
+        self.assertEqual([line["id"] for line in self._archived()], [first.id, second.id])
+
+    def test_dry_run_changes_nothing(self):
+        self._snapshot(400)
+        self._snapshot(1)
+
+        self._call(dry_run=True)
+
+        self.assertIn("Would archive 1 batch snapshots", self.out.getvalue())
+        self.assertEqual(EligibilitySnapshot.objects.count(), 2)
+
+    def test_deletes_orphaned_program_results_and_nps_scores(self):
+        kept = self._snapshot(1)
+        NPSScore.objects.create(eligibility_snapshot=kept, score=9)
+        gone = self._snapshot(2)
+        NPSScore.objects.create(eligibility_snapshot=gone, score=3)
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM screener_eligibilitysnapshot WHERE id = %s", [gone.id])
+
+        self._call(dry_run=True, delete_orphans=True)
+
+        self.assertIn("Would delete 1 orphaned program eligibility snapshots", self.out.getvalue())
+        self.assertEqual(NPSScore.objects.count(), 2)
+
+        self._call(output=self.output, delete_orphans=True, chunk_size=1)
+
+        self.assertIn("Deleted 1 orphaned nps scores", self.out.getvalue())
+        self.assertEqual(
+            list(ProgramEligibilitySnapshot.objects.values_list("eligibility_snapshot_id", flat=True)), [kept.id]
+        )
+        self.assertEqual(list(NPSScore.objects.values_list("eligibility_snapshot_id", flat=True)), [kept.id])
+
+    def test_output_is_required(self):
+        with self.assertRaises(CommandError):
+            self._call()
+
+
+class MonthPartitionsTest(TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE test_partitioned (id int, created timestamptz NOT NULL) PARTITION BY RANGE (created)"
+            )
+            cursor.execute("CREATE TABLE test_partitioned_default PARTITION OF test_partitioned DEFAULT")
+            cursor.execute(
+                "INSERT INTO test_partitioned VALUES (1, '2026-02-10T00:00:00Z'), (2, '2026-05-01T00:00:00Z')"
+            )
+
+    def _partition_of(self, id):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM test_partitioned WHERE id = %s", [id])
+            return cursor.fetchone()[0]
+
+    def test_adds_missing_months_and_moves_their_rows_out_of_the_default_partition(self):
+        created = ensure_month_partitions("test_partitioned", "created", date(2026, 1, 1), date(2026, 3, 1))
+
+        self.assertEqual(
+            created, ["test_partitioned_y2026m01", "test_partitioned_y2026m02", "test_partitioned_y2026m03"]
+        )
+        self.assertEqual(self._partition_of(1), "test_partitioned_y2026m02")
+        self.assertEqual(self._partition_of(2), "test_partitioned_default")
+        self.assertEqual(ensure_month_partitions("test_partitioned", "created", date(2026, 2, 1), date(2026, 2, 1)), [])
+
+    def test_is_partitioned(self):
+        self.assertTrue(is_partitioned("test_partitioned"))
+        self.assertFalse(is_partitioned("screener_screen"))
+
+    def test_add_months_crosses_years(self):
+        self.assertEqual(add_months(date(2026, 11, 20), 3), date(2027, 2, 1))
@@ -0,0 +1,164 @@
+"""
+Unit tests for the batch_snapshots management command.
+"""
+
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from screener import batch
+from screener.management.commands import batch_snapshots
+from screener.batch import SharedRateLimiter
+from screener.models import Screen, WhiteLabel
+
+
+def make_screen(white_label: WhiteLabel, **kwargs) -> Screen:
+    defaults = {
+        "white_label": white_label,
+        "zipcode": "80203",
+        "county": "Denver",
+        "household_size": 1,
+        "agree_to_tos": True,
+        "completed": True,
+        "is_test": False,
+        "is_test_data": False,
+        "submission_date": timezone.make_aware(datetime(2024, 6, 1)),
+    }
+    defaults.update(kwargs)
+    return Screen.objects.create(**defaults)
+
+
+def _thread_pool(max_workers, mp_context=None, initializer=None, initargs=()):
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+
+class BatchSnapshotsCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+        self.white_label = WhiteLabel.objects.create(name="Test State", code="test", state_code="TS")
+        self.screens = [make_screen(self.white_label) for _ in range(5)]
+        make_screen(self.white_label, is_test=True)
+        self.checkpoint_dir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.checkpoint_dir.name, "checkpoint.json")
+
+    def tearDown(self):
+        self.checkpoint_dir.cleanup()
+
+    def _call(self, **kwargs):
+        options = {"white_label": "test", "all": True, "limit": -1, "workers": 1, "pe_rate": 1000}
+        options.update(kwargs)
+        call_command("batch_snapshots", stdout=self.out, stderr=StringIO(), **options)
+
+    @patch.object(batch, "ID_CHUNK_SIZE", 2)
+    @patch.object(batch_snapshots, "eligibility_results")
+    def test_snapshots_matching_screens_newest_first(self, eligibility_results):
+        self._call()
+
+        snapshotted = [call.args[0].id for call in eligibility_results.call_args_list]
+        self.assertEqual(snapshotted, sorted((s.id for s in self.screens), reverse=True))
+        for call in eligibility_results.call_args_list:
+            self.assertEqual(call.kwargs, {"batch": True})
+        self.assertIn("Processed 5 screens", self.out.getvalue())
+
+    @patch.object(batch_snapshots, "eligibility_results")
+    def test_limit(self, eligibility_results):
+        self._call(limit=2)
+
+        self.assertEqual(eligibility_results.call_count, 2)
+
+    @patch.object(batch_snapshots, "eligibility_results")
+    def test_counts_errors_by_type(self, eligibility_results):
+        failing = {self.screens[0].id: KeyError("income"), self.screens[1].id: KeyError("age")}
+        failing[self.screens[2].id] = ValueError("bad zipcode")
+
+        def run(screen, batch):
+            if screen.id in failing:
+                raise failing[screen.id]
+
+        eligibility_results.side_effect = run
+        self._call()
+
+        output = self.out.getvalue()
+        self.assertIn("3 screens had errors", output)
+        self.assertIn("KeyError: 2", output)
+        self.assertIn("ValueError: 1", output)
+        self.assertIn(f"{self.screens[2].id}: ValueError: bad zipcode", output)
+
+    @patch.object(batch_snapshots, "CHECKPOINT_EVERY", 1)
+    @patch.object(batch_snapshots, "eligibility_results")
+    def test_interrupted_run_resumes_from_checkpoint(self, eligibility_results):
+        newest_first = sorted((s.id for s in self.screens), reverse=True)
+
+        def interrupt_on_third(screen, batch):
+            if screen.id == newest_first[2]:
+                raise KeyboardInterrupt
+
+        eligibility_results.side_effect = interrupt_on_third
+        with self.assertRaises(KeyboardInterrupt):
+            self._call(checkpoint=self.checkpoint)
+
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)["before_id"], newest_first[1])
+
+        eligibility_results.reset_mock(side_effect=True)
+        self._call(checkpoint=self.checkpoint)
+
+        snapshotted = [call.args[0].id for call in eligibility_results.call_args_list]
+        self.assertEqual(snapshotted, newest_first[2:])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    @patch.object(batch_snapshots, "eligibility_results")
+    def test_checkpoint_kept_when_limit_stops_the_run(self, eligibility_results):
+        self._call(limit=2, checkpoint=self.checkpoint)
+        self._call(limit=2, checkpoint=self.checkpoint)
+
+        self.assertEqual(eligibility_results.call_count, 4)
+        self.assertTrue(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_for_other_filters_is_refused(self):
+        with open(self.checkpoint, "w") as f:
+            json.dump({"filters": {"all": True, "new": False, "white_label": "co"}, "before_id": 10}, f)
+
+        with self.assertRaises(CommandError):
+            self._call(checkpoint=self.checkpoint)
+
+    @patch.object(batch.connections, "close_all")
+    @patch.object(batch, "ProcessPoolExecutor", _thread_pool)
+    @patch.object(batch, "IN_FLIGHT_PER_WORKER", 1)
+    def test_worker_pool(self, close_all):
+        # Pool workers have their own connections, which can't see this test's
+        # transaction, so the per-screen work is replaced as well.
+        snapshotted = []
+
+        def snapshot(screen_id):
+            snapshotted.append(screen_id)
+            return ("RuntimeError", "boom") if screen_id == self.screens[0].id else None
+
+        with patch.object(batch_snapshots, "snapshot_screen", snapshot):
+            self._call(workers=2, checkpoint=self.checkpoint)
+
+        self.assertEqual(sorted(snapshotted), sorted(s.id for s in self.screens))
+        self.assertIn("RuntimeError: 1", self.out.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint))
+        close_all.assert_called_once()
+
+
+class SharedRateLimiterTest(TestCase):
+    def test_spaces_calls(self):
+        limiter = SharedRateLimiter(rate=50)
+
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.wait()
+
+        self.assertGreaterEqual(time.monotonic() - start, 3 / 50)
@@ -0,0 +1,182 @@
+"""
+Unit tests for the deliver_webhooks management command and the webhook queue it works through.
+"""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from programs.models import Referrer, WebHookFunction
+from screener.models import Screen, WebhookDelivery, WhiteLabel
+from screener.webhooks import MAX_ATTEMPTS, RETRY_BASE, claim_batches, get_web_hook
+
+
+def response(status_code=200, text="ok"):
+    return MagicMock(status_code=status_code, text=text)
+
+
+class DeliverWebhooksCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+        self.white_label = WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+        self.referrer = Referrer.objects.create(
+            white_label=self.white_label,
+            referrer_code="partner",
+            name="Partner",
+            webhook_url="https://partner.example.com/hook",
+        )
+        self.referrer.webhook_functions.add(WebHookFunction.objects.create(name="send_results"))
+
+    def _queue(self, external_id="ext-1", results=None):
+        screen = Screen.objects.create(
+            white_label=self.white_label,
+            referrer_code="partner",
+            external_id=external_id,
+            household_size=1,
+            completed=True,
+        )
+        return get_web_hook(screen).send(screen, results or {"programs": []})
+
+    def _call(self, post_responses, **kwargs):
+        with patch("screener.webhooks.requests.post", side_effect=post_responses) as post:
+            call_command("deliver_webhooks", once=True, stdout=self.out, **kwargs)
+        return post
+
+    def test_send_queues_the_results_instead_of_posting(self):
+        with patch("screener.webhooks.requests.post") as post:
+            delivery = self._queue(results={"programs": [{"name": "SNAP"}]})
+
+        post.assert_not_called()
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, WebhookDelivery.PENDING)
+        self.assertEqual(delivery.results, {"programs": [{"name": "SNAP"}]})
+
+    def test_results_are_not_kept_when_the_webhook_does_not_send_them(self):
+        self.referrer.webhook_functions.clear()
+
+        self.assertIsNone(self._queue().results)
+
+    def test_posts_each_screen_and_marks_it_delivered(self):
+        delivery = self._queue()
+
+        post = self._call([response()])
+
+        post.assert_called_once()
+        self.assertEqual(post.call_args.args, ("https://partner.example.com/hook",))
+        self.assertEqual(post.call_args.kwargs["json"], {"external_id": "ext-1", "eligibility": {"programs": []}})
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, WebhookDelivery.DELIVERED)
+        self.assertEqual((delivery.attempts, delivery.last_status_code), (1, 200))
+        self.assertIsNotNone(delivery.delivered_at)
+        self.assertIn("Posted 1 webhook requests, 0 failed", self.out.getvalue())
+
+    def test_failures_are_retried_with_backoff_then_given_up_on(self):
+        delivery = self._queue()
+
+        before = timezone.now()
+        self._call([response(500, "down")])
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, WebhookDelivery.PENDING)
+        self.assertEqual(delivery.last_error, "500: down")
+        self.assertGreaterEqual(delivery.next_attempt_at, before + RETRY_BASE)
+
+        WebhookDelivery.objects.filter(id=delivery.id).update(next_attempt_at=timezone.now(), attempts=MAX_ATTEMPTS - 1)
+        with patch("screener.webhooks.capture_message") as capture_message:
+            self._call(requests.exceptions.ConnectionError("refused"))
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, WebhookDelivery.FAILED)
+        self.assertEqual(delivery.attempts, MAX_ATTEMPTS)
+        self.assertIsNone(delivery.last_status_code)
+        capture_message.assert_called_once()
+
+    def test_batches_screens_for_referrers_that_accept_them(self):
+        Referrer.objects.filter(id=self.referrer.id).update(webhook_batch_size=2)
+        for external_id in ("a", "b", "c"):
+            self._queue(external_id)
+
+        post = self._call([response(), response()])
+
+        bodies = [call.kwargs["json"]["batch"] for call in post.call_args_list]
+        self.assertEqual(sorted(len(body) for body in bodies), [1, 2])
+        self.assertEqual(sorted(item["external_id"] for body in bodies for item in body), ["a", "b", "c"])
+        self.assertEqual(WebhookDelivery.objects.filter(status=WebhookDelivery.DELIVERED).count(), 3)
+
+    def test_deliveries_whose_screen_was_deleted_after_the_claim_are_left_out(self):
+        Referrer.objects.filter(id=self.referrer.id).update(webhook_batch_size=2)
+        kept = self._queue("kept")
+        gone = self._queue("gone")
+
+        def claim_then_delete(in_flight):
+            batches = claim_batches(in_flight)
+            Screen.objects.filter(id=gone.screen_id).delete()
+            return batches
+
+        with patch("screener.management.commands.deliver_webhooks.claim_batches", side_effect=claim_then_delete):
+            post = self._call([response()])
+
+        self.assertEqual([item["external_id"] for item in post.call_args.kwargs["json"]["batch"]], ["kept"])
+        kept.refresh_from_db()
+        self.assertEqual(kept.status, WebhookDelivery.DELIVERED)
+        self.assertFalse(WebhookDelivery.objects.filter(id=gone.id).exists())
+
+    def test_a_body_that_cannot_be_built_is_a_failed_attempt(self):
+        delivery = self._queue()
+
+        with patch("screener.webhooks.Hook.request_data", side_effect=ValueError("bad screen")), patch(
+            "screener.management.commands.deliver_webhooks.capture_exception"
+        ) as capture_exception:
+            post = self._call([])
+
+        post.assert_not_called()
+        capture_exception.assert_called_once()
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.status, delivery.attempts), (WebhookDelivery.PENDING, 1))
+        self.assertEqual(delivery.last_error, "Could not build the request body: ValueError('bad screen')")
+        self.assertGreater(delivery.next_attempt_at, timezone.now())
+        self.assertIn("1 failed", self.out.getvalue())
+
+    def test_stats(self):
+        self._queue()
+        self._call([response()])
+        self._queue("ext-2")
+
+        call_command("deliver_webhooks", stats=True, stdout=self.out)
+
+        header, row = self.out.getvalue().splitlines()[-2:]
+        self.assertTrue(header.startswith("referrer\tqueued\tdelivered\tfailed\twaiting"))
+        self.assertTrue(row.startswith("[Colorado] Partner\t2\t1\t0\t1"))
+
+
+class ClaimBatchesTest(TestCase):
+    def setUp(self):
+        white_label = WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+        self.referrer = Referrer.objects.create(
+            white_label=white_label, referrer_code="partner", name="Partner", webhook_url="https://example.com"
+        )
+        screen = Screen.objects.create(white_label=white_label, household_size=1, completed=True)
+        self.deliveries = [WebhookDelivery.objects.create(referrer=self.referrer, screen=screen) for _ in range(5)]
+
+    def _claimed(self, in_flight=None):
+        return [[delivery.id for delivery in batch] for batch in claim_batches(in_flight or {})]
+
+    def test_claims_no_more_than_the_referrers_free_slots(self):
+        Referrer.objects.filter(id=self.referrer.id).update(webhook_concurrency=3, webhook_batch_size=1)
+        ids = [delivery.id for delivery in self.deliveries]
+
+        self.assertEqual(self._claimed({self.referrer.id: 1}), [[ids[0]], [ids[1]]])
+        self.assertEqual(self._claimed({self.referrer.id: 3}), [])
+        self.assertEqual(self._claimed(), [[ids[2]], [ids[3]], [ids[4]]])
+        self.assertEqual(self._claimed(), [])
+
+    def test_abandoned_claims_are_picked_up_again(self):
+        [[first]] = self._claimed()
+        WebhookDelivery.objects.filter(id=first).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self._claimed(), [[first]])
@@ -0,0 +1,130 @@
+"""
+Unit tests for the email_new_benefits management command.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from authentication.models import User
+from integrations.services.cms_integration import CoHubSpotIntegration
+from screener.management.commands import email_new_benefits
+from screener.models import EligibilitySnapshot, ProgramEligibilitySnapshot, Screen, WhiteLabel
+
+
+@override_settings(
+    HUBSPOT_NEW_BENEFITS_COUNT_PROPERTY="new_benefits_count", HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY="new_benefits_value"
+)
+class EmailNewBenefitsCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+        self.white_label = WhiteLabel.objects.create(
+            name="Colorado", code="co", state_code="CO", cms_method="co_hubspot"
+        )
+        self.other_white_label = WhiteLabel.objects.create(
+            name="Texas", code="tx", state_code="TX", cms_method="tx_hubspot"
+        )
+        self.updates = []
+        patcher = patch.object(CoHubSpotIntegration, "bulk_update", side_effect=self.updates.extend)
+        self.bulk_update = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _user(self, external_id):
+        return User.objects.create(email_or_cell=f"user{User.objects.count()}@example.com", external_id=external_id)
+
+    def _snapshot(self, user, programs, white_label=None, age_days=0, is_batch=True):
+        screen = Screen.objects.create(
+            white_label=white_label or self.white_label, user=user, completed=True, household_size=1
+        )
+        snapshot = EligibilitySnapshot.objects.create(screen=screen, is_batch=is_batch)
+        # submission_date is auto_now, so backdate it with an update.
+        EligibilitySnapshot.objects.filter(id=snapshot.id).update(
+            submission_date=timezone.now() - timedelta(days=age_days)
+        )
+        for name, new, eligible, value in programs:
+            ProgramEligibilitySnapshot.objects.create(
+                eligibility_snapshot=snapshot,
+                name=name,
+                name_abbreviated=name,
+                new=new,
+                eligible=eligible,
+                estimated_value=Decimal(value),
+            )
+        return snapshot
+
+    def _call(self, **kwargs):
+        call_command("email_new_benefits", stdout=self.out, stderr=StringIO(), limit=-1, **kwargs)
+        return {update["id"]: update["properties"] for update in self.updates}
+
+    def test_counts_new_eligible_programs_in_latest_batch_snapshot(self):
+        user = self._user("hs-1")
+        self._snapshot(user, [("snap", True, True, "300")], age_days=30)
+        self._snapshot(user, [("snap", True, True, "250.75"), ("wic", True, True, "40"), ("tanf", True, False, "9")])
+        self._snapshot(user, [("lifeline", True, True, "100")], is_batch=False)
+
+        updates = self._call()
+
+        self.assertEqual(updates, {"hs-1": {"new_benefits_count": 2, "new_benefits_value": 290}})
+
+    def test_contacts_without_new_benefits_are_reset(self):
+        self._snapshot(self._user("hs-1"), [("snap", False, True, "300")])
+        self._snapshot(self._user("hs-2"), [])
+
+        updates = self._call()
+
+        self.assertEqual(updates["hs-1"], {"new_benefits_count": 0, "new_benefits_value": 0})
+        self.assertEqual(updates["hs-2"], {"new_benefits_count": 0, "new_benefits_value": 0})
+
+    def test_sends_only_the_configured_properties(self):
+        self._snapshot(self._user("hs-1"), [("snap", True, True, "300")])
+
+        self._call()
+
+        self.assertEqual(
+            self.updates, [{"id": "hs-1", "properties": {"new_benefits_count": 1, "new_benefits_value": 300}}]
+        )
+
+    @override_settings(HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY=None)
+    def test_properties_must_be_configured(self):
+        self._snapshot(self._user("hs-1"), [("snap", True, True, "300")])
+
+        with self.assertRaisesMessage(CommandError, "HUBSPOT_NEW_BENEFITS_VALUE_PROPERTY"):
+            self._call()
+
+        self.bulk_update.assert_not_called()
+
+    def test_skips_users_not_in_hubspot_and_other_white_labels(self):
+        self._snapshot(self._user(None), [("snap", True, True, "300")])
+        self._snapshot(self._user("hs-tx"), [("snap", True, True, "300")], white_label=self.other_white_label)
+
+        self.assertEqual(self._call(), {})
+        self.assertIn("No users in HubSpot", self.out.getvalue())
+
+    def test_limit(self):
+        for i in range(3):
+            self._snapshot(self._user(f"hs-{i}"), [])
+
+        call_command("email_new_benefits", stdout=self.out, limit=2)
+
+        self.assertEqual(len(self.updates), 2)
+
+    @patch.object(email_new_benefits, "BATCH_SIZE", 2)
+    def test_queries_do_not_grow_with_users(self):
+        for i in range(5):
+            self._snapshot(self._user(f"hs-{i}"), [("snap", True, True, "10"), ("wic", True, True, "5")])
+
+        with CaptureQueriesContext(connection) as queries:
+            updates = self._call()
+
+        self.assertEqual(len(updates), 5)
+        self.assertEqual(self.bulk_update.call_count, 3)
+        # The white label, then the totals.
+        self.assertLessEqual(len(queries), 3)
@@ -3,20 +3,27 @@ Unit tests for export_screener_data management command.
 """
 
 import csv
+import json
 import os
 import tempfile
+import zipfile
 from datetime import datetime
 from io import StringIO
 
+import pyarrow.dataset as pa_dataset
+import pyarrow.parquet as pq
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 from django.utils import timezone
 
 from screener.models import (
     CurrentBenefit,
+    EligibilitySnapshot,
     Expense,
     HouseholdMember,
     IncomeStream,
+    ProgramEligibilitySnapshot,
     Screen,
     WhiteLabel,
 )
@@ -288,3 +295,157 @@ class ExportScreenerDataCommandTest(TestCase):
             self._call(output_dir)
             err_output = self.err.getvalue()
             self.assertNotIn("missing descriptions", err_output)
+
+    # ------------------------------------------------------------------
+    # COPY engine and Parquet format
+    # ------------------------------------------------------------------
+
+    def _seed_household(self, white_label: WhiteLabel, **kwargs) -> Screen:
+        screen = make_screen(white_label, **kwargs)
+        member = HouseholdMember.objects.create(screen=screen, relationship="headOfHousehold", age=30, student=True)
+        IncomeStream.objects.create(
+            screen=screen, household_member=member, type="wages", amount="2000.50", frequency="monthly"
+        )
+        Expense.objects.create(screen=screen, type="rent", amount=1000, frequency="monthly")
+        snapshot = EligibilitySnapshot.objects.create(screen=screen)
+        ProgramEligibilitySnapshot.objects.create(
+            eligibility_snapshot=snapshot,
+            name="SNAP",
+            name_abbreviated="snap",
+            eligible=True,
+            estimated_value="250.75",
+            failed_tests=[],
+            passed_tests=["income"],
+        )
+        return screen
+
+    def test_copy_engine_writes_the_same_csv_rows(self):
+        self._seed_household(self.white_label, referrer_code="")
+        with tempfile.TemporaryDirectory() as orm_dir, tempfile.TemporaryDirectory() as copy_dir:
+            self._call(orm_dir)
+            self._call(copy_dir, engine="copy")
+
+            for filename in ("household_members.csv", "income_streams.csv", "expenses.csv", "white_labels.csv"):
+                self.assertEqual(self._read_csv(copy_dir, filename), self._read_csv(orm_dir, filename), filename)
+
+            screen = self._read_csv(copy_dir, "screens.csv")[0]
+            self.assertEqual(screen["completed"], "True")
+            self.assertEqual(screen["submission_date"], "2024-06-01 00:00:00.000000+00:00")
+            eligibility = self._read_csv(copy_dir, "program_eligibility.csv")[0]
+            self.assertEqual(eligibility["passed_tests"], '["income"]')
+        self.assertIn("Exported 1 program eligibility records", self.out.getvalue())
+
+    def test_parquet_is_typed_and_the_same_from_either_engine(self):
+        screen = self._seed_household(self.white_label)
+        with tempfile.TemporaryDirectory() as orm_dir, tempfile.TemporaryDirectory() as copy_dir:
+            self._call(orm_dir, format="parquet")
+            self._call(copy_dir, format="parquet", engine="copy")
+
+            for filename in ("screens.parquet", "income_streams.parquet", "program_eligibility.parquet"):
+                orm_table = pq.read_table(os.path.join(orm_dir, filename))
+                copy_table = pq.read_table(os.path.join(copy_dir, filename))
+                self.assertTrue(copy_table.equals(orm_table), filename)
+
+            income = pq.read_table(os.path.join(copy_dir, "income_streams.parquet"))
+            self.assertEqual(str(income.schema.field("amount").type), "decimal128(10, 2)")
+            eligibility = pq.read_table(os.path.join(copy_dir, "program_eligibility.parquet")).to_pylist()[0]
+            self.assertEqual(eligibility["screen_id"], screen.id)
+            self.assertIs(eligibility["eligible"], True)
+            self.assertEqual(eligibility["passed_tests"], '["income"]')
+            self.assertFalse(os.path.exists(os.path.join(copy_dir, "screens.csv")))
+
+    def test_partitions_parquet_by_white_label_and_month(self):
+        other_wl = WhiteLabel.objects.create(name="Other State", code="other", state_code="OS")
+        self._seed_household(self.white_label)
+        self._seed_household(self.white_label, submission_date=timezone.make_aware(datetime(2024, 7, 15)))
+        self._seed_household(other_wl)
+        with tempfile.TemporaryDirectory() as output_dir:
+            self._call(output_dir, format="parquet", engine="copy", partition_by=["white_label", "month"])
+
+            months = sorted(os.listdir(os.path.join(output_dir, "income_streams", "white_label_code=test")))
+            self.assertEqual(months, ["submission_month=2024-06", "submission_month=2024-07"])
+            members = pa_dataset.dataset(os.path.join(output_dir, "household_members"), partitioning="hive")
+            self.assertEqual(
+                sorted(members.to_table().column("white_label_code").to_pylist()), ["other", "test", "test"]
+            )
+            # Lookup tables aren't screen data, so they stay single files.
+            self.assertTrue(os.path.exists(os.path.join(output_dir, "white_labels.parquet")))
+
+    def test_partition_by_requires_parquet(self):
+        make_screen(self.white_label)
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaises(CommandError):
+                self._call(output_dir, partition_by=["month"])
+
+    def test_compress_includes_partitioned_parquet(self):
+        self._seed_household(self.white_label)
+        with tempfile.TemporaryDirectory() as parent_dir:
+            output_dir = os.path.join(parent_dir, "export")
+            self._call(output_dir, format="parquet", partition_by=["month"], compress=True)
+
+            with zipfile.ZipFile(f"{output_dir}.zip") as zf:
+                names = zf.namelist()
+            self.assertIn("screens/submission_month=2024-06/part-0.parquet", names)
+            self.assertIn("data_dictionary.csv", names)
+
+    # ------------------------------------------------------------------
+    # Incremental export
+    # ------------------------------------------------------------------
+
+    def _read_manifest(self, output_dir: str) -> dict:
+        with open(os.path.join(output_dir, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_incremental_exports_only_new_and_changed_screens(self):
+        changed = self._seed_household(self.white_label)
+        self._seed_household(self.white_label)  # unchanged
+        with tempfile.TemporaryDirectory() as output_dir:
+            self._call(output_dir, incremental=True)
+
+            new = self._seed_household(self.white_label)
+            EligibilitySnapshot.objects.create(screen=changed)
+            self._call(output_dir, incremental=True)
+
+            manifest = self._read_manifest(output_dir)
+            self.assertEqual(len(manifest["runs"]), 2)
+            first_run, second_run = manifest["runs"]
+            self.assertEqual(first_run["rows"]["screens"], 2)
+            self.assertEqual(second_run["since"], first_run["high_water_mark"])
+            self.assertEqual(manifest["high_water_mark"]["screen_id"], new.id)
+
+            second_screens = self._read_csv(output_dir, f"screens/part-{second_run['run_id']}.csv")
+            self.assertEqual({int(row["id"]) for row in second_screens}, {changed.id, new.id})
+            second_members = self._read_csv(output_dir, f"household_members/part-{second_run['run_id']}.csv")
+            self.assertEqual({int(row["screen_id"]) for row in second_members}, {changed.id, new.id})
+            self.assertEqual(len(os.listdir(os.path.join(output_dir, "household_members"))), 2)
+            self.assertIn(f"income_streams/part-{second_run['run_id']}.csv", second_run["files"])
+
+    def test_incremental_run_without_changes_writes_nothing(self):
+        self._seed_household(self.white_label)
+        with tempfile.TemporaryDirectory() as output_dir:
+            self._call(output_dir, incremental=True)
+            self._call(output_dir, incremental=True)
+
+            self.assertEqual(len(self._read_manifest(output_dir)["runs"]), 1)
+            self.assertEqual(len(os.listdir(os.path.join(output_dir, "screens"))), 1)
+        self.assertIn("No screens found matching the criteria.", self.out.getvalue())
+
+    def test_incremental_appends_to_partitions(self):
+        self._seed_household(self.white_label)
+        with tempfile.TemporaryDirectory() as output_dir:
+            options = {"format": "parquet", "engine": "copy", "partition_by": ["month"], "incremental": True}
+            self._call(output_dir, **options)
+            self._seed_household(self.white_label)
+            self._call(output_dir, **options)
+
+            partition = os.path.join(output_dir, "screens", "submission_month=2024-06")
+            self.assertEqual(len(os.listdir(partition)), 2)
+            screens = pa_dataset.dataset(os.path.join(output_dir, "screens"), partitioning="hive").to_table()
+            self.assertEqual(screens.num_rows, 2)
+
+    def test_incremental_requires_the_same_layout(self):
+        make_screen(self.white_label)
+        with tempfile.TemporaryDirectory() as output_dir:
+            self._call(output_dir, incremental=True)
+            with self.assertRaises(CommandError):
+                self._call(output_dir, incremental=True, format="parquet")
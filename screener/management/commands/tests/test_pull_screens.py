@@ -0,0 +1,138 @@
+"""
+Unit tests for the pull_screens management command.
+
+The command is pointed at the default database as its source, so each test copies screens into the
+database they came from.
+"""
+
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from authentication.models import User
+from screener.management.commands.pull_screens import Command
+from screener.models import (
+    EligibilitySnapshot,
+    EnergyCalculatorMember,
+    EnergyCalculatorScreen,
+    Expense,
+    HouseholdMember,
+    IncomeStream,
+    Insurance,
+    Message,
+    ProgramEligibilitySnapshot,
+    Screen,
+    WhiteLabel,
+)
+
+
+@override_settings(HAS_MIGRATION_SOURCE_DB=True)
+@patch.object(Command, "MIGRATION_SOURCE_DB", "default")
+class PullScreensCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+        self.white_label = WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, "pull.json")
+
+    def _screen(self) -> Screen:
+        n = User.objects.count()
+        user = User.objects.create(email_or_cell=f"user{n}@example.com", external_id=f"hs-{n}")
+        screen = Screen.objects.create(white_label=self.white_label, user=user, household_size=2, completed=True)
+        head = HouseholdMember.objects.create(screen=screen, relationship="headOfHousehold", age=40)
+        spouse = HouseholdMember.objects.create(screen=screen, relationship="spouse", age=38)
+        IncomeStream.objects.create(screen=screen, household_member=head, type="wages", amount=100, frequency="monthly")
+        Insurance.objects.create(household_member=spouse, medicaid=True)
+        EnergyCalculatorMember.objects.create(household_member=head)
+        EnergyCalculatorScreen.objects.create(screen=screen, is_renter=True)
+        Expense.objects.create(screen=screen, household_member=spouse, type="rent", amount=900, frequency="monthly")
+        Message.objects.create(screen=screen, type="email")
+        snapshot = EligibilitySnapshot.objects.create(screen=screen)
+        for name in ("snap", "wic"):
+            ProgramEligibilitySnapshot.objects.create(
+                eligibility_snapshot=snapshot,
+                name=name,
+                name_abbreviated=name,
+                eligible=True,
+                estimated_value=Decimal("10"),
+            )
+        return screen
+
+    def _call(self, **kwargs):
+        call_command("pull_screens", stdout=self.out, stderr=StringIO(), **kwargs)
+
+    def _copy_of(self, screen: Screen) -> Screen:
+        return Screen.objects.exclude(pk=screen.pk).get(uuid=screen.uuid)
+
+    def test_copies_screens_with_remapped_keys(self):
+        source = self._screen()
+
+        self._call()
+
+        copy = self._copy_of(source)
+        self.assertEqual(copy.user_id, source.user_id)
+        members = list(copy.household_members.order_by("pk"))
+        self.assertEqual([m.relationship for m in members], ["headOfHousehold", "spouse"])
+        self.assertEqual(copy.income_streams.get().household_member_id, members[0].pk)
+        self.assertEqual(copy.expenses.get().household_member_id, members[1].pk)
+        self.assertTrue(Insurance.objects.get(household_member=members[1]).medicaid)
+        self.assertTrue(EnergyCalculatorMember.objects.filter(household_member=members[0]).exists())
+        self.assertTrue(copy.energy_calculator.is_renter)
+        self.assertEqual(copy.messages.count(), 1)
+        self.assertEqual(ProgramEligibilitySnapshot.objects.filter(eligibility_snapshot__screen=copy).count(), 2)
+        self.assertIn("Copied 1 screens", self.out.getvalue())
+
+    def test_queries_do_not_grow_with_screens(self):
+        def queries_to_copy(new_screens):
+            for _ in range(new_screens):
+                self._screen()
+            with CaptureQueriesContext(connection) as queries:
+                self._call()
+            # Start each run from an empty database.
+            Screen.objects.all().delete()
+            return len(queries)
+
+        self.assertEqual(queries_to_copy(2), queries_to_copy(6))
+
+    @patch.object(Command, "CHUNK_SIZE", 1)
+    def test_resumes_after_checkpoint_skipping_screens_already_copied(self):
+        first, second, third = self._screen(), self._screen(), self._screen()
+        with open(self.checkpoint, "w") as f:
+            json.dump({"after_id": first.pk}, f)
+
+        self._call(checkpoint=self.checkpoint)
+
+        # The first screen is before the checkpoint, and the second is already in the target database.
+        self.assertEqual(Screen.objects.filter(uuid=first.uuid).count(), 1)
+        self.assertEqual(Screen.objects.filter(uuid=second.uuid).count(), 1)
+        self.assertEqual(Screen.objects.filter(uuid=third.uuid).count(), 2)
+        self.assertIn("Skipped 1 screens", self.out.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    @patch.object(Command, "CHUNK_SIZE", 1)
+    def test_failed_chunk_rolls_back_and_keeps_checkpoint(self):
+        first, second = self._screen(), self._screen()
+        copy_chunk = Command._copy_chunk
+
+        def fail_on_second(command, screens, white_label_ids):
+            copy_chunk(command, screens, white_label_ids)
+            if screens[0].uuid == second.uuid:
+                raise Command.CheckFailed("check failed")
+
+        with patch.object(Command, "_copy_chunk", fail_on_second):
+            with self.assertRaises(Command.CheckFailed):
+                self._call(checkpoint=self.checkpoint)
+
+        self.assertEqual(Screen.objects.filter(uuid=first.uuid).count(), 2)
+        self.assertEqual(Screen.objects.filter(uuid=second.uuid).count(), 1)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f), {"after_id": first.pk})
@@ -0,0 +1,121 @@
+"""
+Unit tests for the update_eligibility_rollups management command.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from screener.models import (
+    EligibilityRollup,
+    EligibilityRollupProgress,
+    EligibilitySnapshot,
+    ProgramEligibilitySnapshot,
+    Screen,
+    WhiteLabel,
+)
+
+
+class UpdateEligibilityRollupsCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+        self.white_label = WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+
+    def _snapshot(self, programs, day=1, referrer_code=None, had_error=False, is_batch=False, screen=None):
+        screen = screen or Screen.objects.create(
+            white_label=self.white_label, referrer_code=referrer_code, completed=True, household_size=1
+        )
+        snapshot = EligibilitySnapshot.objects.create(screen=screen, is_batch=is_batch, had_error=had_error)
+        # submission_date is auto_now, so set it with an update.
+        EligibilitySnapshot.objects.filter(id=snapshot.id).update(
+            submission_date=datetime(2026, 3, day, 12, tzinfo=dt_timezone.utc)
+        )
+        for name, eligible, new, value in programs:
+            ProgramEligibilitySnapshot.objects.create(
+                eligibility_snapshot=snapshot,
+                name=name,
+                name_abbreviated=name,
+                eligible=eligible,
+                new=new,
+                estimated_value=Decimal(value),
+            )
+        return snapshot
+
+    def _call(self, **kwargs):
+        call_command("update_eligibility_rollups", stdout=self.out, **kwargs)
+
+    def _rollups(self):
+        return {
+            (r.program, r.day.day, r.referrer_code): (r.screens, r.eligible, r.new_eligible, r.total_value)
+            for r in EligibilityRollup.objects.all()
+        }
+
+    def test_totals_per_program_day_and_referrer(self):
+        self._snapshot([("snap", True, True, "300"), ("wic", False, False, "0")])
+        self._snapshot([("snap", True, False, "200.50")])
+        self._snapshot([("snap", False, False, "0")], referrer_code="partner")
+        self._snapshot([("snap", True, True, "100")], day=2)
+
+        self._call()
+
+        self.assertEqual(
+            self._rollups(),
+            {
+                ("snap", 1, ""): (2, 2, 1, Decimal("500.50")),
+                ("wic", 1, ""): (1, 0, 0, Decimal("0")),
+                ("snap", 1, "partner"): (1, 0, 0, Decimal("0")),
+                ("snap", 2, ""): (1, 1, 1, Decimal("100")),
+            },
+        )
+
+    def test_later_runs_add_only_new_snapshots(self):
+        self._snapshot([("snap", True, True, "300")])
+        self._call()
+        last = self._snapshot([("snap", True, False, "50")])
+
+        self._call()
+        self._call()
+
+        self.assertEqual(self._rollups(), {("snap", 1, ""): (2, 2, 1, Decimal("350"))})
+        self.assertEqual(EligibilityRollupProgress.objects.get().last_snapshot_id, last.id)
+        self.assertIn("No new snapshots to count", self.out.getvalue())
+
+    def test_batch_and_test_screens_are_not_counted(self):
+        self._snapshot([("snap", True, True, "300")], is_batch=True)
+        test_screen = Screen.objects.create(white_label=self.white_label, is_test=True, completed=True)
+        self._snapshot([("snap", True, True, "300")], screen=test_screen)
+
+        self._call()
+
+        self.assertEqual(self._rollups(), {})
+
+    def test_waits_for_snapshots_still_being_calculated(self):
+        first = self._snapshot([("snap", True, True, "300")])
+        pending = EligibilitySnapshot.objects.create(screen=first.screen, had_error=True)
+        self._snapshot([("snap", True, True, "100")])
+
+        self._call()
+        self.assertEqual(self._rollups(), {("snap", 1, ""): (1, 1, 1, Decimal("300"))})
+
+        ProgramEligibilitySnapshot.objects.create(
+            eligibility_snapshot=pending, name="snap", name_abbreviated="snap", eligible=True, estimated_value=10
+        )
+        EligibilitySnapshot.objects.filter(id=pending.id).update(
+            had_error=False, submission_date=datetime(2026, 3, 1, 13, tzinfo=dt_timezone.utc)
+        )
+        self._call()
+
+        self.assertEqual(self._rollups(), {("snap", 1, ""): (3, 3, 2, Decimal("410"))})
+
+    def test_backfill_in_small_chunks_recounts_everything(self):
+        for value in ("10", "20", "30"):
+            self._snapshot([("snap", True, True, value)])
+        self._call()
+        EligibilityRollup.objects.update(screens=0)
+
+        self._call(backfill=True, chunk_size=1)
+
+        self.assertEqual(self._rollups(), {("snap", 1, ""): (3, 3, 3, Decimal("60"))})
@@ -0,0 +1,128 @@
+"""
+Unit tests for the what_if_impact management command.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from programs.models import Program, ProgramCategory
+from screener.management.commands import what_if_impact
+from screener.models import EligibilitySnapshot, Screen, WhiteLabel
+
+
+def make_screen(white_label: WhiteLabel, **kwargs) -> Screen:
+    defaults = {
+        "white_label": white_label,
+        "zipcode": "80203",
+        "county": "Denver",
+        "household_size": 1,
+        "agree_to_tos": True,
+        "completed": True,
+        "is_test": False,
+        "is_test_data": False,
+        "submission_date": timezone.make_aware(datetime(2024, 6, 1)),
+    }
+    defaults.update(kwargs)
+    return Screen.objects.create(**defaults)
+
+
+class WhatIfImpactCommandTest(TestCase):
+    def setUp(self):
+        self.out = StringIO()
+        self.white_label = WhiteLabel.objects.create(name="Test State", code="test", state_code="TS")
+        category = ProgramCategory.objects.new_program_category("test", "test_category", None)
+        for abbr, active in (("snap", True), ("wic", True), ("new_credit", False)):
+            program = Program.objects.new_program("test", abbr)
+            program.category = category
+            program.active = active
+            program.save()
+        self.screens = [make_screen(self.white_label) for _ in range(4)]
+
+        # Every screen is eligible for snap. Version 2 raises the value for all but the
+        # first screen and drops wic for the last one.
+        def calculate(screen, programs, missing_dependencies, pe_version=None):
+            eligibility = {}
+            for program in programs:
+                eligible, value = True, 100
+                if pe_version == "2.0.0":
+                    if program.name_abbreviated == "snap" and screen.id != self.screens[0].id:
+                        value = 150
+                    if program.name_abbreviated == "wic" and screen.id == self.screens[-1].id:
+                        eligible = False
+                eligibility[program.name_abbreviated] = SimpleNamespace(eligible=eligible, value=value)
+            return programs, eligibility, False, {"request": None, "response": None}
+
+        patcher = patch.object(what_if_impact, "calculate_eligibility", side_effect=calculate)
+        self.calculate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _call(self, **kwargs):
+        options = {"white_label": "test", "workers": 1, "pe_rate": 1000}
+        options.update(kwargs)
+        with tempfile.TemporaryDirectory() as output_dir:
+            output = os.path.join(output_dir, "impact.json")
+            call_command("what_if_impact", stdout=self.out, stderr=StringIO(), output=output, **options)
+            with open(output) as f:
+                return json.load(f)
+
+    def test_reports_flips_and_value_deltas(self):
+        report = self._call(baseline_pe_version="1.0.0", candidate_pe_version="2.0.0")
+
+        self.assertEqual(report["screens"], 4)
+        snap = report["programs"]["snap"]
+        self.assertEqual(snap["eligible"], {"baseline": 4, "candidate": 4})
+        self.assertEqual(snap["value_changed"], 3)
+        self.assertEqual(snap["total_value"], {"baseline": 400, "candidate": 550})
+        self.assertEqual(snap["value_deltas"]["count"], 3)
+        self.assertEqual(snap["value_deltas"]["median"], 50)
+
+        wic = report["programs"]["wic"]
+        self.assertEqual(wic["became_ineligible"], 1)
+        self.assertEqual(wic["examples"]["became_ineligible"], [self.screens[-1].id])
+        self.assertEqual(wic["value_deltas"]["min"], -100)
+
+        output = self.out.getvalue()
+        self.assertIn("eligible 4 -> 3 of 4 (+0 / -1", output)
+
+    def test_candidate_program_set(self):
+        report = self._call(add_programs=("new_credit",), remove_programs=("wic",))
+
+        self.assertEqual(report["programs"]["new_credit"]["only_candidate"], 4)
+        self.assertEqual(report["programs"]["wic"]["only_baseline"], 4)
+        self.assertIsNone(report["programs"]["snap"]["value_deltas"])
+        self.assertIn("No change: snap", self.out.getvalue())
+        # The inactive program is only switched on in memory.
+        self.assertFalse(Program.objects.get(name_abbreviated="new_credit").active)
+
+    def test_sample(self):
+        report = self._call(candidate_pe_version="2.0.0", sample=2)
+
+        self.assertEqual(report["screens"], 2)
+        self.assertEqual(self.calculate.call_count, 4)
+
+    def test_writes_nothing(self):
+        self._call(candidate_pe_version="2.0.0")
+
+        self.assertFalse(EligibilitySnapshot.objects.exists())
+
+    def test_errors_are_counted(self):
+        self.calculate.side_effect = KeyError("income")
+
+        report = self._call(candidate_pe_version="2.0.0")
+
+        self.assertEqual(report["errors"], {"KeyError": 4})
+        self.assertEqual(report["programs"], {})
+
+    def test_candidate_must_differ(self):
+        with self.assertRaises(CommandError):
+            self._call(baseline_pe_version="1.0.0")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from screener.rollups import CHUNK_SIZE, rebuild_rollups, update_rollups
+
+
+class Command(BaseCommand):
+    help = """
+    Add eligibility snapshots written since the last run to the daily EligibilityRollup totals.
+    Run it on a schedule; --backfill recounts every snapshot from scratch.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Clear the rollups and count every snapshot again",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Snapshot ids counted per transaction (default: {CHUNK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            self.stdout.write("Clearing eligibility rollups and counting every snapshot")
+            after_id, through_id, written = rebuild_rollups(options["chunk_size"])
+        else:
+            after_id, through_id, written = update_rollups(options["chunk_size"])
+
+        if through_id == after_id:
+            self.stdout.write("No new snapshots to count")
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"Counted snapshots {after_id + 1} to {through_id}, {written} rollup rows updated")
+        )
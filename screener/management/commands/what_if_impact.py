@@ -0,0 +1,321 @@
+"""
+Compare eligibility across stored screens under two configurations.
+
+Every sampled screen is calculated twice, once for the baseline and once for the
+candidate, and the report shows how each program's results move: eligibility flips in
+either direction, value deltas, and a summary of how the deltas are spread. Nothing is
+saved; the calculations go through calculate_eligibility, not eligibility_results.
+
+The candidate can differ from the baseline by PolicyEngine version and by program set:
+--add-programs switches inactive programs on for the candidate (in memory only) and
+--remove-programs leaves active ones out.
+
+Screens run on the same process pool as batch_snapshots (see screener/batch.py). Point
+--pe-url at a local PolicyEngine stand-in to go past the hosted API's rate limits.
+
+Usage:
+    python manage.py what_if_impact --white-label co --sample 5000 --candidate-pe-version 1.720.0
+    python manage.py what_if_impact --white-label il --add-programs il_new_credit --output impact.json
+"""
+
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from integrations.clients.policyengine.engines import PrivateApiSim
+from programs.models import Program
+from screener.batch import load_screen, run_screens, screen_ids
+from screener.models import Screen
+from screener.views import calculate_eligibility, eligibility_programs
+from tqdm import tqdm
+
+# Example screen ids kept per program and direction of change.
+EXAMPLES = 5
+
+# {abbr: (eligible, value)} for one screen under one scenario.
+ScenarioResults = dict[str, tuple[bool, int]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    pe_version: Optional[str] = None
+    add_programs: tuple[str, ...] = ()
+    remove_programs: tuple[str, ...] = ()
+
+
+# Programs per (white label, referrer code, scenario), kept for the life of a worker
+# process: most screens in a run share a handful of these, and the prefetches cost
+# more than the calculations.
+_programs_cache: dict[tuple, list[Program]] = {}
+
+
+def _scenario_programs(screen: Screen, scenario: Scenario) -> list[Program]:
+    key = (screen.white_label_id, screen.referrer_code, scenario)
+    if key not in _programs_cache:
+        referrer, programs = eligibility_programs(screen)
+        prefetches = programs._prefetch_related_lookups
+        programs = [p for p in programs if p.name_abbreviated not in scenario.remove_programs]
+
+        if scenario.add_programs:
+            added = Program.objects.filter(
+                white_label=screen.white_label,
+                active=False,
+                category__isnull=False,
+                name_abbreviated__in=scenario.add_programs,
+            ).prefetch_related(*prefetches)
+            if referrer is not None:
+                added = added.exclude(id__in=[p.id for p in referrer.remove_programs.all()])
+            for program in added:
+                # Only on this instance: calculate it as if it had launched.
+                program.active = True
+                programs.append(program)
+
+        _programs_cache[key] = programs
+
+    return _programs_cache[key]
+
+
+def _results(screen: Screen, scenario: Scenario, missing_dependencies) -> ScenarioResults:
+    programs = _scenario_programs(screen, scenario)
+    _, eligibility, _, _ = calculate_eligibility(screen, programs, missing_dependencies, pe_version=scenario.pe_version)
+    return {abbr: (e.eligible, e.value) for abbr, e in eligibility.items()}
+
+
+def compare_screen(
+    baseline: Scenario, candidate: Scenario, screen_id: int
+) -> tuple[Optional[str], ScenarioResults, ScenarioResults]:
+    """(error type, baseline results, candidate results) for one screen."""
+    try:
+        screen = load_screen(screen_id)
+        missing_dependencies = screen.missing_fields()
+        return None, _results(screen, baseline, missing_dependencies), _results(screen, candidate, missing_dependencies)
+    except Exception as e:
+        return type(e).__name__, {}, {}
+
+
+@dataclass
+class ProgramImpact:
+    screens: int = 0
+    baseline_eligible: int = 0
+    candidate_eligible: int = 0
+    only_baseline: int = 0
+    only_candidate: int = 0
+    baseline_value: int = 0
+    candidate_value: int = 0
+    became_eligible: list[int] = field(default_factory=list)
+    became_ineligible: list[int] = field(default_factory=list)
+    value_changed: list[int] = field(default_factory=list)
+    deltas: list[int] = field(default_factory=list)
+
+    def add(self, screen_id: int, baseline: Optional[tuple[bool, int]], candidate: Optional[tuple[bool, int]]):
+        if candidate is None:
+            self.only_baseline += 1
+            return
+        if baseline is None:
+            self.only_candidate += 1
+            return
+
+        self.screens += 1
+        baseline_eligible, baseline_value = baseline
+        candidate_eligible, candidate_value = candidate
+        # An ineligible result's value isn't shown to anyone.
+        baseline_value = baseline_value if baseline_eligible else 0
+        candidate_value = candidate_value if candidate_eligible else 0
+
+        self.baseline_eligible += baseline_eligible
+        self.candidate_eligible += candidate_eligible
+        self.baseline_value += baseline_value
+        self.candidate_value += candidate_value
+
+        if candidate_eligible and not baseline_eligible:
+            self.became_eligible.append(screen_id)
+        elif baseline_eligible and not candidate_eligible:
+            self.became_ineligible.append(screen_id)
+        elif candidate_value != baseline_value:
+            self.value_changed.append(screen_id)
+
+        if candidate_value != baseline_value:
+            self.deltas.append(candidate_value - baseline_value)
+
+    @property
+    def changed(self) -> bool:
+        return bool(
+            self.deltas or self.became_eligible or self.became_ineligible or self.only_baseline or self.only_candidate
+        )
+
+    def delta_summary(self) -> Optional[dict]:
+        if not self.deltas:
+            return None
+        deltas = sorted(self.deltas)
+        deciles = statistics.quantiles(deltas, n=10) if len(deltas) > 1 else [deltas[0]] * 9
+        return {
+            "count": len(deltas),
+            "mean": round(statistics.fmean(deltas), 2),
+            "min": deltas[0],
+            "p10": deciles[0],
+            "median": statistics.median(deltas),
+            "p90": deciles[-1],
+            "max": deltas[-1],
+        }
+
+    def to_dict(self, examples: int) -> dict:
+        return {
+            "screens": self.screens,
+            "eligible": {"baseline": self.baseline_eligible, "candidate": self.candidate_eligible},
+            "became_eligible": len(self.became_eligible),
+            "became_ineligible": len(self.became_ineligible),
+            "value_changed": len(self.value_changed),
+            "only_baseline": self.only_baseline,
+            "only_candidate": self.only_candidate,
+            "total_value": {"baseline": self.baseline_value, "candidate": self.candidate_value},
+            "value_deltas": self.delta_summary(),
+            "examples": {
+                "became_eligible": self.became_eligible[:examples],
+                "became_ineligible": self.became_ineligible[:examples],
+                "value_changed": self.value_changed[:examples],
+            },
+        }
+
+
+def _program_list(value: str) -> tuple[str, ...]:
+    return tuple(sorted({abbr.strip().lower() for abbr in value.split(",") if abbr.strip()}))
+
+
+class Command(BaseCommand):
+    help = """
+    Calculate stored screens under a baseline and a candidate configuration (PolicyEngine
+    version and/or program set) and report how each program's results change. Writes nothing.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--white-label", type=str, help="Only screens for this white label")
+        parser.add_argument("--sample", type=int, help="Random sample of this many screens (default: all)")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for --sample (default: 0)")
+        parser.add_argument("--baseline-pe-version", type=str, help="Default: the configured version")
+        parser.add_argument("--candidate-pe-version", type=str, help="Default: same as the baseline")
+        parser.add_argument(
+            "--add-programs",
+            type=_program_list,
+            default=(),
+            help="Comma separated inactive programs to switch on for the candidate",
+        )
+        parser.add_argument(
+            "--remove-programs",
+            type=_program_list,
+            default=(),
+            help="Comma separated programs to leave out of the candidate",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes. 1 runs every screen in this process (default: CPU count)",
+        )
+        parser.add_argument(
+            "--pe-rate",
+            type=float,
+            default=5.0,
+            help="Maximum PolicyEngine requests per second across all workers (default: 5)",
+        )
+        parser.add_argument("--pe-url", type=str, help="PolicyEngine calculate URL, e.g. a local stand-in")
+        parser.add_argument("--examples", type=int, default=EXAMPLES, help="Example screen ids per change")
+        parser.add_argument("--output", type=str, help="Also write the report to this JSON file")
+
+    def handle(self, *args, **options):
+        baseline = Scenario(pe_version=options["baseline_pe_version"])
+        candidate = Scenario(
+            pe_version=options["candidate_pe_version"] or options["baseline_pe_version"],
+            add_programs=options["add_programs"],
+            remove_programs=options["remove_programs"],
+        )
+        if candidate == baseline:
+            raise CommandError(
+                "The candidate is the same as the baseline. Pass --candidate-pe-version, "
+                "--add-programs or --remove-programs."
+            )
+
+        if options["pe_url"]:
+            # Set before the pool forks, so every worker inherits it.
+            PrivateApiSim.pe_url = options["pe_url"]
+        _programs_cache.clear()
+
+        screens = Screen.objects.filter(agree_to_tos=True, is_test=False, is_test_data=False, completed=True)
+        if options["white_label"]:
+            screens = screens.filter(white_label__code=options["white_label"])
+
+        ids = list(screen_ids(screens))
+        if options["sample"] is not None and options["sample"] < len(ids):
+            ids = random.Random(options["seed"]).sample(ids, options["sample"])
+
+        impacts: dict[str, ProgramImpact] = defaultdict(ProgramImpact)
+        errors = Counter()
+        start = time.monotonic()
+        work = partial(compare_screen, baseline, candidate)
+        for screen_id, (error, baseline_results, candidate_results) in tqdm(
+            run_screens(work, ids, options["workers"], options["pe_rate"]), total=len(ids), desc="Screens"
+        ):
+            if error is not None:
+                errors[error] += 1
+                continue
+            for abbr in baseline_results.keys() | candidate_results.keys():
+                impacts[abbr].add(screen_id, baseline_results.get(abbr), candidate_results.get(abbr))
+        seconds = time.monotonic() - start
+
+        report = {
+            "baseline": asdict(baseline),
+            "candidate": asdict(candidate),
+            "screens": len(ids),
+            "errors": dict(errors),
+            "seconds": round(seconds, 1),
+            "programs": {abbr: impacts[abbr].to_dict(options["examples"]) for abbr in sorted(impacts)},
+        }
+        self._print_report(report, impacts)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _print_report(self, report: dict, impacts: dict[str, ProgramImpact]):
+        rate = report["screens"] / report["seconds"] if report["seconds"] else 0.0
+        self.stdout.write(f"Compared {report['screens']} screens in {report['seconds']}s ({rate:.2f} screens/sec)")
+        self.stdout.write(f"  baseline:  {report['baseline']}")
+        self.stdout.write(f"  candidate: {report['candidate']}")
+        if report["errors"]:
+            counts = ", ".join(f"{error}: {count}" for error, count in report["errors"].items())
+            self.stdout.write(self.style.ERROR(f"  errors: {counts}"))
+
+        unchanged = [abbr for abbr in sorted(impacts) if not impacts[abbr].changed]
+        for abbr in sorted(impacts):
+            if not impacts[abbr].changed:
+                continue
+            program = report["programs"][abbr]
+            eligible, total = program["eligible"], program["total_value"]
+            self.stdout.write(self.style.WARNING(f"\n{abbr}"))
+            self.stdout.write(
+                f"  eligible {eligible['baseline']} -> {eligible['candidate']} of {program['screens']}"
+                f" (+{program['became_eligible']} / -{program['became_ineligible']},"
+                f" {program['value_changed']} value changes)"
+            )
+            self.stdout.write(f"  total value {total['baseline']} -> {total['candidate']}")
+            if program["value_deltas"] is not None:
+                d = program["value_deltas"]
+                self.stdout.write(
+                    f"  deltas: n={d['count']} mean={d['mean']} min={d['min']} p10={d['p10']}"
+                    f" median={d['median']} p90={d['p90']} max={d['max']}"
+                )
+            if program["only_baseline"] or program["only_candidate"]:
+                self.stdout.write(
+                    f"  calculated only in baseline: {program['only_baseline']},"
+                    f" only in candidate: {program['only_candidate']}"
+                )
+
+        if unchanged:
+            self.stdout.write(f"\nNo change: {', '.join(unchanged)}")
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.28 on 2026-10-18 23:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screener', '0161_screen_needs_medical_expenses_and_debt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EligibilityRollupProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_snapshot_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EligibilityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('program', models.CharField(max_length=120)),
+                ('day', models.DateField()),
+                ('referrer_code', models.CharField(blank=True, default='', max_length=320)),
+                ('screens', models.IntegerField(default=0)),
+                ('eligible', models.IntegerField(default=0)),
+                ('new_eligible', models.IntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('white_label', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligibility_rollups', to='screener.whitelabel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['white_label', 'day'], name='eligibility_rollup_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eligibilityrollup',
+            constraint=models.UniqueConstraint(fields=('white_label', 'program', 'day', 'referrer_code'), name='eligibility_rollup_key'),
+        ),
+    ]
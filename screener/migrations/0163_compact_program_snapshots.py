@@ -0,0 +1,54 @@
+# Generated by Django 4.2.28 on 2026-10-18 23:43
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+import django.db.models.lookups
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screener', '0162_eligibility_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EligibilityMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=32, unique=True)),
+                ('message', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SnapshotProgram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=320)),
+                ('name_abbreviated', models.CharField(max_length=120)),
+                ('estimated_delivery_time', models.CharField(blank=True, max_length=120, null=True)),
+                ('estimated_application_time', models.CharField(blank=True, max_length=120, null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='snapshotprogram',
+            constraint=models.UniqueConstraint(models.F('name_abbreviated'), models.F('name'), django.db.models.functions.comparison.Coalesce('estimated_delivery_time', models.Value('')), django.db.models.lookups.IsNull(models.F('estimated_delivery_time'), True), django.db.models.functions.comparison.Coalesce('estimated_application_time', models.Value('')), django.db.models.lookups.IsNull(models.F('estimated_application_time'), True), name='snapshot_program_text'),
+        ),
+        migrations.AddField(
+            model_name='programeligibilitysnapshot',
+            name='program',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='screener.snapshotprogram'),
+        ),
+        migrations.AddField(
+            model_name='programeligibilitysnapshot',
+            name='failed_test_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='programeligibilitysnapshot',
+            name='passed_test_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+    ]
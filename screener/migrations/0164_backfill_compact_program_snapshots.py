@@ -0,0 +1,93 @@
+import hashlib
+import json
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 5_000
+TEXT_FIELDS = ("name", "name_abbreviated", "estimated_delivery_time", "estimated_application_time")
+
+
+def digest_of(message) -> str:
+    # Same as EligibilityMessage.digest_of()
+    return hashlib.md5(json.dumps(message, sort_keys=True).encode()).hexdigest()
+
+
+def messages_of(value) -> list:
+    # Results runs saved json.dumps() of the message list, so most rows hold a JSON string.
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value or []
+
+
+def program_ids(SnapshotProgram, programs: set) -> dict:
+    def existing():
+        rows = SnapshotProgram.objects.filter(name_abbreviated__in={p[1] for p in programs}).values_list(
+            "id", *TEXT_FIELDS
+        )
+        return {tuple(text): id for id, *text in rows if tuple(text) in programs}
+
+    ids = existing()
+    SnapshotProgram.objects.bulk_create(
+        [SnapshotProgram(**dict(zip(TEXT_FIELDS, program))) for program in programs - ids.keys()],
+        ignore_conflicts=True,
+    )
+    return existing()
+
+
+def message_ids(EligibilityMessage, messages: dict) -> dict:
+    EligibilityMessage.objects.bulk_create(
+        [EligibilityMessage(digest=digest, message=message) for digest, message in messages.items()],
+        ignore_conflicts=True,
+    )
+    return dict(EligibilityMessage.objects.filter(digest__in=messages).values_list("digest", "id"))
+
+
+def backfill_compact_program_snapshots(apps, schema_editor):
+    """
+    Move the program text and messages of each snapshot row into SnapshotProgram and EligibilityMessage,
+    a chunk of rows per transaction. Rows that already have a program are skipped, so it can be rerun.
+    """
+    ProgramEligibilitySnapshot = apps.get_model("screener", "ProgramEligibilitySnapshot")
+    SnapshotProgram = apps.get_model("screener", "SnapshotProgram")
+    EligibilityMessage = apps.get_model("screener", "EligibilityMessage")
+
+    after_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                ProgramEligibilitySnapshot.objects.filter(id__gt=after_id)
+                .only("id", "program_id", "failed_tests", "passed_tests", *TEXT_FIELDS)
+                .order_by("id")[:CHUNK_SIZE]
+            )
+            if not rows:
+                return
+            after_id = rows[-1].id
+            rows = [row for row in rows if row.program_id is None]
+
+            programs = {row: tuple(getattr(row, field) for field in TEXT_FIELDS) for row in rows}
+            tests = {row: (messages_of(row.failed_tests), messages_of(row.passed_tests)) for row in rows}
+            messages = {digest_of(m): m for failed, passed in tests.values() for m in failed + passed}
+            programs_ids = program_ids(SnapshotProgram, set(programs.values())) if rows else {}
+            messages_ids = message_ids(EligibilityMessage, messages) if messages else {}
+
+            for row in rows:
+                failed, passed = tests[row]
+                row.program_id = programs_ids[programs[row]]
+                row.failed_test_ids = [messages_ids[digest_of(m)] for m in failed]
+                row.passed_test_ids = [messages_ids[digest_of(m)] for m in passed]
+            ProgramEligibilitySnapshot.objects.bulk_update(
+                rows, ["program", "failed_test_ids", "passed_test_ids"], batch_size=1_000
+            )
+
+
+class Migration(migrations.Migration):
+    # Each chunk commits on its own, so a large table isn't rewritten in one transaction.
+    atomic = False
+
+    dependencies = [
+        ("screener", "0163_compact_program_snapshots"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_compact_program_snapshots, migrations.RunPython.noop),
+    ]
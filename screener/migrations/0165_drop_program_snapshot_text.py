@@ -0,0 +1,103 @@
+# Generated by Django 4.2.28 on 2026-10-18 23:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from screener.dependent_views import DependentViews
+
+# The columns ProgramEligibilitySnapshot had before its text moved to SnapshotProgram and EligibilityMessage.
+CREATE_EXPORT_VIEW = """
+CREATE VIEW screener_programeligibilityexport AS
+SELECT
+    snapshot.id,
+    snapshot.eligibility_snapshot_id,
+    snapshot.new,
+    program.name,
+    program.name_abbreviated,
+    snapshot.estimated_value,
+    program.estimated_delivery_time,
+    program.estimated_application_time,
+    snapshot.eligible,
+    (
+        SELECT COALESCE(jsonb_agg(message.message ORDER BY ids.ord), '[]'::jsonb)
+        FROM unnest(snapshot.failed_test_ids) WITH ORDINALITY AS ids(id, ord)
+        JOIN screener_eligibilitymessage AS message ON message.id = ids.id
+    ) AS failed_tests,
+    (
+        SELECT COALESCE(jsonb_agg(message.message ORDER BY ids.ord), '[]'::jsonb)
+        FROM unnest(snapshot.passed_test_ids) WITH ORDINALITY AS ids(id, ord)
+        JOIN screener_eligibilitymessage AS message ON message.id = ids.id
+    ) AS passed_tests
+FROM screener_programeligibilitysnapshot AS snapshot
+JOIN screener_snapshotprogram AS program ON program.id = snapshot.program_id
+"""
+
+# Reporting views outside the app (see refresh_views.VIEWS) read the dropped columns. They are kept, dropped,
+# and created again reading the same columns from the export view. failed_tests and passed_tests come out of
+# the view as JSON arrays, where most old rows held the array json.dumps()'d into a JSON string, and NULL
+# comes out as [].
+reporting_views = DependentViews(
+    ["screener_programeligibilitysnapshot"],
+    renames={"screener_programeligibilitysnapshot": "screener_programeligibilityexport"},
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screener', '0164_backfill_compact_program_snapshots'),
+    ]
+
+    operations = [
+        reporting_views.save(),
+        migrations.AlterField(
+            model_name='programeligibilitysnapshot',
+            name='program',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='screener.snapshotprogram'),
+        ),
+        migrations.RemoveField(
+            model_name='programeligibilitysnapshot',
+            name='estimated_application_time',
+        ),
+        migrations.RemoveField(
+            model_name='programeligibilitysnapshot',
+            name='estimated_delivery_time',
+        ),
+        migrations.RemoveField(
+            model_name='programeligibilitysnapshot',
+            name='failed_tests',
+        ),
+        migrations.RemoveField(
+            model_name='programeligibilitysnapshot',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='programeligibilitysnapshot',
+            name='name_abbreviated',
+        ),
+        migrations.RemoveField(
+            model_name='programeligibilitysnapshot',
+            name='passed_tests',
+        ),
+        migrations.CreateModel(
+            name='ProgramEligibilityExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('new', models.BooleanField()),
+                ('name', models.CharField(max_length=320)),
+                ('name_abbreviated', models.CharField(max_length=120)),
+                ('estimated_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('estimated_delivery_time', models.CharField(max_length=120, null=True)),
+                ('estimated_application_time', models.CharField(max_length=120, null=True)),
+                ('eligible', models.BooleanField()),
+                ('failed_tests', models.JSONField()),
+                ('passed_tests', models.JSONField()),
+                ('eligibility_snapshot', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='screener.eligibilitysnapshot')),
+            ],
+            options={
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CREATE_EXPORT_VIEW, "DROP VIEW screener_programeligibilityexport"),
+        reporting_views.restore(),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.28 on 2026-10-19 00:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from screener.dependent_views import DependentViews
+
+# Replace screener_eligibilitysnapshot with a table partitioned by submission_date month: a partition for every
+# month from the first snapshot to three months from now, and a default partition for anything outside them.
+# The archive_snapshots command adds partitions for later months.
+PARTITION_SNAPSHOTS = """
+SET LOCAL timezone = 'UTC';
+
+ALTER TABLE screener_eligibilitysnapshot RENAME TO screener_eligibilitysnapshot_unpartitioned;
+
+CREATE TABLE screener_eligibilitysnapshot (
+    id bigint NOT NULL,
+    submission_date timestamp with time zone NOT NULL,
+    screen_id bigint NOT NULL,
+    is_batch boolean NOT NULL,
+    had_error boolean NOT NULL,
+    PRIMARY KEY (id, submission_date)
+) PARTITION BY RANGE (submission_date);
+
+CREATE TABLE screener_eligibilitysnapshot_default PARTITION OF screener_eligibilitysnapshot DEFAULT;
+
+DO $$
+DECLARE
+    month timestamptz := date_trunc(
+        'month', COALESCE((SELECT min(submission_date) FROM screener_eligibilitysnapshot_unpartitioned), now())
+    );
+BEGIN
+    WHILE month <= date_trunc('month', now()) + interval '3 months' LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF screener_eligibilitysnapshot FOR VALUES FROM (%L) TO (%L)',
+            'screener_eligibilitysnapshot_' || to_char(month, '"y"YYYY"m"MM'),
+            month,
+            month + interval '1 month'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO screener_eligibilitysnapshot (id, submission_date, screen_id, is_batch, had_error)
+SELECT id, submission_date, screen_id, is_batch, had_error FROM screener_eligibilitysnapshot_unpartitioned;
+
+DROP TABLE screener_eligibilitysnapshot_unpartitioned;
+
+CREATE SEQUENCE screener_eligibilitysnapshot_id_seq OWNED BY screener_eligibilitysnapshot.id;
+SELECT setval('screener_eligibilitysnapshot_id_seq', COALESCE(max(id), 0) + 1, false) FROM screener_eligibilitysnapshot;
+ALTER TABLE screener_eligibilitysnapshot ALTER COLUMN id SET DEFAULT nextval('screener_eligibilitysnapshot_id_seq');
+
+CREATE INDEX screener_eligibilitysnapshot_screen_id_90d844c2 ON screener_eligibilitysnapshot (screen_id);
+ALTER TABLE screener_eligibilitysnapshot ADD CONSTRAINT screener_eligibility_screen_id_90d844c2_fk_screener_
+    FOREIGN KEY (screen_id) REFERENCES screener_screen (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+UNPARTITION_SNAPSHOTS = """
+CREATE TABLE screener_eligibilitysnapshot_unpartitioned (
+    id bigint NOT NULL,
+    submission_date timestamp with time zone NOT NULL,
+    screen_id bigint NOT NULL,
+    is_batch boolean NOT NULL,
+    had_error boolean NOT NULL
+);
+
+INSERT INTO screener_eligibilitysnapshot_unpartitioned (id, submission_date, screen_id, is_batch, had_error)
+SELECT id, submission_date, screen_id, is_batch, had_error FROM screener_eligibilitysnapshot;
+
+DROP TABLE screener_eligibilitysnapshot;
+ALTER TABLE screener_eligibilitysnapshot_unpartitioned RENAME TO screener_eligibilitysnapshot;
+ALTER TABLE screener_eligibilitysnapshot ADD CONSTRAINT screener_eligibilitysnapshot_pkey PRIMARY KEY (id);
+
+CREATE SEQUENCE screener_eligibilitysnapshot_id_seq OWNED BY screener_eligibilitysnapshot.id;
+SELECT setval('screener_eligibilitysnapshot_id_seq', COALESCE(max(id), 0) + 1, false) FROM screener_eligibilitysnapshot;
+ALTER TABLE screener_eligibilitysnapshot ALTER COLUMN id SET DEFAULT nextval('screener_eligibilitysnapshot_id_seq');
+
+CREATE INDEX screener_eligibilitysnapshot_screen_id_90d844c2 ON screener_eligibilitysnapshot (screen_id);
+ALTER TABLE screener_eligibilitysnapshot ADD CONSTRAINT screener_eligibility_screen_id_90d844c2_fk_screener_
+    FOREIGN KEY (screen_id) REFERENCES screener_screen (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+# Renaming the table would take the reporting views reading it along to the unpartitioned copy, and then it
+# couldn't be dropped. They are kept and dropped first, and created again on the partitioned table.
+reporting_views = DependentViews(["screener_eligibilitysnapshot"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screener', '0165_drop_program_snapshot_text'),
+    ]
+
+    operations = [
+        # Postgres only allows foreign keys to the partitioned table's whole (id, submission_date) key.
+        migrations.AlterField(
+            model_name='npsscore',
+            name='eligibility_snapshot',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='nps_score', to='screener.eligibilitysnapshot'),
+        ),
+        migrations.AlterField(
+            model_name='programeligibilitysnapshot',
+            name='eligibility_snapshot',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='program_snapshots', to='screener.eligibilitysnapshot'),
+        ),
+        reporting_views.save(),
+        migrations.RunSQL(PARTITION_SNAPSHOTS, UNPARTITION_SNAPSHOTS),
+        reporting_views.restore(),
+        migrations.AddIndex(
+            model_name='eligibilitysnapshot',
+            index=models.Index(condition=models.Q(('had_error', False)), fields=['screen', '-submission_date'], name='snapshot_screen_latest_idx'),
+        ),
+    ]
@@ -1,10 +1,16 @@
-from typing import ClassVar, Optional
+from typing import ClassVar, Iterable, Optional
 from datetime import date
+from django.contrib.postgres.fields import ArrayField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import IsNull
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.utils.functional import cached_property
 from decimal import Decimal
+import hashlib
+import json
 import uuid
 from authentication.models import User
 from django.utils.translation import gettext_lazy as _
@@ -50,6 +56,15 @@ class WhiteLabel(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # The configuration bundle carries this white label's frontend feature flags.
+        # Deferred: configuration imports this module.
+        from configuration.bundle import invalidate_config_bundle_on_commit
+
+        invalidate_config_bundle_on_commit(self.code)
+
     def _get_flag_value(self, key: str) -> bool:
         """Internal: Get flag value with default fallback. Assumes key is valid."""
         return (self.feature_flags or {}).get(key, self.FEATURE_FLAGS[key].default)
@@ -175,7 +190,7 @@ class Screen(models.Model):
         Get list of unique expense types for this screen.
         Returns empty list if no expenses exist.
         """
-        return list(self.expenses.values_list("type", flat=True).distinct().filter(type__isnull=False))
+        return list(dict.fromkeys(expense.type for expense in self.expenses.all() if expense.type is not None))
 
     def num_children(self, age_min=0, age_max=18, include_pregnant=False, child_relationship=["all"]):
         children = 0
@@ -891,16 +906,43 @@ class EnergyCalculatorMember(models.Model):
 
 # A point in time log table to capture the exact eligibility and value results
 # for a completed screen. This table is currently used primarily for analytics
-# but will eventually drive new benefit update notifications
+# but will eventually drive new benefit update notifications.
+# Partitioned by submission_date month (migration 0166, screener/partitions.py) with the primary key
+# (id, submission_date). A lookup by id alone can't skip partitions, so it searches the key index of every
+# month's partition: filter on submission_date too where it is known, as mark_complete() does.
+# Postgres can't enforce foreign keys to it by id alone, so the ones from ProgramEligibilitySnapshot and NPSScore
+# have no database constraint. Django still cascades deletes; `archive_snapshots --delete-orphans` removes rows
+# left behind by deletes that went around it, like dropping a partition.
 class EligibilitySnapshot(models.Model):
     screen = models.ForeignKey(Screen, related_name="eligibility_snapshots", on_delete=models.CASCADE)
     submission_date = models.DateTimeField(auto_now=True)
     is_batch = models.BooleanField(default=False)
     had_error = models.BooleanField(default=False)
 
+    def mark_complete(self):
+        """Record that the results were saved, updating the row in its own partition only."""
+        submission_date = timezone.now()
+        EligibilitySnapshot.objects.filter(id=self.id, submission_date=self.submission_date).update(
+            had_error=False, submission_date=submission_date
+        )
+        self.had_error = False
+        self.submission_date = submission_date
+
+    class Meta:
+        indexes = [
+            # The latest snapshot for a screen
+            models.Index(
+                fields=["screen", "-submission_date"],
+                condition=models.Q(had_error=False),
+                name="snapshot_screen_latest_idx",
+            )
+        ]
+
 
 class NPSScore(models.Model):
-    eligibility_snapshot = models.OneToOneField(EligibilitySnapshot, related_name="nps_score", on_delete=models.CASCADE)
+    eligibility_snapshot = models.OneToOneField(
+        EligibilitySnapshot, related_name="nps_score", on_delete=models.CASCADE, db_constraint=False
+    )
     score = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(10)])
     score_reason = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -920,18 +962,270 @@ class NPSScore(models.Model):
         return f"NPS {self.score} for snapshot {self.eligibility_snapshot_id}"
 
 
+class SnapshotProgramManager(models.Manager):
+    def ids_for(self, programs: Iterable[tuple[str, ...]]) -> dict[tuple[str, ...], int]:
+        """Map each tuple of TEXT_FIELDS values to the id of its row, adding the rows that don't exist yet."""
+        programs = set(programs)
+        ids = self._ids(programs)
+        missing = programs - ids.keys()
+        if missing:
+            # Ignoring conflicts lets concurrent results runs add the same program.
+            self.bulk_create(
+                [self.model(**dict(zip(self.model.TEXT_FIELDS, program))) for program in missing],
+                ignore_conflicts=True,
+            )
+            ids.update(self._ids(missing))
+        return ids
+
+    def _ids(self, programs: set[tuple[str, ...]]) -> dict[tuple[str, ...], int]:
+        if not programs:
+            return {}
+        rows = self.filter(name_abbreviated__in={program[1] for program in programs}).values_list(
+            "id", *self.model.TEXT_FIELDS
+        )
+        return {tuple(text): id for id, *text in rows if tuple(text) in programs}
+
+
+class EligibilityMessageManager(models.Manager):
+    def ids_for(self, messages: Iterable) -> dict[str, int]:
+        """Map the digest of each message to the id of its row, adding the rows that don't exist yet."""
+        messages = {self.model.digest_of(message): message for message in messages}
+        ids = self._ids(messages)
+        missing = messages.keys() - ids.keys()
+        if missing:
+            self.bulk_create(
+                [self.model(digest=digest, message=messages[digest]) for digest in missing], ignore_conflicts=True
+            )
+            ids.update(self._ids(missing))
+        return ids
+
+    def _ids(self, digests) -> dict[str, int]:
+        if not digests:
+            return {}
+        return dict(self.filter(digest__in=digests).values_list("digest", "id"))
+
+
+# The program text of ProgramEligibilitySnapshot rows, stored once for all the rows that share it.
+class SnapshotProgram(models.Model):
+    TEXT_FIELDS: ClassVar[tuple[str, ...]] = (
+        "name",
+        "name_abbreviated",
+        "estimated_delivery_time",
+        "estimated_application_time",
+    )
+
+    name = models.CharField(max_length=320)
+    name_abbreviated = models.CharField(max_length=120)
+    estimated_delivery_time = models.CharField(max_length=120, blank=True, null=True)
+    estimated_application_time = models.CharField(max_length=120, blank=True, null=True)
+
+    objects = SnapshotProgramManager()
+
+    class Meta:
+        constraints = [
+            # Unique with NULL times equal to each other but not to "", as the snapshot rows had either.
+            models.UniqueConstraint(
+                "name_abbreviated",
+                "name",
+                Coalesce("estimated_delivery_time", models.Value("")),
+                IsNull(models.F("estimated_delivery_time"), True),
+                Coalesce("estimated_application_time", models.Value("")),
+                IsNull(models.F("estimated_application_time"), True),
+                name="snapshot_program_text",
+            )
+        ]
+
+
+# A pass or fail message from an eligibility calculation, stored once for all the ProgramEligibilitySnapshot
+# rows that refer to it.
+class EligibilityMessage(models.Model):
+    digest = models.CharField(max_length=32, unique=True)
+    message = models.JSONField()
+
+    objects = EligibilityMessageManager()
+
+    @staticmethod
+    def digest_of(message) -> str:
+        return hashlib.md5(json.dumps(message, sort_keys=True).encode()).hexdigest()
+
+
+class ProgramEligibilitySnapshotManager(models.Manager):
+    def create_results(
+        self, results: list[dict], batch_size: Optional[int] = None
+    ) -> list["ProgramEligibilitySnapshot"]:
+        """
+        Create a snapshot row for each result. Results have the program text and the failed_tests and
+        passed_tests message lists as well as the snapshot fields.
+        """
+        results = [dict(result) for result in results]
+        programs = [tuple(result.pop(field, None) for field in SnapshotProgram.TEXT_FIELDS) for result in results]
+        failed = [list(result.pop("failed_tests", None) or []) for result in results]
+        passed = [list(result.pop("passed_tests", None) or []) for result in results]
+
+        program_ids = SnapshotProgram.objects.ids_for(programs)
+        message_ids = EligibilityMessage.objects.ids_for(
+            message for messages in failed + passed for message in messages
+        )
+
+        def ids(messages):
+            return [message_ids[EligibilityMessage.digest_of(message)] for message in messages]
+
+        rows = [
+            self.model(
+                program_id=program_ids[program],
+                failed_test_ids=ids(failed_tests),
+                passed_test_ids=ids(passed_tests),
+                **result,
+            )
+            for result, program, failed_tests, passed_tests in zip(results, programs, failed, passed)
+        ]
+        return self.bulk_create(rows, batch_size=batch_size)
+
+    def create(self, **kwargs):
+        if "program" in kwargs or "program_id" in kwargs:
+            return super().create(**kwargs)
+        return self.create_results([kwargs])[0]
+
+    def expanded(self):
+        """
+        Rows with the columns of ProgramEligibilityExport: the program text and the messages themselves rather
+        than their ids. Only for values(), as the annotations can't be set on model instances.
+        """
+        return self.annotate(
+            **{field: models.F(f"program__{field}") for field in SnapshotProgram.TEXT_FIELDS},
+            failed_tests=_Messages("failed_test_ids"),
+            passed_tests=_Messages("passed_test_ids"),
+        )
+
+
+class _Messages(models.Func):
+    """The EligibilityMessage messages for an array of ids, as a JSON array in the same order."""
+
+    template = (
+        "(SELECT COALESCE(jsonb_agg(message.message ORDER BY ids.ord), '[]'::jsonb) "
+        "FROM unnest(%(expressions)s) WITH ORDINALITY AS ids(id, ord) "
+        f"JOIN {EligibilityMessage._meta.db_table} AS message ON message.id = ids.id)"
+    )
+    output_field = models.JSONField()
+
+
 # Eligibility results for each specific program per screen. These are
-# aggregated per screen using the EligibilitySnapshot id
+# aggregated per screen using the EligibilitySnapshot id.
+# One is written for every program each time results are calculated, so the text they share is kept in
+# SnapshotProgram and EligibilityMessage and this table only holds ids, flags and the value.
 class ProgramEligibilitySnapshot(models.Model):
     eligibility_snapshot = models.ForeignKey(
-        EligibilitySnapshot, related_name="program_snapshots", on_delete=models.CASCADE
+        EligibilitySnapshot, related_name="program_snapshots", on_delete=models.CASCADE, db_constraint=False
     )
+    program = models.ForeignKey(SnapshotProgram, related_name="+", on_delete=models.PROTECT)
     new = models.BooleanField(default=False)
+    eligible = models.BooleanField()
+    estimated_value = models.DecimalField(decimal_places=2, max_digits=10)
+    # EligibilityMessage ids, in the order the calculator added the messages
+    failed_test_ids = ArrayField(models.IntegerField(), blank=True, default=list)
+    passed_test_ids = ArrayField(models.IntegerField(), blank=True, default=list)
+
+    objects = ProgramEligibilitySnapshotManager()
+
+    # Read the program text through these with select_related("program") on the query.
+    @property
+    def name(self) -> str:
+        return self.program.name
+
+    @property
+    def name_abbreviated(self) -> str:
+        return self.program.name_abbreviated
+
+    @property
+    def estimated_delivery_time(self) -> Optional[str]:
+        return self.program.estimated_delivery_time
+
+    @property
+    def estimated_application_time(self) -> Optional[str]:
+        return self.program.estimated_application_time
+
+
+# ProgramEligibilitySnapshot with the columns it had before its text moved out: a view, kept for the data
+# export and for SQL that reads the old columns. Queries in the app build the same columns with
+# ProgramEligibilitySnapshot.objects.expanded(), so they don't depend on the view.
+class ProgramEligibilityExport(models.Model):
+    eligibility_snapshot = models.ForeignKey(EligibilitySnapshot, related_name="+", on_delete=models.DO_NOTHING)
+    new = models.BooleanField()
     name = models.CharField(max_length=320)
     name_abbreviated = models.CharField(max_length=120)
     estimated_value = models.DecimalField(decimal_places=2, max_digits=10)
-    estimated_delivery_time = models.CharField(max_length=120, blank=True, null=True)
-    estimated_application_time = models.CharField(max_length=120, blank=True, null=True)
+    estimated_delivery_time = models.CharField(max_length=120, null=True)
+    estimated_application_time = models.CharField(max_length=120, null=True)
     eligible = models.BooleanField()
-    failed_tests = models.JSONField(blank=True, null=True)
-    passed_tests = models.JSONField(blank=True, null=True)
+    failed_tests = models.JSONField()
+    passed_tests = models.JSONField()
+
+    class Meta:
+        managed = False
+
+
+# Daily eligibility totals per white label, program and referrer, for reporting without scanning
+# ProgramEligibilitySnapshot. Kept up to date by the update_eligibility_rollups command from the
+# snapshots written since its last run (see screener/rollups.py).
+class EligibilityRollup(models.Model):
+    white_label = models.ForeignKey(WhiteLabel, related_name="eligibility_rollups", on_delete=models.CASCADE)
+    program = models.CharField(max_length=120)  # SnapshotProgram.name_abbreviated
+    day = models.DateField()
+    referrer_code = models.CharField(max_length=320, blank=True, default="")
+    # Screen results that included the program. A screen is counted again each time its results are calculated.
+    screens = models.IntegerField(default=0)
+    eligible = models.IntegerField(default=0)
+    new_eligible = models.IntegerField(default=0)
+    total_value = models.DecimalField(decimal_places=2, max_digits=14, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["white_label", "program", "day", "referrer_code"], name="eligibility_rollup_key"
+            )
+        ]
+        indexes = [models.Index(fields=["white_label", "day"], name="eligibility_rollup_day_idx")]
+
+
+# The last EligibilitySnapshot counted in EligibilityRollup. A single row.
+class EligibilityRollupProgress(models.Model):
+    last_snapshot_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+# A screen's results queued for its referrer's webhook. Hook.send() adds them and the deliver_webhooks worker
+# posts them, retrying failures with backoff (see screener/webhooks.py).
+class WebhookDelivery(models.Model):
+    PENDING = "pending"
+    SENDING = "sending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (DELIVERED, "Delivered"),
+        (FAILED, "Failed"),
+    ]
+
+    referrer = models.ForeignKey("programs.Referrer", related_name="webhook_deliveries", on_delete=models.CASCADE)
+    screen = models.ForeignKey(Screen, related_name="webhook_deliveries", on_delete=models.CASCADE)
+    # The eligibility results, only kept if the referrer's webhook sends them.
+    results = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    # When the delivery is due. While it's being sent, when the worker's claim on it runs out.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    last_duration_ms = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["referrer", "next_attempt_at"],
+                condition=models.Q(status__in=["pending", "sending"]),
+                name="webhook_delivery_due_idx",
+            )
+        ]
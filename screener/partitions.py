@@ -0,0 +1,68 @@
+"""
+Monthly range partitions for tables partitioned by a timestamp, like screener_eligibilitysnapshot
+(partitioned by submission_date in migration 0166).
+
+Each table has a "<table>_default" partition for rows outside every month partition. ensure_month_partitions()
+adds the partitions for coming months before rows for them arrive. If the default partition already has rows for
+a month, they are moved into the new partition.
+"""
+
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+SNAPSHOT_TABLE = "screener_eligibilitysnapshot"
+SNAPSHOT_PARTITION_COLUMN = "submission_date"
+
+
+def is_partitioned(table: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [table])
+        return cursor.fetchone()[0]
+
+
+def add_months(month: date, months: int) -> date:
+    """The first day of the month `months` after the month of `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month:%Y}m{month:%m}"
+
+
+def _partitions(table: str) -> set[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [table],
+        )
+        return {name for (name,) in cursor.fetchall()}
+
+
+def ensure_month_partitions(table: str, column: str, first_month: date, last_month: date) -> list[str]:
+    """Add the partitions missing for first_month through last_month (UTC months). Returns the ones added."""
+    existing = _partitions(table)
+    created = []
+    month = first_month.replace(day=1)
+    while month <= last_month:
+        name = partition_name(table, month)
+        if name not in existing:
+            start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+            end_month = add_months(month, 1)
+            end = datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS)')
+                # Attaching fails while the default partition has rows in the range, so move them over first.
+                cursor.execute(
+                    f'WITH moved AS (DELETE FROM "{table}_default" WHERE "{column}" >= %s AND "{column}" < %s '
+                    f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved',
+                    [start, end],
+                )
+                cursor.execute(
+                    f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [start, end]
+                )
+            created.append(name)
+        month = add_months(month, 1)
+    return created
@@ -0,0 +1,141 @@
+"""
+Incremental maintenance of EligibilityRollup.
+
+update_rollups() adds the snapshots written since the last run to the daily totals, a chunk of snapshot
+ids at a time. Each chunk's totals and the progress row are committed together, so a crash or a
+concurrent run can't count a snapshot twice. Batch snapshots and test screens aren't counted.
+
+Snapshots are created before their program results are written (had_error is cleared once they are), so
+progress stops at the oldest snapshot still being calculated and picks it up on a later run. A snapshot
+that never finishes is passed over once it is older than SETTLE_AFTER.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from screener.models import (
+    EligibilityRollup,
+    EligibilityRollupProgress,
+    EligibilitySnapshot,
+    ProgramEligibilitySnapshot,
+)
+
+# Snapshots counted per transaction.
+CHUNK_SIZE = 10_000
+# How long a snapshot can stay unfinished (had_error still set) before it's treated as failed.
+SETTLE_AFTER = timedelta(minutes=10)
+
+ROLLUP_KEY = ("white_label_id", "program", "day", "referrer_code")
+# snapshot_totals() columns for ROLLUP_KEY
+TOTALS_KEY = ("white_label_id", "program_name", "day", "referrer_code")
+ROLLUP_TOTALS = ["screens", "eligible", "new_eligible", "total_value"]
+
+
+def _settled_through(after_id: int) -> int:
+    """The highest snapshot id up to which every snapshot has been written (or has failed)."""
+    unsettled = EligibilitySnapshot.objects.filter(
+        id__gt=after_id, had_error=True, submission_date__gt=timezone.now() - SETTLE_AFTER
+    ).aggregate(first_id=Min("id"))["first_id"]
+    if unsettled is not None:
+        return unsettled - 1
+    return EligibilitySnapshot.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+
+
+def snapshot_totals(after_id: int, through_id: int):
+    """Rollup totals for the counted program results in snapshots after_id < id <= through_id."""
+    eligible = Q(eligible=True)
+    return (
+        ProgramEligibilitySnapshot.objects.filter(
+            eligibility_snapshot_id__gt=after_id,
+            eligibility_snapshot_id__lte=through_id,
+            eligibility_snapshot__had_error=False,
+            eligibility_snapshot__is_batch=False,
+            eligibility_snapshot__screen__is_test=False,
+        )
+        # is_test_data is null for screens that haven't been checked yet.
+        .exclude(eligibility_snapshot__screen__is_test_data=True)
+        .values(
+            white_label_id=F("eligibility_snapshot__screen__white_label_id"),
+            program_name=F("program__name_abbreviated"),
+            day=TruncDate("eligibility_snapshot__submission_date"),
+            referrer_code=Coalesce("eligibility_snapshot__screen__referrer_code", Value("")),
+        )
+        .annotate(
+            screen_count=Count("id"),
+            eligible_count=Count("id", filter=eligible),
+            new_eligible_count=Count("id", filter=eligible & Q(new=True)),
+            value_total=Coalesce(
+                Sum("estimated_value", filter=eligible), Value(Decimal(0)), output_field=DecimalField()
+            ),
+        )
+        .order_by()
+    )
+
+
+def _add_totals(totals) -> int:
+    """Add totals to their rollup rows, creating any that don't exist yet. Returns the rows written."""
+    totals = {tuple(row[key] for key in TOTALS_KEY): row for row in totals}
+    if not totals:
+        return 0
+
+    existing = EligibilityRollup.objects.filter(
+        white_label_id__in={key[0] for key in totals},
+        day__in={key[2] for key in totals},
+        program__in={key[1] for key in totals},
+        referrer_code__in={key[3] for key in totals},
+    )
+    rollups = {tuple(getattr(rollup, key) for key in ROLLUP_KEY): rollup for rollup in existing}
+
+    created = []
+    for key, row in totals.items():
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = EligibilityRollup(**dict(zip(ROLLUP_KEY, key)))
+            created.append(rollup)
+        rollup.screens += row["screen_count"]
+        rollup.eligible += row["eligible_count"]
+        rollup.new_eligible += row["new_eligible_count"]
+        rollup.total_value += row["value_total"]
+
+    # The caller holds the progress lock, so nothing else creates rollup rows in the meantime.
+    EligibilityRollup.objects.bulk_create(created)
+    EligibilityRollup.objects.bulk_update(
+        [rollups[key] for key in totals if key in rollups], ROLLUP_TOTALS, batch_size=1_000
+    )
+    return len(totals)
+
+
+def update_rollups(chunk_size: int = CHUNK_SIZE) -> tuple[int, int, int]:
+    """
+    Count every settled snapshot written since the last update.
+    Returns the last snapshot id counted before and after, and the rollup rows written.
+    """
+    started_after = None
+    written = 0
+    while True:
+        with transaction.atomic():
+            # Locking the progress row serializes concurrent runs.
+            progress, _ = EligibilityRollupProgress.objects.select_for_update().get_or_create(pk=1)
+            after_id = progress.last_snapshot_id
+            if started_after is None:
+                started_after = after_id
+            through_id = min(_settled_through(after_id), after_id + chunk_size)
+            if through_id <= after_id:
+                return started_after, after_id, written
+
+            written += _add_totals(snapshot_totals(after_id, through_id))
+            progress.last_snapshot_id = through_id
+            progress.save()
+
+
+def rebuild_rollups(chunk_size: int = CHUNK_SIZE) -> tuple[int, int, int]:
+    """Clear the rollups and count every snapshot again."""
+    with transaction.atomic():
+        EligibilityRollup.objects.all().delete()
+        EligibilityRollupProgress.objects.update_or_create(pk=1, defaults={"last_snapshot_id": 0})
+    return update_rollups(chunk_size)
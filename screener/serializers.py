@@ -550,7 +550,7 @@ class ResultsSerializer(serializers.Serializer):
 
     programs = EligibilitySerializer(many=True)
     urgent_needs = UrgentNeedSerializer(many=True)
-    screen_id = serializers.CharField()
+    screen_id = serializers.CharField(allow_null=True)
     default_language = serializers.CharField()
     missing_programs = serializers.BooleanField()
     validations = ValidationSerializer(many=True)
@@ -15,9 +15,13 @@ and can only discuss what this payload contains. Two invariants matter.
 See the ai-service repo's docs/04-mfb-ai-service-api-contract.md (Layer 2).
 """
 
+import json
+from contextlib import contextmanager
 from decimal import Decimal
 from unittest import mock
 
+import httpx
+
 from django.conf import settings
 from django.core.cache import cache
 from django.db import connection
@@ -67,8 +71,33 @@ def set_translation(translated_field, text: str) -> None:
     translated_field.save()
 
 
+@contextmanager
+def ai_service(respond):
+    """Stand in for mfb-ai-service: `respond(request)` answers each call the assistant
+    makes, and the calls are collected in the yielded list."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return respond(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with mock.patch("screener.assistant.http_client", return_value=client):
+        yield calls
+
+
+def replying(status_code=201, body=None):
+    return lambda request: httpx.Response(status_code, json={} if body is None else body)
+
+
+def sent_json(request: httpx.Request) -> dict:
+    return json.loads(request.content)
+
+
 class BuildContextTests(TestCase):
     def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
         self.white_label = WhiteLabel.objects.create(name="Test State", code="test", state_code="TS")
         self.screen = Screen.objects.create(
             white_label=self.white_label,
@@ -617,8 +646,10 @@ class BuildContextTests(TestCase):
         """
 
         def query_count() -> int:
-            # Reload so prefetch/cached_property state matches a fresh request.
+            # Reload so prefetch/cached_property state matches a fresh request, and
+            # start from a cold apply-link cache so both counts include building it.
             screen = Screen.objects.prefetch_related(*CONTEXT_PREFETCH).get(pk=self.screen.pk)
+            cache.clear()
             with CaptureQueriesContext(connection) as captured:
                 _build_context(screen)
             return len(captured)
@@ -642,6 +673,7 @@ class BuildContextTests(TestCase):
 
         def query_count() -> int:
             screen = Screen.objects.prefetch_related(*CONTEXT_PREFETCH).get(pk=self.screen.pk)
+            cache.clear()
             with CaptureQueriesContext(connection) as captured:
                 _build_context(screen)
             return len(captured)
@@ -765,11 +797,10 @@ class AssistantStartViewTests(APITestCase):
 
     def _post(self, body):
         """POST and return the payload the view forwarded to ai-service."""
-        with mock.patch("screener.assistant.requests.request") as request:
-            request.return_value = mock.Mock(status_code=201, json=lambda: {"conversation_id": "c1", "messages": []})
+        with ai_service(replying(201, {"conversation_id": "c1", "messages": []})) as calls:
             response = self.client.post(self.url, body, format="json")
         self.assertEqual(response.status_code, 201, response.data)
-        return request.call_args.kwargs["json"]
+        return sent_json(calls[-1])
 
     def test_visible_programs_from_the_request_reaches_the_context(self):
         payload = self._post({"visible_programs": [{"name_abbreviated": "wic", "value": 900}]})
@@ -786,8 +817,7 @@ class AssistantStartViewTests(APITestCase):
 
     def test_json_array_body_does_not_500(self):
         """`request.data` is a list for an array body, so `.get` isn't safe to assume."""
-        with mock.patch("screener.assistant.requests.request") as request:
-            request.return_value = mock.Mock(status_code=201, json=lambda: {})
+        with ai_service(replying()):
             response = self.client.post(self.url, [], format="json")
 
         self.assertEqual(response.status_code, 201)
@@ -807,8 +837,7 @@ class AssistantStartViewTests(APITestCase):
         the apply-link programs + their translations prefetch, and current_programs. All
         flat in program and member count — which is what the sibling tests assert.
         """
-        with mock.patch("screener.assistant.requests.request") as request:
-            request.return_value = mock.Mock(status_code=201, json=lambda: {})
+        with ai_service(replying()):
             with CaptureQueriesContext(connection) as captured:
                 self.client.post(self.url, {}, format="json")
 
@@ -823,6 +852,81 @@ class AssistantStartViewTests(APITestCase):
         self.assertEqual(response.status_code, 403)
 
 
+class AssistantContextCacheTests(APITestCase):
+    """Reopening the assistant reuses the assembled context until the screen's
+    results or enrollment change."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.white_label = WhiteLabel.objects.create(
+            name="Test State", code="test", state_code="TS", feature_flags={"benbot": True}
+        )
+        self.screen = Screen.objects.create(
+            white_label=self.white_label, zipcode="78701", household_size=2, completed=True
+        )
+        seed_program(self.white_label, "snap", "wic")
+        self.snapshot("6636")
+        self.url = reverse("assistant-start", args=[self.screen.uuid])
+
+    def snapshot(self, snap_value: str):
+        snapshot = EligibilitySnapshot.objects.create(screen=self.screen, is_batch=False, had_error=False)
+        for name, value in (("snap", snap_value), ("wic", "1224")):
+            ProgramEligibilitySnapshot.objects.create(
+                eligibility_snapshot=snapshot,
+                name=name.upper(),
+                name_abbreviated=name,
+                estimated_value=Decimal(value),
+                eligible=True,
+            )
+
+    def start(self, body=None):
+        """POST a start call; returns the forwarded context and whether it was rebuilt."""
+        with ai_service(replying()) as calls, mock.patch(
+            "screener.assistant._build_context", wraps=_build_context
+        ) as build:
+            self.client.post(self.url, body or {}, format="json")
+        return sent_json(calls[-1])["context"], build.called
+
+    def test_reopening_is_a_cache_hit(self):
+        first, built = self.start()
+        self.assertTrue(built)
+
+        with CaptureQueriesContext(connection) as captured:
+            second, built = self.start()
+
+        self.assertFalse(built)
+        self.assertEqual(second, first)
+        # The screen and its two prefetches, plus the latest snapshot id.
+        self.assertLessEqual(len(captured), 4, f"{len(captured)} queries")
+
+    def test_a_new_snapshot_is_picked_up(self):
+        self.start()
+        self.snapshot("100")
+
+        context, built = self.start()
+
+        self.assertTrue(built)
+        self.assertEqual([p["external_name"] for p in context["eligible_programs"]], ["wic", "snap"])
+
+    def test_toggling_a_current_benefit_is_picked_up(self):
+        self.start()
+        CurrentBenefit.objects.create(screen=self.screen, program=Program.objects.get(name_abbreviated="snap"))
+
+        context, built = self.start()
+
+        self.assertTrue(built)
+        self.assertEqual([p["external_name"] for p in context["eligible_programs"]], ["wic"])
+
+    def test_each_visible_programs_list_is_cached_separately(self):
+        self.start({"visible_programs": ["snap"]})
+
+        context, built = self.start({"visible_programs": ["wic"]})
+
+        self.assertTrue(built)
+        self.assertEqual([p["external_name"] for p in context["eligible_programs"]], ["wic"])
+
+
 class AssistantThrottleTests(APITestCase):
     """The throttles are on AllowAny endpoints that proxy to a paid LLM, so "it's
     configured" isn't enough — assert one actually engages and returns 429.
@@ -848,8 +952,7 @@ class AssistantThrottleTests(APITestCase):
         rate = settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]["assistant_start"]
         limit = int(rate.split("/")[0])
 
-        with mock.patch("screener.assistant.requests.request") as request:
-            request.return_value = mock.Mock(status_code=201, json=lambda: {})
+        with ai_service(replying()):
             statuses = [self.client.post(self.url, {}, format="json").status_code for _ in range(limit + 1)]
 
         self.assertEqual(statuses[-1], status.HTTP_429_TOO_MANY_REQUESTS)
@@ -862,3 +965,95 @@ class AssistantThrottleTests(APITestCase):
         rates = settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
         self.assertIn("assistant_start", rates)
         self.assertIn("assistant_message", rates)
+
+
+class AssistantMessageStreamTests(APITestCase):
+    """`"stream": true` relays ai-service's server-sent events as they arrive."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        white_label = WhiteLabel.objects.create(
+            name="Test State", code="test", state_code="TS", feature_flags={"benbot": True}
+        )
+        screen = Screen.objects.create(white_label=white_label, zipcode="78701", household_size=1, completed=True)
+        self.url = reverse("assistant-message", args=[screen.uuid, "c1"])
+
+    def _event_stream(self, chunks):
+        async def content():
+            for chunk in chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+
+        return httpx.Response(200, headers={"Content-Type": "text/event-stream; charset=utf-8"}, content=content())
+
+    async def _stream(self, upstream, body):
+        """POST through the ASGI test client, which serves a streamed response as it's read."""
+        with ai_service(lambda request: upstream) as calls:
+            response = await self.async_client.post(self.url, body, content_type="application/json")
+            chunks = [chunk async for chunk in response.streaming_content]
+        return calls, response, chunks
+
+    async def test_events_are_relayed_chunk_by_chunk(self):
+        upstream = self._event_stream([b"data: Hel\n\n", b"data: lo\n\n"])
+
+        calls, response, chunks = await self._stream(upstream, {"text": "hi", "stream": True})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(chunks, [b"data: Hel\n\n", b"data: lo\n\n"])
+        self.assertEqual(calls[0].headers["Accept"], "text/event-stream")
+        self.assertTrue(upstream.is_closed)
+
+    async def test_a_broken_stream_ends_with_an_error_event(self):
+        upstream = self._event_stream([b"data: Hel\n\n", httpx.ReadError("connection reset")])
+
+        _, _, chunks = await self._stream(upstream, {"text": "hi", "stream": True})
+
+        first, error = chunks
+        self.assertEqual(first, b"data: Hel\n\n")
+        self.assertTrue(error.startswith(b"event: error\ndata: "))
+        self.assertIn(b"ai_upstream_error", error)
+
+    def test_under_wsgi_the_events_are_sent_in_one_response(self):
+        upstream = self._event_stream([b"data: Hel\n\n", b"data: lo\n\n"])
+
+        with ai_service(lambda request: upstream):
+            response = self.client.post(self.url, {"text": "hi", "stream": True}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response.content, b"data: Hel\n\ndata: lo\n\n")
+
+    def test_a_json_reply_is_passed_through_when_streaming_was_asked_for(self):
+        with ai_service(replying(200, {"ok": 1})):
+            response = self.client.post(self.url, {"text": "hi", "stream": True}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"ok": 1})
+
+    def test_without_stream_the_reply_is_buffered(self):
+        with ai_service(replying(200, {"ok": 1})) as calls:
+            response = self.client.post(self.url, {"text": "hi"}, format="json")
+
+        self.assertEqual(response.data, {"ok": 1})
+        self.assertNotEqual(calls[0].headers["Accept"], "text/event-stream")
+
+    def test_an_unreachable_service_is_a_502(self):
+        def refuse(request):
+            raise httpx.ConnectError("connection refused")
+
+        with ai_service(refuse):
+            response = self.client.post(self.url, {"text": "hi"}, format="json")
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response.data["error"]["code"], "ai_upstream_error")
+
+    def test_an_unknown_screen_is_a_404(self):
+        url = reverse("assistant-message", args=["00000000-0000-0000-0000-000000000000", "c1"])
+
+        response = self.client.post(url, {"text": "hi"}, format="json")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data, {"detail": "Not found."})
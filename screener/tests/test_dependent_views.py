@@ -0,0 +1,100 @@
+"""
+Tests for DependentViews (screener/dependent_views.py), which migrations use to move views built outside the app
+out of the way of a table or column they drop.
+"""
+
+from django.db import connection
+from django.test import TestCase
+
+from screener.dependent_views import DependentViews
+
+TABLE = "dependent_views_table"
+RENAMED = "dependent_views_renamed"
+
+
+def query(sql, params=None):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def execute(*statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def relations():
+    return dict(query("SELECT relname, relkind FROM pg_class WHERE relname LIKE 'dependent_views_%%'"))
+
+
+class DependentViewsTest(TestCase):
+    def setUp(self):
+        execute(
+            f"CREATE TABLE {TABLE} (id integer, name text)",
+            f"INSERT INTO {TABLE} VALUES (1, 'snap'), (2, 'wic')",
+            f"CREATE VIEW dependent_views_names AS SELECT id, upper(name) AS name FROM {TABLE}",
+            "CREATE MATERIALIZED VIEW dependent_views_totals AS SELECT count(*) AS total FROM dependent_views_names",
+            "CREATE UNIQUE INDEX dependent_views_totals_idx ON dependent_views_totals (total)",
+            "CREATE MATERIALIZED VIEW dependent_views_empty AS SELECT id FROM dependent_views_names WITH NO DATA",
+            "GRANT SELECT ON dependent_views_totals TO PUBLIC",
+            "COMMENT ON VIEW dependent_views_names IS 'Program names'",
+        )
+        self.views = DependentViews([TABLE], renames={TABLE: RENAMED})
+
+    def run_code(self, operation, reverse=False):
+        with connection.schema_editor() as schema_editor:
+            (operation.reverse_code if reverse else operation.code)(None, schema_editor)
+
+    def assert_views_read(self, table):
+        self.assertEqual(
+            relations(),
+            {
+                table: "r",
+                "dependent_views_names": "v",
+                "dependent_views_totals": "m",
+                "dependent_views_totals_idx": "i",
+                "dependent_views_empty": "m",
+            },
+        )
+        self.assertIn(table, query("SELECT pg_get_viewdef('dependent_views_names')")[0][0])
+        self.assertEqual(query("SELECT total FROM dependent_views_totals"), [(2,)])
+        self.assertEqual(
+            query(
+                "SELECT relname, relispopulated FROM pg_class "
+                "WHERE relname IN ('dependent_views_totals', 'dependent_views_empty') ORDER BY relname"
+            ),
+            [("dependent_views_empty", False), ("dependent_views_totals", True)],
+        )
+        self.assertEqual(query("SELECT obj_description('dependent_views_names'::regclass)"), [("Program names",)])
+        self.assertTrue(query("SELECT has_table_privilege('public', 'dependent_views_totals', 'SELECT')")[0][0])
+
+    def test_views_are_dropped_and_created_again_on_the_renamed_table(self):
+        self.run_code(self.views.save())
+
+        self.assertEqual(relations(), {TABLE: "r"})
+
+        execute(f"ALTER TABLE {TABLE} RENAME TO {RENAMED}")
+        self.run_code(self.views.restore())
+
+        self.assert_views_read(RENAMED)
+
+    def test_reverse_puts_the_views_back_on_the_original_table(self):
+        save, restore = self.views.save(), self.views.restore()
+        self.run_code(save)
+        execute(f"ALTER TABLE {TABLE} RENAME TO {RENAMED}")
+        self.run_code(restore)
+
+        self.run_code(restore, reverse=True)
+        execute(f"ALTER TABLE {RENAMED} RENAME TO {TABLE}")
+        self.run_code(save, reverse=True)
+
+        self.assert_views_read(TABLE)
+
+    def test_nothing_to_do_without_views(self):
+        views = DependentViews(["screener_snapshotprogram"])
+
+        self.run_code(views.save())
+        self.run_code(views.restore())
+
+        self.assertEqual(views.saved, [])
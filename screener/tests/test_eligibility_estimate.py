@@ -0,0 +1,182 @@
+"""
+Tests for the quick estimate: POST /api/eligibility/estimate/ and the in-memory screen
+it calculates against (screener/estimate.py). The estimate must run the real calculators
+and build the PolicyEngine payload without writing a screen, members, income streams or
+snapshots, and without reading them back either.
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from programs.framework.pe_dependencies.payload import pe_input
+from programs.models import Program, ProgramCategory
+from programs.programs.cross_white_label.medicaid.chip.tx import TxChip
+from screener.estimate import unsaved_screen
+from screener.models import (
+    CurrentBenefit,
+    EligibilitySnapshot,
+    HouseholdMember,
+    IncomeStream,
+    ProgramEligibilitySnapshot,
+    Screen,
+    WhiteLabel,
+)
+from screener.serializers import ScreenSerializer
+
+ESTIMATE_URL = "/api/eligibility/estimate/"
+
+
+def member(relationship, age, **kwargs):
+    data = {
+        "relationship": relationship,
+        "age": age,
+        "student": False,
+        "pregnant": False,
+        "visually_impaired": False,
+        "disabled": False,
+        "long_term_disability": False,
+        "has_income": False,
+        "income_streams": [],
+        "insurance": {"none": True},
+    }
+    data.update(kwargs)
+    return data
+
+
+def household(**extra):
+    payload = {
+        "white_label": "co",
+        "agree_to_tos": True,
+        "is_13_or_older": True,
+        "zipcode": "80203",
+        "county": "Denver County",
+        "household_size": 2,
+        "household_assets": 0,
+        "household_members": [
+            member(
+                "headOfHousehold",
+                40,
+                has_income=True,
+                income_streams=[{"type": "sSI", "amount": 500, "frequency": "monthly"}],
+            ),
+            member("child", 10, frontend_id="00000000-0000-0000-0000-000000000002"),
+        ],
+        "expenses": [{"type": "rent", "amount": 900, "frequency": "monthly"}],
+        "current_benefits": ["tanf"],
+    }
+    payload.update(extra)
+    return payload
+
+
+def build(payload):
+    serializer = ScreenSerializer(data=payload)
+    serializer.is_valid(raise_exception=True)
+    return unsaved_screen(serializer.validated_data)
+
+
+class UnsavedScreenTests(TestCase):
+    def setUp(self):
+        self.white_label = WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+        for name in ("tanf", "ssi"):
+            Program.objects.new_program("co", name)
+
+    def test_relations_are_served_from_memory(self):
+        screen = build(household())
+
+        with self.assertNumQueries(0):
+            head, child = screen.household_members.all()
+            self.assertEqual((head.id, child.id), (1, 2))
+            self.assertIs(head.screen, screen)
+            self.assertEqual(screen.calc_gross_income("yearly", ["all"]), 6000)
+            self.assertEqual(head.calc_gross_income("monthly", ["sSI"]), 500)
+            self.assertEqual(screen.calc_expenses("monthly", ["rent"]), 900)
+            self.assertEqual(screen.expense_type_names(), ["rent"])
+            self.assertTrue(head.has_insurance_types(("none",)))
+            self.assertFalse(hasattr(screen, "energy_calculator"))
+            self.assertFalse(screen.frozen)
+            self.assertIsNotNone(screen.get_reference_date())
+            self.assertTrue(screen.missing_fields().has("energy_calculator"))
+            self.assertEqual(screen.get_head(), head)
+
+    def test_current_benefits_include_the_derived_names(self):
+        screen = build(household())
+
+        with self.assertNumQueries(0):
+            # tanf was asked for; ssi is implied by the sSI income stream.
+            self.assertTrue(screen.has_benefit("tanf"))
+            self.assertTrue(screen.has_benefit("ssi"))
+            self.assertFalse(screen.has_benefit("snap"))
+
+    def test_member_without_insurance_reads_as_missing(self):
+        payload = household()
+        del payload["household_members"][1]["insurance"]
+        _, child = build(payload).household_members.all()
+
+        self.assertFalse(hasattr(child, "insurance"))
+        self.assertFalse(child.has_insurance("medicaid"))
+
+    def test_builds_the_policyengine_payload(self):
+        screen = build(household())
+
+        with self.assertNumQueries(0):
+            result = pe_input(screen, [TxChip], resolved_version=("current", None))
+
+        household_data = result["household"]
+        self.assertEqual(set(household_data["people"]), {"1", "2"})
+        self.assertEqual(household_data["households"]["household"]["members"], ["1", "2"])
+
+    def test_nothing_is_saved(self):
+        build(household())
+
+        self.assertFalse(Screen.objects.exists())
+        self.assertFalse(HouseholdMember.objects.exists())
+        self.assertFalse(CurrentBenefit.objects.exists())
+
+
+class EligibilityEstimateViewTests(TestCase):
+    def setUp(self):
+        WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+        category = ProgramCategory.objects.new_program_category("co", "youth", None)
+        program = Program.objects.new_program("co", "mydenver")
+        program.category = category
+        program.active = True
+        program.save()
+
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(email_or_cell="kiosk@example.com", password="kiosk")
+        )
+
+    def test_returns_results_without_writing_anything(self):
+        with patch("screener.views.get_web_hook") as get_web_hook:
+            response = self.client.post(ESTIMATE_URL, household(), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [program] = response.data["programs"]
+        self.assertEqual(program["name_abbreviated"], "mydenver")
+        self.assertTrue(program["eligible"])
+        self.assertEqual(program["estimated_value"], 150)
+        self.assertFalse(program["new"])
+        self.assertIsNone(response.data["screen_id"])
+        get_web_hook.assert_not_called()
+
+        for model in (Screen, HouseholdMember, IncomeStream, EligibilitySnapshot, ProgramEligibilitySnapshot):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_invalid_household_returns_400(self):
+        payload = household()
+        payload["household_members"][0]["age"] = "forty"
+
+        response = self.client.post(ESTIMATE_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Screen.objects.exists())
+
+    def test_requires_authentication(self):
+        response = APIClient().post(ESTIMATE_URL, household(), format="json")
+
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
@@ -1,15 +1,36 @@
 """
-Unit tests for Screen, HouseholdMember, and WhiteLabel model methods.
+Unit tests for Screen, HouseholdMember, WhiteLabel, EligibilitySnapshot and ProgramEligibilitySnapshot model methods.
 """
 
 from decimal import Decimal
 from unittest.mock import patch
+from django.db import connection
 from django.test import TestCase
-from screener.models import Screen, HouseholdMember, WhiteLabel, IncomeStream, Expense
+from django.test.utils import CaptureQueriesContext
+from screener.models import (
+    EligibilityMessage,
+    EligibilitySnapshot,
+    Expense,
+    HouseholdMember,
+    IncomeStream,
+    ProgramEligibilitySnapshot,
+    Screen,
+    SnapshotProgram,
+    WhiteLabel,
+)
 from screener.feature_flags import FeatureFlagConfig
 from screener.serializers import _write_current_benefits
 from screener.tests.helpers import seed_program
 
+EXPANDED_COLUMNS = (
+    "name",
+    "name_abbreviated",
+    "estimated_delivery_time",
+    "estimated_application_time",
+    "failed_tests",
+    "passed_tests",
+)
+
 
 class TestScreen(TestCase):
     """
@@ -1102,3 +1123,117 @@ class TestWhiteLabelFeatureFlags(TestCase):
             self.white_label.has_feature("unknown_flag")
 
         self.assertIn("Unknown feature flag: unknown_flag", str(cm.exception))
+
+
+class TestEligibilitySnapshot(TestCase):
+    def setUp(self):
+        white_label = WhiteLabel.objects.create(name="Test State", code="test", state_code="TS")
+        screen = Screen.objects.create(white_label=white_label, household_size=1, completed=True)
+        self.snapshot = EligibilitySnapshot.objects.create(screen=screen, had_error=True)
+
+    def test_mark_complete_updates_the_row_in_its_partition(self):
+        created = self.snapshot.submission_date
+
+        with CaptureQueriesContext(connection) as queries:
+            self.snapshot.mark_complete()
+
+        [update] = queries.captured_queries
+        self.assertIn('"submission_date" =', update["sql"].split("WHERE")[1])
+        row = EligibilitySnapshot.objects.get(id=self.snapshot.id)
+        self.assertFalse(row.had_error)
+        self.assertGreater(row.submission_date, created)
+        self.assertEqual(row.submission_date, self.snapshot.submission_date)
+
+
+class TestProgramEligibilitySnapshot(TestCase):
+    """
+    Tests for storing ProgramEligibilitySnapshot program text and messages once.
+    """
+
+    def setUp(self):
+        white_label = WhiteLabel.objects.create(name="Test State", code="test", state_code="TS")
+        screen = Screen.objects.create(white_label=white_label, household_size=1, completed=True)
+        self.snapshot = EligibilitySnapshot.objects.create(screen=screen)
+        self.income = ({"default_message": "Household makes", "label": "eligibility_message.income-0"}, " $100 ")
+
+    def result(self, name_abbreviated="snap", **kwargs):
+        return {
+            "eligibility_snapshot": self.snapshot,
+            "name": name_abbreviated.upper(),
+            "name_abbreviated": name_abbreviated,
+            "estimated_value": Decimal("100"),
+            "estimated_delivery_time": "1 week",
+            "estimated_application_time": None,
+            "eligible": True,
+            **kwargs,
+        }
+
+    def test_create_results_stores_shared_text_once(self):
+        ProgramEligibilitySnapshot.objects.create_results(
+            [
+                self.result(failed_tests=[self.income], passed_tests=["age"]),
+                self.result(passed_tests=["age", self.income]),
+                self.result("wic", passed_tests=["age"]),
+            ]
+        )
+
+        self.assertEqual(SnapshotProgram.objects.count(), 2)
+        self.assertEqual(EligibilityMessage.objects.count(), 2)
+        snap = SnapshotProgram.objects.get(name_abbreviated="snap")
+        self.assertEqual(ProgramEligibilitySnapshot.objects.filter(program=snap).count(), 2)
+        self.assertIsNone(snap.estimated_application_time)
+
+    def test_missing_and_blank_times_are_kept_apart(self):
+        ProgramEligibilitySnapshot.objects.create_results(
+            [self.result(), self.result(), self.result(estimated_application_time="")]
+        )
+
+        self.assertEqual(
+            sorted(SnapshotProgram.objects.values_list("estimated_application_time", flat=True), key=str),
+            ["", None],
+        )
+
+        # Both programs are found, so nothing is added: one query for the programs and one for the rows.
+        with self.assertNumQueries(2):
+            ProgramEligibilitySnapshot.objects.create_results(
+                [self.result(), self.result(estimated_application_time="")]
+            )
+
+        self.assertEqual(SnapshotProgram.objects.count(), 2)
+
+    def test_later_results_reuse_existing_rows(self):
+        ProgramEligibilitySnapshot.objects.create_results([self.result(failed_tests=[self.income])])
+
+        with self.assertNumQueries(3):
+            ProgramEligibilitySnapshot.objects.create_results([self.result(failed_tests=[self.income])])
+
+        self.assertEqual(SnapshotProgram.objects.count(), 1)
+        self.assertEqual(EligibilityMessage.objects.count(), 1)
+
+    def test_expanded_has_the_text_and_messages_in_order(self):
+        ProgramEligibilitySnapshot.objects.create_results(
+            [self.result(failed_tests=[self.income, "age"], passed_tests=["age", self.income])]
+        )
+
+        row = ProgramEligibilitySnapshot.objects.expanded().values(*EXPANDED_COLUMNS).get()
+
+        income = list(self.income)
+        self.assertEqual(
+            row,
+            {
+                "name": "SNAP",
+                "name_abbreviated": "snap",
+                "estimated_delivery_time": "1 week",
+                "estimated_application_time": None,
+                "failed_tests": [income, "age"],
+                "passed_tests": ["age", income],
+            },
+        )
+
+    def test_program_text_is_read_through_the_program(self):
+        ProgramEligibilitySnapshot.objects.create(**self.result())
+
+        row = ProgramEligibilitySnapshot.objects.select_related("program").get()
+
+        self.assertEqual((row.name, row.name_abbreviated, row.estimated_delivery_time), ("SNAP", "snap", "1 week"))
+        self.assertEqual((row.failed_test_ids, row.passed_test_ids), ([], []))
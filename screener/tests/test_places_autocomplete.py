@@ -4,8 +4,8 @@ Unit tests for the Google Places Autocomplete proxy:
   - PlacesAutocompleteView (empty input / 502 / happy-path)
 """
 
-import requests
-from unittest.mock import patch, Mock
+import httpx
+from unittest.mock import patch
 
 from django.core.cache import cache
 from django.test import TestCase, override_settings
@@ -28,99 +28,85 @@ class TestGooglePlacesClient(TestCase):
         "status": "OK",
     }
 
-    @patch("integrations.clients.google_places.requests.get")
-    def test_returns_parsed_predictions(self, mock_get):
-        mock_get.return_value = Mock(json=lambda: self.MOCK_GOOGLE_RESPONSE)
-        mock_get.return_value.raise_for_status = Mock()
+    def setUp(self):
+        self.body = self.MOCK_GOOGLE_RESPONSE
+        self.calls = []
+
+        def handler(request):
+            self.calls.append(request)
+            return httpx.Response(200, json=self.body)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        patcher = patch("integrations.clients.google_places.http_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
+    async def test_returns_parsed_predictions(self):
         client = GooglePlacesClient()
-        results = client.autocomplete_address("123 Main")
+        results = await client.autocomplete_address("123 Main")
 
         self.assertEqual(len(results), 2)
         self.assertEqual(results[0]["place_id"], "abc123")
 
-    @patch("integrations.clients.google_places.requests.get")
-    def test_strips_usa_suffix_from_descriptions(self, mock_get):
-        mock_get.return_value = Mock(json=lambda: self.MOCK_GOOGLE_RESPONSE)
-        mock_get.return_value.raise_for_status = Mock()
-
-        results = GooglePlacesClient().autocomplete_address("123 Main")
+    async def test_strips_usa_suffix_from_descriptions(self):
+        results = await GooglePlacesClient().autocomplete_address("123 Main")
 
         self.assertEqual(results[0]["description"], "123 Main St, Denver, CO 80014")
         self.assertEqual(results[1]["description"], "123 Main Ave, Boulder, CO 80302")
 
-    @patch("integrations.clients.google_places.requests.get")
-    def test_passes_correct_params_to_google(self, mock_get):
-        mock_get.return_value = Mock(json=lambda: {"predictions": [], "status": "ZERO_RESULTS"})
-        mock_get.return_value.raise_for_status = Mock()
+    async def test_passes_correct_params_to_google(self):
+        self.body = {"predictions": [], "status": "ZERO_RESULTS"}
 
-        GooglePlacesClient().autocomplete_address("456 Oak")
+        await GooglePlacesClient().autocomplete_address("456 Oak")
 
-        _, kwargs = mock_get.call_args
-        params = kwargs["params"]
+        params = self.calls[0].url.params
         self.assertEqual(params["input"], "456 Oak")
         self.assertEqual(params["types"], "address")
         self.assertEqual(params["components"], "country:us")
 
-    @patch("integrations.clients.google_places.requests.get")
-    def test_returns_empty_list_when_no_predictions(self, mock_get):
-        mock_get.return_value = Mock(json=lambda: {"predictions": [], "status": "ZERO_RESULTS"})
-        mock_get.return_value.raise_for_status = Mock()
+    async def test_returns_empty_list_when_no_predictions(self):
+        self.body = {"predictions": [], "status": "ZERO_RESULTS"}
 
-        results = GooglePlacesClient().autocomplete_address("zzz")
+        results = await GooglePlacesClient().autocomplete_address("zzz")
 
         self.assertEqual(results, [])
 
-    @patch("integrations.clients.google_places.requests.get")
-    def test_preserves_non_usa_descriptions_unchanged(self, mock_get):
-        mock_get.return_value = Mock(
-            json=lambda: {
-                "predictions": [{"description": "123 Main St, Denver, CO 80014", "place_id": "xyz"}],
-                "status": "OK",
-            }
-        )
-        mock_get.return_value.raise_for_status = Mock()
+    async def test_preserves_non_usa_descriptions_unchanged(self):
+        self.body = {
+            "predictions": [{"description": "123 Main St, Denver, CO 80014", "place_id": "xyz"}],
+            "status": "OK",
+        }
 
-        results = GooglePlacesClient().autocomplete_address("123 Main")
+        results = await GooglePlacesClient().autocomplete_address("123 Main")
 
         self.assertEqual(results[0]["description"], "123 Main St, Denver, CO 80014")
 
-    @patch("integrations.clients.google_places.requests.get")
-    def test_cache_hit_skips_api_call(self, mock_get):
-        mock_get.return_value = Mock(json=lambda: self.MOCK_GOOGLE_RESPONSE)
-        mock_get.return_value.raise_for_status = Mock()
-
+    async def test_cache_hit_skips_api_call(self):
         client = GooglePlacesClient()
-        client.autocomplete_address("123 Main")
-        client.autocomplete_address("123 Main")
+        await client.autocomplete_address("123 Main")
+        await client.autocomplete_address("123 Main")
 
-        mock_get.assert_called_once()
-
-    @patch("integrations.clients.google_places.requests.get")
-    def test_cache_key_is_case_insensitive(self, mock_get):
-        mock_get.return_value = Mock(json=lambda: self.MOCK_GOOGLE_RESPONSE)
-        mock_get.return_value.raise_for_status = Mock()
+        self.assertEqual(len(self.calls), 1)
 
+    async def test_cache_key_is_case_insensitive(self):
         client = GooglePlacesClient()
-        client.autocomplete_address("123 Main")
-        client.autocomplete_address("123 MAIN")
+        await client.autocomplete_address("123 Main")
+        await client.autocomplete_address("123 MAIN")
 
-        mock_get.assert_called_once()
+        self.assertEqual(len(self.calls), 1)
 
-    @patch("integrations.clients.google_places.requests.get")
-    def test_error_status_raises_and_is_not_cached(self, mock_get):
-        mock_get.return_value = Mock(json=lambda: {"predictions": [], "status": "REQUEST_DENIED"})
-        mock_get.return_value.raise_for_status = Mock()
+    async def test_error_status_raises_and_is_not_cached(self):
+        self.body = {"predictions": [], "status": "REQUEST_DENIED"}
 
         client = GooglePlacesClient()
-        with self.assertRaises(requests.RequestException):
-            client.autocomplete_address("123 Main")
+        with self.assertRaises(httpx.HTTPError):
+            await client.autocomplete_address("123 Main")
 
         # A second call must hit the API again — error responses must not be cached.
-        with self.assertRaises(requests.RequestException):
-            client.autocomplete_address("123 Main")
+        with self.assertRaises(httpx.HTTPError):
+            await client.autocomplete_address("123 Main")
 
-        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(len(self.calls), 2)
 
     def tearDown(self):
         cache.clear()
@@ -158,23 +144,24 @@ class TestPlacesAutocompleteView(APITestCase):
 
     @patch("screener.views.GooglePlacesClient.autocomplete_address")
     def test_google_api_error_status_returns_502(self, mock_autocomplete):
-        mock_autocomplete.side_effect = requests.RequestException("Google Places API error status: REQUEST_DENIED")
+        mock_autocomplete.side_effect = httpx.HTTPError("Google Places API error status: REQUEST_DENIED")
         response = self.client.get(self.URL, {"input": "123 Main"})
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
         self.assertIn("error", response.data)
 
     @patch("screener.views.GooglePlacesClient.autocomplete_address")
     def test_google_http_error_returns_502(self, mock_autocomplete):
-        err = requests.HTTPError()
-        err.response = Mock(status_code=403)
-        mock_autocomplete.side_effect = err
+        request = httpx.Request("GET", "https://maps.googleapis.com")
+        mock_autocomplete.side_effect = httpx.HTTPStatusError(
+            "Forbidden", request=request, response=httpx.Response(403, request=request)
+        )
         response = self.client.get(self.URL, {"input": "123 Main"})
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
         self.assertIn("error", response.data)
 
     @patch("screener.views.GooglePlacesClient.autocomplete_address")
     def test_network_failure_returns_502(self, mock_autocomplete):
-        mock_autocomplete.side_effect = requests.RequestException("timeout")
+        mock_autocomplete.side_effect = httpx.ReadTimeout("timeout")
         response = self.client.get(self.URL, {"input": "123 Main"})
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
         self.assertIn("error", response.data)
@@ -5,8 +5,8 @@ Unit tests for CESN Calculate Impact utilities:
   - RemImpactView (400 / 502 / happy-path)
 """
 
-import requests
-from unittest.mock import patch, Mock
+import httpx
+from unittest.mock import patch
 
 from django.test import TestCase
 from rest_framework import status
@@ -15,6 +15,13 @@ from rest_framework.test import APITestCase
 from screener.serializers import KG_TO_LBS, RemImpactSerializer, _convert_emissions_to_lbs
 
 
+def rem_error(status_code: int, **body) -> httpx.HTTPStatusError:
+    """What RewiringAmericaClient raises for a non-2xx REM response."""
+    request = httpx.Request("GET", "https://api.rewiringamerica.org/api/v1/rem/address")
+    response = httpx.Response(status_code, request=request, **body)
+    return httpx.HTTPStatusError(f"REM returned {status_code}", request=request, response=response)
+
+
 class TestConvertEmissionsToLbs(TestCase):
     """Tests for _convert_emissions_to_lbs."""
 
@@ -179,9 +186,7 @@ class TestRemImpactView(APITestCase):
 
     @patch("screener.views.RewiringAmericaClient.fetch_rem_impact")
     def test_upstream_http_error_returns_502(self, mock_fetch):
-        err = requests.HTTPError()
-        err.response = Mock(status_code=400, json=lambda: {"msg": "bad"})
-        mock_fetch.side_effect = err
+        mock_fetch.side_effect = rem_error(400, json={"msg": "bad"})
         response = self.client.get(self.URL, self.VALID_PARAMS)
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
         self.assertIn("error", response.data)
@@ -189,20 +194,14 @@ class TestRemImpactView(APITestCase):
 
     @patch("screener.views.RewiringAmericaClient.fetch_rem_impact")
     def test_upstream_http_error_with_non_json_body_falls_back_to_text(self, mock_fetch):
-        err = requests.HTTPError()
-        err.response = Mock(
-            status_code=500,
-            json=Mock(side_effect=ValueError("not json")),
-            text="Internal Server Error",
-        )
-        mock_fetch.side_effect = err
+        mock_fetch.side_effect = rem_error(500, text="Internal Server Error")
         response = self.client.get(self.URL, self.VALID_PARAMS)
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
         self.assertEqual(response.data["detail"], "Internal Server Error")
 
     @patch("screener.views.RewiringAmericaClient.fetch_rem_impact")
     def test_network_failure_returns_502(self, mock_fetch):
-        mock_fetch.side_effect = requests.RequestException("connection refused")
+        mock_fetch.side_effect = httpx.ConnectError("connection refused")
         response = self.client.get(self.URL, self.VALID_PARAMS)
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
         self.assertIn("error", response.data)
@@ -218,13 +217,8 @@ class TestRemImpactView(APITestCase):
             "building_not_supported",
         ):
             with self.subTest(error_type=error_type):
-                err = requests.HTTPError()
                 # REM wraps the typed error one level deep: {"detail": {"type": ..., "msg": ...}}
-                err.response = Mock(
-                    status_code=400,
-                    json=lambda t=error_type: {"detail": {"type": t, "msg": "some message"}},
-                )
-                mock_fetch.side_effect = err
+                mock_fetch.side_effect = rem_error(400, json={"detail": {"type": error_type, "msg": "some message"}})
                 response = self.client.get(self.URL, self.VALID_PARAMS)
                 self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
                 self.assertEqual(response.data["error"], "address_not_supported")
@@ -232,9 +226,7 @@ class TestRemImpactView(APITestCase):
 
     @patch("screener.views.RewiringAmericaClient.fetch_rem_impact")
     def test_rem_400_with_unknown_error_type_still_returns_502(self, mock_fetch):
-        err = requests.HTTPError()
-        err.response = Mock(status_code=400, json=lambda: {"detail": {"type": "some_future_type", "msg": "x"}})
-        mock_fetch.side_effect = err
+        mock_fetch.side_effect = rem_error(400, json={"detail": {"type": "some_future_type", "msg": "x"}})
         response = self.client.get(self.URL, self.VALID_PARAMS)
         self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
 
@@ -11,6 +11,8 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("", include(router.urls)),
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
+    # Results for posted household JSON; saves nothing.
+    path("eligibility/estimate/", views.EligibilityEstimateView.as_view(), name="eligibility-estimate"),
     path("eligibility/<id>", views.EligibilityTranslationView.as_view(), name="translated screen eligibility endpoint"),
     path("screens/<uuid:screen_uuid>/nps/", views.NPSScoreView.as_view(), name="nps-score"),
     # Single-benefit toggle for the results-page "already have this" control.
@@ -1,8 +1,9 @@
 import hashlib
-import requests
-from typing import Optional
+import httpx
+from typing import Iterable, Optional
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from benefits.async_views import AsyncAPIView
 from integrations.clients.rewiring_america import RewiringAmericaClient
 from integrations.clients.google_places import GooglePlacesClient
 from integrations.services.communications import MessageUser
@@ -12,6 +13,7 @@ from integrations.clients.policyengine.registry import all_calculators
 from programs.urgent_needs.base import UrgentNeedFunction
 from programs.programs.cross_white_label.medicaid.base import Medicaid
 from django.db import transaction
+from django.db.models import Prefetch, QuerySet
 from screener.models import (
     Screen,
     HouseholdMember,
@@ -39,8 +41,9 @@ from screener.serializers import (
     RemImpactSerializer,
     CurrentBenefitToggleSerializer,
 )
-from integrations.clients.policyengine.policy_engine import calc_pe_eligibility
+from integrations.clients.policyengine.policy_engine import PEData, calc_pe_eligibility
 from integrations.external_api_status import track_external_api_failures, get_external_api_failures
+from programs.framework.base import Eligibility
 from programs.util import DependencyError, Dependencies
 from programs.urgent_needs import urgent_need_functions
 from programs.models import (
@@ -59,6 +62,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from programs.warnings import warning_calculators
 from programs.serializers import HasBenefitsProgramSerializer
 from validations.serializers import ValidationSerializer
+from .estimate import unsaved_screen
 from .webhooks import get_web_hook
 from drf_yasg.utils import swagger_auto_schema
 import math
@@ -269,6 +273,22 @@ class EligibilityTranslationView(views.APIView):
         return Response(results)
 
 
+class EligibilityEstimateView(views.APIView):
+    @swagger_auto_schema(request_body=ScreenSerializer, responses={200: ResultsSerializer()})
+    def post(self, request):
+        """
+        Results for a household posted as screen JSON, without saving the screen. Runs
+        the same calculators and PolicyEngine request as /eligibility/<id>, against an
+        in-memory screen (screener/estimate.py), and writes no screen, members, income
+        streams or snapshots, so there is no screen_id and no webhook.
+        """
+        serializer = ScreenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        screen = unsaved_screen(serializer.validated_data)
+
+        return Response(all_results(screen, save=False))
+
+
 class MessageViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     """
     API endpoint that logs messages sent.
@@ -291,11 +311,19 @@ class MessageViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
         return Response({}, status=status.HTTP_201_CREATED)
 
 
-def all_results(screen: Screen, batch=False, is_admin: bool = False, pe_version: Optional[str] = None):
+def all_results(
+    screen: Screen, batch=False, is_admin: bool = False, pe_version: Optional[str] = None, save: bool = True
+):
+    """
+    The results payload for the screen. With save=False nothing is written, so the screen
+    can be an unsaved one from screener/estimate.py; the payload then has no screen_id.
+    """
     # Track any external-API failure (e.g. PolicyEngine) that occurs while computing
     # this screen's results, so we can tell the frontend results may be incomplete.
     with track_external_api_failures():
-        eligibility, missing_programs, categories, _pe_data = eligibility_results(screen, batch, pe_version=pe_version)
+        eligibility, missing_programs, categories, _pe_data = eligibility_results(
+            screen, batch, pe_version=pe_version, save=save
+        )
         urgent_needs = urgent_need_results(screen, eligibility)
         external_api_failures = get_external_api_failures()
     validations = ValidationSerializer(screen.validations.all(), many=True).data
@@ -303,7 +331,7 @@ def all_results(screen: Screen, batch=False, is_admin: bool = False, pe_version:
     results = {
         "programs": eligibility,
         "urgent_needs": urgent_needs,
-        "screen_id": screen.id,
+        "screen_id": screen.id if save else None,
         "default_language": screen.request_language_code,
         "missing_programs": missing_programs,
         "validations": validations,
@@ -414,7 +442,8 @@ CALC_ORDER = (
 )
 
 
-def eligibility_results(screen: Screen, batch=False, pe_version: Optional[str] = None):
+def eligibility_programs(screen: Screen) -> tuple[Optional[Referrer], QuerySet[Program]]:
+    """The screen's referrer (if any) and the programs its results are calculated for."""
     try:
         referrer = Referrer.objects.prefetch_related("remove_programs", "primary_navigators").get(
             white_label=screen.white_label,
@@ -455,22 +484,23 @@ def eligibility_results(screen: Screen, batch=False, pe_version: Optional[str] =
         )
         .exclude(id__in=excluded_programs)
     )
-    data = []
 
-    try:
-        previous_snapshot = (
-            EligibilitySnapshot.objects.prefetch_related("program_snapshots")
-            .filter(is_batch=False, screen=screen, had_error=False)
-            .latest("submission_date")
-        )
-        previous_results = None if previous_snapshot is None else previous_snapshot.program_snapshots.all()
-    except ObjectDoesNotExist:
-        previous_snapshot = None
-    snapshot = EligibilitySnapshot.objects.create(screen=screen, is_batch=batch, had_error=True)
+    return referrer, all_programs
 
-    missing_dependencies = screen.missing_fields()
 
-    program_by_abbr = {p.name_abbreviated: p for p in all_programs}
+def calculate_eligibility(
+    screen: Screen,
+    programs: Iterable[Program],
+    missing_dependencies: Dependencies,
+    pe_version: Optional[str] = None,
+) -> tuple[list[Program], dict[str, Eligibility], bool, PEData]:
+    """Run the calculators for `programs` against `screen`. Saves and serializes nothing.
+
+    Returns the programs in calculation order, the eligibility of each calculated program
+    by name_abbreviated, whether any program was left out for missing dependencies, and
+    the PolicyEngine request/response.
+    """
+    program_by_abbr = {p.name_abbreviated: p for p in programs}
     pe_calculators = {}
     for calculator_name, Calculator in all_calculators.items():
         program = program_by_abbr.get(calculator_name)
@@ -493,21 +523,15 @@ def eligibility_results(screen: Screen, batch=False, pe_version: Optional[str] =
     missing_programs = False
 
     # make certain benifits calculate first so that they can be used in other benefits
-    all_programs = sorted(all_programs, key=sort_first)
-
-    program_snapshots = []
-    eligible_program_data: list[tuple] = []  # (program, data_index) for post-loop navigator pass
+    programs = sorted(programs, key=sort_first)
 
     program_eligibility = {}
 
-    for program in all_programs:
+    for program in programs:
         # Tracking-only programs (has_calculator=False) and disabled programs
-        # (active=False) are skipped before any eligibility lookup. Without this
-        # guard, the loop would fall through and reuse the previous iteration's
-        # `eligibility` value when writing program_snapshots.
+        # (active=False) are skipped before any eligibility lookup.
         if not (program.active and program.has_calculator):
             continue
-        skip = False
         if program.name_abbreviated not in pe_programs:
             try:
                 eligibility = program.eligibility(screen, program_eligibility, missing_dependencies)
@@ -523,6 +547,47 @@ def eligibility_results(screen: Screen, batch=False, pe_version: Optional[str] =
 
         program_eligibility[program.name_abbreviated] = eligibility
 
+    return programs, program_eligibility, missing_programs, pe_data
+
+
+def eligibility_results(screen: Screen, batch=False, pe_version: Optional[str] = None, save: bool = True):
+    referrer, all_programs = eligibility_programs(screen)
+    data = []
+
+    # With save=False there is no snapshot, previous or new, so no program is "new".
+    previous_snapshot = None
+    snapshot = None
+    if save:
+        try:
+            previous_snapshot = (
+                EligibilitySnapshot.objects.prefetch_related(
+                    Prefetch("program_snapshots", queryset=ProgramEligibilitySnapshot.objects.select_related("program"))
+                )
+                .filter(is_batch=False, screen=screen, had_error=False)
+                .latest("submission_date")
+            )
+            previous_results = None if previous_snapshot is None else previous_snapshot.program_snapshots.all()
+        except ObjectDoesNotExist:
+            previous_snapshot = None
+        snapshot = EligibilitySnapshot.objects.create(screen=screen, is_batch=batch, had_error=True)
+
+    missing_dependencies = screen.missing_fields()
+
+    all_programs, program_eligibility, missing_programs, pe_data = calculate_eligibility(
+        screen, all_programs, missing_dependencies, pe_version=pe_version
+    )
+
+    program_snapshots = []
+    eligible_program_data: list[tuple] = []  # (program, data_index) for post-loop navigator pass
+
+    for program in all_programs:
+        # Programs without a result (tracking-only, disabled, or missing dependencies)
+        # get no snapshot or response entry.
+        if program.name_abbreviated not in program_eligibility:
+            continue
+        eligibility = program_eligibility[program.name_abbreviated]
+        skip = False
+
         if previous_snapshot is not None:
             new = True
             for previous_snapshot in previous_results:
@@ -552,18 +617,18 @@ def eligibility_results(screen: Screen, batch=False, pe_version: Optional[str] =
         if not skip and program.active:
             legal_status = [status.status for status in program.legal_status_required.all()]
             program_snapshots.append(
-                ProgramEligibilitySnapshot(
-                    eligibility_snapshot=snapshot,
-                    name=program.name.text,
-                    name_abbreviated=program.name_abbreviated,
-                    estimated_value=eligibility.value,
-                    estimated_delivery_time=program.estimated_delivery_time.text,
-                    estimated_application_time=program.estimated_application_time.text,
-                    eligible=eligibility.eligible,
-                    failed_tests=json.dumps(eligibility.fail_messages),
-                    passed_tests=json.dumps(eligibility.pass_messages),
-                    new=new,
-                )
+                {
+                    "eligibility_snapshot": snapshot,
+                    "name": program.name.text,
+                    "name_abbreviated": program.name_abbreviated,
+                    "estimated_value": eligibility.value,
+                    "estimated_delivery_time": program.estimated_delivery_time.text,
+                    "estimated_application_time": program.estimated_application_time.text,
+                    "eligible": eligibility.eligible,
+                    "failed_tests": eligibility.fail_messages,
+                    "passed_tests": eligibility.pass_messages,
+                    "new": new,
+                }
             )
             program_translations = GetProgramTranslation(screen, program, missing_dependencies)
 
@@ -650,9 +715,9 @@ def eligibility_results(screen: Screen, batch=False, pe_version: Optional[str] =
         }
     categories = list(category_map.values())
 
-    ProgramEligibilitySnapshot.objects.bulk_create(program_snapshots)
-    snapshot.had_error = False
-    snapshot.save()
+    if save:
+        ProgramEligibilitySnapshot.objects.create_results(program_snapshots)
+        snapshot.mark_complete()
 
     eligible_programs = []
     for program in data:
@@ -883,21 +948,21 @@ class ReferralSourcesView(views.APIView):
         return Response({"generic": generic, "partners": partners})
 
 
-class RemImpactView(views.APIView):
+class RemImpactView(AsyncAPIView):
     """
     Proxies a request to the Rewiring America REM /api/v1/rem/address endpoint
     and returns only the total cost delta (bill impact) and total emissions delta
-    that the frontend needs to render the Calculate Impact results view.
+    that the frontend needs to render the Calculate Impact results view. Async, so
+    waiting on REM doesn't hold a worker (see benefits/async_views.py).
     """
 
-    permission_classes = [permissions.AllowAny]
     throttle_classes = [RemRateThrottle]
 
-    def get(self, request, **_kwargs) -> Response:
-        upgrade = request.query_params.get("upgrade")
-        address = request.query_params.get("address")
-        heating_fuel = request.query_params.get("heating_fuel")
-        water_heater_fuel = request.query_params.get("water_heater_fuel") or None
+    async def get(self, request, **_kwargs) -> Response:
+        upgrade = request.GET.get("upgrade")
+        address = request.GET.get("address")
+        heating_fuel = request.GET.get("heating_fuel")
+        water_heater_fuel = request.GET.get("water_heater_fuel") or None
 
         if not all([upgrade, address, heating_fuel]):
             return Response(
@@ -907,8 +972,8 @@ class RemImpactView(views.APIView):
 
         try:
             client = RewiringAmericaClient()
-            raw = client.fetch_rem_impact(upgrade, address, heating_fuel, water_heater_fuel)
-        except requests.HTTPError as e:
+            raw = await client.fetch_rem_impact(upgrade, address, heating_fuel, water_heater_fuel)
+        except httpx.HTTPStatusError as e:
             try:
                 detail = e.response.json()
             except Exception:
@@ -935,7 +1000,7 @@ class RemImpactView(views.APIView):
                 {"error": f"Rewiring America API error: {e.response.status_code}", "detail": detail},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return Response(
                 {"error": "Rewiring America request failed.", "detail": str(e)},
                 status=status.HTTP_502_BAD_GATEWAY,
@@ -950,32 +1015,31 @@ class RemImpactView(views.APIView):
         return Response(serializer.data)
 
 
-class PlacesAutocompleteView(views.APIView):
+class PlacesAutocompleteView(AsyncAPIView):
     """
     Proxies address autocomplete requests to the Google Places API,
     keeping the API key server-side. Returns US street address predictions
-    restricted to street-level addresses.
+    restricted to street-level addresses. Async, like RemImpactView.
     """
 
-    permission_classes = [permissions.AllowAny]
     throttle_classes = [PlacesRateThrottle]
 
-    def get(self, request, **_kwargs) -> Response:
-        input_text = request.query_params.get("input", "").strip()
+    async def get(self, request, **_kwargs) -> Response:
+        input_text = request.GET.get("input", "").strip()
 
         if not input_text:
             return Response([], status=status.HTTP_200_OK)
 
         try:
             client = GooglePlacesClient()
-            predictions = client.autocomplete_address(input_text)
-        except requests.HTTPError as e:
-            http_status = e.response.status_code if e.response is not None else "unknown"
+            predictions = await client.autocomplete_address(input_text)
+        except httpx.HTTPStatusError as e:
+            http_status = e.response.status_code
             return Response(
                 {"error": f"Google Places API error: {http_status}"},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return Response(
                 {"error": "Google Places request failed.", "detail": str(e)},
                 status=status.HTTP_502_BAD_GATEWAY,
@@ -1,9 +1,39 @@
-from .models import Screen
+"""
+Outbound referrer webhooks.
+
+Hook.send() only queues a WebhookDelivery, so the partner's endpoint is never on the eligibility request's path.
+The deliver_webhooks worker claims due deliveries with claim_batches(), builds each request body with
+Hook.payload() and posts it with post(), then saves the outcome with record_attempt(). The screen is serialized
+when the request is built, not when the results were calculated, so a delivery that waits or is retried sends the
+screen as it is then; the results are the ones saved with the delivery.
+
+- A referrer gets at most webhook_concurrency requests in flight, each with up to webhook_batch_size screens.
+- A failed request is retried after RETRY_BASE, doubling up to RETRY_MAX, until MAX_ATTEMPTS is reached.
+- A batch whose body can't be built counts as a failed attempt, and is retried like a failed request.
+- A claimed delivery that a worker never reports back on is picked up again after CLAIM_TIMEOUT.
+"""
+
+import time
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+import requests
+from django.db import transaction
+from django.db.models import Avg, Count, Min, Q
+from django.utils import timezone
+from sentry_sdk import capture_message
+
+from .models import Screen, WebhookDelivery
 from programs.models import Referrer
 from .serializers import ScreenSerializer
-from sentry_sdk import capture_exception, capture_message
-from typing import Optional
-import requests
+
+MAX_ATTEMPTS = 8
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(hours=2)
+CLAIM_TIMEOUT = timedelta(minutes=5)
+TIMEOUT = (5, 30)
+
+DUE_STATUSES = (WebhookDelivery.PENDING, WebhookDelivery.SENDING)
 
 
 class Hook:
@@ -11,12 +41,44 @@ class Hook:
         self.hook = hook
         self.functions = [func.name for func in hook.webhook_functions.all()]
 
-    def send(self, screen: Screen, results: dict, force=True) -> Optional[Exception]:
+    def send(self, screen: Screen, results: dict, force=True) -> Optional[WebhookDelivery]:
+        """Queue the screen's results for the referrer's webhook."""
         if screen.completed and not force:
             return
         if self.hook.webhook_url is None:
             return
 
+        return WebhookDelivery.objects.create(
+            referrer=self.hook,
+            screen=screen,
+            results=results if "send_results" in self.functions else None,
+        )
+
+    def payload(self, deliveries: list[WebhookDelivery]) -> Optional[dict]:
+        """
+        The request body for the deliveries, which are all for this referrer. Deliveries whose screen has been
+        deleted since they were claimed are left out, as deleting the screen deleted them too. None if that
+        leaves nothing to send.
+        """
+        screens = Screen.objects.all()
+        if "send_screen" in self.functions:
+            # ScreenSerializer.to_representation reads the current_benefits join table.
+            screens = screens.prefetch_related("current_benefits__program")
+        screens = screens.in_bulk([delivery.screen_id for delivery in deliveries])
+
+        items = [
+            self.request_data(screens[delivery.screen_id], delivery.results)
+            for delivery in deliveries
+            if delivery.screen_id in screens
+        ]
+        if not items:
+            return None
+        if self.hook.webhook_batch_size > 1:
+            return {"batch": items}
+        [item] = items
+        return item
+
+    def request_data(self, screen: Screen, results: Optional[dict]) -> dict:
         request_data = {"external_id": screen.external_id}
         if "send_screen" in self.functions:
             key, value = self.screen_data(screen)
@@ -24,22 +86,9 @@ class Hook:
         if "send_results" in self.functions:
             key, value = self.send_eligibility(results)
             request_data[key] = value
-
-        try:
-            res = requests.post(self.hook.webhook_url, json=request_data, timeout=(5, 30))
-            if res.status_code != 200:
-                capture_message(f"{res.text}", level="error")
-                return Exception(f"{res.status_code}: {res.text}")
-        except requests.exceptions.RequestException as e:
-            capture_exception(e)
-            return e
+        return request_data
 
     def screen_data(self, screen: Screen):
-        # ScreenSerializer.to_representation reads the current_benefits join table;
-        # prefetch current_benefits__program so it doesn't issue a per-send query.
-        # (The viewset/eligibility paths prefetch this on their own querysets; the
-        # webhook loads the screen separately, so do it here.)
-        screen = Screen.objects.prefetch_related("current_benefits__program").get(pk=screen.pk)
         screen_dict = ScreenSerializer(screen).data
         return "screen", screen_dict
 
@@ -57,3 +106,125 @@ def get_web_hook(screen: Screen) -> Optional[Hook]:
         return None
 
     return Hook(referrer)
+
+
+def claim_batches(in_flight: dict[int, int]) -> list[list[WebhookDelivery]]:
+    """
+    Claim the due deliveries that fit in each referrer's free request slots, grouped into one batch per
+    request. in_flight is the caller's count of requests still open per referrer id.
+    """
+    now = timezone.now()
+    due = WebhookDelivery.objects.filter(status__in=DUE_STATUSES, next_attempt_at__lte=now)
+    batches = []
+    for referrer in Referrer.objects.select_related("white_label").filter(id__in=due.values("referrer_id")):
+        slots = referrer.webhook_concurrency - in_flight.get(referrer.id, 0)
+        if slots <= 0:
+            continue
+        size = referrer.webhook_batch_size
+        with transaction.atomic():
+            # skip_locked lets several workers claim at once without taking the same deliveries.
+            deliveries = list(
+                due.filter(referrer=referrer)
+                .select_for_update(skip_locked=True)
+                .order_by("next_attempt_at", "id")[: slots * size]
+            )
+            WebhookDelivery.objects.filter(id__in=[delivery.id for delivery in deliveries]).update(
+                status=WebhookDelivery.SENDING, next_attempt_at=now + CLAIM_TIMEOUT
+            )
+        for delivery in deliveries:
+            delivery.referrer = referrer
+        batches.extend(deliveries[i : i + size] for i in range(0, len(deliveries), size))
+    return batches
+
+
+class Attempt(NamedTuple):
+    status_code: Optional[int]
+    error: Optional[str]
+    duration_ms: int
+
+
+def post(url: str, body: dict) -> Attempt:
+    """Post the body to a webhook. Does no database work, so it can run on any thread."""
+    started = time.monotonic()
+    status_code = None
+    error = None
+    try:
+        res = requests.post(url, json=body, timeout=TIMEOUT)
+        status_code = res.status_code
+        if not 200 <= res.status_code < 300:
+            error = f"{res.status_code}: {res.text[:1000]}"
+    # TypeError and ValueError are a body that can't be encoded as JSON.
+    except (requests.exceptions.RequestException, TypeError, ValueError) as e:
+        error = repr(e)
+    return Attempt(status_code, error, round((time.monotonic() - started) * 1000))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+def record_attempt(deliveries: list[WebhookDelivery], attempt: Attempt):
+    """Save the outcome of posting a batch, and schedule a retry if it failed."""
+    now = timezone.now()
+    for delivery in deliveries:
+        delivery.attempts += 1
+        delivery.last_status_code = attempt.status_code
+        delivery.last_error = attempt.error or ""
+        delivery.last_duration_ms = attempt.duration_ms
+        if attempt.error is None:
+            delivery.status = WebhookDelivery.DELIVERED
+            delivery.delivered_at = now
+        elif delivery.attempts >= MAX_ATTEMPTS:
+            delivery.status = WebhookDelivery.FAILED
+        else:
+            delivery.status = WebhookDelivery.PENDING
+            delivery.next_attempt_at = now + retry_delay(delivery.attempts)
+
+    WebhookDelivery.objects.bulk_update(
+        deliveries,
+        [
+            "attempts",
+            "last_status_code",
+            "last_error",
+            "last_duration_ms",
+            "status",
+            "delivered_at",
+            "next_attempt_at",
+        ],
+    )
+    failed = [delivery for delivery in deliveries if delivery.status == WebhookDelivery.FAILED]
+    if failed:
+        capture_message(
+            f"Gave up on {len(failed)} webhook deliveries to {deliveries[0].referrer} after {MAX_ATTEMPTS} "
+            f"attempts: {attempt.error}",
+            level="error",
+        )
+
+
+def delivery_stats(since) -> list[dict]:
+    """Delivery counts and timings per referrer, for deliveries queued since the given time."""
+    now = timezone.now()
+    due = Q(status__in=DUE_STATUSES)
+    stats = (
+        WebhookDelivery.objects.filter(created_at__gte=since)
+        .values("referrer_id")
+        .annotate(
+            queued=Count("id"),
+            delivered=Count("id", filter=Q(status=WebhookDelivery.DELIVERED)),
+            failed=Count("id", filter=Q(status=WebhookDelivery.FAILED)),
+            waiting=Count("id", filter=due),
+            retried=Count("id", filter=Q(attempts__gt=1)),
+            avg_attempts=Avg("attempts", filter=Q(status=WebhookDelivery.DELIVERED)),
+            avg_duration_ms=Avg("last_duration_ms", filter=Q(status=WebhookDelivery.DELIVERED)),
+            oldest_waiting=Min("created_at", filter=due),
+        )
+        .order_by("referrer_id")
+    )
+    referrers = Referrer.objects.select_related("white_label").in_bulk([row["referrer_id"] for row in stats])
+    result = []
+    for row in stats:
+        row["referrer"] = str(referrers[row.pop("referrer_id")])
+        oldest = row.pop("oldest_waiting")
+        row["oldest_waiting_seconds"] = round((now - oldest).total_seconds()) if oldest else None
+        result.append(row)
+    return result
@@ -0,0 +1,168 @@
+"""
+Bulk translation export, the counterpart of bulk_import_translations.
+
+The export used to walk every Translation through parler's descriptors and
+get_reverse_instances(), which cost a few queries per label per language plus a
+ModelDataController per reference, and then held the whole export in one dict
+before encoding it. Here the labels come from a single ordered query over the
+translated table and are written out as they are read, and the referencing models
+are loaded with one query per model (plus the prefetches their builders declare).
+
+The output is the same document bulk_import reads:
+    {"translations": {label: {"langs": {lang: [text, edited]}, "no_auto", "active"}},
+     "model_data": {model_name: {"meta_data": {...}, "instance_data": {...}}}}
+"""
+
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Callable, Iterator
+
+from django.conf import settings
+from django.db.models import Q
+
+from translations.model_data import ModelDataController
+from .models import Translation
+
+_CHUNK_SIZE = 2000
+
+
+@dataclass
+class ExportStats:
+    translations: int = 0
+    instances: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.translations + self.instances) / self.seconds if self.seconds else 0.0
+
+
+def iter_translation_entries() -> Iterator[tuple[str, dict]]:
+    """Yield (label, entry) for every Translation, reading the table once."""
+    lang_codes = [lang["code"] for lang in settings.PARLER_LANGUAGES[None]]
+    rows = (
+        Translation.objects.order_by("id")
+        .values_list(
+            "id",
+            "label",
+            "no_auto",
+            "active",
+            "translations__language_code",
+            "translations__text",
+            "translations__edited",
+        )
+        .iterator(chunk_size=_CHUNK_SIZE)
+    )
+
+    for (_, label, no_auto, active), group in groupby(rows, key=lambda row: row[:4]):
+        texts = {row[4]: (row[5], row[6]) for row in group if row[4] is not None}
+        # Same fallback parler applies when the old export read `translation.text`
+        # for a language without a row.
+        fallback = texts.get(settings.LANGUAGE_CODE, (None, False))
+        yield label, {
+            "langs": {lang: texts.get(lang, fallback) for lang in lang_codes},
+            "no_auto": no_auto,
+            "active": active,
+        }
+
+
+def _translation_relations() -> dict[type, list]:
+    """Reverse relations onto Translation, grouped by referencing model.
+
+    Same relations Translation._get_reverses() walks per instance, minus parler's own
+    translated-fields table.
+    """
+    relations = defaultdict(list)
+    for relation in Translation._meta.get_fields():
+        if relation.auto_created and not relation.concrete and relation.related_name != "translations":
+            relations[relation.related_model].append(relation)
+
+    return relations
+
+
+def build_model_data() -> dict:
+    """The "model_data" half of the export, one query per referencing model."""
+    labels_by_id = dict(Translation.objects.values_list("id", "label"))
+
+    model_data = {}
+    for Model, relations in _translation_relations().items():
+        # Instances without an external name were never exported; models that have no
+        # such field at all (FormOption) can't be matched up on import either.
+        if "external_name" not in {field.name for field in Model._meta.get_fields()}:
+            continue
+
+        TranslationExportBuilder: type[ModelDataController] = getattr(
+            Model, "TranslationExportBuilder", ModelDataController
+        )
+
+        referenced = Q()
+        for relation in relations:
+            referenced |= Q(**{f"{relation.field.name}__isnull": False})
+
+        instances = (
+            Model.objects.filter(referenced)
+            .exclude(external_name=None)
+            .select_related(*TranslationExportBuilder.export_select_related)
+            .prefetch_related(*TranslationExportBuilder.export_prefetch_related)
+            .order_by("pk")
+        )
+
+        for instance in instances.iterator(chunk_size=_CHUNK_SIZE):
+            export_builder = TranslationExportBuilder(instance)
+
+            model_name = export_builder.model_name
+            if model_name not in model_data:
+                model_data[model_name] = {
+                    "meta_data": {"dependencies": TranslationExportBuilder.dependencies, "name": model_name},
+                    "instance_data": {},
+                }
+            instance_data = model_data[model_name]["instance_data"]
+
+            if export_builder.external_name not in instance_data:
+                instance_data[export_builder.external_name] = {
+                    "data": export_builder.to_model_data(),
+                    "labels": {},
+                    "external_name": export_builder.external_name,
+                }
+
+            labels = instance_data[export_builder.external_name]["labels"]
+            for relation in relations:
+                translation_id = getattr(instance, relation.field.attname)
+                if translation_id is not None:
+                    labels[relation.get_accessor_name()] = labels_by_id[translation_id]
+
+    return model_data
+
+
+def build_translation_export() -> dict:
+    """The whole export as a dict, for callers that want it in memory."""
+    return {"translations": dict(iter_translation_entries()), "model_data": build_model_data()}
+
+
+def stream_translation_export(write: Callable[[str], object]) -> ExportStats:
+    """Write the export as JSON through `write`, one translation at a time.
+
+    Produces the same text json.dumps(build_translation_export(), ensure_ascii=False)
+    would, without holding the translations in memory.
+    """
+    stats = ExportStats()
+    start = time.monotonic()
+
+    write('{"translations": {')
+    for label, entry in iter_translation_entries():
+        if stats.translations:
+            write(", ")
+        write(f"{json.dumps(label, ensure_ascii=False)}: {json.dumps(entry, ensure_ascii=False)}")
+        stats.translations += 1
+
+    model_data = build_model_data()
+    stats.instances = sum(len(model["instance_data"]) for model in model_data.values())
+    write('}, "model_data": ')
+    write(json.dumps(model_data, ensure_ascii=False))
+    write("}")
+
+    stats.seconds = time.monotonic() - start
+    return stats
@@ -1,13 +1,38 @@
 from django.core.management.base import BaseCommand
-from translations.models import Translation
-import json
+from translations.bulk_export_translations import stream_translation_export
+import argparse
 
 
 class Command(BaseCommand):
+    """
+    Run on heroku:
+    `heroku run --no-tty -a [HEROKU APP NAME] manage.py bulk_export > [PATH TO FILE]`
+    """
+
     help = """
     Get translation export
     """
 
-    def handle(self, *args, **options) -> str:
-        self.stdout.reconfigure(encoding="utf-8")
-        return json.dumps(Translation.objects.export_translations(), ensure_ascii=False)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            type=argparse.FileType("w", encoding="utf-8"),
+            help="File to write the export to (default: stdout)",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        if output is None:
+            if hasattr(self.stdout, "reconfigure"):
+                self.stdout.reconfigure(encoding="utf-8")
+            stats = stream_translation_export(lambda text: self.stdout.write(text, ending=""))
+        else:
+            with output:
+                stats = stream_translation_export(output.write)
+
+        # stderr, so a redirected stdout stays valid JSON.
+        self.stderr.write(
+            f"Exported {stats.translations} translations and {stats.instances} model instances "
+            f"in {stats.seconds:.1f}s ({stats.rows_per_second:.0f} rows/s)"
+        )
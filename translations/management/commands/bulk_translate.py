@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Q, OuterRef, Exists
 from translations.models import Translation
 from integrations.clients.google_translate import Translate
@@ -20,8 +21,6 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         limit = 10_000 if options["all"] else min(10_000, options["limit"])
-        max_batch_size = 128
-        char_limit = 5_000
         lang = options["lang"]
 
         translate = Translate()
@@ -64,16 +63,18 @@ class Command(BaseCommand):
             print(f"No translations need {lang} translation. Use --force-translations to run anyway.")
             return
 
+        # One query for the rows a person has already edited, instead of one per label.
+        edited_ids = set(
+            Translation.objects.filter(translations__language_code=lang, translations__edited=True).values_list(
+                "id", flat=True
+            )
+        )
+
         total_count = 0
-        temp_chars = 0
-        temp_count = 0
         texts = {}
-        batches = []
         for translation in translations:
             text = translation.text
-            current_translation = translation.get_lang(lang)
-            is_edited = current_translation is not None and current_translation.edited
-            if is_edited or translation.text is None:
+            if translation.id in edited_ids or text is None:
                 continue
 
             if translation.no_auto:
@@ -82,41 +83,30 @@ class Command(BaseCommand):
                 translation.save()
                 continue
 
-            if temp_chars + len(text) > char_limit or temp_count + 1 > max_batch_size:
-                batches.append(texts.copy())
-                texts = {}
-                temp_chars = 0
-                temp_count = 0
-
-            temp_chars += len(text)
-            temp_count += 1
             total_count += 1
-
-            if text not in texts:
-                texts[text] = []
-            texts[text].append(translation)
+            texts.setdefault(text, []).append(translation)
 
             if total_count >= limit:
-                batches.append(texts)
                 break
 
-        print(f"Processing {len(batches)} batches for language {lang}")
+        # Translate handles batching, concurrency and the translation memory; identical
+        # texts across labels are sent once.
+        print(f"Translating {len(texts)} unique texts ({total_count} labels) to {lang}")
 
-        records_created = 0
+        try:
+            auto = translate.bulk_translate([lang], list(texts.keys()))
+        except Exception as e:
+            print(f"ERROR translating to {lang}: {str(e)}")
+            raise
 
-        for i, batch in enumerate(batches):
-
-            try:
-                auto = translate.bulk_translate([lang], list(batch.keys()))
-
-                for [original_text, new_text] in auto.items():
-                    for trans in batch[original_text]:
-                        Translation.objects.edit_translation_by_id(trans.id, lang, new_text[lang], manual=False)
-                        records_created += 1
-
-            except Exception as e:
-                print(f"ERROR in batch {i+1}: {str(e)}")
-                raise
+        records_created = 0
+        # One transaction, so the translation cache is refreshed once at commit rather
+        # than patched after every label.
+        with transaction.atomic():
+            for original_text, new_text in auto.items():
+                for trans in texts[original_text]:
+                    Translation.objects.edit_translation_by_id(trans.id, lang, new_text[lang], manual=False)
+                    records_created += 1
 
         print(f"Bulk translate completed successfully for {lang}")
         print(f"Total records created/updated: {records_created}")
@@ -12,19 +12,39 @@ Usage:
     python manage.py check_readability --fail-on-error
     python manage.py check_readability --language es --whitelabel co --output report.json
     python manage.py check_readability --language es --whitelabel co --output report.csv
+    python manage.py check_readability --workers 8
+
+Scores are cached in the ReadabilityScore table by text hash, language and analyzer
+version, so a rerun only analyzes texts that changed. Uncached texts are analyzed in
+a process pool.
 """
 
 import csv
 import json
+import os
 import textstat
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from importlib.metadata import version
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 from django.core.management.base import BaseCommand, CommandError
-from translations.models import Translation
+from translations.models import ReadabilityScore, Translation
 from programs.models import Program
 from screener.models import WhiteLabel
 
+# Part of the score cache key. Bump the leading number when the metrics returned by
+# ReadabilityChecker.analyze change; a textstat upgrade changes it on its own.
+ANALYZER_VERSION = f"1/textstat-{version('textstat')}"
+
+# Below this many uncached texts, starting worker processes costs more than it saves.
+MIN_TEXTS_FOR_POOL = 50
+
+# Texts per pool task, and how many computed scores to hold before saving them.
+POOL_CHUNK_SIZE = 16
+SAVE_EVERY = 500
+
 
 @dataclass
 class ReadabilityResult:
@@ -108,6 +128,12 @@ class ReadabilityChecker:
             "crawford": textstat.crawford(text),
         }
 
+    def analyze(self, text: str, lang: str) -> Dict[str, float]:
+        """All metrics for the language; what the score cache stores."""
+        if lang.startswith("es"):
+            return self.analyze_spanish(text)
+        return self.analyze_english(text)
+
     def get_word_count(self, text: str) -> int:
         """Count words in text."""
         return len(text.split()) if text else 0
@@ -136,16 +162,17 @@ class ReadabilityChecker:
                 word_count=0,
             )
 
+        return self.result_from_scores(label, text, lang, self.analyze(text, lang))
+
+    def result_from_scores(self, label: str, text: str, lang: str, scores: Dict[str, float]) -> ReadabilityResult:
+        """Judge precomputed scores against this checker's thresholds."""
         word_count = self.get_word_count(text)
 
-        # Analyze based on language
         if lang.startswith("es"):
-            scores = self.analyze_spanish(text)
             primary_score = scores["fernandez_huerta"]
             passes = primary_score >= self.es_threshold
             threshold = self.es_threshold
         else:
-            scores = self.analyze_english(text)
             primary_score = scores["flesch_kincaid_grade"]
             passes = primary_score <= self.en_threshold
             threshold = self.en_threshold
@@ -162,6 +189,11 @@ class ReadabilityChecker:
         )
 
 
+def analyze_text(text: str, lang: str) -> Dict[str, float]:
+    """Process pool entry point; module level so it can be pickled."""
+    return ReadabilityChecker().analyze(text, lang)
+
+
 class Command(BaseCommand):
     help = "Check readability of translations to ensure content accessibility"
 
@@ -204,6 +236,12 @@ class Command(BaseCommand):
             choices=["text", "json", "csv"],
             help="Output format (default: auto-detected from file extension, or text)",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes to analyze uncached texts with (default: CPU count; 1 to run in-process)",
+        )
 
     def handle(self, *args, **options):
         language = options["language"]
@@ -211,7 +249,7 @@ class Command(BaseCommand):
 
         checker = self._build_checker(language, options["threshold"], options["min_words"])
         translations = self._fetch_translations(language, whitelabel, options.get("label_filter"))
-        passing, failing, skipped = self._analyze(translations, language, checker)
+        passing, failing, skipped = self._analyze(translations, language, checker, options["workers"])
         report = self._build_report_data(passing, failing, skipped, language, checker, whitelabel)
 
         self._print_summary(report, options["detailed"], options["show_passing"])
@@ -248,11 +286,12 @@ class Command(BaseCommand):
         self.stdout.write(f"Found {translations.count()} active translations\n")
         return translations
 
-    def _analyze(self, translations, language: str, checker: ReadabilityChecker):
+    def _analyze(self, translations, language: str, checker: ReadabilityChecker, workers: int = 1):
         passing: List[ReadabilityResult] = []
         failing: List[ReadabilityResult] = []
         skipped = 0
 
+        candidates = []
         for translation in translations:
             translation.set_current_language(language)
             text = translation.text
@@ -265,7 +304,12 @@ class Command(BaseCommand):
                 skipped += 1
                 continue
 
-            result = checker.check(translation.label, text, language)
+            candidates.append((translation.label, text))
+
+        scores_by_text = self._scores(list(dict.fromkeys(text for _, text in candidates)), language, workers)
+
+        for label, text in candidates:
+            result = checker.result_from_scores(label, text, language, scores_by_text[text])
 
             if result.passes:
                 passing.append(result)
@@ -274,6 +318,52 @@ class Command(BaseCommand):
 
         return passing, failing, skipped
 
+    def _scores(self, texts: List[str], language: str, workers: int) -> Dict[str, Dict[str, float]]:
+        """Scores for each text: from the cache where possible, otherwise analyzed and cached."""
+        by_hash = {ReadabilityScore.hash_text(text): text for text in texts}
+        hashes = list(by_hash)
+
+        scores_by_text = {}
+        for i in range(0, len(hashes), SAVE_EVERY):
+            cached = ReadabilityScore.objects.filter(
+                text_hash__in=hashes[i : i + SAVE_EVERY], language=language, analyzer_version=ANALYZER_VERSION
+            ).values_list("text_hash", "scores")
+            for text_hash, scores in cached:
+                scores_by_text[by_hash[text_hash]] = scores
+
+        missing = [text for text in texts if text not in scores_by_text]
+        self.stdout.write(f"{len(scores_by_text)} cached, {len(missing)} to analyze")
+        if not missing:
+            return scores_by_text
+
+        if workers > 1 and len(missing) >= MIN_TEXTS_FOR_POOL:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # map() yields in input order as results arrive, so progress and saves stream.
+                computed = pool.map(analyze_text, missing, repeat(language), chunksize=POOL_CHUNK_SIZE)
+                self._collect(missing, computed, language, scores_by_text)
+        else:
+            self._collect(missing, map(analyze_text, missing, repeat(language)), language, scores_by_text)
+
+        return scores_by_text
+
+    def _collect(self, texts: List[str], computed, language: str, scores_by_text: Dict[str, Dict[str, float]]):
+        """Record scores as they arrive, saving every SAVE_EVERY so an interrupted run keeps its work."""
+        pending = []
+        for done, (text, scores) in enumerate(zip(texts, computed), start=1):
+            scores_by_text[text] = scores
+            pending.append(
+                ReadabilityScore(
+                    text_hash=ReadabilityScore.hash_text(text),
+                    language=language,
+                    analyzer_version=ANALYZER_VERSION,
+                    scores=scores,
+                )
+            )
+            if len(pending) >= SAVE_EVERY or done == len(texts):
+                ReadabilityScore.objects.bulk_create(pending, ignore_conflicts=True)
+                pending = []
+                self.stdout.write(f"  analyzed {done}/{len(texts)}")
+
     def _build_report_data(
         self,
         passing: List[ReadabilityResult],
@@ -0,0 +1,93 @@
+"""
+Tests for the bulk_export management command and the bulk export it streams.
+
+The export must stay the document bulk_import reads, so these pin its shape
+against a small fixture, check the streamed text is the same JSON the in-memory
+build encodes to, and guard the query count against creeping back up to one (or
+more) per label.
+"""
+
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from programs.models import Document, Program
+from screener.models import WhiteLabel
+from translations.bulk_export_translations import build_translation_export, stream_translation_export
+from translations.models import Translation
+
+DEFAULT_LANG = settings.LANGUAGE_CODE
+
+
+class BulkExportTest(TestCase):
+    def setUp(self):
+        WhiteLabel.objects.create(name="Test", code="test", state_code="TS")
+        self.program = Program.objects.new_program(white_label="test", name_abbreviated="test_snap")
+        Translation.objects.edit_translation(self.program.name.label, "es", "SNAP es", manual=True)
+        self.document = Document.objects.new_document("test", "test_id_card")
+        self.program.documents.add(self.document)
+        Translation.objects.add_translation("unused.label", "Unused", active=False)
+
+    def _export(self):
+        out = StringIO()
+        stats = stream_translation_export(out.write)
+        return json.loads(out.getvalue()), stats
+
+    def test_translation_entries(self):
+        export, _ = self._export()
+
+        entry = export["translations"][self.program.name.label]
+        self.assertEqual(entry["langs"]["es"], ["SNAP es", True])
+        self.assertEqual(set(entry["langs"]), {lang["code"] for lang in settings.PARLER_LANGUAGES[None]})
+        self.assertEqual(export["translations"]["unused.label"]["active"], False)
+
+    def test_model_data_matches_the_per_instance_relations(self):
+        export, _ = self._export()
+
+        program_data = export["model_data"]["Program"]["instance_data"][self.program.external_name]
+        expected_labels = {
+            reverse.field_name: translation.label
+            for translation in Translation.objects.all()
+            for reverse in translation.get_reverse_instances()
+            if reverse.instance == self.program
+        }
+        self.assertEqual(program_data["labels"], expected_labels)
+        self.assertEqual(program_data["data"]["documents"], ["test_id_card"])
+        self.assertEqual(
+            export["model_data"]["Program"]["meta_data"],
+            {"dependencies": ["Document", "ProgramCategory"], "name": "Program"},
+        )
+        self.assertIn("test_id_card", export["model_data"]["Document"]["instance_data"])
+
+    def test_stream_matches_the_in_memory_export(self):
+        out = StringIO()
+        stream_translation_export(out.write)
+
+        self.assertEqual(out.getvalue(), json.dumps(build_translation_export(), ensure_ascii=False))
+
+    def test_query_count_does_not_grow_with_the_number_of_labels(self):
+        with CaptureQueriesContext(connection) as before:
+            self._export()
+
+        for i in range(3):
+            program = Program.objects.new_program(white_label="test", name_abbreviated=f"test_more_{i}")
+            program.documents.add(self.document)
+
+        with CaptureQueriesContext(connection) as after:
+            _, stats = self._export()
+
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
+        self.assertEqual(stats.instances, 5)
+
+    def test_command_writes_json_to_stdout_and_stats_to_stderr(self):
+        out, err = StringIO(), StringIO()
+
+        call_command("bulk_export", stdout=out, stderr=err)
+
+        self.assertIn(self.program.name.label, json.loads(out.getvalue())["translations"])
+        self.assertIn("rows/s", err.getvalue())
@@ -0,0 +1,59 @@
+"""
+Tests for the bulk_translate management command, against a local fake of the
+Google client (see integrations/clients/tests/test_google_translate.py).
+"""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from integrations.clients import google_translate
+from integrations.clients.google_translate import Translate
+from integrations.clients.tests.test_google_translate import FakeTranslateClient
+from translations.models import Translation
+
+
+@patch.object(google_translate, "_rate_limiter", google_translate._RateLimiter(1_000))
+class BulkTranslateCommandTest(TestCase):
+    def setUp(self):
+        self.client = FakeTranslateClient()
+        for i in range(3):
+            Translation.objects.add_translation(f"shared.{i}", "Call 211 for help.")
+        Translation.objects.add_translation("unique", "Bring your ID.")
+        edited = Translation.objects.add_translation("edited", "Do not touch.")
+        Translation.objects.edit_translation_by_id(edited.id, "es", "Editado a mano", manual=True)
+
+    def _run(self):
+        with patch(
+            "translations.management.commands.bulk_translate.Translate",
+            side_effect=lambda: Translate(client=self.client),
+        ):
+            call_command("bulk_translate", "--lang", "es", "--all", "True", "--force-translations", stdout=StringIO())
+
+    def _es(self, label):
+        return Translation.objects.get(label=label).get_lang("es").text
+
+    def test_translates_each_unique_text_once(self):
+        with patch("builtins.print"):
+            self._run()
+
+        self.assertEqual(sorted(self.client.segments_sent()), ["Bring your ID.", "Call 211 for help."])
+        self.assertEqual(self._es("shared.2"), "Call 211 for help. [es]")
+
+    def test_leaves_manually_edited_translations(self):
+        with patch("builtins.print"):
+            self._run()
+
+        self.assertEqual(self._es("edited"), "Editado a mano")
+
+    def test_second_run_is_served_from_translation_memory(self):
+        with patch("builtins.print"):
+            self._run()
+            self.client.calls.clear()
+            self._run()
+
+        self.assertEqual(self.client.calls, [])
+        self.assertEqual(self._es("unique"), "Bring your ID. [es]")
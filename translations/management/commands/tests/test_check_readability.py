@@ -5,18 +5,25 @@ These tests verify that the readability checker correctly analyzes
 English and Spanish text using various readability metrics.
 """
 
+import json
+import os
+import tempfile
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 from unittest.mock import patch, MagicMock
 
+from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase
 
 from translations.management.commands.check_readability import (
+    MIN_TEXTS_FOR_POOL,
     ReadabilityChecker,
     ReadabilityResult,
 )
+from translations.models import ReadabilityScore, Translation
 
 
 class ReadabilityCheckerTest(TestCase):
@@ -281,3 +288,79 @@ class ReadabilityResultTest(TestCase):
         self.assertEqual(result.primary_score, 5.0)
         self.assertEqual(result.threshold, 8.0)
         self.assertEqual(result.word_count, 2)
+
+
+def fake_analyze(self, text, lang):
+    """Stand-in for textstat: one grade per word, so longer texts fail."""
+    return {"flesch_kincaid_grade": float(len(text.split()))}
+
+
+@patch.object(ReadabilityChecker, "analyze", fake_analyze)
+class ReadabilityScoreCacheTest(TestCase):
+    """Scores are cached by text hash, so reruns only analyze what changed."""
+
+    def setUp(self):
+        self.out = StringIO()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.short = "one two three four five six seven eight nine ten"
+        self.long = self.short + " eleven twelve"
+        Translation.objects.add_translation("easy.a", self.short)
+        Translation.objects.add_translation("easy.b", self.short)
+        Translation.objects.add_translation("hard", self.long)
+
+    def _run(self, *args):
+        output = os.path.join(self.tmp.name, "report.json")
+        call_command("check_readability", "--threshold", "11", "--output", output, *args, stdout=self.out)
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_identical_texts_are_analyzed_once_and_cached(self):
+        with patch.object(ReadabilityChecker, "analyze", autospec=True, side_effect=fake_analyze) as analyze:
+            report = self._run("--workers", "1")
+
+        self.assertEqual(analyze.call_count, 2)
+        self.assertEqual(ReadabilityScore.objects.count(), 2)
+        self.assertEqual([r["label"] for r in report["failing"]], ["hard"])
+        self.assertEqual(report["summary"]["passing_count"], 2)
+
+    def test_rerun_only_analyzes_changed_texts(self):
+        self._run("--workers", "1")
+        Translation.objects.edit_translation(
+            "hard", settings.LANGUAGE_CODE, "now this text has exactly ten words and it passes"
+        )
+
+        with patch.object(ReadabilityChecker, "analyze", autospec=True, side_effect=fake_analyze) as analyze:
+            report = self._run("--workers", "1")
+
+        self.assertEqual(analyze.call_count, 1)
+        self.assertEqual(report["failing"], [])
+
+    def test_scores_from_another_analyzer_version_are_ignored(self):
+        self._run("--workers", "1")
+
+        with (
+            patch("translations.management.commands.check_readability.ANALYZER_VERSION", "2/test"),
+            patch.object(ReadabilityChecker, "analyze", autospec=True, side_effect=fake_analyze) as analyze,
+        ):
+            self._run("--workers", "1")
+
+        self.assertEqual(analyze.call_count, 2)
+
+    def test_thresholds_apply_to_cached_scores(self):
+        self._run("--workers", "1")
+
+        report = self._run("--workers", "1", "--threshold", "20")
+
+        self.assertEqual(report["failing"], [])
+
+    def test_large_runs_use_the_worker_pool(self):
+        for i in range(MIN_TEXTS_FOR_POOL):
+            Translation.objects.add_translation(f"bulk.{i}", f"{self.short} {i}")
+
+        # Threads stand in for processes: same map() contract, no fork in the test run.
+        with patch("translations.management.commands.check_readability.ProcessPoolExecutor", ThreadPoolExecutor):
+            report = self._run("--workers", "4")
+
+        self.assertEqual(report["summary"]["total_analyzed"], MIN_TEXTS_FOR_POOL + 3)
+        self.assertIn(f"analyzed {MIN_TEXTS_FOR_POOL + 2}/{MIN_TEXTS_FOR_POOL + 2}", self.out.getvalue())
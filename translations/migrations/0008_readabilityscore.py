@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-18 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translations', '0007_translationmemory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadabilityScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64)),
+                ('language', models.CharField(max_length=16)),
+                ('analyzer_version', models.CharField(max_length=64)),
+                ('scores', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='readabilityscore',
+            constraint=models.UniqueConstraint(fields=('text_hash', 'language', 'analyzer_version'), name='readability_score_unique_text_lang_version'),
+        ),
+    ]
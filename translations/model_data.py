@@ -7,6 +7,11 @@ class ModelDataController(Generic[T]):
     _model_name = ""
     dependencies: list[str] = []
 
+    # Relations to_model_data() reads, loaded up front by the bulk export so it
+    # doesn't run a query per instance.
+    export_select_related: list[str] = []
+    export_prefetch_related: list[str] = []
+
     DataType = TypedDict("DataType", {})
 
     class DeferCreation(Exception):
@@ -1,13 +1,18 @@
+import hashlib
+import json
+import time
+import uuid
 import zlib
 from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from typing import Any
-from django.db import models
+from django.db import models, transaction
 from simple_history.models import HistoricalRecords
 from parler.models import TranslatableModel, TranslatedFields, TranslatableManager
 from django.conf import settings
 from dataclasses import dataclass
 from django.core.cache import cache
-from translations.model_data import ModelDataController
+from benefits.compression import IDENTITY, compress
 from sentry_sdk import capture_exception
 
 BLANK_TRANSLATION_PLACEHOLDER = "[PLACEHOLDER]"
@@ -22,7 +27,28 @@ _TRANSLATION_CACHE_JITTER = 60 * 60 * 2  # 2 hours
 # Bump when the cached value's shape changes. Old entries are then ignored and
 # age out on their own TTL, so a format change is self-invalidating on deploy
 # instead of needing a coordinated flush.
-_TRANSLATION_CACHE_VERSION = "v2"
+_TRANSLATION_CACHE_VERSION = "v3"
+
+# Held by the one process rebuilding after a miss. Expires on its own so a worker
+# killed mid-rebuild can't block the others for longer than a rebuild should take.
+_TRANSLATION_REBUILD_LOCK_KEY = f"translation_data_rebuild_lock:{_TRANSLATION_CACHE_VERSION}"
+_TRANSLATION_REBUILD_LOCK_TIMEOUT = 60  # seconds
+
+# How long a process that lost the lock waits for the winner's write before
+# building for itself, and how often it looks.
+_TRANSLATION_REBUILD_WAIT = 10  # seconds
+_TRANSLATION_REBUILD_POLL_INTERVAL = 0.2  # seconds
+
+
+# A ?since= delta re-sends every label touched this long before the client's version
+# as well. History rows are stamped when they are written, not when they commit, so
+# a slow transaction (or a skewed dyno clock) can land a change behind a version
+# that was already handed out.
+_TRANSLATION_DELTA_OVERLAP = timedelta(minutes=5)
+
+# Older versions get the full dict back; replaying that much history costs more
+# than it saves.
+_TRANSLATION_DELTA_MAX_AGE = timedelta(days=30)
 
 
 def _all_langs() -> list[str]:
@@ -54,12 +80,17 @@ def _build_translation_data() -> dict:
     cache. Reading the translated table directly is ~10x faster and holds ~2.5x
     less peak heap.
     """
-    default_lang = settings.LANGUAGE_CODE
+    texts_by_label = _texts_by_label(Translation.objects.filter(active=True))
+
+    return {
+        lang: {label: _resolve_text(texts, lang) for label, texts in texts_by_label.items()} for lang in _all_langs()
+    }
+
 
+def _texts_by_label(translations) -> dict[str, dict[str, str]]:
+    """{label: {lang: text}} for a Translation queryset, in one query."""
     texts_by_label: dict[str, dict[str, str]] = defaultdict(dict)
-    rows = Translation.objects.filter(active=True).values_list(
-        "label", "translations__language_code", "translations__text"
-    )
+    rows = translations.values_list("label", "translations__language_code", "translations__text")
     for label, lang_code, text in rows.iterator(chunk_size=5000):
         if lang_code is None:
             # Active label with no translation rows at all.
@@ -67,51 +98,357 @@ def _build_translation_data() -> dict:
             continue
         texts_by_label[label][lang_code] = text
 
+    return texts_by_label
+
+
+def _resolve_text(texts: dict[str, str], lang: str) -> str | None:
     # Mirrors parler's use_fallback=True behaviour: fall back to the default
     # language when a label has no row for the requested one.
+    return texts[lang] if lang in texts else texts.get(settings.LANGUAGE_CODE)
+
+
+def _translation_version_key(lang: str) -> str:
+    return f"translation_data_version:{_TRANSLATION_CACHE_VERSION}:{lang}"
+
+
+# lang -> (version, {label: text}) for the languages this process has served. Only
+# trusted while the version matches the one in the shared cache, which is how an
+# invalidation or rebuild in another process reaches this one.
+_local_translation_data: dict[str, tuple[str, dict]] = {}
+
+
+def _new_translation_version(built_at: float) -> str:
+    """A version stamp: when the dict was read from the DB, plus a unique suffix.
+
+    The timestamp is what a ?since= delta replays history from. The dict reflects
+    every change committed before it, so it is taken before the query runs.
+    """
+    return f"{int(built_at * 1000)}-{uuid.uuid4().hex[:12]}"
+
+
+def _translation_version_built_at(version: str) -> datetime | None:
+    try:
+        millis, _ = version.split("-", 1)
+        return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _cache_translation_data(built: dict, built_at: float) -> dict[str, str]:
+    """Write each language's dict and a fresh version stamp. Returns {lang: version}.
+
+    The dict goes in before its version: a reader that sees the new version must find
+    the new dict. A reader that sees the new dict under the old version only reloads
+    once more on its next request.
+    """
+    versions = {}
+    for lang, value in built.items():
+        # Written one at a time rather than via set_many so each language can carry
+        # its own jittered TTL; set_many applies a single timeout to the whole batch.
+        timeout = _translation_cache_timeout(lang)
+        version = _new_translation_version(built_at)
+        cache.set(_translation_cache_key(lang), value, timeout=timeout)
+        cache.set(_translation_version_key(lang), version, timeout=timeout)
+        versions[lang] = version
+    return versions
+
+
+def _rebuild_translation_data(missing: list[str]) -> dict[str, tuple[str, dict]]:
+    """Rebuild every language, letting only one process at a time do it.
+
+    After an invalidation every worker misses at once. The one that takes the lock
+    rebuilds; the rest wait for its write and read that instead of each running the
+    same full-table query. If the holder takes too long, a waiter builds for itself
+    rather than leaving its request hanging.
+    """
+    acquired = cache.add(_TRANSLATION_REBUILD_LOCK_KEY, True, timeout=_TRANSLATION_REBUILD_LOCK_TIMEOUT)
+
+    # None rather than False means IGNORE_EXCEPTIONS swallowed a Redis error. Nobody
+    # can be holding a lock we can't see, and waiting would only add a stall to every
+    # request for as long as Redis is down.
+    if acquired is False:
+        deadline = time.monotonic() + _TRANSLATION_REBUILD_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(_TRANSLATION_REBUILD_POLL_INTERVAL)
+            found = _read_shared_translation_data(missing)
+            if len(found) == len(missing):
+                return found
+
+    try:
+        built_at = time.time()
+        built = _build_translation_data()
+        versions = _cache_translation_data(built, built_at)
+    finally:
+        if acquired:
+            cache.delete(_TRANSLATION_REBUILD_LOCK_KEY)
+
+    return {lang: (versions[lang], built[lang]) for lang in missing}
+
+
+def _read_shared_translation_data(langs: list[str]) -> dict[str, tuple[str, dict]]:
+    """Read (version, dict) for each language that has both in the shared cache."""
+    versions = cache.get_many([_translation_version_key(lang) for lang in langs])
+    versioned = [lang for lang in langs if _translation_version_key(lang) in versions]
+    cached = cache.get_many([_translation_cache_key(lang) for lang in versioned])
+
     return {
-        lang: {
-            label: (texts[lang] if lang in texts else texts.get(default_lang))
-            for label, texts in texts_by_label.items()
-        }
-        for lang in _all_langs()
+        lang: (versions[_translation_version_key(lang)], cached[_translation_cache_key(lang)])
+        for lang in versioned
+        if _translation_cache_key(lang) in cached
     }
 
 
 def _get_translation_data(langs: list[str] | None = None) -> dict:
-    """Return {lang: {label: text}}, cached one entry per language.
+    """Return {lang: {label: text}}, cached one entry per language."""
+    return {lang: data for lang, (_, data) in _get_versioned_translation_data(langs).items()}
+
+
+def _get_versioned_translation_data(langs: list[str] | None = None) -> dict[str, tuple[str, dict]]:
+    """Return {lang: (version, {label: text})}, cached one entry per language.
 
     One key per language rather than a single combined blob: the combined dict
     is ~15MB serialized against a 25MB Redis, and a single-language request only
     needs its own ~1MB slice. A rebuild still populates every language, since
     the underlying query fetches them all anyway.
+
+    Each process also holds the decoded dicts it has served, stamped with the
+    version they were read under. A request fetches only the per-language version
+    stamps from Redis and pulls a dict across the network only when its stamp
+    has moved.
     """
     wanted = list(langs) if langs is not None else _all_langs()
 
-    cached = cache.get_many([_translation_cache_key(lang) for lang in wanted])
+    versions = cache.get_many([_translation_version_key(lang) for lang in wanted])
     data = {}
-    missing = []
+    stale = []
     for lang in wanted:
-        key = _translation_cache_key(lang)
-        if key in cached:
-            data[lang] = cached[key]
+        version = versions.get(_translation_version_key(lang))
+        local = _local_translation_data.get(lang)
+        if version is not None and local is not None and local[0] == version:
+            data[lang] = local
         else:
-            missing.append(lang)
+            stale.append(lang)
 
-    if missing:
-        built = _build_translation_data()
-        # Written one at a time rather than via set_many so each language can carry
-        # its own jittered TTL; set_many applies a single timeout to the whole batch.
-        for lang, value in built.items():
-            cache.set(_translation_cache_key(lang), value, timeout=_translation_cache_timeout(lang))
-        for lang in missing:
-            data[lang] = built[lang]
+    if stale:
+        loaded = _read_shared_translation_data(stale)
+        missing = [lang for lang in stale if lang not in loaded]
+        if missing:
+            loaded.update(_rebuild_translation_data(missing))
+
+        for lang in stale:
+            _local_translation_data[lang] = loaded[lang]
+            data[lang] = loaded[lang]
 
     return data
 
 
+# lang -> (version, {encoding: body}) for the single-language responses this process
+# has served. Kept in-process only: compressed copies of all 18 languages would not
+# fit next to the dicts in Redis.
+_local_translation_bodies: dict[str, tuple[str, dict[str, bytes]]] = {}
+
+
+def _get_encoded_translation_body(lang: str, encoding: str) -> tuple[str, bytes]:
+    """Return (version, body) for `lang`'s full response, JSON-encoded and compressed.
+
+    Each version is encoded and compressed at most once per process and encoding, so
+    a warm request is a version check and a dict lookup with no serialization at all.
+    """
+    version, data = _get_versioned_translation_data([lang])[lang]
+
+    local = _local_translation_bodies.get(lang)
+    if local is None or local[0] != version:
+        local = (version, {})
+        _local_translation_bodies[lang] = local
+
+    bodies = local[1]
+    if encoding not in bodies:
+        # Same shape and separators DRF's JSONRenderer produces for the dict.
+        raw = json.dumps({lang: data}, ensure_ascii=False, separators=(",", ":")).encode()
+        bodies[encoding] = compress(raw, encoding)
+
+    return version, bodies[encoding]
+
+
+@dataclass(frozen=True)
+class TranslationDelta:
+    version: str
+    changed: dict
+    removed: list
+
+
+def _get_translation_delta(lang: str, since: str) -> TranslationDelta | None:
+    """What changed in `lang` since the client's `since` version.
+
+    Labels are found through HistoricalTranslation and their values taken from the
+    current cached dict, so applying the delta to the client's copy gives exactly
+    what a full fetch would. Returns None when `since` can't be replayed (malformed
+    or too old) and the client should take the full dict instead.
+    """
+    version, current = _get_versioned_translation_data([lang])[lang]
+    if since == version:
+        return TranslationDelta(version=version, changed={}, removed=[])
+
+    since_at = _translation_version_built_at(since)
+    if since_at is None or since_at < datetime.now(timezone.utc) - _TRANSLATION_DELTA_MAX_AGE:
+        return None
+
+    # Every label any touched translation has carried, so a rename removes the old
+    # label as well as adding the new one.
+    touched_ids = Translation.history.filter(history_date__gt=since_at - _TRANSLATION_DELTA_OVERLAP).values("id")
+    labels = set(Translation.history.filter(id__in=touched_ids).values_list("label", flat=True))
+
+    return TranslationDelta(
+        version=version,
+        changed={label: current[label] for label in labels if label in current},
+        removed=sorted(label for label in labels if label not in current),
+    )
+
+
 def _invalidate_translation_cache() -> None:
-    cache.delete_many([_translation_cache_key(lang) for lang in _all_langs()])
+    _invalidate_translation_languages(_all_langs())
+
+
+_ALL_LANGS = "*"
+
+# Marks a label to be dropped from a cached dict rather than set.
+_REMOVED_LABEL = object()
+
+# Past this many labels in one commit (bulk imports, config imports) a full rebuild
+# is cheaper than patching, so the cache is invalidated instead.
+_TRANSLATION_PATCH_MAX_LABELS = 50
+
+
+def _pending_translation_patches() -> dict[str, set[str]]:
+    """label -> languages whose cached text may have changed, waiting for the current
+    transaction to commit. _ALL_LANGS means every language: the label was added,
+    deleted, renamed or (de)activated.
+
+    Kept on the database connection, like the on_commit callbacks that flush it.
+    Each thread has a connection of its own, so a commit only flushes the labels its
+    own transactions queued.
+    """
+    connection = transaction.get_connection()
+    if not hasattr(connection, "pending_translation_patches"):
+        connection.pending_translation_patches = {}
+    return connection.pending_translation_patches
+
+
+def _schedule_translation_cache_patch(label: str, lang: str = _ALL_LANGS) -> None:
+    """Patch `label` into the cached dicts once the current transaction commits.
+
+    Patching before commit would publish text a rollback then takes back. Every
+    call queues a flush; the first to run after commit drains the batch and the
+    rest find nothing to do. Outside a transaction the flush runs immediately. A
+    rolled-back label stays queued and is re-read with the next batch, which is
+    harmless since patches come from the DB.
+    """
+    _pending_translation_patches().setdefault(label, set()).add(lang)
+    transaction.on_commit(_flush_translation_cache_patches)
+
+
+def _flush_translation_cache_patches() -> None:
+    queued = _pending_translation_patches()
+    pending = dict(queued)
+    queued.clear()
+    if not pending:
+        return
+
+    if len(pending) > _TRANSLATION_PATCH_MAX_LABELS:
+        _invalidate_translation_cache()
+        return
+
+    _patch_translation_cache(pending)
+
+
+def _patch_translation_cache(pending: dict[str, set[str]]) -> None:
+    """Rewrite only the changed labels in each affected language's cached dict.
+
+    The new values are read back from the DB rather than taken from the caller, so
+    a patch can't disagree with what a rebuild would produce. An edit to the default
+    language also reaches every language that falls back to it.
+    """
+    default_lang = settings.LANGUAGE_CODE
+    all_langs = _all_langs()
+    texts_by_label = _texts_by_label(Translation.objects.filter(label__in=pending, active=True))
+
+    # lang -> {label: text, or _REMOVED_LABEL to drop it}
+    changes: dict[str, dict] = defaultdict(dict)
+    for label, langs in pending.items():
+        texts = texts_by_label.get(label)
+        if texts is None:
+            # Deleted, renamed away or deactivated: gone from every language.
+            affected = all_langs
+        elif _ALL_LANGS in langs:
+            affected = all_langs
+        else:
+            affected = set(langs)
+            if default_lang in langs:
+                affected |= {lang for lang in all_langs if lang not in texts}
+
+        for lang in affected:
+            changes[lang][label] = _REMOVED_LABEL if texts is None else _resolve_text(texts, lang)
+
+    acquired = cache.add(_TRANSLATION_REBUILD_LOCK_KEY, True, timeout=_TRANSLATION_REBUILD_LOCK_TIMEOUT)
+    deadline = time.monotonic() + _TRANSLATION_REBUILD_WAIT
+    while acquired is False and time.monotonic() < deadline:
+        time.sleep(_TRANSLATION_REBUILD_POLL_INTERVAL)
+        acquired = cache.add(_TRANSLATION_REBUILD_LOCK_KEY, True, timeout=_TRANSLATION_REBUILD_LOCK_TIMEOUT)
+
+    if acquired is False:
+        # Someone has held the lock too long to wait on. Dropping the affected
+        # languages is always safe; the next read rebuilds them.
+        _invalidate_translation_languages(list(changes))
+        return
+
+    try:
+        versions = cache.get_many([_translation_version_key(lang) for lang in changes])
+        for lang, label_changes in changes.items():
+            version = versions.get(_translation_version_key(lang))
+            if version is None:
+                # Nothing cached to patch; the next read rebuilds it anyway.
+                continue
+
+            local = _local_translation_data.get(lang)
+            if local is not None and local[0] == version:
+                current = local[1]
+            else:
+                current = cache.get(_translation_cache_key(lang))
+                if current is None:
+                    # The dict was evicted but its version survived, so other
+                    # processes would keep serving their old copies.
+                    _invalidate_translation_languages([lang])
+                    continue
+
+            # Patch a copy: the in-process dict may still be referenced by a
+            # response that is being rendered.
+            patched = dict(current)
+            for label, text in label_changes.items():
+                if text is _REMOVED_LABEL:
+                    patched.pop(label, None)
+                else:
+                    patched[label] = text
+
+            # Keep the old version's timestamp: a patch adds these labels, not every
+            # change committed since, so deltas must still replay from the original build.
+            built_at = _translation_version_built_at(version)
+            if built_at is None:
+                _invalidate_translation_languages([lang])
+                continue
+            new_versions = _cache_translation_data({lang: patched}, built_at.timestamp())
+            _local_translation_data[lang] = (new_versions[lang], patched)
+    finally:
+        if acquired:
+            cache.delete(_TRANSLATION_REBUILD_LOCK_KEY)
+
+
+def _invalidate_translation_languages(langs: list[str]) -> None:
+    cache.delete_many(
+        [_translation_cache_key(lang) for lang in langs] + [_translation_version_key(lang) for lang in langs]
+    )
+    for lang in langs:
+        _local_translation_data.pop(lang, None)
+        _local_translation_bodies.pop(lang, None)
 
 
 class TranslationManager(TranslatableManager):
@@ -143,7 +480,7 @@ class TranslationManager(TranslatableManager):
             # Check if translation exists before creating
             if not parent.has_translation(lang):
                 parent.create_translation(lang, text="", edited=False)
-        _invalidate_translation_cache()
+        _schedule_translation_cache_patch(parent.label)
         return parent
 
     def edit_translation(self, label, lang, translation, manual=True):
@@ -155,7 +492,7 @@ class TranslationManager(TranslatableManager):
         parent.text = translation
         parent.edited = manual
         parent.save()
-        _invalidate_translation_cache()
+        _schedule_translation_cache_patch(parent.label, lang)
         return parent
 
     def edit_translation_by_id(self, id, lang, translation, manual=True):
@@ -167,65 +504,26 @@ class TranslationManager(TranslatableManager):
         parent.text = translation
         parent.edited = manual
         parent.save()
-        _invalidate_translation_cache()
+        _schedule_translation_cache_patch(parent.label, lang)
         return parent
 
     def all_translations(self, langs=all_langs):
         return _get_translation_data(langs)
 
-    def export_translations(self):
-        all_langs = settings.PARLER_LANGUAGES[None]
-        translations = self.prefetch_related("translations")
-
-        translations_export = {"translations": {}, "model_data": {}}
-        for translation in translations:
-            related_instances = translation.get_reverse_instances()
+    def versioned_translations(self, langs=all_langs):
+        return _get_versioned_translation_data(langs)
 
-            for relationship in related_instances:
-                instance = relationship.instance
-
-                if instance.external_name is None:
-                    continue
+    def translation_delta(self, lang, since):
+        return _get_translation_delta(lang, since)
 
-                field_name = relationship.field_name
-                TranslationExportBuilder: type[ModelDataController] = getattr(
-                    instance, "TranslationExportBuilder", ModelDataController
-                )
+    def encoded_translations(self, lang, encoding):
+        return _get_encoded_translation_body(lang, encoding)
 
-                export_builder = TranslationExportBuilder(instance)
-
-                model_data = translations_export["model_data"]
-                model_name = export_builder.model_name
-                if model_name not in model_data:
-                    model_data[model_name] = {
-                        "meta_data": {"dependencies": TranslationExportBuilder.dependencies, "name": model_name},
-                        "instance_data": {},
-                    }
-                instance_data = model_data[model_name]["instance_data"]
-
-                if export_builder.external_name not in instance_data:
-                    instance_data[export_builder.external_name] = {
-                        "data": export_builder.to_model_data(),
-                        "labels": {},
-                        "external_name": export_builder.external_name,
-                    }
-
-                instance_data[export_builder.external_name]["labels"][field_name] = translation.label
-
-            translations_export["translations"][translation.label] = {
-                "langs": {},
-                "no_auto": translation.no_auto,
-                "active": translation.active,
-            }
-
-            for lang in all_langs:
-                translation.set_current_language(lang["code"])
-                translations_export["translations"][translation.label]["langs"][lang["code"]] = (
-                    translation.text,
-                    translation.edited,
-                )
+    def export_translations(self):
+        # Deferred: the bulk export module imports this one.
+        from translations.bulk_export_translations import build_translation_export
 
-        return translations_export
+        return build_translation_export()
 
 
 class CustomHistoricalRecords(HistoricalRecords):
@@ -256,8 +554,9 @@ class Translation(TranslatableModel):
     objects = TranslationManager()
 
     def delete(self, *args, **kwargs):
+        label = self.label
         result = super().delete(*args, **kwargs)
-        _invalidate_translation_cache()
+        _schedule_translation_cache_patch(label)
         return result
 
     def save(self, *args, **kwargs):
@@ -268,9 +567,12 @@ class Translation(TranslatableModel):
         is_new = self.pk is None
 
         old_translations = {}
+        old_label = None
         if not is_new:
             try:
                 old_instance = Translation.objects.get(pk=self.pk)
+                if old_instance.label != self.label or old_instance.active != self.active:
+                    old_label = old_instance.label
                 for lang_code, _ in settings.LANGUAGES:
                     if old_instance.has_translation(lang_code):
                         old_text = old_instance.safe_translation_getter(
@@ -294,6 +596,12 @@ class Translation(TranslatableModel):
 
         super().save(*args, **kwargs)
 
+        # Text edits go through the manager, which patches just that language. A
+        # rename or (de)activation moves the label in or out of every language.
+        if old_label is not None:
+            _schedule_translation_cache_patch(old_label)
+            _schedule_translation_cache_patch(self.label)
+
         for lang_code, _ in settings.LANGUAGES:
             try:
                 self.set_current_language(lang_code)
@@ -387,3 +695,55 @@ class Translation(TranslatableModel):
 
     def __str__(self):
         return self.label
+
+
+class TranslationMemory(models.Model):
+    """
+    Machine translations already paid for, one row per source paragraph and target
+    language. Translate.bulk_translate checks here before calling Google, so the same
+    sentence shared by many labels (or re-translated for a new white label) is only
+    ever sent once per language.
+    """
+
+    source_hash = models.CharField(max_length=64)
+    language = models.CharField(max_length=16)
+    source_text = models.TextField()
+    translated_text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source_hash", "language"], name="translation_memory_unique_source_lang"),
+        ]
+
+    def __str__(self):
+        return f"{self.language}: {self.source_text[:50]}"
+
+    @staticmethod
+    def hash_source(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ReadabilityScore(models.Model):
+    """
+    Readability metrics already computed for a text, so check_readability only
+    analyzes texts that changed. Keyed by analyzer version as well as text and
+    language: scores from a different metric set or textstat release are ignored.
+    """
+
+    text_hash = models.CharField(max_length=64)
+    language = models.CharField(max_length=16)
+    analyzer_version = models.CharField(max_length=64)
+    scores = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["text_hash", "language", "analyzer_version"], name="readability_score_unique_text_lang_version"
+            ),
+        ]
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
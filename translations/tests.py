@@ -7,11 +7,18 @@ entry per language rather than a single ~15MB blob, so both properties are pinne
 here.
 """
 
+import gzip
+import json
+import threading
+from datetime import timedelta
 from unittest.mock import patch
 
+import brotli
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection, transaction
 from django.test import TestCase, override_settings
+from django.utils import timezone
 from parler import appsettings as parler_appsettings
 from rest_framework.permissions import AllowAny
 from rest_framework.test import APIRequestFactory
@@ -27,6 +34,7 @@ from translations.models import (
     _invalidate_translation_cache,
     _translation_cache_key,
     _translation_cache_timeout,
+    _translation_version_key,
 )
 from translations.views import TranslationView
 
@@ -111,7 +119,7 @@ class TestTranslationCache(TestCase):
 
     def test_cache_key_is_versioned(self):
         """A format change must not be read back as the old shape."""
-        self.assertIn("v2", _translation_cache_key(DEFAULT_LANG))
+        self.assertIn("v3", _translation_cache_key(DEFAULT_LANG))
         self.assertIn(DEFAULT_LANG, _translation_cache_key(DEFAULT_LANG))
 
     def test_served_from_cache_without_further_queries(self):
@@ -138,11 +146,12 @@ class TestTranslationCache(TestCase):
             with self.subTest(lang=lang):
                 self.assertIsNone(cache.get(_translation_cache_key(lang)))
 
-    def test_edit_translation_is_reflected_after_invalidation(self):
+    def test_edit_translation_is_reflected_after_commit(self):
         self._make("greeting", {DEFAULT_LANG: "Hello"})
         self.assertEqual(_get_translation_data([DEFAULT_LANG])[DEFAULT_LANG]["greeting"], "Hello")
 
-        Translation.objects.edit_translation("greeting", DEFAULT_LANG, "Howdy")
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", DEFAULT_LANG, "Howdy")
 
         self.assertEqual(_get_translation_data([DEFAULT_LANG])[DEFAULT_LANG]["greeting"], "Howdy")
 
@@ -196,6 +205,222 @@ class TestTranslationCache(TestCase):
         self.assertGreater(old_path.call_count, 0)
 
 
+@override_settings(CACHES=LOCAL_CACHE)
+class TestInProcessTranslationTier(TestCase):
+    """Each process keeps the dicts it has served and checks only a version stamp.
+
+    Pulling a language's ~1MB payload out of Redis on every request was the cost here;
+    a warm request should now move a few bytes per language.
+    """
+
+    def setUp(self):
+        cache.clear()
+        parent = Translation.objects.create(label="greeting", active=True)
+        for lang in (DEFAULT_LANG, "es"):
+            parent.create_translation(lang, text=f"Hello-{lang}", edited=True)
+        _invalidate_translation_cache()
+
+    def test_warm_read_fetches_only_version_stamps(self):
+        _get_translation_data([DEFAULT_LANG])
+
+        with patch.object(translation_models, "cache", wraps=cache) as spy:
+            data = _get_translation_data([DEFAULT_LANG])
+
+        self.assertEqual(data[DEFAULT_LANG]["greeting"], f"Hello-{DEFAULT_LANG}")
+        spy.get_many.assert_called_once_with([_translation_version_key(DEFAULT_LANG)])
+        spy.get.assert_not_called()
+
+    def test_reloads_when_another_process_moves_the_version(self):
+        _get_translation_data([DEFAULT_LANG])
+
+        cache.set(_translation_cache_key(DEFAULT_LANG), {"greeting": "Howdy"})
+        cache.set(_translation_version_key(DEFAULT_LANG), "from-another-process")
+
+        self.assertEqual(_get_translation_data([DEFAULT_LANG])[DEFAULT_LANG]["greeting"], "Howdy")
+
+    def test_in_process_copy_is_dropped_when_the_shared_cache_is_cleared(self):
+        _get_translation_data([DEFAULT_LANG])
+        Translation.objects.filter(label="greeting").update(active=False)
+        cache.clear()
+
+        self.assertNotIn("greeting", _get_translation_data([DEFAULT_LANG])[DEFAULT_LANG])
+
+    def test_waits_for_the_lock_holder_instead_of_rebuilding(self):
+        cache.add(translation_models._TRANSLATION_REBUILD_LOCK_KEY, True)
+        # Nothing shared on the first look, then the holder's write lands.
+        reads = [{}, {"es": ("from-holder", {"greeting": "built elsewhere"})}]
+
+        with (
+            patch.object(translation_models, "_TRANSLATION_REBUILD_POLL_INTERVAL", 0),
+            patch.object(translation_models, "_read_shared_translation_data", side_effect=reads),
+            patch.object(translation_models, "_build_translation_data") as build,
+        ):
+            data = _get_translation_data(["es"])
+
+        build.assert_not_called()
+        self.assertEqual(data["es"]["greeting"], "built elsewhere")
+
+    def test_builds_itself_when_the_lock_holder_never_writes(self):
+        cache.add(translation_models._TRANSLATION_REBUILD_LOCK_KEY, True)
+
+        with patch.object(translation_models, "_TRANSLATION_REBUILD_WAIT", 0):
+            data = _get_translation_data(["es"])
+
+        self.assertEqual(data["es"]["greeting"], "Hello-es")
+
+    def test_rebuild_releases_the_lock(self):
+        _get_translation_data([DEFAULT_LANG])
+
+        self.assertIsNone(cache.get(translation_models._TRANSLATION_REBUILD_LOCK_KEY))
+
+    def test_failed_rebuild_releases_the_lock(self):
+        with patch.object(translation_models, "_build_translation_data", side_effect=Exception("statement timeout")):
+            with self.assertRaises(Exception):
+                _get_translation_data([DEFAULT_LANG])
+
+        self.assertIsNone(cache.get(translation_models._TRANSLATION_REBUILD_LOCK_KEY))
+
+
+class TestTranslationCachePatching(TestCase):
+    """Edits patch the changed labels into the cached dicts instead of dropping them.
+
+    Dropping every language on each admin edit sent the next request for each one
+    through a full rebuild.
+    """
+
+    def setUp(self):
+        cache.clear()
+        translation_models._pending_translation_patches().clear()
+        self.greeting = Translation.objects.create(label="greeting", active=True)
+        for lang, text in ((DEFAULT_LANG, "Hello"), ("es", "Hola")):
+            self.greeting.create_translation(lang, text=text, edited=True)
+        farewell = Translation.objects.create(label="farewell", active=True)
+        farewell.create_translation(DEFAULT_LANG, text="Bye", edited=True)
+        _invalidate_translation_cache()
+        _get_translation_data()
+
+    def _assert_served_without_rebuild(self, langs):
+        with patch.object(translation_models, "_build_translation_data") as build:
+            data = _get_translation_data(langs)
+        build.assert_not_called()
+        return data
+
+    def test_edit_patches_only_that_language(self):
+        fr_version = cache.get(_translation_version_key("fr"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", "es", "Buenas")
+
+        data = self._assert_served_without_rebuild(["es", "fr"])
+        self.assertEqual(data["es"]["greeting"], "Buenas")
+        self.assertEqual(data["es"]["farewell"], "Bye")
+        self.assertEqual(cache.get(_translation_version_key("fr")), fr_version)
+
+    def test_default_language_edit_reaches_languages_that_fall_back(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("farewell", DEFAULT_LANG, "Goodbye")
+
+        data = self._assert_served_without_rebuild([DEFAULT_LANG, "es"])
+        self.assertEqual(data[DEFAULT_LANG]["farewell"], "Goodbye")
+        self.assertEqual(data["es"]["farewell"], "Goodbye")
+
+    def test_default_language_edit_leaves_translated_languages_alone(self):
+        es_version = cache.get(_translation_version_key("es"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", DEFAULT_LANG, "Howdy")
+
+        self.assertEqual(cache.get(_translation_version_key("es")), es_version)
+
+    def test_new_label_is_added_to_every_language(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.add_translation("welcome", "Welcome")
+
+        data = self._assert_served_without_rebuild(_all_langs())
+        for lang in _all_langs():
+            with self.subTest(lang=lang):
+                self.assertIn("welcome", data[lang])
+
+    def test_deleted_label_is_removed_from_every_language(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.greeting.delete()
+
+        data = self._assert_served_without_rebuild([DEFAULT_LANG, "es"])
+        self.assertNotIn("greeting", data[DEFAULT_LANG])
+        self.assertNotIn("greeting", data["es"])
+
+    def test_deactivating_a_label_removes_it(self):
+        self.greeting.active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.greeting.save()
+
+        self.assertNotIn("greeting", self._assert_served_without_rebuild(["es"])["es"])
+
+    def test_nothing_changes_before_commit(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            Translation.objects.edit_translation("greeting", "es", "Buenas")
+
+        self.assertEqual(_get_translation_data(["es"])["es"]["greeting"], "Hola")
+
+    def test_edits_in_one_transaction_are_flushed_together(self):
+        flush = translation_models._patch_translation_cache
+        with patch.object(translation_models, "_patch_translation_cache", wraps=flush) as patch_cache:
+            with self.captureOnCommitCallbacks(execute=True):
+                Translation.objects.edit_translation("greeting", "es", "Buenas")
+                Translation.objects.edit_translation("farewell", "es", "Adios")
+
+        patch_cache.assert_called_once()
+        data = _get_translation_data(["es"])["es"]
+        self.assertEqual((data["greeting"], data["farewell"]), ("Buenas", "Adios"))
+
+    def test_a_commit_only_flushes_its_own_threads_labels(self):
+        def edit_and_roll_back():
+            try:
+                with transaction.atomic():
+                    translation_models._schedule_translation_cache_patch("farewell", "es")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            finally:
+                connection.close()
+
+        other_thread = threading.Thread(target=edit_and_roll_back)
+        other_thread.start()
+        other_thread.join()
+
+        with patch.object(translation_models, "_patch_translation_cache") as patch_cache:
+            with self.captureOnCommitCallbacks(execute=True):
+                Translation.objects.edit_translation("greeting", "es", "Buenas")
+
+        patch_cache.assert_called_once_with({"greeting": {"es"}})
+
+    def test_large_batches_fall_back_to_invalidation(self):
+        with patch.object(translation_models, "_TRANSLATION_PATCH_MAX_LABELS", 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                Translation.objects.edit_translation("greeting", "es", "Buenas")
+                Translation.objects.edit_translation("farewell", "es", "Adios")
+
+        self.assertIsNone(cache.get(_translation_version_key(DEFAULT_LANG)))
+        self.assertEqual(_get_translation_data(["es"])["es"]["farewell"], "Adios")
+
+    def test_other_processes_pick_up_the_patch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", "es", "Buenas")
+        translation_models._local_translation_data.clear()
+
+        self.assertEqual(self._assert_served_without_rebuild(["es"])["es"]["greeting"], "Buenas")
+
+    def test_busy_lock_drops_the_affected_languages(self):
+        cache.add(translation_models._TRANSLATION_REBUILD_LOCK_KEY, True)
+
+        with patch.object(translation_models, "_TRANSLATION_REBUILD_WAIT", 0):
+            with self.captureOnCommitCallbacks(execute=True):
+                Translation.objects.edit_translation("greeting", "es", "Buenas")
+
+        self.assertIsNone(cache.get(_translation_version_key("es")))
+        self.assertIsNotNone(cache.get(_translation_version_key("fr")))
+
+
 @override_settings(CACHES=LOCAL_CACHE)
 class TestTranslationViewErrorPath(TestCase):
     """The failure path must not make a bad situation worse.
@@ -226,11 +451,12 @@ class TestTranslationViewErrorPath(TestCase):
         response = self._get(DEFAULT_LANG)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.data[DEFAULT_LANG]["greeting"], f"Hello-{DEFAULT_LANG}")
+        self.assertEqual(json.loads(response.content)[DEFAULT_LANG]["greeting"], f"Hello-{DEFAULT_LANG}")
 
     def test_failed_rebuild_leaves_other_languages_warm(self):
         _get_translation_data()  # warm every language
-        cache.delete(_translation_cache_key("es"))  # simulate one LRU eviction
+        # simulate one LRU eviction; the version goes too, or the in-process copy serves "es"
+        cache.delete_many([_translation_cache_key("es"), _translation_version_key("es")])
         warm_before = self._warm_language_count()
 
         with patch.object(translation_models, "_build_translation_data", side_effect=Exception("statement timeout")):
@@ -262,3 +488,178 @@ class TestTranslationViewErrorPath(TestCase):
             response = self._get(DEFAULT_LANG)
 
         self.assertNotIn("traceback", response.data)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class TestTranslationConditionalAndDelta(TestCase):
+    """Returning visitors revalidate with an ETag or fetch only what changed."""
+
+    def setUp(self):
+        cache.clear()
+        translation_models._pending_translation_patches().clear()
+        for label, text in (("greeting", "Hello"), ("farewell", "Bye")):
+            parent = Translation.objects.create(label=label, active=True)
+            parent.create_translation(DEFAULT_LANG, text=text, edited=True)
+        # Outside the overlap window a delta replays, as fixtures would be in practice.
+        Translation.history.update(history_date=timezone.now() - timedelta(hours=1))
+        _invalidate_translation_cache()
+
+    def _get(self, params, **headers):
+        view = TranslationView.as_view(permission_classes=[AllowAny])
+        return view(APIRequestFactory().get("/api/translations/", params, **headers))
+
+    def _version(self):
+        return self._get({"lang": DEFAULT_LANG})["X-Translations-Version"]
+
+    def test_response_carries_version_and_etag(self):
+        response = self._get({"lang": DEFAULT_LANG})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{response["X-Translations-Version"]}"')
+
+    def test_matching_if_none_match_returns_304(self):
+        etag = self._get({"lang": DEFAULT_LANG})["ETag"]
+
+        response = self._get({"lang": DEFAULT_LANG}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_all_languages_etag_changes_when_one_language_does(self):
+        etag = self._get({})["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", "es", "Hola")
+
+        self.assertEqual(self._get({}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_since_returns_only_changed_labels(self):
+        since = self._version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", DEFAULT_LANG, "Howdy")
+
+        response = self._get({"lang": DEFAULT_LANG, "since": since})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["full"])
+        self.assertEqual(response.data["translations"], {"greeting": "Howdy"})
+        self.assertEqual(response.data["removed"], [])
+        self.assertNotEqual(response.data["version"], since)
+
+    def test_since_reports_deleted_labels(self):
+        since = self._version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.get(label="farewell").delete()
+
+        self.assertEqual(self._get({"lang": DEFAULT_LANG, "since": since}).data["removed"], ["farewell"])
+
+    def test_since_reports_the_old_label_of_a_rename(self):
+        since = self._version()
+
+        translation = Translation.objects.get(label="farewell")
+        translation.label = "goodbye"
+        with self.captureOnCommitCallbacks(execute=True):
+            translation.save()
+
+        data = self._get({"lang": DEFAULT_LANG, "since": since}).data
+        self.assertEqual(data["translations"], {"goodbye": "Bye"})
+        self.assertEqual(data["removed"], ["farewell"])
+
+    def test_since_current_version_is_empty_without_queries(self):
+        since = self._version()
+
+        with self.assertNumQueries(0):
+            delta = Translation.objects.translation_delta(DEFAULT_LANG, since)
+
+        self.assertEqual((delta.changed, delta.removed), ({}, []))
+
+    def test_unusable_since_returns_full_dict(self):
+        for since in ("garbage", translation_models._new_translation_version(0)):
+            with self.subTest(since=since):
+                data = self._get({"lang": DEFAULT_LANG, "since": since}).data
+
+                self.assertTrue(data["full"])
+                self.assertEqual(set(data["translations"]), {"greeting", "farewell"})
+
+    def test_patch_keeps_the_build_time_of_the_version(self):
+        since = self._version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", DEFAULT_LANG, "Howdy")
+
+        new_version = self._version()
+        self.assertNotEqual(new_version, since)
+        self.assertEqual(
+            translation_models._translation_version_built_at(new_version),
+            translation_models._translation_version_built_at(since),
+        )
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class TestPreEncodedTranslationResponse(TestCase):
+    """Single-language responses are encoded and compressed once per version."""
+
+    def setUp(self):
+        cache.clear()
+        parent = Translation.objects.create(label="greeting", active=True)
+        parent.create_translation(DEFAULT_LANG, text="Hello", edited=True)
+        parent.create_translation("es", text="Hola é", edited=True)
+        _invalidate_translation_cache()
+
+    def _get(self, lang, **headers):
+        view = TranslationView.as_view(permission_classes=[AllowAny])
+        return view(APIRequestFactory().get("/api/translations/", {"lang": lang}, **headers))
+
+    def test_serves_brotli_when_accepted(self):
+        response = self._get("es", HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(brotli.decompress(response.content)), {"es": {"greeting": "Hola é"}})
+
+    def test_serves_gzip_when_brotli_is_not_accepted(self):
+        response = self._get("es", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.content)), {"es": {"greeting": "Hola é"}})
+
+    def test_uncompressed_body_matches_what_drf_rendered(self):
+        response = self._get("es")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(json.loads(response.content), Translation.objects.all_translations(["es"]))
+
+    def test_warm_request_does_not_re_encode(self):
+        self._get("es", HTTP_ACCEPT_ENCODING="br")
+
+        with patch.object(translation_models, "compress") as compress:
+            response = self._get("es", HTTP_ACCEPT_ENCODING="br")
+
+        compress.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_version_is_re_encoded(self):
+        self._get("es", HTTP_ACCEPT_ENCODING="br")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.edit_translation("greeting", "es", "Buenas")
+
+        response = self._get("es", HTTP_ACCEPT_ENCODING="br")
+        self.assertEqual(json.loads(brotli.decompress(response.content))["es"]["greeting"], "Buenas")
+        self.assertEqual(response["ETag"], f'"{response["X-Translations-Version"]}-br"')
+
+    def test_each_encoding_has_its_own_etag(self):
+        etags = {self._get("es", HTTP_ACCEPT_ENCODING=encoding)["ETag"] for encoding in ("br", "gzip", "")}
+
+        self.assertEqual(len(etags), 3)
+
+    def test_304_for_an_etag_of_another_encoding(self):
+        etag = self._get("es", HTTP_ACCEPT_ENCODING="br")["ETag"]
+
+        response = self._get("es", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], f'"{response["X-Translations-Version"]}-gzip"')
+        self.assertIn("Accept-Encoding", response["Vary"])
@@ -2,6 +2,14 @@ from django.core.paginator import Paginator
 from django.shortcuts import render
 from django.conf import settings
 from authentication.models import User
+from benefits.compression import (
+    IDENTITY,
+    encoded_etag,
+    encoded_json_response,
+    etag_matches,
+    negotiate_encoding,
+    not_modified_response,
+)
 from screener.models import WhiteLabel
 from .models import Translation, HistoricalTranslation
 from simple_history.utils import update_change_reason
@@ -12,11 +20,14 @@ from django.http import (
     HttpResponseBadRequest,
     HttpResponse,
     HttpResponseNotFound,
+    HttpResponseNotModified,
     HttpResponseRedirect,
 )
+from django.utils.cache import patch_cache_control
 from django.db.models import ProtectedError
 from django.db import models
 from sentry_sdk import capture_exception
+import hashlib
 import traceback
 from programs.models import (
     County,
@@ -39,17 +50,52 @@ from django.urls import path
 
 
 class TranslationView(views.APIView):
+    """Label map for one language (?lang=) or all of them.
+
+    Responses carry an ETag built from the per-language version stamps, with the
+    encoding added for a compressed body, so a client holding the current copy gets
+    a 304. With ?lang= and ?since=<version> (the version from the
+    X-Translations-Version header), only the labels changed since that version are
+    returned; a since that can't be replayed gets the full dict with "full": true.
+    """
+
     def get(self, request):
         language = request.query_params.get("lang")
+        since = request.query_params.get("since")
         all_langs = [lang["code"] for lang in settings.PARLER_LANGUAGES[None]]
 
         try:
             if language in all_langs:
-                translations = Translation.objects.all_translations([language])
+                versioned = Translation.objects.versioned_translations([language])
+                version = versioned[language][0]
+                etag = f'"{version}"'
+            else:
+                versioned = Translation.objects.versioned_translations()
+                version = None
+                digest = hashlib.sha256("|".join(v for v, _ in versioned.values()).encode()).hexdigest()
+                etag = f'"{digest[:32]}"'
+
+            # Only the full label map of one language is served pre-encoded.
+            encoded = version is not None and not since
+            encoding = negotiate_encoding(request.headers.get("Accept-Encoding")) if encoded else IDENTITY
+            if etag_matches(etag, request.headers.get("If-None-Match")):
+                response = not_modified_response() if encoded else HttpResponseNotModified()
+            elif version is not None and since:
+                response = Response(self._delta(language, since))
+            elif version is not None:
+                # Served pre-encoded, skipping DRF's renderer; the version is re-read
+                # alongside the body so the ETag always describes what is sent.
+                version, body = Translation.objects.encoded_translations(language, encoding)
+                etag = f'"{version}"'
+                response = encoded_json_response(body, encoding)
             else:
-                translations = Translation.objects.all_translations()
+                response = Response({lang: data for lang, (_, data) in versioned.items()})
 
-            return Response(translations)
+            response["ETag"] = encoded_etag(etag, encoding)
+            if version is not None:
+                response["X-Translations-Version"] = version
+            patch_cache_control(response, no_cache=True)
+            return response
         except Exception as error:
             # Deliberately neither retry the build nor invalidate here.
             #
@@ -73,6 +119,15 @@ class TranslationView(views.APIView):
 
             return Response(error_response, status=503)
 
+    @staticmethod
+    def _delta(language, since):
+        delta = Translation.objects.translation_delta(language, since)
+        if delta is None:
+            version, data = Translation.objects.versioned_translations([language])[language]
+            return {"version": version, "full": True, "translations": data, "removed": []}
+
+        return {"version": delta.version, "full": False, "translations": delta.changed, "removed": delta.removed}
+
 
 class NewTranslationForm(forms.Form):
     label = forms.CharField(max_length=128, widget=forms.TextInput(attrs={"class": "input"}))
@@ -0,0 +1,107 @@
+"""
+Which programs a code change can move, for `validate --changed-since`.
+
+A calculator's results depend on the files its class hierarchy is defined in, the
+files of the PolicyEngine inputs and outputs it declares, and the results of any
+program it gates on (found by looking for other programs' codes in its source). A
+changed file outside all of those but still in eligibility code (the views, the PE
+client, the payload builder...) can move anything, so it selects every program.
+"""
+
+import inspect
+import re
+import subprocess
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+# Changes here that aren't part of a calculator's own files select every program.
+ELIGIBILITY_CODE = ("programs/", "screener/", "integrations/clients/policyengine/")
+
+_QUOTED = re.compile(r"[\"']([a-z0-9_]+)[\"']")
+
+
+def _calculators() -> dict[str, type]:
+    # Deferred: both registries import every calculator.
+    from integrations.clients.policyengine.registry import all_calculators
+    from programs.programs import calculators
+
+    return {**calculators, **all_calculators}
+
+
+def _repo_path(obj) -> Optional[str]:
+    try:
+        path = Path(inspect.getsourcefile(obj)).resolve()
+    except (TypeError, OSError):
+        return None
+    if not path.is_relative_to(settings.BASE_DIR):
+        return None
+    return path.relative_to(settings.BASE_DIR).as_posix()
+
+
+def _own_classes(Calculator: type) -> list[type]:
+    return [cls for cls in Calculator.__mro__ if _repo_path(cls) is not None]
+
+
+def calculator_files(Calculator: type) -> set[str]:
+    """Repo files whose changes can change what `Calculator` returns."""
+    classes = _own_classes(Calculator)
+    for pe_class in [*getattr(Calculator, "pe_inputs", []), *getattr(Calculator, "pe_outputs", [])]:
+        classes.extend(_own_classes(pe_class))
+
+    return {_repo_path(cls) for cls in classes}
+
+
+def upstream_programs(Calculator: type, codes: Iterable[str]) -> set[str]:
+    """Programs among `codes` that `Calculator` reads the results of."""
+    source = "\n".join(inspect.getsource(cls) for cls in _own_classes(Calculator))
+    return set(_QUOTED.findall(source)) & set(codes) - {Calculator.program_code}
+
+
+def changed_files(ref: str) -> list[str]:
+    """Files changed since `ref`, including uncommitted and untracked ones."""
+    commands = (
+        ["git", "diff", "--name-only", ref, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    )
+    files = []
+    for command in commands:
+        try:
+            result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise CommandError(f"Could not list changes since {ref}: {getattr(e, 'stderr', '') or e}")
+        files.extend(line for line in result.stdout.splitlines() if line)
+
+    return files
+
+
+def _is_eligibility_code(path: str) -> bool:
+    if not path.endswith(".py") or not path.startswith(ELIGIBILITY_CODE):
+        return False
+    name = path.rsplit("/", 1)[-1]
+    return not ("/tests/" in path or "/management/" in path or name.startswith("test_") or name == "tests.py")
+
+
+def affected_programs(files: Iterable[str]) -> Optional[set[str]]:
+    """Program codes whose results `files` can change, or None for all of them."""
+    calculators = _calculators()
+    programs_by_file: dict[str, set[str]] = {}
+    for code, Calculator in calculators.items():
+        for path in calculator_files(Calculator):
+            programs_by_file.setdefault(path, set()).add(code)
+
+    affected = set()
+    for path in filter(_is_eligibility_code, files):
+        if path not in programs_by_file:
+            return None
+        affected |= programs_by_file[path]
+
+    # Anything gating on an affected program is affected too.
+    upstream = {code: upstream_programs(Calculator, calculators) for code, Calculator in calculators.items()}
+    while True:
+        downstream = {code for code, reads in upstream.items() if reads & affected} - affected
+        if not downstream:
+            return affected
+        affected |= downstream
@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from programs.models import Program, ProgramCategory
+from screener.models import EligibilitySnapshot, Screen, WhiteLabel
+from validations.management.commands import validate
+from validations.management.commands._changed_programs import affected_programs
+from validations.models import Validation
+
+
+@patch.dict(os.environ, {"FRONTEND_DOMAIN": "https://example.org"})
+class ValidateCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.white_label = WhiteLabel.objects.create(name="Colorado", code="co", state_code="CO")
+        category = ProgramCategory.objects.new_program_category("co", "food", None)
+        for abbr in ("snap", "wic", "tanf"):
+            program = Program.objects.new_program("co", abbr, external_name=f"co_{abbr}")
+            program.category = category
+            program.active = True
+            program.save()
+
+    def setUp(self):
+        self.out = StringIO()
+        self.screens = [
+            Screen.objects.create(white_label=self.white_label, zipcode="80202", household_size=1, completed=True)
+            for _ in range(2)
+        ]
+        # Both screens: snap passes, wic fails on value. tanf isn't calculated, so skips.
+        for screen in self.screens:
+            Validation.objects.create(screen=screen, program_name="co_snap", eligible=True, value=Decimal("250"))
+            Validation.objects.create(screen=screen, program_name="co_wic", eligible=True, value=Decimal("40"))
+            Validation.objects.create(screen=screen, program_name="co_tanf", eligible=False, value=Decimal("0"))
+
+        def calculate(screen, programs, missing_dependencies, pe_version=None):
+            values = {"snap": 250.7, "wic": 55}
+            eligibility = {
+                program.name_abbreviated: SimpleNamespace(eligible=True, value=values[program.name_abbreviated])
+                for program in programs
+                if program.name_abbreviated in values
+            }
+            return list(programs), eligibility, False, {"request": None, "response": None}
+
+        patcher = patch.object(validate, "calculate_eligibility", side_effect=calculate)
+        self.calculate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        self.junit = os.path.join(output_dir.name, "validations.xml")
+        self.json = os.path.join(output_dir.name, "validations.json")
+
+    def _call(self, **kwargs):
+        options = {"workers": 1, "pe_rate": 1000, "junit": self.junit, "json": self.json}
+        options.update(kwargs)
+        call_command("validate", stdout=self.out, stderr=StringIO(), **options)
+        with open(self.json) as f:
+            return json.load(f)
+
+    def test_json_results(self):
+        report = self._call()
+
+        self.assertEqual((report["passed"], report["failed"], report["skipped"]), (2, 2, 2))
+        wic = [r for r in report["results"] if r["program_name"] == "co_wic"]
+        self.assertEqual({(r["expected_value"], r["value"], r["result"]) for r in wic}, {(40, 55, "Failed")})
+        self.assertTrue(wic[0]["url"].startswith("https://example.org/co/"))
+        self.assertEqual(self.calculate.call_count, 2)
+
+    def test_junit_results(self):
+        self._call()
+
+        suite = ElementTree.parse(self.junit).getroot().find("testsuite")
+        self.assertEqual(suite.get("name"), "co")
+        self.assertEqual((suite.get("tests"), suite.get("failures"), suite.get("skipped")), ("6", "2", "2"))
+        failure = suite.find("testcase[@classname='co.co_wic']/failure")
+        self.assertEqual(failure.get("message"), "value 40 => 55, eligible True => True")
+
+    def test_screen_error_fails_its_validations(self):
+        self.calculate.side_effect = KeyError("income")
+
+        report = self._call()
+
+        self.assertEqual((report["passed"], report["failed"], report["skipped"]), (0, 6, 0))
+        self.assertEqual(report["results"][0]["notes"], "Error: KeyError: 'income'")
+
+    def test_does_not_save_snapshots(self):
+        self._call()
+
+        self.assertFalse(EligibilitySnapshot.objects.exists())
+
+    @patch.object(validate, "changed_files", return_value=["programs/programs/co/snap.py"])
+    @patch.object(validate, "affected_programs", return_value={"snap"})
+    def test_changed_since_selects_affected_programs(self, affected, changed_files):
+        report = self._call(changed_since="origin/main")
+
+        changed_files.assert_called_once_with("origin/main")
+        self.assertEqual({r["program_name"] for r in report["results"]}, {"co_snap"})
+
+    @patch.object(validate, "changed_files", return_value=["screener/views.py"])
+    @patch.object(validate, "affected_programs", return_value=None)
+    def test_changed_since_shared_code_runs_everything(self, affected, changed_files):
+        report = self._call(changed_since="origin/main")
+
+        self.assertEqual(len(report["results"]), 6)
+
+
+class AffectedProgramsTest(TestCase):
+    def test_calculator_file_selects_its_program_and_programs_gating_on_it(self):
+        affected = affected_programs(["programs/programs/cross_white_label/medicaid/family_care/il.py"])
+
+        # il_aca_adults gates on il_family_care.
+        self.assertEqual(affected, {"il_family_care", "il_aca_adults"})
+
+    def test_shared_eligibility_code_selects_everything(self):
+        self.assertIsNone(affected_programs(["screener/views.py"]))
+
+    def test_tests_and_other_apps_select_nothing(self):
+        affected = affected_programs(
+            [
+                "programs/programs/cross_white_label/medicaid/family_care/tests/test_il.py",
+                "translations/models.py",
+                "docs/README.md",
+            ]
+        )
+
+        self.assertEqual(affected, set())
@@ -2,11 +2,16 @@ from datetime import datetime
 from enum import Enum
 from random import randint
 from typing import Optional
+from xml.etree import ElementTree
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from googleapiclient.errors import HttpError
+from integrations.clients.policyengine import engines as pe_engines
 from integrations.services.sheets.formatting import color_cell, title_cell, wrap_row
-from screener.views import eligibility_results
+from programs.models import Program
+from screener.batch import load_screen, run_screens
+from screener.views import calculate_eligibility, eligibility_programs
+from validations.management.commands._changed_programs import affected_programs, changed_files
 from validations.models import Validation
 from decouple import config
 from google_auth_httplib2 import AuthorizedHttp
@@ -14,8 +19,35 @@ from googleapiclient.discovery import build
 from google.oauth2 import service_account
 import argparse
 import json
+import math
+import os
+import time
 from httplib2 import Http
 
+# {external_name: (program id, eligible, estimated value)} for one screen.
+ScreenResults = dict[str, tuple[int, bool, int]]
+
+
+def validate_screen(screen_id: int) -> tuple[Optional[str], ScreenResults]:
+    """(error, results) for one screen. Calculates what eligibility_results would return,
+    without building the response or saving a snapshot."""
+    try:
+        screen = load_screen(screen_id)
+        _, programs = eligibility_programs(screen)
+        programs, eligibility, _, _ = calculate_eligibility(screen, programs, screen.missing_fields())
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", {}
+
+    return None, {
+        program.external_name: (
+            program.id,
+            eligibility[program.name_abbreviated].eligible,
+            math.trunc(eligibility[program.name_abbreviated].value),
+        )
+        for program in programs
+        if program.name_abbreviated in eligibility
+    }
+
 
 class Result(Enum):
     SKIPPED = "Skipped"
@@ -65,6 +97,20 @@ class ValidationResult:
     def format_value_change(self):
         return f"{self.expected_value} => {self.value}"
 
+    def to_dict(self):
+        return {
+            "url": self.format_url(),
+            "white_label": self.white_label,
+            "uuid": str(self.uuid),
+            "program_name": self.program_name,
+            "result": self.result.value,
+            "expected_value": self.expected_value,
+            "value": self.value,
+            "expected_eligibility": self.expected_eligibility,
+            "eligibility": self.eligibility,
+            "notes": self.notes,
+        }
+
     def sheets_cell(self, value, type="stringValue", is_link=False):
         return color_cell(value, self.COLORS[self.result], type=type, is_link=is_link)
 
@@ -102,6 +148,29 @@ class ValidationResults:
         self.skipped += 1
         self.results.append(ValidationResult(white_label, uuid, program_name, Result.SKIPPED, notes=notes))
 
+    def error(
+        self,
+        white_label: str,
+        uuid: str,
+        program_name: str,
+        expected_value: int,
+        expected_eligibility: bool,
+        error: str,
+    ):
+        """The screen couldn't be calculated, which fails every validation on it."""
+        self.failed += 1
+        self.results.append(
+            ValidationResult(
+                white_label,
+                uuid,
+                program_name,
+                Result.FAILED,
+                expected_value=expected_value,
+                expected_eligibility=expected_eligibility,
+                notes=f"Error: {error}",
+            )
+        )
+
     def test(
         self,
         white_label: str,
@@ -155,6 +224,30 @@ class Command(BaseCommand):
         )
         parser.add_argument("-s", "--sheet-id", help="The Google sheet id to display results in")
         parser.add_argument("-w", "--white-label", help="What white label to run validations for")
+        parser.add_argument(
+            "--changed-since",
+            metavar="REF",
+            help="Only validate programs whose calculators (or the programs they gate on) changed since this git ref",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes. 1 runs every screen in this process (default: CPU count)",
+        )
+        parser.add_argument(
+            "--pe-rate",
+            type=float,
+            default=5.0,
+            help="Maximum PolicyEngine requests per second across all workers (default: 5)",
+        )
+        parser.add_argument(
+            "--pe-cache",
+            metavar="DIR",
+            help="Reuse PolicyEngine responses stored here by earlier runs (pinned versions only)",
+        )
+        parser.add_argument("--junit", metavar="FILE", help="Write results as JUnit XML")
+        parser.add_argument("--json", metavar="FILE", help="Write results as JSON")
 
     def handle(self, *args, **options):
         queryset = Validation.objects.all()
@@ -165,7 +258,20 @@ class Command(BaseCommand):
         if options["program"] is not None:
             queryset = queryset.filter(program_name=options["program"])
 
-        validations = queryset.prefetch_related("screen").order_by("-created_date")
+        if options["changed_since"] is not None:
+            program_codes = affected_programs(changed_files(options["changed_since"]))
+            if program_codes is None:
+                self.stdout.write(
+                    f"Shared eligibility code changed since {options['changed_since']}, running everything"
+                )
+            else:
+                self.stdout.write(f"Programs changed since {options['changed_since']}: {len(program_codes)}")
+                external_names = Program.objects.filter(name_abbreviated__in=program_codes).values_list(
+                    "external_name", flat=True
+                )
+                queryset = queryset.filter(program_name__in=list(external_names))
+
+        validations = queryset.select_related("screen__white_label").order_by("-created_date")
 
         # group validations together based on screen
         grouped_validations: dict[int, list[Validation]] = {}
@@ -175,40 +281,65 @@ class Command(BaseCommand):
 
             grouped_validations[validation.screen.id].append(validation)
 
+        if options["pe_cache"] is not None:
+            pe_engines.set_response_cache(pe_engines.ResponseCache(options["pe_cache"]))
+
         validation_results = ValidationResults()
-        for group in grouped_validations.values():
-            screen = group[0].screen
-            white_label = screen.white_label.code
-            results = eligibility_results(screen, batch=True)[0]
-
-            for validation in group:
-                program = self._find_program(validation, results)
-
-                if program is None:
-                    validation_results.skip(white_label, screen.uuid, validation.program_name, validation.notes)
-                    continue
-
-                validation_results.test(
-                    white_label,
-                    screen.uuid,
-                    program["program_id"],
-                    validation.program_name,
-                    int(validation.value),
-                    program["estimated_value"],
-                    validation.eligible,
-                    program["eligible"],
-                    validation.notes,
-                )
+        start = time.monotonic()
+        try:
+            for screen_id, (error, results) in run_screens(
+                validate_screen, grouped_validations, options["workers"], options["pe_rate"]
+            ):
+                self._compare(validation_results, grouped_validations[screen_id], error, results)
+        finally:
+            pe_engines.set_response_cache(None)
+        seconds = time.monotonic() - start
         validation_results.results.sort(key=lambda r: r.white_label)
 
         self._stdout_display(validation_results, options["hide_skipped"])
+        self.stdout.write(f"Ran {len(grouped_validations)} screens in {seconds:.1f}s")
+        if options["junit"] is not None:
+            self._junit_display(validation_results, options["junit"], seconds)
+        if options["json"] is not None:
+            self._json_display(validation_results, options["json"], seconds)
         if options["sheet_id"] is not None:
             self._google_sheet_display(validation_results, options["sheet_id"], options["hide_skipped"])
 
-    def _find_program(self, validation: Validation, programs):
-        for program in programs:
-            if program["external_name"] == validation.program_name:
-                return program
+    def _compare(
+        self,
+        validation_results: ValidationResults,
+        group: list[Validation],
+        error: Optional[str],
+        results: ScreenResults,
+    ):
+        screen = group[0].screen
+        white_label = screen.white_label.code
+        for validation in group:
+            expected_value = int(validation.value)
+            if error is not None:
+                validation_results.error(
+                    white_label, screen.uuid, validation.program_name, expected_value, validation.eligible, error
+                )
+                continue
+
+            program = results.get(validation.program_name)
+
+            if program is None:
+                validation_results.skip(white_label, screen.uuid, validation.program_name, validation.notes)
+                continue
+
+            program_id, eligible, value = program
+            validation_results.test(
+                white_label,
+                screen.uuid,
+                program_id,
+                validation.program_name,
+                expected_value,
+                value,
+                validation.eligible,
+                eligible,
+                validation.notes,
+            )
 
     def _stdout_display(self, results: ValidationResults, hide_skipped: bool):
         for result in results.results:
@@ -232,6 +363,55 @@ class Command(BaseCommand):
         if not hide_skipped:
             self.stdout.write(f"Skipped: {results.skipped}")
 
+    def _junit_display(self, results: ValidationResults, path: str, seconds: float):
+        # One suite per white label, one case per validation, named by program and screen.
+        suites = ElementTree.Element("testsuites", name="validations", time=f"{seconds:.3f}")
+        by_white_label: dict[str, list[ValidationResult]] = {}
+        for result in results.results:
+            by_white_label.setdefault(result.white_label, []).append(result)
+
+        for white_label, white_label_results in by_white_label.items():
+            suite = ElementTree.SubElement(
+                suites,
+                "testsuite",
+                name=white_label,
+                tests=str(len(white_label_results)),
+                failures=str(sum(r.result == Result.FAILED for r in white_label_results)),
+                skipped=str(sum(r.result == Result.SKIPPED for r in white_label_results)),
+            )
+            for result in white_label_results:
+                case = ElementTree.SubElement(
+                    suite, "testcase", classname=f"{white_label}.{result.program_name}", name=str(result.uuid)
+                )
+                if result.result == Result.FAILED:
+                    failure = ElementTree.SubElement(
+                        case,
+                        "failure",
+                        message=(
+                            f"value {result.format_value_change()}, "
+                            f"eligible {result.expected_eligibility} => {result.eligibility}"
+                        ),
+                    )
+                    failure.text = "\n".join(text for text in (result.format_url(), result.notes) if text)
+                elif result.result == Result.SKIPPED:
+                    ElementTree.SubElement(case, "skipped", message=result.notes or "Program not in results")
+
+        ElementTree.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+    def _json_display(self, results: ValidationResults, path: str, seconds: float):
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "passed": results.passed,
+                    "failed": results.failed,
+                    "skipped": results.skipped,
+                    "seconds": round(seconds, 1),
+                    "results": [result.to_dict() for result in results.results],
+                },
+                f,
+                indent=2,
+            )
+
     def _google_sheet_display(self, results: ValidationResults, google_sheet_id: str, hide_skipped: bool):
         column_count = 9
         row_data = [